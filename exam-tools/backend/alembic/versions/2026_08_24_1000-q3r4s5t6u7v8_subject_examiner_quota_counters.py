@@ -0,0 +1,91 @@
+"""Add subject_examiner_quota_counters and backfill from the examiner roster.
+
+Revision ID: q3r4s5t6u7v8
+Revises: p2q3r4s5t6u7
+Create Date: 2026-08-24
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "q3r4s5t6u7v8"
+down_revision: str | Sequence[str] | None = "p2q3r4s5t6u7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_REGION_ENUM = postgresql.ENUM(
+    "ASHANTI",
+    "BONO",
+    "BONO_EAST",
+    "AHAFO",
+    "CENTRAL",
+    "EASTERN",
+    "GREATER_ACCRA",
+    "NORTHERN",
+    "NORTH_EAST",
+    "SAVANNAH",
+    "UPPER_EAST",
+    "UPPER_WEST",
+    "VOLTA",
+    "OTI",
+    "WESTERN",
+    "WESTERN_NORTH",
+    name="region",
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "subject_examiner_quota_counters",
+        sa.Column("examination_id", sa.Integer(), nullable=False),
+        sa.Column("subject_id", sa.Integer(), nullable=False),
+        sa.Column("region", _REGION_ENUM, nullable=False),
+        sa.Column("examiner_type", sa.String(length=64), nullable=False),
+        sa.Column("gender", sa.String(length=20), nullable=False),
+        sa.Column("examiner_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.CheckConstraint("examiner_count >= 0", name="ck_subject_examiner_quota_counters_nonneg"),
+        sa.ForeignKeyConstraint(["examination_id"], ["examinations.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["subject_id"], ["subjects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("examination_id", "subject_id", "region", "examiner_type", "gender"),
+    )
+
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO subject_examiner_quota_counters (
+                examination_id,
+                subject_id,
+                region,
+                examiner_type,
+                gender,
+                examiner_count,
+                updated_at
+            )
+            SELECT
+                e.examination_id,
+                es.subject_id,
+                e.region,
+                e.examiner_type,
+                CASE WHEN e.gender IN ('Male', 'Female') THEN e.gender ELSE '' END,
+                COUNT(*),
+                NOW()
+            FROM examiner_subjects es
+            JOIN examiners e ON e.id = es.examiner_id
+            GROUP BY
+                e.examination_id,
+                es.subject_id,
+                e.region,
+                e.examiner_type,
+                CASE WHEN e.gender IN ('Male', 'Female') THEN e.gender ELSE '' END
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("subject_examiner_quota_counters")
@@ -83,6 +83,33 @@ class Settings(BaseSettings):
     gcs_documents_prefix: str = "exam-tools/documents"
     # Object prefix for inspector attendance sheet blobs (separate from exam documents)
     gcs_attendance_sheets_prefix: str = "exam-tools/attendance-sheets"
+    # Object prefix for pre-rendered examiner appointment letter PDFs
+    gcs_appointment_letters_prefix: str = "exam-tools/appointment-letters"
+    # Object prefix for stored timetable PDFs (keyed by schedule version and scope)
+    gcs_timetable_pdfs_prefix: str = "exam-tools/timetable-pdfs"
+    # Worker processes used when batch-rendering appointment letters (env: APPOINTMENT_LETTER_RENDER_WORKERS)
+    appointment_letter_render_workers: int = Field(default=2, ge=1)
+    # Seconds a cached lunch-coupon code index is trusted before its version is re-checked
+    # (env: LUNCH_COUPON_INDEX_TTL_SECONDS; 0 = check on every scan)
+    lunch_coupon_index_ttl_seconds: int = Field(default=30, ge=0)
+    # Maximum queued scans accepted in one batch verification upload
+    lunch_coupon_batch_max_scans: int = Field(default=500, ge=1)
+    # Candidates upserted per INSERT ... ON CONFLICT statement during examination candidate import
+    # (env: CANDIDATE_IMPORT_CHUNK_SIZE)
+    candidate_import_chunk_size: int = Field(default=1000, ge=1)
+    # Timetable PDFs rendered concurrently by the pre-render job (env: TIMETABLE_PRERENDER_CONCURRENCY)
+    timetable_prerender_concurrency: int = Field(default=4, ge=1)
+    # Seconds the cached bank branch directory index is trusted before its version is re-checked
+    # (env: BANK_BRANCH_INDEX_TTL_SECONDS; 0 = check on every search)
+    bank_branch_index_ttl_seconds: int = Field(default=60, ge=0)
+    # Count SQL statements and DB time per request and aggregate them per route (env: QUERY_METRICS_ENABLED)
+    query_metrics_enabled: bool = True
+    # Add X-DB-Query-Count / X-DB-Time-Ms to every response (env: QUERY_METRICS_RESPONSE_HEADERS)
+    query_metrics_response_headers: bool = False
+    # A statement shape repeated more than this many times in one request is reported as N+1
+    query_metrics_repeat_threshold: int = Field(default=20, ge=1)
+    # Slowest statements kept per request and per route
+    query_metrics_slowest: int = Field(default=5, ge=1)
 
 
     # System-wide examination used for inspector sign-in (centre + phone + password + subject_scope → posting).
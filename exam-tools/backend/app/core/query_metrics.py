@@ -0,0 +1,203 @@
+"""Per-request SQL statement counts, DB time and N+1 detection.
+
+``install_query_metrics`` hooks an engine's cursor events. Statements run while a
+``track_queries()`` scope is active (the HTTP middleware opens one per request) are
+counted into that scope; the scope travels with the request through contextvars, which
+SQLAlchemy's async greenlets inherit. Finished request scopes are folded into per-route
+aggregates (``record_route_queries`` / ``query_metrics_snapshot``).
+
+Statements are grouped by shape: whitespace is collapsed and bind markers, literals and
+expanded IN lists are replaced by ``?``. A shape executed more than
+``query_metrics_repeat_threshold`` times in one request is reported as an N+1 pattern.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import heapq
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_SHAPE_MAX_LENGTH = 500
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize *statement* so executions differing only in values compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _BIND.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?)", shape)
+    return shape[:_SHAPE_MAX_LENGTH]
+
+
+@dataclass
+class QueryStats:
+    """Statements executed inside one ``track_queries()`` scope."""
+
+    count: int = 0
+    db_time_ms: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    # min-heap of (duration_ms, shape) holding the slowest statements
+    _slowest: list[tuple[float, str]] = field(default_factory=list, repr=False)
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        shape = statement_shape(statement)
+        self.count += 1
+        self.db_time_ms += duration_ms
+        self.shapes[shape] += 1
+        entry = (duration_ms, shape)
+        if len(self._slowest) < settings.query_metrics_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        return sorted(self._slowest, reverse=True)
+
+    def repeated_shapes(self, threshold: int | None = None) -> list[tuple[str, int]]:
+        """Shapes executed more than *threshold* times, most repeated first."""
+        limit = settings.query_metrics_repeat_threshold if threshold is None else threshold
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > limit]
+
+
+_current_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar(
+    "query_metrics_current_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements executed in this context (nested scopes shadow outer ones)."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn: Any, **_kw: Any) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, statement: str, **_kw: Any) -> None:
+    stats = _current_stats.get()
+    started = conn.info.get("query_metrics_started")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+def install_query_metrics(engine: Any) -> None:
+    """Attach the cursor hooks to an ``Engine`` or ``AsyncEngine`` (idempotent)."""
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute, named=True)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute, named=True)
+
+
+@contextmanager
+def assert_max_queries(limit: int, *, max_repeats: int | None = None) -> Iterator[QueryStats]:
+    """Test helper: fail when the block runs more than *limit* statements.
+
+    With ``max_repeats`` it also fails when any statement shape repeats more often than
+    that, which pins an endpoint against regressing into an N+1 loop.
+    """
+    with track_queries() as stats:
+        yield stats
+    problems: list[str] = []
+    if stats.count > limit:
+        problems.append(f"{stats.count} SQL statements executed (budget {limit})")
+    if max_repeats is not None:
+        problems.extend(f"{n}x {shape}" for shape, n in stats.repeated_shapes(max_repeats))
+    if problems:
+        top = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.most_common(5))
+        raise AssertionError("; ".join(problems[:3]) + f"\nMost executed:\n{top}")
+
+
+# --- Per-route aggregates -------------------------------------------------------------------
+
+
+@dataclass
+class RouteQueryMetrics:
+    route: str
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_time_ms: float = 0.0
+    max_db_time_ms: float = 0.0
+    n_plus_one_requests: int = 0
+    # shape -> highest per-request repeat count seen above the threshold
+    repeated_shapes: dict[str, int] = field(default_factory=dict)
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def add(self, stats: QueryStats) -> None:
+        self.requests += 1
+        self.queries += stats.count
+        self.max_queries = max(self.max_queries, stats.count)
+        self.db_time_ms += stats.db_time_ms
+        self.max_db_time_ms = max(self.max_db_time_ms, stats.db_time_ms)
+        repeated = stats.repeated_shapes()
+        if repeated:
+            self.n_plus_one_requests += 1
+            for shape, n in repeated:
+                self.repeated_shapes[shape] = max(self.repeated_shapes.get(shape, 0), n)
+        self.slowest = heapq.nlargest(settings.query_metrics_slowest, [*self.slowest, *stats.slowest])
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "route": self.route,
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0.0,
+            "max_queries": self.max_queries,
+            "db_time_ms": round(self.db_time_ms, 2),
+            "avg_db_time_ms": round(self.db_time_ms / self.requests, 2) if self.requests else 0.0,
+            "max_db_time_ms": round(self.max_db_time_ms, 2),
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "repeated_statements": [
+                {"statement": shape, "count": n}
+                for shape, n in sorted(self.repeated_shapes.items(), key=lambda item: -item[1])
+            ],
+            "slowest_statements": [
+                {"statement": shape, "duration_ms": round(ms, 2)} for ms, shape in self.slowest
+            ],
+        }
+
+
+_routes: dict[str, RouteQueryMetrics] = {}
+
+
+def record_route_queries(route: str, stats: QueryStats) -> None:
+    metrics = _routes.get(route)
+    if metrics is None:
+        metrics = _routes[route] = RouteQueryMetrics(route=route)
+    metrics.add(stats)
+
+
+def query_metrics_snapshot() -> list[dict[str, Any]]:
+    """Per-route aggregates since start-up (or the last reset), heaviest routes first."""
+    return [m.as_dict() for m in sorted(_routes.values(), key=lambda m: (-m.queries, m.route))]
+
+
+def reset_query_metrics() -> None:
+    _routes.clear()
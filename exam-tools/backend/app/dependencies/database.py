@@ -18,6 +18,9 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.pool import NullPool
 from sqlalchemy.types import JSON
 
+from app.config import settings
+from app.core.query_metrics import install_query_metrics
+
 try:
     from sqlalchemy.ext.asyncio import async_sessionmaker  # type: ignore[attr-defined]
 except ImportError:  # pragma: no cover
@@ -111,6 +114,8 @@ class DatabaseSessionManager:
             return  # Already configured
 
         self._engine = create_async_engine(self._host, **self._engine_kwargs)
+        if settings.query_metrics_enabled:
+            install_query_metrics(self._engine)
         self._sessionmaker: Any = async_sessionmaker(
             autocommit=False, bind=self._engine, expire_on_commit=False
         )
@@ -12,6 +12,7 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.types import ASGIApp
 
 from app.config import logging_settings, settings
+from app.core.query_metrics import record_route_queries, track_queries
 from app.dependencies.database import get_sessionmanager, initialize_db
 from app.initial_data import ensure_super_admin_user
 from app.routers import (
@@ -81,6 +82,7 @@ from app.routers import (
     test_admin_officers,
     executive_viewers,
 )
+from app.services.examiner_appointment_letter_batch import shutdown_letter_render_pool
 
 SENSITIVE_KEYS = {"password", "token", "authorization"}
 
@@ -157,7 +159,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     async with initialize_db(sessionmanager):
         async with sessionmanager.session() as session:
             await ensure_super_admin_user(session)
-        yield
+        try:
+            yield
+        finally:
+            shutdown_letter_render_pool()
 
 
 app = FastAPI(title="Certificate Examination Resource Management System", lifespan=lifespan)
@@ -211,6 +216,43 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             )
 
 
+class QueryMetricsMiddleware(BaseHTTPMiddleware):
+    """Count the SQL statements each request runs and fold them into per-route metrics."""
+
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        self.logger = logging.getLogger("http.queries")
+
+    async def dispatch(self, request: Request, call_next):
+        if not settings.query_metrics_enabled or request.url.path in {"/health", "/metrics"}:
+            return await call_next(request)
+
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        route = request.scope.get("route")
+        route_key = f"{request.method} {getattr(route, 'path', None) or 'unmatched'}"
+        record_route_queries(route_key, stats)
+
+        repeated = stats.repeated_shapes()
+        if repeated:
+            statement, count = repeated[0]
+            self.logger.warning(
+                "repeated SQL statement",
+                extra={
+                    "route": route_key,
+                    "query_count": stats.count,
+                    "repeat_count": count,
+                    "statement": statement,
+                },
+            )
+        if settings.query_metrics_response_headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.db_time_ms:.1f}"
+        return response
+
+
+app.add_middleware(QueryMetricsMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
 app.add_middleware(
@@ -219,7 +261,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-DB-Query-Count", "X-DB-Time-Ms"],
 )
 
 # Include routers
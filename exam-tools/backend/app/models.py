@@ -2060,6 +2060,28 @@ class SubjectExaminerQuotaSettings(Base):
     )
 
 
+class SubjectExaminerQuotaCounter(Base):
+    """Materialized roster headcount per subject, home region, role and gender bucket.
+
+    Maintained in the same transaction as roster changes; quota checks read these rows
+    instead of recounting examiners. ``gender`` is ``Male``, ``Female`` or ``""`` (other/unset).
+    """
+
+    __tablename__ = "subject_examiner_quota_counters"
+
+    examination_id = Column(Integer, ForeignKey("examinations.id", ondelete="CASCADE"), primary_key=True)
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), primary_key=True)
+    region = Column(Enum(Region, create_constraint=False), primary_key=True)
+    examiner_type = examiner_type_column(primary_key=True)
+    gender = Column(String(20), primary_key=True, default="")
+    examiner_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("examiner_count >= 0", name="ck_subject_examiner_quota_counters_nonneg"),
+    )
+
+
 class ExaminerAttendance(Base):
     """Per-day examiner attendance check-in for an examination (QR scan by reference code)."""
 
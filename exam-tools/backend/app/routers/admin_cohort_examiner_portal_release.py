@@ -17,11 +17,13 @@ from app.schemas.cohort_examiner_portal_release import (
     CohortExaminerPortalReleasePut,
     CohortExaminerPortalReleaseResponse,
     NotifyEligibleAppointmentLettersResponse,
+    RenderAppointmentLettersResponse,
 )
 from app.services.cohort_portal_release import (
     cohort_release_summary_fields,
     is_appointment_letter_available_for_examiner,
 )
+from app.services.examiner_appointment_letter_batch import prerender_subject_appointment_letters
 from app.services.sms.examiner_appointment_letter_release import notify_eligible_examiners_in_cohort
 from app.services.subject_marking_group import load_group
 
@@ -254,3 +256,39 @@ async def post_notify_eligible_appointment_letters(
     )
     await session.commit()
     return NotifyEligibleAppointmentLettersResponse(**result)
+
+
+@router.post(
+    "/render-appointment-letters",
+    response_model=RenderAppointmentLettersResponse,
+)
+async def post_render_cohort_appointment_letters(
+    examination_id: int,
+    subject_id: int,
+    group_id: UUID,
+    session: DBSessionDep,
+    _: SuperAdminOrTestAdminOfficerDep,
+) -> RenderAppointmentLettersResponse:
+    """Pre-render appointment letters for cohort members so portal downloads serve stored PDFs."""
+    await _load_group_or_404(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        group_id=group_id,
+    )
+    examiners = await _cohort_member_examiners(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        group_id=group_id,
+    )
+    try:
+        result = await prerender_subject_appointment_letters(
+            session,
+            examination_id=examination_id,
+            subject_id=subject_id,
+            examiner_ids=[examiner.id for examiner in examiners],
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return RenderAppointmentLettersResponse(**result)
@@ -20,8 +20,8 @@ from app.schemas.examiner_attendance_sheet import (
     ExaminerAttendanceSheetAdminSummaryResponse,
 )
 from app.services.admin_examiner_attendance_zip import (
-    build_examiner_attendance_sheets_zip_bytes,
     examiner_attendance_zip_download_filename,
+    stream_examiner_attendance_sheets_zip,
 )
 from app.services.exam_timetable_pdf import load_examination_or_raise
 from app.services.examiner_attendance_sheet_files import read_examiner_attendance_sheet_bytes
@@ -249,7 +249,7 @@ async def download_admin_examiner_attendance_sheets_zip(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No sheets match filters")
 
     try:
-        zip_bytes = build_examiner_attendance_sheets_zip_bytes(sheets)
+        zip_stream = stream_examiner_attendance_sheets_zip(sheets)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
 
@@ -264,7 +264,7 @@ async def download_admin_examiner_attendance_sheets_zip(
 
     filename = examiner_attendance_zip_download_filename(subject_code, cohort_name, attendance_date)
     return StreamingResponse(
-        iter([zip_bytes]),
+        zip_stream,
         media_type="application/zip",
         headers={"Content-Disposition": _content_disposition_attachment(filename)},
     )
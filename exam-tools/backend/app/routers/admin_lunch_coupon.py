@@ -13,6 +13,9 @@ from app.dependencies.auth import SuperAdminOrTestAdminOfficerDep
 from app.dependencies.database import DBSessionDep
 from app.models import Examination
 from app.schemas.lunch_coupon_verify import (
+    LunchCouponBatchScan,
+    LunchCouponBatchVerifyRequest,
+    LunchCouponBatchVerifyResponse,
     LunchCouponVerifiedListResponse,
     LunchCouponVerifiedRow,
     LunchCouponVerifyRequest,
@@ -20,10 +23,12 @@ from app.schemas.lunch_coupon_verify import (
 )
 from app.services.lunch_coupon_pdf import generate_lunch_coupons_pdf
 from app.services.lunch_coupon_verify import (
+    check_batch_scan_count,
     list_lunch_coupon_verifications,
     list_lunch_coupon_verifications_all,
+    lunch_coupon_batch_response,
     verify_and_record_lunch_coupon,
-    verify_and_record_lunch_coupon_scan,
+    verify_and_record_lunch_coupon_scans,
 )
 from app.services.subject_marking_group import load_group
 
@@ -110,11 +115,11 @@ async def post_admin_lunch_coupon_verify_scan(
     user: SuperAdminOrTestAdminOfficerDep,
 ) -> LunchCouponVerifyResponse:
     exam_ids = await _all_examination_ids(session)
-    result = await verify_and_record_lunch_coupon_scan(
+    [result] = await verify_and_record_lunch_coupon_scans(
         session,
         examination_ids=exam_ids,
         officer_subject_ids_by_exam=None,
-        reference_code=body.reference_code,
+        scans=[LunchCouponBatchScan(reference_code=body.reference_code)],
         verified_by_id=user.id,
     )
     if result.get("recorded"):
@@ -122,6 +127,27 @@ async def post_admin_lunch_coupon_verify_scan(
     return LunchCouponVerifyResponse(**result)
 
 
+@scan_router.post("/lunch-coupon/verify-scan/batch", response_model=LunchCouponBatchVerifyResponse)
+async def post_admin_lunch_coupon_verify_scan_batch(
+    body: LunchCouponBatchVerifyRequest,
+    session: DBSessionDep,
+    user: SuperAdminOrTestAdminOfficerDep,
+) -> LunchCouponBatchVerifyResponse:
+    check_batch_scan_count(len(body.scans))
+    exam_ids = await _all_examination_ids(session)
+    results = await verify_and_record_lunch_coupon_scans(
+        session,
+        examination_ids=exam_ids,
+        officer_subject_ids_by_exam=None,
+        scans=body.scans,
+        verified_by_id=user.id,
+    )
+    response = lunch_coupon_batch_response(results)
+    if response.recorded_count:
+        await session.commit()
+    return response
+
+
 @router.get("/{exam_id}/lunch-coupon/verified", response_model=LunchCouponVerifiedListResponse)
 async def get_admin_lunch_coupon_verified(
     exam_id: int,
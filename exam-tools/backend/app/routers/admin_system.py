@@ -1,12 +1,13 @@
-"""Admin-only system settings (active examination for staff)."""
+"""Admin-only system settings (active examination for staff) and per-route query metrics."""
 
 from fastapi import APIRouter, HTTPException, status
 
+from app.core.query_metrics import query_metrics_snapshot, reset_query_metrics
 from app.dependencies.auth import SuperAdminOrTestAdminOfficerDep
 from app.dependencies.database import DBSessionDep
 from app.models import Examination, SystemSettings
 from app.schemas.examination import ExaminationResponse
-from app.schemas.system_settings import ActiveExaminationAdminResponse, ActiveExaminationPut
+from app.schemas.system_settings import ActiveExaminationAdminResponse, ActiveExaminationPut, QueryMetricsRoute
 from app.services.active_examination import resolve_active_examination_id
 
 router = APIRouter(prefix="/admin/system", tags=["admin-system"])
@@ -71,3 +72,14 @@ async def put_active_examination_settings(
         resolved_examination_id=resolved_id,
         examination=ExaminationResponse.model_validate(exam),
     )
+
+
+@router.get("/query-metrics", response_model=list[QueryMetricsRoute])
+async def get_query_metrics(_: SuperAdminOrTestAdminOfficerDep) -> list[QueryMetricsRoute]:
+    """SQL statements per route in this worker process, routes issuing the most statements first."""
+    return [QueryMetricsRoute.model_validate(row) for row in query_metrics_snapshot()]
+
+
+@router.delete("/query-metrics", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_query_metrics(_: SuperAdminOrTestAdminOfficerDep) -> None:
+    reset_query_metrics()
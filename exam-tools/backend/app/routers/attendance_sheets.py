@@ -7,7 +7,7 @@ from urllib.parse import quote
 from uuid import UUID
 
 from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, status
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, or_, select
 from sqlalchemy.orm import contains_eager, joinedload
 
@@ -42,7 +42,7 @@ from app.services.admin_attendance_compliance import (
 )
 from app.services.admin_attendance_zip import (
     attendance_zip_download_filename,
-    build_attendance_sheets_zip_bytes,
+    stream_attendance_sheets_zip,
 )
 from app.services.attendance_sheet_files import (
     AttendanceSheetUploadError,
@@ -640,7 +640,7 @@ async def download_admin_attendance_sheets_zip(
     examination_date: date | None = Query(default=None),
     inspector_user_id: UUID | None = Query(default=None),
     q: str | None = Query(None, description="Search centre code/name or inspector name"),
-) -> Response:
+) -> StreamingResponse:
     try:
         await load_examination_or_raise(session, examination_id)
     except ValueError:
@@ -709,12 +709,7 @@ async def download_admin_attendance_sheets_zip(
 
     center = sheets[0].examination_centre
     try:
-        payload = build_attendance_sheets_zip_bytes(sheets)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File missing on server",
-        ) from None
+        payload = stream_attendance_sheets_zip(sheets)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
 
@@ -723,8 +718,8 @@ async def download_admin_attendance_sheets_zip(
         str(center.name) if center else "",
         examination_date,
     )
-    return Response(
-        content=payload,
+    return StreamingResponse(
+        payload,
         media_type="application/zip",
         headers={"Content-Disposition": _content_disposition_attachment(zip_name)},
     )
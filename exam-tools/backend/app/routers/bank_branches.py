@@ -24,6 +24,7 @@ from app.services.school_bulk_upload import (
     validate_bank_branch_required_columns,
 )
 
+from app.services.bank_branch_index import invalidate_bank_branch_index
 from app.services.bank_branch_query import (
     DEFAULT_LIMIT,
     MAX_LIST,
@@ -125,6 +126,7 @@ async def bulk_upload_bank_branches(
             updated += 1
 
     await session.commit()
+    invalidate_bank_branch_index()
 
     total_rows = len(df)
     successful = created + updated
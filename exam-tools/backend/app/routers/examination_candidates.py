@@ -15,10 +15,12 @@ from app.models import Examination, ExaminationCandidate, Region, School, Zone
 from app.routers.examinations import _get_exam_or_404
 from app.schemas.examination_candidates import (
     ExaminationCandidateListResponse,
+    ExaminationCandidateImportJobResponse,
     ExaminationCandidateImportResponse,
     ExaminationCandidateResponse,
 )
 from app.services.examination_candidate_import import import_candidates_dataframe, parse_candidates_file
+from app.services.examination_candidate_import_jobs import get_candidate_import_job, start_candidate_import_job
 
 router = APIRouter(prefix="/examinations", tags=["examinations"])
 
@@ -167,3 +169,41 @@ async def import_examination_candidates(
         failed=failed,
         errors=errors,
     )
+
+
+@router.post(
+    "/{exam_id}/candidates/import/jobs",
+    response_model=ExaminationCandidateImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_examination_candidates_import_job(
+    exam_id: int,
+    session: DBSessionDep,
+    _: SuperAdminDep,
+    file: UploadFile = File(...),
+) -> ExaminationCandidateImportJobResponse:
+    """Import a large candidate file in the background; poll the job for progress and errors."""
+    await _get_exam_or_404(session, exam_id)
+    raw = await file.read()
+    try:
+        df = parse_candidates_file(raw, file.filename or "unknown")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    job = start_candidate_import_job(exam_id, df)
+    return ExaminationCandidateImportJobResponse.model_validate(job)
+
+
+@router.get(
+    "/{exam_id}/candidates/import/jobs/{job_id}",
+    response_model=ExaminationCandidateImportJobResponse,
+)
+async def get_examination_candidates_import_job(
+    exam_id: int,
+    job_id: UUID,
+    _: SuperAdminDep,
+) -> ExaminationCandidateImportJobResponse:
+    job = get_candidate_import_job(job_id)
+    if job is None or job.examination_id != exam_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return ExaminationCandidateImportJobResponse.model_validate(job)
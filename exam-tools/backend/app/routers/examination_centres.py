@@ -42,6 +42,7 @@ from app.services.examination_centre_bulk_upload import (
 from app.services.template_generator import generate_examination_centres_bulk_template
 from app.schemas.school import PostedInspectorAtCentreRow
 from app.schemas.timetable import TimetableDownloadFilter
+from app.services.centre_resolution_index import invalidate_centre_resolution_index
 from app.services.centre_resolution import (
     get_examination_centre_or_404,
     hosted_school_count,
@@ -186,9 +187,11 @@ async def bulk_upload_examination_centres(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
     try:
-        return await apply_centre_bulk_upload(session, examination_id, subject_scope, df)
+        result = await apply_centre_bulk_upload(session, examination_id, subject_scope, df)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    invalidate_centre_resolution_index(examination_id)
+    return result
 
 
 @router.post(
@@ -344,6 +347,7 @@ async def delete_examination_centre(
     centre = await get_examination_centre_or_404(session, examination_id, centre_id)
     await session.delete(centre)
     await session.commit()
+    invalidate_centre_resolution_index(examination_id)
 
 
 @router.put(
@@ -418,6 +422,7 @@ async def set_centre_memberships(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Membership conflict (school may already belong to another centre for this scope)",
         ) from None
+    invalidate_centre_resolution_index(examination_id)
 
     return await get_examination_centre_detail(examination_id, centre_id, session, _admin)
 
@@ -433,6 +438,7 @@ async def upgrade_centres_to_split(
 ) -> UpgradeToSplitResponse:
     created, removed = await upgrade_examination_to_split(session, examination_id)
     await session.commit()
+    invalidate_centre_resolution_index(examination_id)
     return UpgradeToSplitResponse(
         examination_id=examination_id,
         centre_structure_mode=CentreStructureMode.SPLIT,
@@ -457,6 +463,7 @@ async def clone_centres(
         source_examination_id=source_examination_id,
     )
     await session.commit()
+    invalidate_centre_resolution_index(examination_id)
     if count == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
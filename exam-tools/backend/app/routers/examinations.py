@@ -1,17 +1,15 @@
 """Examination and schedule CRUD; timetable download (admin + school-scoped)."""
 
 import logging
-import math
 from collections import defaultdict
 from datetime import date, datetime, time
 from uuid import UUID
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, File, HTTPException, Query, Response, UploadFile, status
+from fastapi import APIRouter, File, Header, HTTPException, Query, Response, UploadFile, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy import asc, delete, func, or_, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
 
 from app.config import settings
 from app.dependencies.auth import (
@@ -88,6 +86,7 @@ from app.schemas.examination import (
     NationalExecutiveOverviewResponse,
     StaffDepotOverviewResponse,
     TimetableEntry,
+    TimetablePrerenderJobResponse,
     TimetablePreviewResponse,
 )
 from app.schemas.inspector_posting import MyInspectorPostingRow, MyInspectorPostingsResponse
@@ -96,10 +95,9 @@ from app.services.active_examination import (
     require_active_inspector_examination_id,
     resolve_active_examination_id,
 )
+from app.services.day_summary_cube import DaySummaryCube, get_day_summary_cube, invigilators_required
 from app.services.depot_scope import depot_school_ids, require_depot_id_for_depot_keeper
 from app.services.exam_timetable_pdf import (
-    build_full_exam_timetable_pdf,
-    build_school_timetable_pdf,
     filter_schedule_codes_by_subject_type,
     get_programme_subject_schedule_codes,
     get_school_subject_schedule_codes,
@@ -148,11 +146,23 @@ from app.services.executive_overview import (
     build_executive_centre_detail,
     build_national_executive_overview,
 )
+from app.services.timetable_pdf_cache import (
+    etag_matches,
+    get_or_render_timetable_pdf,
+    get_timetable_prerender_job,
+    invalidate_timetable_pdfs,
+    normalize_timetable_orientation,
+    start_timetable_prerender_job,
+    timetable_pdf_etag,
+    timetable_pdf_fingerprint,
+)
 from app.services.timetable_service import (
+    TimetableDocument,
     center_scope_school_ids,
     get_candidate_schedule_codes_for_centre_scope,
     get_candidate_schedule_codes_for_exam,
     resolve_center_host_school,
+    resolve_timetable_document,
     schools_in_center_scope_ordered,
 )
 
@@ -665,6 +675,7 @@ async def create_schedule(
     session.add(sch)
     await session.commit()
     await session.refresh(sch)
+    await invalidate_timetable_pdfs(exam_id)
     return ExaminationScheduleResponse.model_validate(sch)
 
 
@@ -712,6 +723,7 @@ async def update_schedule(
 
     await session.commit()
     await session.refresh(schedule)
+    await invalidate_timetable_pdfs(exam_id)
     return ExaminationScheduleResponse.model_validate(schedule)
 
 
@@ -733,6 +745,7 @@ async def delete_schedule(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
     await session.delete(schedule)
     await session.commit()
+    await invalidate_timetable_pdfs(exam_id)
 
 
 @router.get("/{exam_id}/schedules/template")
@@ -911,6 +924,7 @@ async def bulk_upload_schedules(
 
     if successful > 0:
         await session.commit()
+        await invalidate_timetable_pdfs(exam_id)
     else:
         await session.rollback()
 
@@ -922,6 +936,65 @@ async def bulk_upload_schedules(
     )
 
 
+async def _timetable_pdf_response(
+    document: TimetableDocument,
+    filename: str,
+    *,
+    if_none_match: str | None,
+    merge_by_date: bool,
+    orientation: str,
+) -> Response:
+    """Stored PDF for *document* (rendered on first request), or 304 when the client has this version."""
+    # Only the layouts the pre-render job warms are stored; unknown values fall back to portrait
+    orientation = normalize_timetable_orientation(orientation)
+    fingerprint = timetable_pdf_fingerprint(document, merge_by_date=merge_by_date, orientation=orientation)
+    headers = {"ETag": timetable_pdf_etag(fingerprint), "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    pdf = await get_or_render_timetable_pdf(
+        document,
+        fingerprint,
+        merge_by_date=merge_by_date,
+        orientation=orientation,
+    )
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={**headers, "Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    "/{exam_id}/timetable/pdf/prerender",
+    response_model=TimetablePrerenderJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_timetable_pdf_prerender(
+    exam_id: int,
+    session: DBSessionDep,
+    _: SuperAdminDep,
+) -> TimetablePrerenderJobResponse:
+    """Render full and per-school timetables in the background so downloads serve stored PDFs."""
+    await _get_exam_or_404(session, exam_id)
+    job = start_timetable_prerender_job(exam_id)
+    return TimetablePrerenderJobResponse.model_validate(job)
+
+
+@router.get(
+    "/{exam_id}/timetable/pdf/prerender/{job_id}",
+    response_model=TimetablePrerenderJobResponse,
+)
+async def get_timetable_pdf_prerender(
+    exam_id: int,
+    job_id: UUID,
+    _: SuperAdminDep,
+) -> TimetablePrerenderJobResponse:
+    job = get_timetable_prerender_job(job_id)
+    if job is None or job.examination_id != exam_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pre-render job not found")
+    return TimetablePrerenderJobResponse.model_validate(job)
+
+
 @router.get("/{exam_id}/timetable/pdf")
 async def download_full_timetable_pdf(
     exam_id: int,
@@ -930,23 +1003,21 @@ async def download_full_timetable_pdf(
     subject_filter: TimetableDownloadFilter = Query(default=TimetableDownloadFilter.ALL),
     merge_by_date: bool = Query(default=False, description="Merge subjects written on the same day"),
     orientation: str = Query(default="portrait", description="Page orientation: portrait or landscape"),
+    if_none_match: str | None = Header(default=None),
 ) -> Response:
     try:
-        pdf, exam = await build_full_exam_timetable_pdf(
-            session,
-            exam_id,
-            subject_filter=subject_filter,
-            merge_by_date=merge_by_date,
-            orientation=orientation,
-        )
+        document = await resolve_timetable_document(session, exam_id, subject_filter=subject_filter)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
+    exam = document.exam
     base = _sanitize_filename_part(f"{exam.year}_{exam.exam_series or 'exam'}_{exam.exam_type}")
     filename = f"timetable_{base}_all.pdf"
-    return Response(
-        content=pdf,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return await _timetable_pdf_response(
+        document,
+        filename,
+        if_none_match=if_none_match,
+        merge_by_date=merge_by_date,
+        orientation=orientation,
     )
 
 
@@ -960,6 +1031,7 @@ async def download_school_timetable_pdf(
     programme_id: int | None = Query(default=None),
     merge_by_date: bool = Query(default=False, description="Merge subjects written on the same day"),
     orientation: str = Query(default="portrait", description="Page orientation: portrait or landscape"),
+    if_none_match: str | None = Header(default=None),
 ) -> Response:
     school_stmt = select(School).where(School.id == school_id)
     school_result = await session.execute(school_stmt)
@@ -978,27 +1050,27 @@ async def download_school_timetable_pdf(
                 detail="Programme is not associated with the school",
             )
     try:
-        pdf = await build_school_timetable_pdf(
+        document = await resolve_timetable_document(
             session,
             exam_id,
             school_id,
             programme_id=programme_id,
             subject_filter=subject_filter,
-            merge_by_date=merge_by_date,
-            orientation=orientation,
         )
     except ValueError as e:
         detail = str(e) if str(e) else "Not found"
         if "Programme not found" in detail or "School not found" in detail:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail) from None
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
-    exam = await load_examination_or_raise(session, exam_id)
+    exam = document.exam
     base = _sanitize_filename_part(f"{exam.year}_{exam.exam_series or 'exam'}_{school.code}")
     filename = f"timetable_{base}.pdf"
-    return Response(
-        content=pdf,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return await _timetable_pdf_response(
+        document,
+        filename,
+        if_none_match=if_none_match,
+        merge_by_date=merge_by_date,
+        orientation=orientation,
     )
 
 
@@ -1683,8 +1755,9 @@ async def _build_staff_day_summary_for_scope(
     *,
     subject_filter: TimetableDownloadFilter = TimetableDownloadFilter.ALL,
     preloaded_entries: list[TimetableEntry] | None = None,
+    cube: DaySummaryCube | None = None,
 ) -> StaffCentreDaySummaryResponse:
-    """Shared day-summary builder for centre scope or national (all candidate schools)."""
+    """Shared day-summary builder for centre, depot or national scope (roll-ups of the day-summary cube)."""
     if not scope_ids:
         return StaffCentreDaySummaryResponse(
             examination_date=examination_date,
@@ -1694,8 +1767,6 @@ async def _build_staff_day_summary_for_scope(
             invigilators_required=0,
         )
 
-    school_index = {s.id: i for i, s in enumerate(ordered_schools)}
-
     if preloaded_entries is None:
         entries = await _staff_center_filtered_timetable_entries(
             session, exam_id, scope_ids, subject_filter=subject_filter
@@ -1716,20 +1787,10 @@ async def _build_staff_day_summary_for_scope(
         key=lambda g: (min(e.examination_time for e in g), g[0].subject_code),
     )
 
-    cand_stmt = (
-        select(ExaminationCandidate)
-        .where(
-            ExaminationCandidate.examination_id == exam_id,
-            ExaminationCandidate.school_id.in_(scope_ids),
-            ExaminationCandidate.school_id.isnot(None),
-        )
-        .options(selectinload(ExaminationCandidate.subject_selections))
-    )
-    cand_result = await session.execute(cand_stmt)
-    candidates = list(cand_result.scalars().unique().all())
+    if cube is None:
+        cube = await get_day_summary_cube(session, exam_id)
 
     slot_rows: list[StaffCentreDaySummarySlotRow] = []
-    unique_ids: set[int] = set()
     n_sch = len(ordered_schools)
 
     for group in merged_groups:
@@ -1739,21 +1800,11 @@ async def _build_staff_day_summary_for_scope(
         times_sorted = sorted({e.examination_time for e in group})
         times_label = " · ".join(_format_time_hhmm(t) for t in times_sorted)
 
-        counts_by_school = [0] * n_sch
-        row_total = 0
-
-        for cand in candidates:
-            subj_rows = [
-                (s.subject_code, s.series) for s in (cand.subject_selections or []) if s.subject_code
-            ]
-            if not _candidate_matches_any_entry_in_group(subj_rows, group):
-                continue
-            unique_ids.add(cand.id)
-            row_total += 1
-            if cand.school_id is not None:
-                idx = school_index.get(cand.school_id)
-                if idx is not None:
-                    counts_by_school[idx] += 1
+        code = _subject_day_group_key(first.subject_code)
+        counts_by_school = [
+            cube.candidates(examination_date, code, s.id) if s.id in scope_ids else 0 for s in ordered_schools
+        ]
+        row_total = cube.slot_total(examination_date, code, scope_ids)
 
         slot_rows.append(
             StaffCentreDaySummarySlotRow(
@@ -1789,8 +1840,8 @@ async def _build_staff_day_summary_for_scope(
             for s in slot_rows
         ]
 
-    unique_n = len(unique_ids)
-    invigilators = math.ceil(unique_n / 30) if unique_n else 0
+    unique_n = cube.unique_candidates(examination_date, scope_ids, by_subject.keys())
+    invigilators = invigilators_required(unique_n)
 
     return StaffCentreDaySummaryResponse(
         examination_date=examination_date,
@@ -1801,20 +1852,6 @@ async def _build_staff_day_summary_for_scope(
     )
 
 
-def _candidate_subject_matches_slot(
-    subject_code: str,
-    paper: int,
-    cand_subject_rows: list[tuple[str, int | None]],
-) -> bool:
-    code_norm = str(subject_code).strip()
-    for scode, series in cand_subject_rows:
-        if str(scode).strip() != code_norm:
-            continue
-        if series is None or series == paper:
-            return True
-    return False
-
-
 def _subject_day_group_key(subject_code: str) -> str:
     return str(subject_code).strip()
 
@@ -1823,16 +1860,6 @@ def _format_time_hhmm(t: time) -> str:
     return f"{t.hour:02d}:{t.minute:02d}"
 
 
-def _candidate_matches_any_entry_in_group(
-    cand_subject_rows: list[tuple[str, int | None]],
-    group_entries: list[TimetableEntry],
-) -> bool:
-    for ent in group_entries:
-        if _candidate_subject_matches_slot(ent.subject_code, ent.paper, cand_subject_rows):
-            return True
-    return False
-
-
 @router.get("/{exam_id}/timetable/my-school/pdf")
 async def download_my_school_timetable_pdf(
     exam_id: int,
@@ -1851,6 +1878,7 @@ async def download_my_school_timetable_pdf(
         default=None,
         description="Inspector posting (workspace); overrides JWT when set; required when you have multiple postings.",
     ),
+    if_none_match: str | None = Header(default=None),
 ) -> Response:
     user_school = await _school_from_user(
         session,
@@ -1910,14 +1938,12 @@ async def download_my_school_timetable_pdf(
                 filter_school_id=filter_school_id,
             )
     try:
-        pdf = await build_school_timetable_pdf(
+        document = await resolve_timetable_document(
             session,
             exam_id,
             display_school.id,
             programme_id=programme_id,
             subject_filter=effective_filter,
-            merge_by_date=merge_by_date,
-            orientation=orientation,
             explicit_schedule_codes=explicit_codes,
         )
     except ValueError as e:
@@ -1925,13 +1951,15 @@ async def download_my_school_timetable_pdf(
         if "Programme not found" in detail:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail) from None
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
-    exam = await load_examination_or_raise(session, exam_id)
+    exam = document.exam
     base = _sanitize_filename_part(f"{exam.year}_{exam.exam_series or 'exam'}_{display_school.code}")
     filename = f"timetable_{base}.pdf"
-    return Response(
-        content=pdf,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return await _timetable_pdf_response(
+        document,
+        filename,
+        if_none_match=if_none_match,
+        merge_by_date=merge_by_date,
+        orientation=orientation,
     )
 
 
@@ -2018,6 +2046,7 @@ async def download_my_depot_timetable_pdf(
     ),
     merge_by_date: bool = Query(default=False, description="Merge subjects written on the same day"),
     orientation: str = Query(default="portrait", description="Page orientation: portrait or landscape"),
+    if_none_match: str | None = Header(default=None),
 ) -> Response:
     scope_ids, display_school = await _depot_scope_and_display_school(session, user, filter_school_id)
     if programme_id is not None:
@@ -2030,14 +2059,12 @@ async def download_my_depot_timetable_pdf(
         filter_school_id=filter_school_id,
     )
     try:
-        pdf = await build_school_timetable_pdf(
+        document = await resolve_timetable_document(
             session,
             exam_id,
             display_school.id,
             programme_id=programme_id,
             subject_filter=subject_filter,
-            merge_by_date=merge_by_date,
-            orientation=orientation,
             explicit_schedule_codes=explicit_codes,
         )
     except ValueError as e:
@@ -2045,13 +2072,15 @@ async def download_my_depot_timetable_pdf(
         if "Programme not found" in detail:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail) from None
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
-    exam = await load_examination_or_raise(session, exam_id)
+    exam = document.exam
     base = _sanitize_filename_part(f"{exam.year}_{exam.exam_series or 'exam'}_{display_school.code}")
     filename = f"timetable_{base}.pdf"
-    return Response(
-        content=pdf,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return await _timetable_pdf_response(
+        document,
+        filename,
+        if_none_match=if_none_match,
+        merge_by_date=merge_by_date,
+        orientation=orientation,
     )
 
 
@@ -2757,6 +2786,7 @@ async def _build_finance_centre_invigilator_item(
         exam_centre=exam_centre,
     )
     dates_sorted = sorted({e.examination_date for e in entries})
+    cube = await get_day_summary_cube(session, exam_id) if dates_sorted else None
     day_rows: list[FinanceCentreDayInvigilatorRow] = []
     for d in dates_sorted:
         summary = await _build_staff_day_summary_for_scope(
@@ -2767,6 +2797,7 @@ async def _build_finance_centre_invigilator_item(
             ordered_schools,
             subject_filter=subject_filter,
             preloaded_entries=entries,
+            cube=cube,
         )
         day_rows.append(
             FinanceCentreDayInvigilatorRow(
@@ -2882,13 +2913,14 @@ async def get_finance_centre_invigilator_summary(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
 
     centre_list = await _finance_centre_hosts(session, exam_id, center_host_id)
+    build_item = _build_finance_centre_invigilator_item
+    if center_host_id is None and centre_list:
+        from app.services.finance_invigilator_bulk import load_examination_invigilator_data
+
+        build_item = (await load_examination_invigilator_data(session, exam_id)).build_invigilator_item
     centres_out: list[FinanceCentreInvigilatorSummaryItem] = []
     for centre in centre_list:
-        centres_out.append(
-            await _build_finance_centre_invigilator_item(
-                session, exam_id, centre, subject_filter
-            ),
-        )
+        centres_out.append(await build_item(session, exam_id, centre, subject_filter))
 
     return FinanceCentreInvigilatorSummaryResponse(examination_id=exam_id, centres=centres_out)
 
@@ -3146,12 +3178,7 @@ async def get_finance_centre_official_statistics(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
 
-    return await build_finance_centre_official_statistics(
-        session,
-        exam_id,
-        subject_filter,
-        build_invigilator_item=_build_finance_centre_invigilator_item,
-    )
+    return await build_finance_centre_official_statistics(session, exam_id, subject_filter)
 
 
 @router.post("/{exam_id}/finance/centre-official-statistics/export")
@@ -3297,7 +3324,6 @@ async def get_finance_inspector_analysis(
         session,
         exam_id,
         subject_filter,
-        build_invigilator_item=_build_finance_centre_invigilator_item,
         candidates_per_inspector=candidates_per_inspector,
     )
 
@@ -3469,113 +3495,6 @@ async def get_my_depot_day_summary(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found") from None
 
     ordered_schools = await _depot_ordered_schools(session, depot_id)
-    scope_ids = {s.id for s in ordered_schools}
-    school_index = {s.id: i for i, s in enumerate(ordered_schools)}
-
-    if not scope_ids:
-        return StaffCentreDaySummaryResponse(
-            examination_date=examination_date,
-            schools=[],
-            slots=[],
-            unique_candidates=0,
-            invigilators_required=0,
-        )
-
-    entries = await _staff_center_filtered_timetable_entries(session, exam_id, scope_ids)
-    day_entries = [e for e in entries if e.examination_date == examination_date]
-    day_entries.sort(key=lambda x: (x.examination_time, x.subject_code, x.paper))
-
-    by_subject: dict[str, list[TimetableEntry]] = defaultdict(list)
-    for ent in day_entries:
-        by_subject[_subject_day_group_key(ent.subject_code)].append(ent)
-    merged_groups: list[list[TimetableEntry]] = []
-    for _key, group in by_subject.items():
-        group.sort(key=lambda x: (x.examination_time, x.paper))
-        merged_groups.append(group)
-    merged_groups.sort(
-        key=lambda g: (min(e.examination_time for e in g), g[0].subject_code),
-    )
-
-    cand_stmt = (
-        select(ExaminationCandidate)
-        .where(
-            ExaminationCandidate.examination_id == exam_id,
-            ExaminationCandidate.school_id.in_(scope_ids),
-            ExaminationCandidate.school_id.isnot(None),
-        )
-        .options(selectinload(ExaminationCandidate.subject_selections))
-    )
-    cand_result = await session.execute(cand_stmt)
-    candidates = list(cand_result.scalars().unique().all())
-
-    slot_rows: list[StaffCentreDaySummarySlotRow] = []
-    unique_ids: set[int] = set()
-    n_sch = len(ordered_schools)
-
-    for group in merged_groups:
-        first = group[0]
-        papers_sorted = sorted({e.paper for e in group})
-        papers_label = " & ".join(str(p) for p in papers_sorted)
-        times_sorted = sorted({e.examination_time for e in group})
-        times_label = " · ".join(_format_time_hhmm(t) for t in times_sorted)
-
-        counts_by_school = [0] * n_sch
-        row_total = 0
-
-        for cand in candidates:
-            subj_rows = [
-                (s.subject_code, s.series) for s in (cand.subject_selections or []) if s.subject_code
-            ]
-            if not _candidate_matches_any_entry_in_group(subj_rows, group):
-                continue
-            unique_ids.add(cand.id)
-            row_total += 1
-            if cand.school_id is not None:
-                idx = school_index.get(cand.school_id)
-                if idx is not None:
-                    counts_by_school[idx] += 1
-
-        slot_rows.append(
-            StaffCentreDaySummarySlotRow(
-                subject_code=first.subject_code,
-                subject_name=first.subject_name,
-                papers_label=papers_label,
-                times_label=times_label,
-                counts_by_school=counts_by_school,
-                row_total=row_total,
-            )
-        )
-
-    schools_for_response: list[CenterScopeSchoolItem] = []
-    if n_sch and slot_rows:
-        school_day_totals = [0] * n_sch
-        for slot in slot_rows:
-            for i, c in enumerate(slot.counts_by_school):
-                school_day_totals[i] += c
-        keep_idx = [i for i, t in enumerate(school_day_totals) if t > 0]
-        filtered_ordered = [ordered_schools[i] for i in keep_idx]
-        schools_for_response = [
-            CenterScopeSchoolItem(id=s.id, code=s.code, name=s.name) for s in filtered_ordered
-        ]
-        slot_rows = [
-            StaffCentreDaySummarySlotRow(
-                subject_code=s.subject_code,
-                subject_name=s.subject_name,
-                papers_label=s.papers_label,
-                times_label=s.times_label,
-                counts_by_school=[s.counts_by_school[i] for i in keep_idx],
-                row_total=s.row_total,
-            )
-            for s in slot_rows
-        ]
-
-    unique_n = len(unique_ids)
-    invigilators = math.ceil(unique_n / 30) if unique_n else 0
-
-    return StaffCentreDaySummaryResponse(
-        examination_date=examination_date,
-        schools=schools_for_response,
-        slots=slot_rows,
-        unique_candidates=unique_n,
-        invigilators_required=invigilators,
+    return await _build_staff_day_summary_for_scope(
+        session, exam_id, examination_date, {s.id for s in ordered_schools}, ordered_schools
     )
@@ -56,6 +56,7 @@ from app.services.examiner_roster import (
     parse_gender_cell,
     read_examiners_spreadsheet,
 )
+from app.services.examiner_quota_counters import RosterQuotaBucket, move_quota_counters
 from app.services.examiner_regional_quota import (
     GenderDistribution,
     GroupDistribution,
@@ -137,6 +138,7 @@ async def _sync_cohort_memberships_for_examiner(session: AsyncSession, ex: Exami
             session,
             examination_id=int(ex.examination_id),
             subject_id=int(sid),
+            examiner_ids=[ex.id],
         )
 
 
@@ -463,6 +465,7 @@ async def update_examiner(
                 )
             except ValueError as e:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    quota_bucket_before = RosterQuotaBucket.for_examiner(ex)
     if "region" in patch and patch["region"] is not None:
         ex.region = new_region
     if "examiner_type" in patch and patch["examiner_type"] is not None:
@@ -472,6 +475,13 @@ async def update_examiner(
         ex.deviation_weight = patch["deviation_weight"]
     if "gender" in patch:
         ex.gender = new_gender
+    await move_quota_counters(
+        session,
+        examination_id=examination_id,
+        subject_ids=_examiner_subject_ids(ex),
+        before=quota_bucket_before,
+        after=RosterQuotaBucket.for_examiner(ex),
+    )
     if "phone_number" in patch and patch["phone_number"] is not None:
         try:
             ex.phone_number = str(patch["phone_number"]).strip()
@@ -523,6 +533,7 @@ async def update_examiner(
                 session,
                 examination_id=examination_id,
                 subject_id=sid,
+                examiner_ids=[ex.id],
             )
     await session.commit()
     stmt2 = (
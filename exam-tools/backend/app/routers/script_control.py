@@ -65,7 +65,7 @@ from app.services.script_control_export import (
 )
 from app.services.script_control_school_status import (
     SchoolStatusFilter,
-    build_script_control_school_status_rows,
+    page_script_control_school_status,
 )
 from app.services.script_control import (
     assert_packing_school_in_scope,
@@ -1767,7 +1767,7 @@ async def list_script_control_school_status(
     if sub is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found")
 
-    rows, status_counts = await build_script_control_school_status_rows(
+    page, total, status_counts = await page_script_control_school_status(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
@@ -1777,9 +1777,9 @@ async def list_script_control_school_status(
         zone=zone,
         school_q=school_q,
         status_filter="all" if (school_q and school_q.strip()) else status,
+        skip=skip,
+        limit=limit,
     )
-    total = len(rows)
-    page = rows[skip : skip + limit]
     subject_series_counts = await _subject_series_counts_for_exam(session, examination_id)
     return ScriptControlSchoolStatusListResponse(
         items=page,
@@ -1814,7 +1814,7 @@ async def list_irregular_script_control_school_status(
     if sub is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found")
 
-    rows, status_counts = await build_script_control_school_status_rows(
+    page, total, status_counts = await page_script_control_school_status(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
@@ -1824,9 +1824,9 @@ async def list_irregular_script_control_school_status(
         zone=zone,
         school_q=school_q,
         status_filter="all" if (school_q and school_q.strip()) else status,
+        skip=skip,
+        limit=limit,
     )
-    total = len(rows)
-    page = rows[skip : skip + limit]
     subject_series_counts = await _subject_series_counts_for_exam(session, examination_id)
     return ScriptControlSchoolStatusListResponse(
         items=page,
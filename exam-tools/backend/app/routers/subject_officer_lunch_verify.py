@@ -11,16 +11,21 @@ from app.dependencies.auth import SubjectOfficerDep
 from app.dependencies.database import DBSessionDep
 from app.models import UserRole
 from app.schemas.lunch_coupon_verify import (
+    LunchCouponBatchScan,
+    LunchCouponBatchVerifyRequest,
+    LunchCouponBatchVerifyResponse,
     LunchCouponVerifiedListResponse,
     LunchCouponVerifyRequest,
     LunchCouponVerifyResponse,
 )
 from app.services.lunch_coupon_pdf import generate_lunch_coupons_pdf
 from app.services.lunch_coupon_verify import (
+    check_batch_scan_count,
     list_lunch_coupon_verifications,
     list_lunch_coupon_verifications_all,
+    lunch_coupon_batch_response,
     verify_and_record_lunch_coupon,
-    verify_and_record_lunch_coupon_scan,
+    verify_and_record_lunch_coupon_scans,
 )
 from app.services.subject_officer_scope import (
     assert_subject_officer_access,
@@ -71,11 +76,11 @@ async def post_lunch_coupon_verify_scan(
     user: SubjectOfficerDep,
 ) -> LunchCouponVerifyResponse:
     examination_ids, by_exam = await _subject_officer_scan_scope(session, user)
-    result = await verify_and_record_lunch_coupon_scan(
+    [result] = await verify_and_record_lunch_coupon_scans(
         session,
         examination_ids=examination_ids,
         officer_subject_ids_by_exam=by_exam,
-        reference_code=body.reference_code,
+        scans=[LunchCouponBatchScan(reference_code=body.reference_code)],
         verified_by_id=user.id,
     )
     if result.get("recorded"):
@@ -83,6 +88,31 @@ async def post_lunch_coupon_verify_scan(
     return LunchCouponVerifyResponse(**result)
 
 
+@router.post(
+    "/subject-officer/lunch-coupon/verify-scan/batch",
+    response_model=LunchCouponBatchVerifyResponse,
+)
+async def post_lunch_coupon_verify_scan_batch(
+    body: LunchCouponBatchVerifyRequest,
+    session: DBSessionDep,
+    user: SubjectOfficerDep,
+) -> LunchCouponBatchVerifyResponse:
+    """Upload scans queued on a scanner device; safe to retry (duplicates report already verified)."""
+    check_batch_scan_count(len(body.scans))
+    examination_ids, by_exam = await _subject_officer_scan_scope(session, user)
+    results = await verify_and_record_lunch_coupon_scans(
+        session,
+        examination_ids=examination_ids,
+        officer_subject_ids_by_exam=by_exam,
+        scans=body.scans,
+        verified_by_id=user.id,
+    )
+    response = lunch_coupon_batch_response(results)
+    if response.recorded_count:
+        await session.commit()
+    return response
+
+
 @router.get(
     "/examinations/{examination_id}/subject-officer/lunch-coupon/verified",
     response_model=LunchCouponVerifiedListResponse,
@@ -40,3 +40,9 @@ class NotifyEligibleAppointmentLettersResponse(BaseModel):
     sms_sent_count: int
     sms_failed_count: int
     skipped_count: int
+
+
+class RenderAppointmentLettersResponse(BaseModel):
+    examiner_count: int
+    rendered_count: int
+    reused_count: int
@@ -162,6 +162,21 @@ class TimetablePreviewResponse(BaseModel):
     entries: list[TimetableEntry]
 
 
+class TimetablePrerenderJobResponse(BaseModel):
+    id: UUID
+    examination_id: int
+    status: str
+    processed_documents: int
+    total_documents: int
+    rendered_count: int
+    reused_count: int
+    error_message: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
+
+
 class CenterScopeSchoolItem(BaseModel):
     id: UUID
     code: str
@@ -85,6 +85,23 @@ class ExaminationCandidateImportResponse(BaseModel):
     errors: list[ExaminationCandidateImportError]
 
 
+class ExaminationCandidateImportJobResponse(BaseModel):
+    id: UUID
+    examination_id: int
+    status: str
+    total_rows: int
+    processed_candidates: int
+    total_candidates: int
+    successful: int
+    failed: int
+    errors: list[ExaminationCandidateImportError]
+    error_message: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ExaminationCandidateListResponse(BaseModel):
     items: list[ExaminationCandidateResponse]
     total: int
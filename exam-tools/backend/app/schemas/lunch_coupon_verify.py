@@ -44,3 +44,25 @@ class LunchCouponVerifiedRow(BaseModel):
 class LunchCouponVerifiedListResponse(BaseModel):
     items: list[LunchCouponVerifiedRow]
     total: int
+
+
+class LunchCouponBatchScan(BaseModel):
+    reference_code: str = Field(..., min_length=1, max_length=64)
+    # Device time of the scan; must fall on the current server day and not run ahead of the server clock.
+    scanned_at: datetime | None = None
+    client_scan_id: str | None = Field(None, max_length=64)
+
+
+class LunchCouponBatchVerifyRequest(BaseModel):
+    scans: list[LunchCouponBatchScan] = Field(..., min_length=1)
+
+
+class LunchCouponBatchScanResult(LunchCouponVerifyResponse):
+    client_scan_id: str | None = None
+
+
+class LunchCouponBatchVerifyResponse(BaseModel):
+    results: list[LunchCouponBatchScanResult]
+    recorded_count: int
+    already_verified_count: int
+    invalid_count: int
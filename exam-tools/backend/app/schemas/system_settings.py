@@ -25,3 +25,25 @@ class ActiveExaminationAdminResponse(BaseModel):
         description="Examination actually used after applying precedence rules.",
     )
     examination: ExaminationResponse
+
+
+class QueryMetricsStatement(BaseModel):
+    statement: str
+    count: int | None = None
+    duration_ms: float | None = None
+
+
+class QueryMetricsRoute(BaseModel):
+    """SQL statement counts and DB time of one route since start-up (or the last reset)."""
+
+    route: str
+    requests: int
+    queries: int
+    avg_queries: float
+    max_queries: int
+    db_time_ms: float
+    avg_db_time_ms: float
+    max_db_time_ms: float
+    n_plus_one_requests: int = Field(description="Requests that repeated one statement shape past the threshold.")
+    repeated_statements: list[QueryMetricsStatement]
+    slowest_statements: list[QueryMetricsStatement]
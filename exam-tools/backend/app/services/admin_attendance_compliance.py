@@ -17,7 +17,7 @@ from app.models import (
     InspectorExamPosting,
     User,
 )
-from app.services.centre_resolution import centre_scope_school_ids_for_inspector_scope
+from app.services.centre_resolution_index import get_centre_resolution_index
 from app.services.script_control import script_packing_today_in_configured_zone
 from app.services.subject_scope import scopes_for_centre_date
 
@@ -109,6 +109,7 @@ async def expected_centres_for_examination_date(
     postings = list((await session.execute(stmt)).scalars().unique().all())
     upload_counts = await _upload_counts_by_center_and_scope(session, examination_id, examination_date)
     today = script_packing_today_in_configured_zone()
+    index = await get_centre_resolution_index(session, examination_id)
     scope_cache: dict[UUID, set[ExamInspectorSubjectScope]] = {}
     by_key: dict[tuple[UUID, str], ExpectedCentreRow] = {}
 
@@ -118,9 +119,7 @@ async def expected_centres_for_examination_date(
             continue
         cid = posting.examination_centre_id
         if cid not in scope_cache:
-            scope_ids = await centre_scope_school_ids_for_inspector_scope(
-                session, center, posting.subject_scope
-            )
+            scope_ids = set(index.inspector_scope_school_ids(cid, posting.subject_scope))
             scope_cache[cid] = await scopes_for_centre_date(
                 session, examination_id, scope_ids, examination_date
             )
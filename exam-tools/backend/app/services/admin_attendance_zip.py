@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-import io
 import re
-import zipfile
+from collections.abc import Iterator, Sequence
 from datetime import date
+from functools import partial
 from pathlib import PurePosixPath
 
 from app.models import InspectorAttendanceSheet
-from app.services.attendance_sheet_files import read_attendance_sheet_bytes
+from app.services.attendance_sheet_files import iter_attendance_sheet_chunks
+from app.services.streaming_zip import ZipStreamEntry, stream_zip
 
 _MAX_ZIP_ENTRIES = 500
 
@@ -49,16 +50,19 @@ def attendance_zip_download_filename(
     return "-".join(parts) + ".zip"
 
 
-def build_attendance_sheets_zip_bytes(sheets: list[InspectorAttendanceSheet]) -> bytes:
-    if not sheets:
+def check_zip_entry_count(count: int) -> None:
+    if count == 0:
         raise ValueError("no sheets to zip")
-    if len(sheets) > _MAX_ZIP_ENTRIES:
+    if count > _MAX_ZIP_ENTRIES:
         raise ValueError(f"too many files (max {_MAX_ZIP_ENTRIES})")
 
-    buf = io.BytesIO()
+
+def stream_attendance_sheets_zip(sheets: Sequence[InspectorAttendanceSheet]) -> Iterator[bytes]:
+    """Validate *sheets* up front, then return an iterator streaming the zip archive."""
+    check_zip_entry_count(len(sheets))
     entry_names = unique_zip_entry_names([s.original_filename for s in sheets])
-    with zipfile.ZipFile(buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for sheet, entry in zip(sheets, entry_names, strict=True):
-            data = read_attendance_sheet_bytes(sheet.stored_path)
-            zf.writestr(entry, data)
-    return buf.getvalue()
+    entries = [
+        ZipStreamEntry(entry, partial(iter_attendance_sheet_chunks, sheet.stored_path))
+        for sheet, entry in zip(sheets, entry_names, strict=True)
+    ]
+    return stream_zip(entries)
@@ -0,0 +1,491 @@
+"""Script allocation benchmark on synthetic in-memory instances.
+
+Instances are drawn from the same distributions as ``simulation_seed`` (school size
+bands, round-robin series, envelope packing with random deductions, examiner roles)
+but are built as transient ORM objects, so no database is touched. Every solve mode is
+run through the pure solver layers and the report records build/solve time, objective,
+unassigned envelopes and booklets, quota deviation and peak traced memory.
+
+Run from the backend directory (``DATABASE_USE=false`` lets ``app.*`` import without a DB)::
+
+    DATABASE_USE=false python -m app.services.allocation_benchmark --scale small --scale medium \\
+        --out allocation-benchmark.json --baseline previous.json
+
+With ``--baseline`` the exit status is 1 when a strategy got slower beyond the tolerance,
+left more booklets unassigned, or stopped solving.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+import scipy
+
+from app.config import script_envelope_cap
+from app.models import (
+    Examiner,
+    ExaminerRosterSource,
+    ExaminerSubject,
+    ExaminerType,
+    Region,
+    School,
+    ScriptEnvelope,
+    ScriptPackingSeries,
+    Zone,
+)
+from app.schemas.script_allocation import (
+    AllocationSolveModeSchema,
+    AllocationSolveOptions,
+    AllocationSubgroupStatusSchema,
+)
+from app.services.script_allocation import (
+    build_eligible_pairs,
+    slack_targets_for_examiner_list,
+    solve_decomposed_by_region,
+)
+from app.services.script_allocation_milp import solve_script_allocation_milp
+from app.services.script_allocation_regional_greedy import regional_greedy_solve
+from app.services.simulation_seed import (
+    SIM_DEFAULT_SERIES_COUNT,
+    SIM_EXAMINER_COUNT,
+    SIM_PAPER_NUMBER,
+    SIM_RANDOM_SEED,
+    SIM_TOTAL_CANDIDATES,
+    _apply_random_envelope_deductions,
+    _deterministic_envelope_counts,
+    _distribution_by_school_id,
+    simulated_examiner_type,
+)
+
+STRATEGIES: tuple[str, ...] = tuple(m.value for m in AllocationSolveModeSchema)
+
+# Average school size implied by the simulation size bands; used when school_count is not given.
+_MEAN_SCHOOL_SIZE = 430
+
+_BENCHMARK_SUBJECT_ID = 1
+
+
+@dataclass(frozen=True)
+class BenchmarkInstanceSpec:
+    name: str
+    total_candidates: int
+    examiner_count: int
+    series_count: int = SIM_DEFAULT_SERIES_COUNT
+    school_count: int | None = None
+    # Each marking region marks scripts from this many other regions (cyclic in region order).
+    cross_marking_span: int = 2
+    paper_number: int = SIM_PAPER_NUMBER
+    seed: int = SIM_RANDOM_SEED
+
+
+BENCHMARK_SCALES: dict[str, BenchmarkInstanceSpec] = {
+    "small": BenchmarkInstanceSpec(name="small", total_candidates=5_000, examiner_count=20),
+    "medium": BenchmarkInstanceSpec(name="medium", total_candidates=20_000, examiner_count=75),
+    "full": BenchmarkInstanceSpec(
+        name="full",
+        total_candidates=SIM_TOTAL_CANDIDATES,
+        examiner_count=SIM_EXAMINER_COUNT,
+    ),
+}
+
+
+@dataclass
+class AllocationInstance:
+    spec: BenchmarkInstanceSpec
+    subject_id: int
+    rows: list[tuple[ScriptEnvelope, ScriptPackingSeries, School]]
+    examiners: list[Examiner]
+    region_rules: dict[Region, set[Region]]
+    quota_by_type_subject: dict[tuple[ExaminerType, int], int]
+
+    @property
+    def total_booklets(self) -> int:
+        return sum(int(env.booklet_count) for env, _series, _school in self.rows)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "schools": len({school.id for _env, _series, school in self.rows}),
+            "envelopes": len(self.rows),
+            "booklets": self.total_booklets,
+            "examiners": len(self.examiners),
+            "series": self.spec.series_count,
+        }
+
+
+@dataclass
+class StrategyResult:
+    strategy: str
+    status: str
+    build_sec: float
+    solve_sec: float
+    objective: float | None
+    proven_optimal: bool | None
+    eligible_pairs: int | None
+    assigned_envelopes: int
+    unassigned_envelopes: int
+    unassigned_booklets: int
+    quota_abs_deviation: int
+    peak_memory_bytes: int | None
+    message: str | None = None
+
+
+def _series_split(total: int, series_count: int) -> dict[int, int]:
+    """Candidates per series when a school's candidates are dealt round-robin into series."""
+    base, extra = divmod(max(0, total), series_count)
+    return {s: base + (1 if s <= extra else 0) for s in range(1, series_count + 1)}
+
+
+def region_cross_marking_rules(regions: Sequence[Region], span: int) -> dict[Region, set[Region]]:
+    """Marking region i may mark scripts from the next ``span`` regions (never its own)."""
+    ordered = sorted(set(regions), key=lambda r: r.value)
+    n = len(ordered)
+    if n < 2:
+        return {}
+    span = max(1, min(int(span), n - 1))
+    return {ordered[i]: {ordered[(i + k) % n] for k in range(1, span + 1)} for i in range(n)}
+
+
+def _seeded_uuid(rng: random.Random) -> UUID:
+    # Solvers break ties on str(id), so ids must come from the seed for reproducible runs.
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def build_allocation_instance(spec: BenchmarkInstanceSpec) -> AllocationInstance:
+    """Deterministic synthetic instance for ``spec`` (same seed -> same instance, ids included)."""
+    rng = random.Random(spec.seed)
+    regions = list(Region)
+    zones = list(Zone)
+    school_count = spec.school_count or max(1, round(spec.total_candidates / _MEAN_SCHOOL_SIZE))
+    schools = [
+        School(
+            id=_seeded_uuid(rng),
+            code=f"SIM{i + 1:05d}",
+            name=f"Simulation School {i + 1:05d}",
+            region=rng.choice(regions),
+            zone=rng.choice(zones),
+        )
+        for i in range(school_count)
+    ]
+    distribution = _distribution_by_school_id(rng, schools, spec.total_candidates)
+
+    cap = script_envelope_cap(spec.paper_number)
+    rows: list[tuple[ScriptEnvelope, ScriptPackingSeries, School]] = []
+    for school in schools:
+        for series_number, candidates in _series_split(distribution[school.id], spec.series_count).items():
+            packing = ScriptPackingSeries(
+                id=_seeded_uuid(rng),
+                school_id=school.id,
+                subject_id=_BENCHMARK_SUBJECT_ID,
+                paper_number=spec.paper_number,
+                series_number=series_number,
+            )
+            counts = _deterministic_envelope_counts(total_booklets=candidates, cap=cap)
+            for idx, count in enumerate(_apply_random_envelope_deductions(rng, counts=counts), start=1):
+                envelope = ScriptEnvelope(
+                    id=_seeded_uuid(rng),
+                    packing_series_id=packing.id,
+                    envelope_number=idx,
+                    booklet_count=count,
+                )
+                rows.append((envelope, packing, school))
+
+    school_regions = sorted({school.region for school in schools}, key=lambda r: r.value)
+    examiners: list[Examiner] = []
+    for i in range(spec.examiner_count):
+        examiner = Examiner(
+            id=_seeded_uuid(rng),
+            name=f"Simulation Examiner {i + 1:04d}",
+            examiner_type=simulated_examiner_type(rng, i),
+            region=rng.choice(school_regions),
+            roster_source=ExaminerRosterSource.MANUAL,
+        )
+        examiner.subjects = [ExaminerSubject(examiner_id=examiner.id, subject_id=_BENCHMARK_SUBJECT_ID)]
+        examiners.append(examiner)
+    examiners.sort(key=lambda ex: ex.name)
+
+    total_booklets = sum(int(env.booklet_count) for env, _series, _school in rows)
+    quota = max(1, -(-total_booklets // max(1, spec.examiner_count)))
+    return AllocationInstance(
+        spec=spec,
+        subject_id=_BENCHMARK_SUBJECT_ID,
+        rows=rows,
+        examiners=examiners,
+        region_rules=region_cross_marking_rules(school_regions, spec.cross_marking_span),
+        quota_by_type_subject={(t, _BENCHMARK_SUBJECT_ID): quota for t in ExaminerType},
+    )
+
+
+def _assignment_metrics(
+    instance: AllocationInstance,
+    assignments: list[tuple[UUID, UUID]],
+) -> dict[str, int]:
+    """Counts from (envelope_id, examiner_id) pairs."""
+    booklets_by_env = {env.id: int(env.booklet_count) for env, _series, _school in instance.rows}
+    assigned_env = {env_id for env_id, _ex in assignments}
+    load: dict[UUID, int] = {}
+    for env_id, examiner_id in assignments:
+        load[examiner_id] = load.get(examiner_id, 0) + booklets_by_env[env_id]
+    deviation = 0
+    for ex in instance.examiners:
+        quota = instance.quota_by_type_subject.get((ex.examiner_type, instance.subject_id))
+        if quota is not None:
+            deviation += abs(load.get(ex.id, 0) - quota)
+    unassigned = [b for env_id, b in booklets_by_env.items() if b > 0 and env_id not in assigned_env]
+    return {
+        "assigned_envelopes": len(assigned_env),
+        "unassigned_envelopes": len(unassigned),
+        "unassigned_booklets": sum(unassigned),
+        "quota_abs_deviation": deviation,
+    }
+
+
+def _solve(instance: AllocationInstance, strategy: str, options: AllocationSolveOptions) -> dict[str, Any]:
+    if strategy == AllocationSolveModeSchema.regional_greedy.value:
+        t0 = time.perf_counter()
+        result = regional_greedy_solve(
+            instance.rows,
+            instance.examiners,
+            subject_id=instance.subject_id,
+            cross_marking_region_rules=instance.region_rules,
+            quota_by_type_subject=instance.quota_by_type_subject,
+            quota_tolerance_booklets=options.rebalance_tolerance_booklets,
+        )
+        return {
+            "ok": True,
+            "build_sec": 0.0,
+            "solve_sec": time.perf_counter() - t0,
+            "objective": None,
+            "proven_optimal": None,
+            "eligible_pairs": None,
+            "assignments": [(a.envelope_id, a.examiner_id) for a in result.assignments],
+            "message": None,
+        }
+
+    if strategy == AllocationSolveModeSchema.decomposed.value:
+        t0 = time.perf_counter()
+        solved = solve_decomposed_by_region(
+            instance.rows,
+            instance.examiners,
+            region_parsed=instance.region_rules,
+            quota_by_type_subject=instance.quota_by_type_subject,
+            unassigned_penalty=options.unassigned_penalty,
+            time_limit_sec=options.time_limit_sec,
+            fairness_weight=options.fairness_weight,
+            school_cohesion_weight=options.school_cohesion_weight,
+            prefer_larger_booklets_epsilon=options.prefer_larger_booklets_epsilon,
+            marking_region_solve_order=None,
+        )
+        total = time.perf_counter() - t0
+        failure = solved.failure
+        stopped_early = AllocationSubgroupStatusSchema.stopped_feasible.value
+        return {
+            "ok": failure is None,
+            "build_sec": max(0.0, total - solved.solve_time_sec),
+            "solve_sec": solved.solve_time_sec,
+            "objective": solved.objective_sum if failure is None else failure.objective,
+            "proven_optimal": failure is None and all(sg["status"] != stopped_early for sg in solved.subgroup_stats),
+            "eligible_pairs": sum(int(sg.get("eligible_pair_count") or 0) for sg in solved.subgroup_stats),
+            "assignments": [(p.envelope_id, p.examiner_id) for p in solved.pair_assignments],
+            "message": failure.message if failure is not None else None,
+        }
+
+    t0 = time.perf_counter()
+    pairs, _env_map = build_eligible_pairs(
+        instance.rows,
+        instance.examiners,
+        cross_marking_region_rules=instance.region_rules,
+    )
+    slack = slack_targets_for_examiner_list(instance.examiners, instance.quota_by_type_subject)
+    build_sec = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    milp_out = solve_script_allocation_milp(
+        pairs=pairs,
+        slack_targets=slack,
+        num_envelopes=len(instance.rows),
+        num_examiners=len(instance.examiners),
+        unassigned_penalty=options.unassigned_penalty,
+        time_limit_sec=options.time_limit_sec,
+        fairness_weight=options.fairness_weight,
+        enforce_single_series_per_examiner=options.enforce_single_series_per_examiner,
+        school_cohesion_weight=options.school_cohesion_weight,
+        prefer_larger_booklets_epsilon=options.prefer_larger_booklets_epsilon,
+    )
+    return {
+        "ok": milp_out.success,
+        "build_sec": build_sec,
+        "solve_sec": time.perf_counter() - t1,
+        "objective": milp_out.objective,
+        "proven_optimal": milp_out.proven_optimal,
+        "eligible_pairs": len(pairs),
+        "assignments": [(p.envelope_id, p.examiner_id) for p in milp_out.pair_assignments],
+        "message": None if milp_out.success and milp_out.proven_optimal else milp_out.message,
+    }
+
+
+def run_strategy(
+    instance: AllocationInstance,
+    strategy: str,
+    *,
+    options: AllocationSolveOptions | None = None,
+    trace_memory: bool = True,
+) -> StrategyResult:
+    """Run one solve mode; peak memory is Python/NumPy allocations traced during the run."""
+    options = options or AllocationSolveOptions()
+    started_tracing = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+    try:
+        out = _solve(instance, strategy, options)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    return StrategyResult(
+        strategy=strategy,
+        status="ok" if out["ok"] else "failed",
+        build_sec=round(out["build_sec"], 4),
+        solve_sec=round(out["solve_sec"], 4),
+        objective=out["objective"],
+        proven_optimal=out["proven_optimal"],
+        eligible_pairs=out["eligible_pairs"],
+        peak_memory_bytes=peak,
+        message=out["message"],
+        **_assignment_metrics(instance, out["assignments"]),
+    )
+
+
+def run_allocation_benchmark(
+    specs: Sequence[BenchmarkInstanceSpec],
+    *,
+    strategies: Sequence[str] = STRATEGIES,
+    options: AllocationSolveOptions | None = None,
+    trace_memory: bool = True,
+) -> dict[str, Any]:
+    """Build each instance once and run every strategy on it; returns a JSON-serializable report."""
+    options = options or AllocationSolveOptions()
+    instances: list[dict[str, Any]] = []
+    for spec in specs:
+        t0 = time.perf_counter()
+        instance = build_allocation_instance(spec)
+        generate_sec = time.perf_counter() - t0
+        instances.append(
+            {
+                "name": spec.name,
+                "spec": asdict(spec),
+                "stats": instance.stats(),
+                "generate_sec": round(generate_sec, 4),
+                "results": [
+                    asdict(run_strategy(instance, strategy, options=options, trace_memory=trace_memory))
+                    for strategy in strategies
+                ],
+            }
+        )
+    return {
+        "generated_at": datetime.now(UTC).isoformat(timespec="seconds").replace("+00:00", "Z"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+        },
+        "options": options.model_dump(
+            include={
+                "unassigned_penalty",
+                "time_limit_sec",
+                "fairness_weight",
+                "school_cohesion_weight",
+                "prefer_larger_booklets_epsilon",
+                "rebalance_tolerance_booklets",
+                "enforce_single_series_per_examiner",
+            }
+        ),
+        "instances": instances,
+    }
+
+
+def compare_benchmark_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    time_tolerance: float = 0.5,
+    min_time_delta_sec: float = 1.0,
+) -> list[str]:
+    """Regressions of ``current`` against ``baseline`` for (instance, strategy) pairs present in both."""
+    base_results = {
+        (inst["name"], res["strategy"]): res for inst in baseline.get("instances", []) for res in inst["results"]
+    }
+    regressions: list[str] = []
+    for inst in current.get("instances", []):
+        for res in inst["results"]:
+            key = (inst["name"], res["strategy"])
+            base = base_results.get(key)
+            if base is None:
+                continue
+            label = f"{key[0]}/{key[1]}"
+            if base["status"] == "ok" and res["status"] != "ok":
+                regressions.append(f"{label}: solve failed ({res.get('message') or 'no message'})")
+                continue
+            base_total = float(base["build_sec"]) + float(base["solve_sec"])
+            cur_total = float(res["build_sec"]) + float(res["solve_sec"])
+            if cur_total - base_total > min_time_delta_sec and cur_total > base_total * (1.0 + time_tolerance):
+                regressions.append(f"{label}: time {base_total:.2f}s -> {cur_total:.2f}s")
+            if int(res["unassigned_booklets"]) > int(base["unassigned_booklets"]):
+                regressions.append(
+                    f"{label}: unassigned booklets {base['unassigned_booklets']} -> {res['unassigned_booklets']}"
+                )
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", action="append", choices=sorted(BENCHMARK_SCALES), help="Repeatable.")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES, help="Repeatable; default all.")
+    parser.add_argument("--time-limit", type=float, default=120.0, help="Solver time limit per strategy (s).")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--baseline", help="Previous report to check for regressions.")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed relative slowdown.")
+    parser.add_argument("--no-trace-memory", action="store_true", help="Skip tracemalloc (faster, no peak memory).")
+    args = parser.parse_args(argv)
+
+    specs = [BENCHMARK_SCALES[name] for name in (args.scale or ["small", "medium"])]
+    report = run_allocation_benchmark(
+        specs,
+        strategies=args.strategy or STRATEGIES,
+        options=AllocationSolveOptions(time_limit_sec=args.time_limit),
+        trace_memory=not args.no_trace_memory,
+    )
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare_benchmark_reports(baseline, report, time_tolerance=args.time_tolerance)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
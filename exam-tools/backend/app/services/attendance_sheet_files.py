@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterator
 from datetime import date
 from pathlib import Path
 
@@ -11,10 +12,14 @@ except ImportError:
 
 from app.config import settings
 from app.services.exam_documents import (
+    STREAM_CHUNK_SIZE,
     ExamDocumentUploadError,
     _get_gcs_bucket,
     _guess_content_type,
     is_uuid_stored_object_key,
+    iter_gcs_blob_chunks,
+    iter_local_file_chunks,
+    iter_stored_chunks,
     normalized_extension,
     read_stored_bytes,
     remove_stored_file,
@@ -166,6 +171,18 @@ def read_attendance_sheet_bytes(stored_path: str) -> bytes:
     return path.read_bytes()
 
 
+def iter_attendance_sheet_chunks(stored_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Chunked counterpart of :func:`read_attendance_sheet_bytes` for streaming downloads."""
+    if is_uuid_stored_object_key(stored_path):
+        yield from iter_stored_chunks(stored_path, chunk_size)
+        return
+    if _uses_gcs():
+        bucket = _get_gcs_bucket()
+        yield from iter_gcs_blob_chunks(bucket.blob(stored_path), stored_path, chunk_size)
+        return
+    yield from iter_local_file_chunks(_resolve_local_attendance_path(stored_path), stored_path, chunk_size)
+
+
 def remove_attendance_sheet_file(stored_path: str) -> None:
     if is_uuid_stored_object_key(stored_path):
         remove_stored_file(stored_path)
@@ -0,0 +1,185 @@
+"""Process-level in-memory index of the bank branch directory for picker searches.
+
+The directory is a few thousand rows that change only on super-admin uploads, while the
+bank pickers on the public token-scoped routes search it on every keystroke. The index
+keeps every branch in picker order with trigram postings on the normalized (lower-cased,
+whitespace-collapsed) bank and branch names, so a substring search intersects a few
+posting lists and verifies the survivors instead of running ``ILIKE '%…%'`` + ``COUNT``.
+
+Within ``bank_branch_index_ttl_seconds`` the cached index is used as-is; after that one
+aggregate query compares the directory version (row count / latest update) and reloads on
+change. Uploads call ``invalidate_bank_branch_index`` so this process sees them at once.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import BankBranch
+
+DirectoryVersion = tuple[int, datetime | None]
+
+_GRAM = 3
+
+
+def normalize_bank_text(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+@dataclass(frozen=True)
+class IndexedBankBranch:
+    id: UUID
+    bank_code: str
+    bank_name: str
+    branch_name: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class _SubstringIndex:
+    """Trigram postings over one text per row; rows are positions in the index order."""
+
+    def __init__(self, texts: list[str]) -> None:
+        self.texts = texts
+        postings: dict[str, list[int]] = defaultdict(list)
+        for pos, text in enumerate(texts):
+            for gram in _trigrams(text):
+                postings[gram].append(pos)
+        self.postings = {gram: frozenset(rows) for gram, rows in postings.items()}
+
+    def search(self, needle: str) -> set[int]:
+        """Positions whose text contains *needle* (already normalized, non-empty)."""
+        if len(needle) < _GRAM:
+            return {pos for pos, text in enumerate(self.texts) if needle in text}
+        grams = sorted(_trigrams(needle), key=lambda g: len(self.postings.get(g, ())))
+        candidates: set[int] | None = None
+        for gram in grams:
+            rows = self.postings.get(gram)
+            if not rows:
+                return set()
+            candidates = set(rows) if candidates is None else candidates & rows
+            if not candidates:
+                return set()
+        return {pos for pos in candidates or () if needle in self.texts[pos]}
+
+
+@dataclass(frozen=True)
+class BankBranchIndex:
+    version: DirectoryVersion
+    # Sorted by bank name, branch name, bank code (the picker order)
+    branches: tuple[IndexedBankBranch, ...]
+    by_bank_name: dict[str, tuple[int, ...]]
+    bank_names: tuple[str, ...]
+    bank_text: _SubstringIndex
+    branch_text: _SubstringIndex
+    bank_name_text: _SubstringIndex
+
+    @classmethod
+    def build(cls, branches: Iterable[IndexedBankBranch], *, version: DirectoryVersion = (0, None)) -> BankBranchIndex:
+        ordered = tuple(sorted(branches, key=lambda b: (b.bank_name, b.branch_name, b.bank_code)))
+        by_bank_name: dict[str, list[int]] = defaultdict(list)
+        for pos, branch in enumerate(ordered):
+            by_bank_name[branch.bank_name].append(pos)
+        bank_names = tuple(sorted(by_bank_name))
+        return cls(
+            version=version,
+            branches=ordered,
+            by_bank_name={name: tuple(rows) for name, rows in by_bank_name.items()},
+            bank_names=bank_names,
+            bank_text=_SubstringIndex([normalize_bank_text(b.bank_name) for b in ordered]),
+            branch_text=_SubstringIndex([normalize_bank_text(b.branch_name) for b in ordered]),
+            bank_name_text=_SubstringIndex([normalize_bank_text(n) for n in bank_names]),
+        )
+
+    def filter(
+        self,
+        *,
+        search: str | None = None,
+        bank_name: str | None = None,
+        bank_name_exact: str | None = None,
+        branch_name: str | None = None,
+    ) -> list[IndexedBankBranch]:
+        """Same filters as the directory query: ``search`` overrides the per-field filters."""
+        selected: set[int] | None = None
+
+        def narrow(rows: set[int]) -> None:
+            nonlocal selected
+            selected = rows if selected is None else selected & rows
+
+        if search and search.strip():
+            needle = normalize_bank_text(search)
+            narrow(self.bank_text.search(needle) | self.branch_text.search(needle))
+        else:
+            if bank_name_exact and bank_name_exact.strip():
+                narrow(set(self.by_bank_name.get(bank_name_exact.strip(), ())))
+            elif bank_name and bank_name.strip():
+                narrow(self.bank_text.search(normalize_bank_text(bank_name)))
+            if branch_name and branch_name.strip():
+                narrow(self.branch_text.search(normalize_bank_text(branch_name)))
+
+        if selected is None:
+            return list(self.branches)
+        return [self.branches[pos] for pos in sorted(selected)]
+
+    def distinct_bank_names(self, q: str | None = None) -> list[str]:
+        if not q or not q.strip():
+            return list(self.bank_names)
+        rows = self.bank_name_text.search(normalize_bank_text(q))
+        return [self.bank_names[pos] for pos in sorted(rows)]
+
+
+@dataclass
+class _CacheSlot:
+    index: BankBranchIndex
+    checked_at: float
+
+
+_cache: dict[str, _CacheSlot] = {}
+_CACHE_KEY = "bank_branches"
+
+
+async def directory_version(session: AsyncSession) -> DirectoryVersion:
+    row = (await session.execute(select(func.count(BankBranch.id), func.max(BankBranch.updated_at)))).one()
+    return (int(row[0] or 0), row[1])
+
+
+async def get_bank_branch_index(session: AsyncSession) -> BankBranchIndex:
+    now = time.monotonic()
+    slot = _cache.get(_CACHE_KEY)
+    if slot is not None and now - slot.checked_at < settings.bank_branch_index_ttl_seconds:
+        return slot.index
+
+    version = await directory_version(session)
+    if slot is not None and slot.index.version == version:
+        slot.checked_at = now
+        return slot.index
+
+    stmt = select(
+        BankBranch.id,
+        BankBranch.bank_code,
+        BankBranch.bank_name,
+        BankBranch.branch_name,
+        BankBranch.created_at,
+        BankBranch.updated_at,
+    )
+    rows = (await session.execute(stmt)).all()
+    index = BankBranchIndex.build((IndexedBankBranch(*row) for row in rows), version=version)
+    _cache[_CACHE_KEY] = _CacheSlot(index=index, checked_at=now)
+    return index
+
+
+def invalidate_bank_branch_index() -> None:
+    _cache.clear()
@@ -1,13 +1,14 @@
-"""Shared bank branch directory queries for authenticated and token-scoped public pickers."""
+"""Shared bank branch directory queries for authenticated and token-scoped public pickers.
 
-from __future__ import annotations
+Both lookups are answered from the process-level index in ``bank_branch_index``; the
+session is only used when that index has to check its version or reload.
+"""
 
-from typing import cast
+from __future__ import annotations
 
-from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import BankBranch
+from app.services.bank_branch_index import IndexedBankBranch, get_bank_branch_index
 
 MAX_LIST = 500
 DEFAULT_LIMIT = 200
@@ -22,37 +23,15 @@ async def list_bank_branches(
     branch_name: str | None = None,
     skip: int = 0,
     limit: int = DEFAULT_LIMIT,
-) -> tuple[list[BankBranch], int]:
-    stmt = select(BankBranch)
-    count_stmt = select(func.count()).select_from(BankBranch)
-
-    if search and search.strip():
-        pat = f"%{search.strip()}%"
-        cond = or_(BankBranch.bank_name.ilike(pat), BankBranch.branch_name.ilike(pat))
-        stmt = stmt.where(cond)
-        count_stmt = count_stmt.where(cond)
-    else:
-        if bank_name_exact and bank_name_exact.strip():
-            exact = bank_name_exact.strip()
-            stmt = stmt.where(BankBranch.bank_name == exact)
-            count_stmt = count_stmt.where(BankBranch.bank_name == exact)
-        elif bank_name and bank_name.strip():
-            pat = f"%{bank_name.strip()}%"
-            stmt = stmt.where(BankBranch.bank_name.ilike(pat))
-            count_stmt = count_stmt.where(BankBranch.bank_name.ilike(pat))
-        if branch_name and branch_name.strip():
-            pat = f"%{branch_name.strip()}%"
-            stmt = stmt.where(BankBranch.branch_name.ilike(pat))
-            count_stmt = count_stmt.where(BankBranch.branch_name.ilike(pat))
-
-    total = int(await session.scalar(count_stmt) or 0)
-    stmt = (
-        stmt.order_by(BankBranch.bank_name.asc(), BankBranch.branch_name.asc(), BankBranch.bank_code.asc())
-        .offset(skip)
-        .limit(limit)
+) -> tuple[list[IndexedBankBranch], int]:
+    index = await get_bank_branch_index(session)
+    rows = index.filter(
+        search=search,
+        bank_name=bank_name,
+        bank_name_exact=bank_name_exact,
+        branch_name=branch_name,
     )
-    result = await session.execute(stmt)
-    return list(result.scalars().all()), total
+    return rows[skip : skip + limit], len(rows)
 
 
 async def distinct_bank_names(
@@ -61,9 +40,5 @@ async def distinct_bank_names(
     q: str | None = None,
     limit: int = 100,
 ) -> list[str]:
-    stmt = select(BankBranch.bank_name).distinct()
-    if q and q.strip():
-        stmt = stmt.where(BankBranch.bank_name.ilike(f"%{q.strip()}%"))
-    stmt = stmt.order_by(BankBranch.bank_name.asc()).limit(limit)
-    result = await session.execute(stmt)
-    return [cast(str, name) for name in result.scalars().all()]
+    index = await get_bank_branch_index(session)
+    return index.distinct_bank_names(q)[:limit]
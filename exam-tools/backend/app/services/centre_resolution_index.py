@@ -0,0 +1,245 @@
+"""Per-examination, in-memory centre topology index.
+
+Mirrors the lookups in :mod:`app.services.centre_resolution` (school → centre,
+centre → schools per membership scope, host counts) as synchronous methods over
+data loaded once per examination. Indexes are cached per process and rebuilt when
+the examination's topology version (structure mode plus centre/membership row
+counts and timestamps) changes, so callers inside loops no longer await per school.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from cachetools import LRUCache
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    CentreStructureMode,
+    Examination,
+    ExaminationCentre,
+    ExaminationCentreMembership,
+    ExaminationCentreMembershipScope,
+    ExamInspectorSubjectScope,
+)
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services.centre_resolution import (
+    _normalize_inspector_scope,
+    _normalize_membership_scope,
+    membership_scope_for_timetable_filter,
+)
+
+CentreTopologyVersion = tuple[str, int, datetime | None, int, datetime | None]
+
+_EMPTY: frozenset[UUID] = frozenset()
+
+
+@dataclass(frozen=True)
+class CentreResolutionIndex:
+    """Immutable centre/school membership lookups for one examination."""
+
+    examination_id: int
+    mode: CentreStructureMode
+    version: CentreTopologyVersion
+    centre_by_school_scope: dict[tuple[UUID, ExaminationCentreMembershipScope], UUID]
+    schools_by_centre_scope: dict[tuple[UUID, ExaminationCentreMembershipScope], frozenset[UUID]]
+    scopes_by_school_centre: dict[tuple[UUID, UUID], frozenset[ExaminationCentreMembershipScope]]
+
+    @classmethod
+    def from_memberships(
+        cls,
+        examination_id: int,
+        mode: CentreStructureMode | str,
+        memberships: Iterable[tuple[UUID, UUID, ExaminationCentreMembershipScope | str]],
+        *,
+        version: CentreTopologyVersion | None = None,
+    ) -> CentreResolutionIndex:
+        """Build from ``(school_id, centre_id, subject_scope)`` membership rows."""
+        if isinstance(mode, str):
+            mode = CentreStructureMode(mode)
+        centre_by_school_scope: dict[tuple[UUID, ExaminationCentreMembershipScope], UUID] = {}
+        schools: dict[tuple[UUID, ExaminationCentreMembershipScope], set[UUID]] = defaultdict(set)
+        scopes: dict[tuple[UUID, UUID], set[ExaminationCentreMembershipScope]] = defaultdict(set)
+        for school_id, centre_id, raw_scope in memberships:
+            scope = _normalize_membership_scope(raw_scope)
+            centre_by_school_scope[(school_id, scope)] = centre_id
+            schools[(centre_id, scope)].add(school_id)
+            scopes[(school_id, centre_id)].add(scope)
+        return cls(
+            examination_id=examination_id,
+            mode=mode,
+            version=version or (mode.value, 0, None, 0, None),
+            centre_by_school_scope=centre_by_school_scope,
+            schools_by_centre_scope={k: frozenset(v) for k, v in schools.items()},
+            scopes_by_school_centre={k: frozenset(v) for k, v in scopes.items()},
+        )
+
+    def _default_scope(self) -> ExaminationCentreMembershipScope:
+        if self.mode == CentreStructureMode.UNIFIED:
+            return ExaminationCentreMembershipScope.ALL
+        return ExaminationCentreMembershipScope.CORE
+
+    def resolve_centre_id(
+        self,
+        school_id: UUID,
+        *,
+        membership_scope: ExaminationCentreMembershipScope | str,
+    ) -> UUID | None:
+        """Same fallback as ``resolve_centre_for_school``: ALL on SPLIT tries CORE then ELECTIVE."""
+        scope = _normalize_membership_scope(membership_scope)
+        scopes_to_try = [scope]
+        if scope == ExaminationCentreMembershipScope.ALL and self.mode == CentreStructureMode.SPLIT:
+            scopes_to_try = [ExaminationCentreMembershipScope.CORE, ExaminationCentreMembershipScope.ELECTIVE]
+        for try_scope in scopes_to_try:
+            centre_id = self.centre_by_school_scope.get((school_id, try_scope))
+            if centre_id is not None:
+                return centre_id
+        return None
+
+    def centre_school_ids(
+        self,
+        centre_id: UUID,
+        *,
+        membership_scope: ExaminationCentreMembershipScope | str | None = None,
+    ) -> frozenset[UUID]:
+        scope = self._default_scope() if membership_scope is None else _normalize_membership_scope(membership_scope)
+        return self.schools_by_centre_scope.get((centre_id, scope), _EMPTY)
+
+    def hosted_school_count(
+        self,
+        centre_id: UUID,
+        *,
+        membership_scope: ExaminationCentreMembershipScope | str | None = None,
+    ) -> int:
+        return len(self.centre_school_ids(centre_id, membership_scope=membership_scope))
+
+    def host_overview_school_ids(self, centre_id: UUID) -> frozenset[UUID]:
+        """Union of scopes on SPLIT (see ``centre_scope_school_ids_for_host_overview``)."""
+        if self.mode == CentreStructureMode.UNIFIED:
+            return self.centre_school_ids(centre_id, membership_scope=ExaminationCentreMembershipScope.ALL)
+        return self.centre_school_ids(
+            centre_id, membership_scope=ExaminationCentreMembershipScope.CORE
+        ) | self.centre_school_ids(centre_id, membership_scope=ExaminationCentreMembershipScope.ELECTIVE)
+
+    def inspector_scope_school_ids(
+        self,
+        centre_id: UUID,
+        inspector_scope: ExamInspectorSubjectScope | str,
+    ) -> frozenset[UUID]:
+        """Same result as ``centre_scope_school_ids_for_inspector_scope``."""
+        ins = _normalize_inspector_scope(inspector_scope)
+        if self.mode == CentreStructureMode.UNIFIED:
+            return self.centre_school_ids(centre_id, membership_scope=ExaminationCentreMembershipScope.ALL)
+        if ins == ExamInspectorSubjectScope.ALL:
+            return self.host_overview_school_ids(centre_id)
+        if ins == ExamInspectorSubjectScope.CORE:
+            return self.centre_school_ids(centre_id, membership_scope=ExaminationCentreMembershipScope.CORE)
+        return self.centre_school_ids(centre_id, membership_scope=ExaminationCentreMembershipScope.ELECTIVE)
+
+    def scope_ids_for_subject_filter(
+        self,
+        centre_id: UUID,
+        scope_ids: set[UUID] | frozenset[UUID],
+        *,
+        subject_filter: TimetableDownloadFilter,
+    ) -> set[UUID]:
+        mem_scope = membership_scope_for_timetable_filter(subject_filter)
+        if mem_scope is None or self.mode != CentreStructureMode.SPLIT:
+            return set(scope_ids)
+        return set(scope_ids) & self.centre_school_ids(centre_id, membership_scope=mem_scope)
+
+    def centre_has_membership_for_subject_filter(
+        self,
+        centre_id: UUID,
+        *,
+        subject_filter: TimetableDownloadFilter,
+    ) -> bool:
+        if self.mode != CentreStructureMode.SPLIT or subject_filter == TimetableDownloadFilter.ALL:
+            return True
+        mem_scope = membership_scope_for_timetable_filter(subject_filter)
+        if mem_scope is None:
+            return True
+        return self.hosted_school_count(centre_id, membership_scope=mem_scope) > 0
+
+    def school_membership_scopes_at_centre(
+        self,
+        school_id: UUID,
+        centre_id: UUID,
+    ) -> frozenset[ExaminationCentreMembershipScope]:
+        return self.scopes_by_school_centre.get((school_id, centre_id), frozenset())
+
+
+# Examinations whose index is kept per process (least recently used are dropped first)
+_INDEX_CACHE_SIZE = 32
+_index_cache: LRUCache[int, CentreResolutionIndex] = LRUCache(maxsize=_INDEX_CACHE_SIZE)
+
+
+async def centre_topology_version(session: AsyncSession, examination_id: int) -> CentreTopologyVersion | None:
+    """Cheap single-row fingerprint of the examination's centre topology (None if exam missing)."""
+    membership_stats = (
+        select(
+            func.count(ExaminationCentreMembership.id).label("n"),
+            func.max(ExaminationCentreMembership.created_at).label("latest"),
+        )
+        .where(ExaminationCentreMembership.examination_id == examination_id)
+        .subquery()
+    )
+    centre_stats = (
+        select(
+            func.count(ExaminationCentre.id).label("n"),
+            func.max(ExaminationCentre.updated_at).label("latest"),
+        )
+        .where(ExaminationCentre.examination_id == examination_id)
+        .subquery()
+    )
+    stmt = select(
+        Examination.centre_structure_mode,
+        membership_stats.c.n,
+        membership_stats.c.latest,
+        centre_stats.c.n,
+        centre_stats.c.latest,
+    ).where(Examination.id == examination_id)
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    mode = row[0]
+    mode_value = mode.value if isinstance(mode, CentreStructureMode) else str(mode)
+    return (mode_value, int(row[1] or 0), row[2], int(row[3] or 0), row[4])
+
+
+async def get_centre_resolution_index(session: AsyncSession, examination_id: int) -> CentreResolutionIndex:
+    """Cached index for *examination_id*; rebuilt in one membership query when the version changes."""
+    version = await centre_topology_version(session, examination_id)
+    if version is None:
+        raise ValueError("Examination not found")
+    cached = _index_cache.get(examination_id)
+    if cached is not None and cached.version == version:
+        return cached
+
+    stmt = select(
+        ExaminationCentreMembership.school_id,
+        ExaminationCentreMembership.examination_centre_id,
+        ExaminationCentreMembership.subject_scope,
+    ).where(ExaminationCentreMembership.examination_id == examination_id)
+    rows = (await session.execute(stmt)).all()
+    index = CentreResolutionIndex.from_memberships(
+        examination_id,
+        version[0],
+        [(row[0], row[1], row[2]) for row in rows],
+        version=version,
+    )
+    _index_cache[examination_id] = index
+    return index
+
+
+def invalidate_centre_resolution_index(examination_id: int | None = None) -> None:
+    """Drop cached indexes (all examinations when *examination_id* is None)."""
+    if examination_id is None:
+        _index_cache.clear()
+    else:
+        _index_cache.pop(examination_id, None)
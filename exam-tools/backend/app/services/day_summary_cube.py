@@ -0,0 +1,194 @@
+"""Per-examination day-summary cube shared by national, centre, depot and finance summaries.
+
+Day summaries used to reload every in-scope candidate with their subject selections on
+each request (and once per date for finance reports). The cube is built from one
+(candidate, school, subject, series) query per examination and answers every summary as a
+roll-up:
+
+* ``sittings[(date, school_id)]`` maps the set of timetable codes a candidate sits that
+  day to the number of candidates at the school with exactly that set. Slot counts are
+  the sum over sets containing the code; unique candidates for any subset of codes are
+  the sum over sets that intersect it, so centre subject filters never need a rebuild.
+* Centre memberships are not part of the cube. Callers pass the school scope they
+  resolved (centre, depot or national), so membership edits do not invalidate it.
+
+Cubes are cached per examination and rebuilt when the schedule/candidate/subject
+fingerprint returned by ``day_summary_version`` changes. The fingerprint is read on
+every call, so write paths need no explicit invalidation.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ExaminationCandidate, ExaminationCandidateSubject, ExaminationSchedule
+from app.schemas.examination import TimetableEntry
+from app.services.exam_timetable_pdf import load_schedules_for_exam, schedules_to_entries
+
+CANDIDATES_PER_INVIGILATOR = 30
+
+# (candidate_id, school_id, subject_code, series)
+CandidateSubjectRow = tuple[int, UUID, str, int | None]
+
+# (row count, max id, latest update) for schedules, candidates and candidate subjects
+TableStamp = tuple[int, int | None, datetime | None]
+DaySummaryVersion = tuple[TableStamp, TableStamp, TableStamp]
+
+
+def invigilators_required(unique_candidates: int) -> int:
+    return math.ceil(unique_candidates / CANDIDATES_PER_INVIGILATOR) if unique_candidates else 0
+
+
+@dataclass(frozen=True)
+class DaySummaryCube:
+    examination_id: int
+    entries: list[TimetableEntry]
+    # (date, school_id) -> codes sat that day -> candidates
+    sittings: dict[tuple[date, UUID], dict[frozenset[str], int]]
+    # (date, code, school_id) -> candidates sitting any paper of code that day
+    cells: dict[tuple[date, str, UUID], int]
+    codes_by_school: dict[UUID, frozenset[str]]
+    version: DaySummaryVersion | None = field(default=None, compare=False)
+
+    @classmethod
+    def build(
+        cls,
+        examination_id: int,
+        entries: list[TimetableEntry],
+        rows: Iterable[CandidateSubjectRow],
+        *,
+        version: DaySummaryVersion | None = None,
+    ) -> DaySummaryCube:
+        """Fold candidate subject rows into per-day sitting sets (same matching as the router)."""
+        # code -> [(paper, date)] so each candidate row is matched by dict lookup.
+        slots_by_code: dict[str, list[tuple[int, date]]] = defaultdict(list)
+        for ent in entries:
+            slots_by_code[str(ent.subject_code).strip()].append((ent.paper, ent.examination_date))
+
+        school_of: dict[int, UUID] = {}
+        days_by_cand: dict[int, dict[date, set[str]]] = defaultdict(lambda: defaultdict(set))
+        codes_by_school: dict[UUID, set[str]] = defaultdict(set)
+        for cand_id, school_id, subject_code, series in rows:
+            if not subject_code:
+                continue
+            code = str(subject_code).strip()
+            school_of[cand_id] = school_id
+            codes_by_school[school_id].add(code)
+            for paper, day in slots_by_code.get(code, ()):
+                if series is None or series == paper:
+                    days_by_cand[cand_id][day].add(code)
+
+        sittings: dict[tuple[date, UUID], dict[frozenset[str], int]] = defaultdict(lambda: defaultdict(int))
+        for cand_id, by_day in days_by_cand.items():
+            school_id = school_of[cand_id]
+            for day, codes in by_day.items():
+                sittings[(day, school_id)][frozenset(codes)] += 1
+
+        cells: dict[tuple[date, str, UUID], int] = defaultdict(int)
+        for (day, school_id), by_codes in sittings.items():
+            for codes, n in by_codes.items():
+                for code in codes:
+                    cells[(day, code, school_id)] += n
+
+        return cls(
+            examination_id=examination_id,
+            entries=list(entries),
+            sittings={key: dict(by_codes) for key, by_codes in sittings.items()},
+            cells=dict(cells),
+            codes_by_school={sid: frozenset(c) for sid, c in codes_by_school.items()},
+            version=version,
+        )
+
+    def candidates(self, day: date, code: str, school_id: UUID) -> int:
+        return self.cells.get((day, str(code).strip(), school_id), 0)
+
+    def slot_total(self, day: date, code: str, school_ids: Iterable[UUID]) -> int:
+        return sum(self.candidates(day, code, sid) for sid in school_ids)
+
+    def unique_candidates(self, day: date, school_ids: Iterable[UUID], codes: Iterable[str]) -> int:
+        """Candidates in ``school_ids`` sitting at least one of ``codes`` on ``day``."""
+        wanted = frozenset(str(c).strip() for c in codes)
+        if not wanted:
+            return 0
+        total = 0
+        for sid in school_ids:
+            for sat, n in self.sittings.get((day, sid), {}).items():
+                if not wanted.isdisjoint(sat):
+                    total += n
+        return total
+
+
+_cube_cache: dict[int, DaySummaryCube] = {}
+
+
+async def day_summary_version(session: AsyncSession, examination_id: int) -> DaySummaryVersion:
+    """Single-row fingerprint of the schedules, candidates and candidate subjects of an examination."""
+    schedule_stats = select(
+        func.count(ExaminationSchedule.id),
+        func.max(ExaminationSchedule.id),
+        func.max(ExaminationSchedule.updated_at),
+    ).where(ExaminationSchedule.examination_id == examination_id)
+    candidate_stats = select(
+        func.count(ExaminationCandidate.id),
+        func.max(ExaminationCandidate.id),
+        func.max(ExaminationCandidate.updated_at),
+    ).where(ExaminationCandidate.examination_id == examination_id)
+    subject_stats = (
+        select(
+            func.count(ExaminationCandidateSubject.id),
+            func.max(ExaminationCandidateSubject.id),
+            func.max(ExaminationCandidateSubject.updated_at),
+        )
+        .join(ExaminationCandidate, ExaminationCandidate.id == ExaminationCandidateSubject.examination_candidate_id)
+        .where(ExaminationCandidate.examination_id == examination_id)
+    )
+    stmt = select(schedule_stats.subquery(), candidate_stats.subquery(), subject_stats.subquery())
+    row = (await session.execute(stmt)).one()
+    return (
+        (int(row[0] or 0), row[1], row[2]),
+        (int(row[3] or 0), row[4], row[5]),
+        (int(row[6] or 0), row[7], row[8]),
+    )
+
+
+async def get_day_summary_cube(session: AsyncSession, examination_id: int) -> DaySummaryCube:
+    """Cached cube for *examination_id*; rebuilt in two queries when the version changes."""
+    version = await day_summary_version(session, examination_id)
+    cached = _cube_cache.get(examination_id)
+    if cached is not None and cached.version == version:
+        return cached
+
+    entries = schedules_to_entries(await load_schedules_for_exam(session, examination_id))
+    stmt = (
+        select(
+            ExaminationCandidate.id,
+            ExaminationCandidate.school_id,
+            ExaminationCandidateSubject.subject_code,
+            ExaminationCandidateSubject.series,
+        )
+        .join(
+            ExaminationCandidateSubject,
+            ExaminationCandidateSubject.examination_candidate_id == ExaminationCandidate.id,
+        )
+        .where(
+            ExaminationCandidate.examination_id == examination_id,
+            ExaminationCandidate.school_id.isnot(None),
+        )
+    )
+    rows = (await session.execute(stmt)).all()
+    cube = DaySummaryCube.build(
+        examination_id,
+        entries,
+        [(row[0], row[1], row[2], row[3]) for row in rows],
+        version=version,
+    )
+    _cube_cache[examination_id] = cube
+    return cube
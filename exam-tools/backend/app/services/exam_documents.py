@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 import uuid
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
@@ -43,6 +44,9 @@ def is_uuid_stored_object_key(stored_path: str) -> bool:
     return bool(_STORED_NAME_RE.match(stored_path.lower()))
 
 
+# Read size used when streaming stored files (e.g. into zip downloads).
+STREAM_CHUNK_SIZE = 256 * 1024
+
 _gcs_bucket: Any = None
 
 
@@ -165,6 +169,34 @@ def read_stored_bytes(stored_path: str) -> bytes:
     return path.read_bytes()
 
 
+def iter_gcs_blob_chunks(blob: Any, stored_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a GCS object's bytes in chunks; missing objects raise ``FileNotFoundError``."""
+    try:
+        with blob.open("rb", chunk_size=chunk_size) as fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+    except NotFound:
+        raise FileNotFoundError(stored_path)
+
+
+def iter_local_file_chunks(path: Path, stored_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    if not path.is_file():
+        raise FileNotFoundError(stored_path)
+    with path.open("rb") as fh:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+
+
+def iter_stored_chunks(stored_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream document bytes from local disk or GCS without loading the whole file."""
+    if _uses_gcs():
+        bucket = _get_gcs_bucket()
+        blob = bucket.blob(_gcs_object_name(stored_path))
+        yield from iter_gcs_blob_chunks(blob, stored_path, chunk_size)
+        return
+    yield from iter_local_file_chunks(absolute_stored_path(stored_path), stored_path, chunk_size)
+
+
 def absolute_stored_path(stored_path: str) -> Path:
     base = storage_base_dir().resolve()
     _assert_safe_stored_name(stored_path)
@@ -3,14 +3,18 @@ from __future__ import annotations
 
 import io
 import re
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import date, datetime
+from typing import Any
 from uuid import UUID
 
 import pandas as pd
-from sqlalchemy import delete, or_, select
+from sqlalchemy import delete, insert, or_, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import (
     ExaminationCandidate,
     ExaminationCandidateSubject,
@@ -21,6 +25,17 @@ from app.models import (
 )
 from app.schemas.examination_candidates import ExaminationCandidateImportError
 
+ImportProgress = Callable[[int, int], None]
+
+_CANDIDATE_UPDATE_COLUMNS = (
+    "school_id",
+    "programme_id",
+    "index_number",
+    "full_name",
+    "date_of_birth",
+    "registration_status",
+)
+
 
 def _normalize_key(key: str) -> str:
     return re.sub(r"\s+", "_", str(key).strip().lower())
@@ -71,12 +86,150 @@ def parse_candidates_file(content: bytes, filename: str) -> pd.DataFrame:
     raise ValueError("File must be CSV or Excel (.csv, .xlsx, .xls)")
 
 
+@dataclass(frozen=True)
+class _CandidateRecord:
+    row_number: int
+    registration_number: str
+    values: dict[str, Any]
+    subjects: list[tuple[int, str, str]]
+
+
+def _column_values(df: pd.DataFrame, lookup: dict[str, str], *keys: str) -> pd.Series:
+    """Vectorized ``_get_cell``: first matching column, missing values as "", stripped strings."""
+    for k in keys:
+        nk = _normalize_key(k)
+        if nk in lookup:
+            col = df[lookup[nk]]
+            return col.where(col.notna(), "").astype(str).str.strip().reset_index(drop=True)
+    return pd.Series([""] * len(df), dtype=object)
+
+
+def _normalize_candidates_frame(df: pd.DataFrame, lookup: dict[str, str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "registration_number": _column_values(df, lookup, "registration_number"),
+            "full_name": _column_values(df, lookup, "name", "full_name"),
+            "school_code": _column_values(df, lookup, "school_code"),
+            "programme_code": _column_values(df, lookup, "programme_code"),
+            "index_number": _column_values(df, lookup, "index_number"),
+            "dob": _column_values(df, lookup, "dob", "date_of_birth"),
+            "registration_status": _column_values(df, lookup, "registration_status"),
+            "subject_codes": _column_values(df, lookup, "subject_original_codes", "subject_codes"),
+        }
+    )
+
+
+def _split_subject_codes(raw: pd.Series) -> pd.Series:
+    return raw.str.split(",").map(lambda parts: [t.strip() for t in parts if t.strip()])
+
+
+async def _resolve_subject_codes(
+    session: AsyncSession,
+    tokens: set[str],
+) -> dict[str, tuple[int, str, str]]:
+    """Map each token to (subject_id, stored code, name); original_code matches win over code."""
+    if not tokens:
+        return {}
+    stmt = select(Subject).where(or_(Subject.original_code.in_(tokens), Subject.code.in_(tokens)))
+    by_original: dict[str, tuple[int, str, str]] = {}
+    by_code: dict[str, tuple[int, str, str]] = {}
+    for subject in (await session.execute(stmt)).scalars().all():
+        entry = (subject.id, subject.original_code if subject.original_code else subject.code, subject.name)
+        if subject.original_code:
+            by_original.setdefault(subject.original_code, entry)
+        by_code.setdefault(subject.code, entry)
+    resolved: dict[str, tuple[int, str, str]] = {}
+    for token in tokens:
+        entry = by_original.get(token) or by_code.get(token)
+        if entry is not None:
+            resolved[token] = entry
+    return resolved
+
+
+async def _link_school_programmes(session: AsyncSession, pairs: set[tuple[UUID, int]]) -> None:
+    if not pairs:
+        return
+    school_ids = {sid for sid, _pid in pairs}
+    programme_ids = {_pid for _sid, _pid in pairs}
+    existing_stmt = select(school_programmes.c.school_id, school_programmes.c.programme_id).where(
+        school_programmes.c.school_id.in_(school_ids),
+        school_programmes.c.programme_id.in_(programme_ids),
+    )
+    existing_pairs = {(row[0], row[1]) for row in (await session.execute(existing_stmt)).all()}
+    missing_pairs = pairs - existing_pairs
+    if missing_pairs:
+        await session.execute(
+            pg_insert(school_programmes)
+            .values([{"school_id": sid, "programme_id": pid} for sid, pid in missing_pairs])
+            .on_conflict_do_nothing(constraint="uq_school_programme")
+        )
+
+
+async def _write_candidate_chunk(
+    session: AsyncSession,
+    examination_id: int,
+    records: list[_CandidateRecord],
+    now: datetime,
+) -> None:
+    """Upsert candidates by registration number, then replace their subject selections."""
+    insert_stmt = pg_insert(ExaminationCandidate).values(
+        [
+            {
+                "examination_id": examination_id,
+                "registration_number": rec.registration_number,
+                **rec.values,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for rec in records
+        ]
+    )
+    upsert = insert_stmt.on_conflict_do_update(
+        constraint="uq_examination_candidate_reg_number",
+        set_={
+            **{col: insert_stmt.excluded[col] for col in _CANDIDATE_UPDATE_COLUMNS},
+            "updated_at": now,
+        },
+    ).returning(ExaminationCandidate.registration_number, ExaminationCandidate.id)
+    id_by_reg = dict((await session.execute(upsert)).all())
+
+    await session.execute(
+        delete(ExaminationCandidateSubject).where(
+            ExaminationCandidateSubject.examination_candidate_id.in_(list(id_by_reg.values()))
+        )
+    )
+    subject_rows = [
+        {
+            "examination_candidate_id": id_by_reg[rec.registration_number],
+            "subject_id": sid,
+            "subject_code": scode,
+            "subject_name": sname,
+            "series": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for rec in records
+        for sid, scode, sname in rec.subjects
+    ]
+    if subject_rows:
+        await session.execute(insert(ExaminationCandidateSubject), subject_rows)
+
+
 async def import_candidates_dataframe(
     session: AsyncSession,
     examination_id: int,
     df: pd.DataFrame,
+    *,
+    progress: ImportProgress | None = None,
 ) -> tuple[int, int, list[ExaminationCandidateImportError]]:
-    """Upsert candidates by (examination_id, registration_number). Returns total_rows, successful, errors."""
+    """Upsert candidates by (examination_id, registration_number). Returns total_rows, successful, errors.
+
+    The frame is normalized column-wise and all codes are resolved up front; valid rows are
+    then written with chunked ``INSERT ... ON CONFLICT`` statements. A chunk that fails is
+    retried row by row so database errors are still reported against their sheet rows.
+    When a registration number repeats, the last row wins (as with row-by-row upserts).
+    ``progress(done, total)`` is called after each chunk with written candidate counts.
+    """
     errors: list[ExaminationCandidateImportError] = []
     lookup = _column_lookup(df)
 
@@ -100,68 +253,45 @@ async def import_candidates_dataframe(
         return len(df), 0, errors
 
     total_rows = len(df)
-    successful = 0
-
-    school_codes = set()
-    programme_codes = set()
-    for _, row in df.iterrows():
-        sc = _get_cell(lookup, row, "school_code")
-        if sc:
-            school_codes.add(sc)
-        pc = _get_cell(lookup, row, "programme_code")
-        if pc:
-            programme_codes.add(pc)
+    frame = _normalize_candidates_frame(df, lookup)
+    subject_tokens = _split_subject_codes(frame["subject_codes"])
+
+    school_codes = set(frame["school_code"][frame["school_code"] != ""].unique())
+    programme_codes = set(frame["programme_code"][frame["programme_code"] != ""].unique())
 
     school_by_code: dict[str, School] = {}
     if school_codes:
-        sch_stmt = select(School).where(School.code.in_(school_codes))
-        sch_res = await session.execute(sch_stmt)
+        sch_res = await session.execute(select(School).where(School.code.in_(school_codes)))
         for s in sch_res.scalars().all():
             school_by_code[s.code] = s
 
     programme_by_code: dict[str, Programme] = {}
     if programme_codes:
-        prog_stmt = select(Programme).where(Programme.code.in_(programme_codes))
-        prog_res = await session.execute(prog_stmt)
+        prog_res = await session.execute(select(Programme).where(Programme.code.in_(programme_codes)))
         for p in prog_res.scalars().all():
             programme_by_code[p.code] = p
 
     # Ensure school_programmes reflects every (school, programme) pair present in the file where
-    # both codes resolve to existing rows. Runs before per-row processing so a single bulk insert
-    # suffices; pairs are linked even if a row later fails (e.g. invalid subjects).
-    candidate_school_programme_pairs: set[tuple[UUID, int]] = set()
-    for _, row in df.iterrows():
-        sc = _get_cell(lookup, row, "school_code")
-        pc = _get_cell(lookup, row, "programme_code")
-        if not sc or not pc:
-            continue
-        sch = school_by_code.get(sc)
-        prog = programme_by_code.get(pc)
-        if sch is not None and prog is not None:
-            candidate_school_programme_pairs.add((sch.id, prog.id))
-
-    if candidate_school_programme_pairs:
-        school_ids = {sid for sid, _pid in candidate_school_programme_pairs}
-        programme_ids = {_pid for _sid, _pid in candidate_school_programme_pairs}
-        existing_stmt = select(school_programmes.c.school_id, school_programmes.c.programme_id).where(
-            school_programmes.c.school_id.in_(school_ids),
-            school_programmes.c.programme_id.in_(programme_ids),
-        )
-        existing_res = await session.execute(existing_stmt)
-        existing_pairs = {(row[0], row[1]) for row in existing_res.all()}
-        missing_pairs = candidate_school_programme_pairs - existing_pairs
-        if missing_pairs:
-            await session.execute(
-                pg_insert(school_programmes)
-                .values([{"school_id": sid, "programme_id": pid} for sid, pid in missing_pairs])
-                .on_conflict_do_nothing(constraint="uq_school_programme")
-            )
-
-    for row_offset, (_, row) in enumerate(df.iterrows()):
-        row_number = row_offset + 2  # sheet row (header + 1-based data)
-
-        reg = _get_cell(lookup, row, "registration_number")
-        full_name = _get_cell(lookup, row, "name", "full_name")
+    # both codes resolve to existing rows; pairs are linked even if a row later fails.
+    pairs = frame.loc[
+        frame["school_code"].isin(school_by_code.keys()) & frame["programme_code"].isin(programme_by_code.keys()),
+        ["school_code", "programme_code"],
+    ].drop_duplicates()
+    await _link_school_programmes(
+        session,
+        {(school_by_code[sc].id, programme_by_code[pc].id) for sc, pc in pairs.itertuples(index=False)},
+    )
+
+    subject_by_token = await _resolve_subject_codes(
+        session, {t for tokens in subject_tokens for t in tokens}
+    )
+    dob_by_raw = {raw: _parse_dob(raw) for raw in frame["dob"].unique()}
+
+    valid_rows = 0
+    records_by_reg: dict[str, _CandidateRecord] = {}
+    for pos, (rec, tokens) in enumerate(zip(frame.itertuples(index=False), subject_tokens, strict=True)):
+        row_number = pos + 2  # sheet row (header + 1-based data)
+        reg = rec.registration_number
         if not reg:
             errors.append(
                 ExaminationCandidateImportError(
@@ -171,7 +301,7 @@ async def import_candidates_dataframe(
                 )
             )
             continue
-        if not full_name:
+        if not rec.full_name:
             errors.append(
                 ExaminationCandidateImportError(
                     row_number=row_number,
@@ -181,58 +311,35 @@ async def import_candidates_dataframe(
             )
             continue
 
-        school_code = _get_cell(lookup, row, "school_code")
         school_id = None
-        if school_code:
-            sch = school_by_code.get(school_code)
+        if rec.school_code:
+            sch = school_by_code.get(rec.school_code)
             if sch is None:
                 errors.append(
                     ExaminationCandidateImportError(
                         row_number=row_number,
-                        error_message=f"Unknown school_code '{school_code}'",
+                        error_message=f"Unknown school_code '{rec.school_code}'",
                         field="school_code",
                     )
                 )
                 continue
             school_id = sch.id
 
-        programme_code = _get_cell(lookup, row, "programme_code")
         programme_id = None
-        if programme_code:
-            prog = programme_by_code.get(programme_code)
+        if rec.programme_code:
+            prog = programme_by_code.get(rec.programme_code)
             if prog is None:
                 errors.append(
                     ExaminationCandidateImportError(
                         row_number=row_number,
-                        error_message=f"Unknown programme_code '{programme_code}'",
+                        error_message=f"Unknown programme_code '{rec.programme_code}'",
                         field="programme_code",
                     )
                 )
                 continue
             programme_id = prog.id
 
-        index_number = _get_cell(lookup, row, "index_number") or None
-        dob_raw = _get_cell(lookup, row, "dob", "date_of_birth")
-        date_of_birth = _parse_dob(dob_raw)
-        reg_status = _get_cell(lookup, row, "registration_status") or None
-        if not reg_status:
-            reg_status = None
-
-        codes_raw = _get_cell(lookup, row, "subject_original_codes", "subject_codes")
-        tokens = [t.strip() for t in codes_raw.split(",") if t.strip()]
-
-        subject_errors: list[str] = []
-        resolved: list[tuple[int, str, str]] = []
-        for oc in tokens:
-            sub_stmt = select(Subject).where(or_(Subject.original_code == oc, Subject.code == oc))
-            sub_res = await session.execute(sub_stmt)
-            subject = sub_res.scalar_one_or_none()
-            if subject is None:
-                subject_errors.append(oc)
-            else:
-                code_to_store = subject.original_code if subject.original_code else subject.code
-                resolved.append((subject.id, code_to_store, subject.name))
-
+        subject_errors = [t for t in tokens if t not in subject_by_token]
         if subject_errors:
             errors.append(
                 ExaminationCandidateImportError(
@@ -243,65 +350,47 @@ async def import_candidates_dataframe(
             )
             continue
 
+        valid_rows += 1
+        records_by_reg.pop(reg, None)  # keep file order of the winning (last) row
+        records_by_reg[reg] = _CandidateRecord(
+            row_number=row_number,
+            registration_number=reg,
+            values={
+                "school_id": school_id,
+                "programme_id": programme_id,
+                "index_number": rec.index_number or None,
+                "full_name": rec.full_name,
+                "date_of_birth": dob_by_raw.get(rec.dob),
+                "registration_status": rec.registration_status or None,
+            },
+            subjects=[subject_by_token[t] for t in tokens],
+        )
+
+    records = list(records_by_reg.values())
+    chunk_size = settings.candidate_import_chunk_size
+    failed_records = 0
+    now = datetime.utcnow()
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start : start + chunk_size]
         try:
             async with session.begin_nested():
-                cand_stmt = select(ExaminationCandidate).where(
-                    ExaminationCandidate.examination_id == examination_id,
-                    ExaminationCandidate.registration_number == reg,
-                )
-                cand_res = await session.execute(cand_stmt)
-                candidate = cand_res.scalar_one_or_none()
-
-                now = datetime.utcnow()
-                if candidate is None:
-                    candidate = ExaminationCandidate(
-                        examination_id=examination_id,
-                        school_id=school_id,
-                        programme_id=programme_id,
-                        registration_number=reg,
-                        index_number=index_number,
-                        full_name=full_name,
-                        date_of_birth=date_of_birth,
-                        registration_status=reg_status,
-                    )
-                    session.add(candidate)
-                    await session.flush()
-                else:
-                    candidate.school_id = school_id
-                    candidate.programme_id = programme_id
-                    candidate.index_number = index_number
-                    candidate.full_name = full_name
-                    candidate.date_of_birth = date_of_birth
-                    candidate.registration_status = reg_status
-                    candidate.updated_at = now
-                    await session.execute(
-                        delete(ExaminationCandidateSubject).where(
-                            ExaminationCandidateSubject.examination_candidate_id == candidate.id
-                        )
-                    )
-                    await session.flush()
-
-                for sid, scode, sname in resolved:
-                    session.add(
-                        ExaminationCandidateSubject(
-                            examination_candidate_id=candidate.id,
-                            subject_id=sid,
-                            subject_code=scode,
-                            subject_name=sname,
-                            series=None,
+                await _write_candidate_chunk(session, examination_id, chunk, now)
+        except Exception:
+            for rec in chunk:
+                try:
+                    async with session.begin_nested():
+                        await _write_candidate_chunk(session, examination_id, [rec], now)
+                except Exception as exc:
+                    failed_records += 1
+                    errors.append(
+                        ExaminationCandidateImportError(
+                            row_number=rec.row_number,
+                            error_message=f"Database error: {exc!s}",
+                            field=None,
                         )
                     )
-                await session.flush()
-        except Exception as exc:
-            errors.append(
-                ExaminationCandidateImportError(
-                    row_number=row_number,
-                    error_message=f"Database error: {exc!s}",
-                    field=None,
-                )
-            )
-            continue
-
-        successful += 1
+        if progress is not None:
+            progress(start + len(chunk), len(records))
 
-    return total_rows, successful, errors
+    errors.sort(key=lambda e: e.row_number)
+    return total_rows, valid_rows - failed_records, errors
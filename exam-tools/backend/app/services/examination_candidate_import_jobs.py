@@ -0,0 +1,104 @@
+"""Background examination candidate imports with progress polling.
+
+Very large candidate files are parsed in the request, then imported by an asyncio task
+on its own database session. Job state lives in this process only: it is meant for
+progress reporting while the upload is running, not as a durable queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pandas as pd
+
+from app.schemas.examination_candidates import ExaminationCandidateImportError
+from app.services.examination_candidate_import import import_candidates_dataframe
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Finished jobs kept for polling; oldest finished jobs are dropped first.
+_MAX_FINISHED_JOBS = 50
+
+
+@dataclass
+class CandidateImportJob:
+    id: UUID
+    examination_id: int
+    total_rows: int
+    status: str = JOB_QUEUED
+    processed_candidates: int = 0
+    total_candidates: int = 0
+    successful: int = 0
+    errors: list[ExaminationCandidateImportError] = field(default_factory=list)
+    error_message: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+    @property
+    def failed(self) -> int:
+        return self.total_rows - self.successful if self.status == JOB_COMPLETED else 0
+
+
+_jobs: dict[UUID, CandidateImportJob] = {}
+_tasks: set[asyncio.Task[None]] = set()
+
+
+def _prune_finished_jobs() -> None:
+    finished = sorted(
+        (j for j in _jobs.values() if j.finished_at is not None),
+        key=lambda j: j.finished_at or j.created_at,
+    )
+    for job in finished[: max(len(finished) - _MAX_FINISHED_JOBS, 0)]:
+        _jobs.pop(job.id, None)
+
+
+async def _run_import_job(job: CandidateImportJob, df: pd.DataFrame) -> None:
+    from app.dependencies.database import get_sessionmanager
+
+    def on_progress(done: int, total: int) -> None:
+        job.processed_candidates = done
+        job.total_candidates = total
+
+    job.status = JOB_RUNNING
+    try:
+        async with get_sessionmanager().session() as session:
+            _total, successful, errors = await import_candidates_dataframe(
+                session, job.examination_id, df, progress=on_progress
+            )
+            if successful > 0:
+                await session.commit()
+            else:
+                await session.rollback()
+        job.successful = successful
+        job.errors = errors
+        job.status = JOB_COMPLETED
+    except Exception as exc:
+        logger.exception("Candidate import job %s failed", job.id)
+        job.status = JOB_FAILED
+        job.error_message = str(exc)
+    finally:
+        job.finished_at = datetime.utcnow()
+        _prune_finished_jobs()
+
+
+def start_candidate_import_job(examination_id: int, df: pd.DataFrame) -> CandidateImportJob:
+    """Queue ``df`` for import on a background task and return the job for polling."""
+    job = CandidateImportJob(id=uuid4(), examination_id=examination_id, total_rows=len(df))
+    _jobs[job.id] = job
+    task = asyncio.create_task(_run_import_job(job, df))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+def get_candidate_import_job(job_id: UUID) -> CandidateImportJob | None:
+    return _jobs.get(job_id)
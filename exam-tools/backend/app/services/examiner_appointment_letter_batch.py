@@ -0,0 +1,446 @@
+"""Batch rendering and storage of roster examiner appointment letters.
+
+Letter inputs shared by every examiner of a subject (signatory, letter date, fee
+rates, cohort coordination and reference numbers) are loaded once per
+(examination, subject). PDFs are rendered in a process pool and stored under a
+fingerprint of their full context, so portal downloads reuse the stored file
+until any input to that letter changes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+try:
+    from google.cloud.exceptions import NotFound
+except ImportError:
+    NotFound = Exception  # type: ignore[misc,assignment]
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models import (
+    Examination,
+    Examiner,
+    ExaminerSubject,
+    ExaminerType,
+    Region,
+    Subject,
+    SubjectMarkingGroup,
+    SubjectMarkingGroupMember,
+)
+from app.services.exam_documents import _get_gcs_bucket, storage_base_dir
+from app.services.examiner_appointment_letter_pdf import (
+    APPOINTMENT_CONTENT_TEMPLATE,
+    _base_appointment_context,
+    _build_appointment_fee_context_from_rates,
+    _build_coordination_letter_context,
+    _empty_coordination_letter_context,
+    _load_letter_date,
+    _load_signatory_context,
+    _render_appointment_letter_pdf_sync,
+    _sanitize_filename_part,
+    appointment_letter_examination_label,
+)
+from app.services.examiner_appointment_letter_reference import (
+    appointment_reference_number_fallback,
+    load_configured_appointment_letter_reference,
+)
+from app.services.examiner_compensation import (
+    MarkingRateMap,
+    RoleAllowanceMap,
+    TravelRateMap,
+    TravelRoleFactorMap,
+    TravelZoneMap,
+    TravelZoneNameMap,
+    load_marking_rates_map,
+    load_role_allowance_rates_map,
+    load_travel_rates_map,
+    load_travel_role_factors_map,
+    load_travel_zones_map,
+    parse_region_stored,
+)
+from app.services.examiner_invitation import _examiner_type_label, subject_display_code
+from app.services.pdf_generator import template_environment
+
+_STORAGE_DIR_NAME = "examiner-appointment-letters"
+_TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+_PRELOADED_TEMPLATES = (
+    APPOINTMENT_CONTENT_TEMPLATE,
+    "certificate-confirmations/response_single.html",
+    "certificate-confirmations/response_header.html",
+    "certificate-confirmations/response_footer.html",
+    "certificate-confirmations/response_footer_subsequent.html",
+)
+
+
+@dataclass
+class AppointmentLetterBatchContext:
+    """Letter inputs shared by all roster examiners of one examination subject."""
+
+    examination: Examination
+    subject: Subject
+    examination_label: str
+    letter_date: datetime
+    signatory_context: dict[str, object]
+    default_coordination: dict[str, str | None]
+    coordination_by_examiner: dict[UUID, dict[str, str | None]]
+    configured_references: dict[ExaminerType, str]
+    role_rates: RoleAllowanceMap
+    marking_rates: MarkingRateMap
+    travel_rates: TravelRateMap
+    travel_zones: TravelZoneMap
+    travel_zone_names: TravelZoneNameMap
+    travel_role_factors: TravelRoleFactorMap
+
+
+@dataclass(frozen=True)
+class AppointmentLetterJob:
+    """Everything needed to render (or look up) one examiner's letter."""
+
+    examination_id: int
+    subject_id: int
+    examiner_id: UUID
+    filename: str
+    reference_number: str
+    letter_date: datetime
+    context: dict[str, object] = field(hash=False)
+
+    @property
+    def fingerprint(self) -> str:
+        payload = json.dumps(
+            {
+                "context": self.context,
+                "reference_number": self.reference_number,
+                "letter_date": self.letter_date.isoformat(),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def _coordination_from_group(group: SubjectMarkingGroup) -> dict[str, str | None]:
+    return _build_coordination_letter_context(
+        start_date=group.coordination_start_date,
+        start_time=group.coordination_start_time,
+        end_date=group.coordination_end_date,
+        end_time=group.coordination_end_time,
+        venue=group.coordination_venue,
+        marking_start_date=group.marking_start_date,
+        marking_end_date=group.marking_end_date,
+    )
+
+
+def choose_letter_cohorts(
+    memberships: Sequence[tuple[UUID, SubjectMarkingGroup]],
+) -> dict[UUID, SubjectMarkingGroup]:
+    """Per examiner, prefer the first non-default cohort by name (as ``get_examiner_marking_group``)."""
+    by_examiner: dict[UUID, list[SubjectMarkingGroup]] = {}
+    for examiner_id, group in memberships:
+        by_examiner.setdefault(examiner_id, []).append(group)
+    chosen: dict[UUID, SubjectMarkingGroup] = {}
+    for examiner_id, groups in by_examiner.items():
+        groups.sort(key=lambda g: (not bool(g.is_default), g.name))
+        chosen[examiner_id] = next((g for g in groups if not g.is_default), groups[0])
+    return chosen
+
+
+async def load_appointment_letter_batch_context(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    examiner_ids: Sequence[UUID] | None = None,
+    examiner_types: Sequence[ExaminerType] | None = None,
+) -> AppointmentLetterBatchContext:
+    """Load shared letter inputs once; cohort coordination and reference numbers are limited to
+    *examiner_ids* / *examiner_types* when given (single-letter downloads)."""
+    exam = await session.get(Examination, examination_id)
+    if exam is None:
+        raise ValueError("Examination not found")
+    subject = await session.get(Subject, subject_id)
+    if subject is None:
+        raise ValueError("Subject not found")
+
+    groups_stmt = select(SubjectMarkingGroup).where(
+        SubjectMarkingGroup.examination_id == examination_id,
+        SubjectMarkingGroup.subject_id == subject_id,
+    )
+    groups = {g.id: g for g in (await session.execute(groups_stmt)).scalars().all()}
+    default_group = next((g for g in groups.values() if g.is_default), None)
+
+    members_stmt = select(SubjectMarkingGroupMember.examiner_id, SubjectMarkingGroupMember.group_id).where(
+        SubjectMarkingGroupMember.examination_id == examination_id,
+        SubjectMarkingGroupMember.subject_id == subject_id,
+    )
+    if examiner_ids is not None:
+        members_stmt = members_stmt.where(SubjectMarkingGroupMember.examiner_id.in_(list(examiner_ids)))
+    memberships = [
+        (examiner_id, groups[group_id])
+        for examiner_id, group_id in (await session.execute(members_stmt)).all()
+        if group_id in groups
+    ]
+    chosen = choose_letter_cohorts(memberships)
+
+    configured_references: dict[ExaminerType, str] = {}
+    for examiner_type in examiner_types if examiner_types is not None else list(ExaminerType):
+        configured = await load_configured_appointment_letter_reference(
+            session,
+            examination_id=examination_id,
+            subject_id=subject_id,
+            examiner_type=examiner_type,
+        )
+        if configured:
+            configured_references[examiner_type] = configured
+
+    travel_zones, travel_zone_names = await load_travel_zones_map(session, examination_id)
+    return AppointmentLetterBatchContext(
+        examination=exam,
+        subject=subject,
+        examination_label=appointment_letter_examination_label(exam, subject),
+        letter_date=await _load_letter_date(session, examination_id),
+        signatory_context=await _load_signatory_context(session, examination_id, subject_id),
+        default_coordination=(
+            _coordination_from_group(default_group)
+            if default_group is not None
+            else _empty_coordination_letter_context()
+        ),
+        coordination_by_examiner={eid: _coordination_from_group(g) for eid, g in chosen.items()},
+        configured_references=configured_references,
+        role_rates=await load_role_allowance_rates_map(session, examination_id),
+        marking_rates=await load_marking_rates_map(session, examination_id),
+        travel_rates=await load_travel_rates_map(session, examination_id),
+        travel_zones=travel_zones,
+        travel_zone_names=travel_zone_names,
+        travel_role_factors=await load_travel_role_factors_map(session, examination_id),
+    )
+
+
+def build_roster_letter_job(batch: AppointmentLetterBatchContext, examiner: Examiner) -> AppointmentLetterJob:
+    """Assemble one examiner's letter context from the shared batch inputs (no DB access)."""
+    exam = batch.examination
+    subject = batch.subject
+    examiner_type = examiner.examiner_type
+    if not isinstance(examiner_type, ExaminerType):
+        examiner_type = ExaminerType(str(examiner_type))
+    region = parse_region_stored(examiner.region)
+
+    reference_number = batch.configured_references.get(examiner_type) or appointment_reference_number_fallback(
+        examination_id=int(exam.id),
+        subject_code=subject_display_code(subject) or subject.code or "",
+        entity_id=examiner.id,
+    )
+    context = _base_appointment_context(
+        examination_label_str=batch.examination_label,
+        invitee_name=examiner.name,
+        phone_number=examiner.phone_number or "",
+        examiner_type=examiner_type,
+        examiner_type_label=_examiner_type_label(examiner_type),
+        subject=subject,
+        region=examiner.region.value if isinstance(examiner.region, Region) else str(examiner.region),
+        coordination_context=batch.coordination_by_examiner.get(examiner.id, batch.default_coordination),
+        signatory_context=batch.signatory_context,
+    )
+    context.update(
+        _build_appointment_fee_context_from_rates(
+            role_rates=batch.role_rates,
+            marking_rates=batch.marking_rates,
+            travel_rates=batch.travel_rates,
+            travel_zones=batch.travel_zones,
+            travel_zone_names=batch.travel_zone_names,
+            travel_role_factors=batch.travel_role_factors,
+            examiner_type=examiner_type,
+            region=region,
+            subject_id=int(subject.id),
+        )
+    )
+    return AppointmentLetterJob(
+        examination_id=int(exam.id),
+        subject_id=int(subject.id),
+        examiner_id=examiner.id,
+        filename=f"appointment_letter_{_sanitize_filename_part(examiner.name)}.pdf",
+        reference_number=reference_number,
+        letter_date=batch.letter_date,
+        context=context,
+    )
+
+
+# --- Stored letters -------------------------------------------------------------------------
+
+
+def _uses_gcs() -> bool:
+    return settings.storage_backend.lower() == "gcs"
+
+
+def stored_letter_key(job: AppointmentLetterJob) -> str:
+    return f"{_STORAGE_DIR_NAME}/{job.examination_id}/{job.subject_id}/{job.examiner_id}-{job.fingerprint}.pdf"
+
+
+def _gcs_letter_key(rel: str) -> str:
+    prefix = (settings.gcs_appointment_letters_prefix or "").strip().strip("/")
+    return f"{prefix}/{rel}" if prefix else rel
+
+
+def _local_letter_path(rel: str) -> Path:
+    return storage_base_dir().resolve().parent / rel
+
+
+def read_stored_letter(job: AppointmentLetterJob) -> bytes | None:
+    """Return the pre-rendered PDF for *job*, or None when it has not been rendered for this context."""
+    rel = stored_letter_key(job)
+    if _uses_gcs():
+        blob = _get_gcs_bucket().blob(_gcs_letter_key(rel))
+        try:
+            return blob.download_as_bytes()
+        except NotFound:
+            return None
+    path = _local_letter_path(rel)
+    if not path.is_file():
+        return None
+    return path.read_bytes()
+
+
+def write_stored_letter(job: AppointmentLetterJob, pdf_bytes: bytes) -> None:
+    """Store *pdf_bytes* for *job* and drop letters rendered for the examiner's older contexts."""
+    rel = stored_letter_key(job)
+    stale_prefix = f"{_STORAGE_DIR_NAME}/{job.examination_id}/{job.subject_id}/{job.examiner_id}-"
+    if _uses_gcs():
+        bucket = _get_gcs_bucket()
+        bucket.blob(_gcs_letter_key(rel)).upload_from_string(pdf_bytes, content_type="application/pdf")
+        for blob in bucket.list_blobs(prefix=_gcs_letter_key(stale_prefix)):
+            if blob.name != _gcs_letter_key(rel):
+                try:
+                    blob.delete()
+                except NotFound:
+                    pass
+        return
+    path = _local_letter_path(rel)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pdf_bytes)
+    for old in path.parent.glob(f"{job.examiner_id}-*.pdf"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+# --- Rendering ------------------------------------------------------------------------------
+
+_render_pool: ProcessPoolExecutor | None = None
+
+
+def _init_letter_render_worker() -> None:
+    """Compile letter templates once per worker process."""
+    env = template_environment(str(_TEMPLATES_DIR))
+    for name in _PRELOADED_TEMPLATES:
+        env.get_template(name)
+
+
+def _render_letter_job(context: dict[str, Any], reference_number: str, letter_date: datetime) -> bytes:
+    return _render_appointment_letter_pdf_sync(
+        context=context,
+        reference_number=reference_number,
+        letter_date=letter_date,
+    )
+
+
+def _letter_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.appointment_letter_render_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_letter_render_worker,
+        )
+    return _render_pool
+
+
+def shutdown_letter_render_pool() -> None:
+    """Stop the letter worker pool (called on application shutdown)."""
+    global _render_pool
+    pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def render_letter_jobs(jobs: Sequence[AppointmentLetterJob]) -> list[bytes]:
+    """Render *jobs* concurrently in the letter worker pool, preserving order."""
+    if not jobs:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = _letter_render_pool()
+    return list(
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _render_letter_job, job.context, job.reference_number, job.letter_date)
+                for job in jobs
+            )
+        )
+    )
+
+
+async def get_or_render_letter(job: AppointmentLetterJob) -> bytes:
+    """Serve the stored letter for *job*; render in-process and store it on a miss."""
+    stored = await asyncio.to_thread(read_stored_letter, job)
+    if stored is not None:
+        return stored
+    pdf_bytes = await asyncio.to_thread(
+        _render_appointment_letter_pdf_sync,
+        context=job.context,
+        reference_number=job.reference_number,
+        letter_date=job.letter_date,
+    )
+    await asyncio.to_thread(write_stored_letter, job, pdf_bytes)
+    return pdf_bytes
+
+
+async def prerender_subject_appointment_letters(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    examiner_ids: Sequence[UUID] | None = None,
+) -> dict[str, int]:
+    """Render and store letters for the subject roster (or *examiner_ids*); reuse up-to-date files."""
+    stmt = (
+        select(Examiner)
+        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
+        .where(
+            Examiner.examination_id == examination_id,
+            ExaminerSubject.subject_id == subject_id,
+        )
+        .options(selectinload(Examiner.subjects))
+    )
+    if examiner_ids is not None:
+        stmt = stmt.where(Examiner.id.in_(list(examiner_ids)))
+    examiners = list((await session.execute(stmt)).scalars().unique().all())
+    batch = await load_appointment_letter_batch_context(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        examiner_ids=examiner_ids,
+    )
+    jobs = [build_roster_letter_job(batch, examiner) for examiner in examiners]
+
+    existing = await asyncio.gather(*(asyncio.to_thread(read_stored_letter, job) for job in jobs))
+    pending = [job for job, stored in zip(jobs, existing, strict=True) if stored is None]
+    rendered = await render_letter_jobs(pending)
+    await asyncio.gather(
+        *(asyncio.to_thread(write_stored_letter, job, pdf) for job, pdf in zip(pending, rendered, strict=True))
+    )
+    return {
+        "examiner_count": len(jobs),
+        "rendered_count": len(pending),
+        "reused_count": len(jobs) - len(pending),
+    }
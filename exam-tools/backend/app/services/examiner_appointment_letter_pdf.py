@@ -526,7 +526,10 @@ async def build_examiner_appointment_letter_for_roster(
     resolved,
     session: AsyncSession | None = None,
 ) -> tuple[bytes, str]:
-    """Build appointment letter PDF for a roster portal examiner."""
+    """Build appointment letter PDF for a roster portal examiner.
+
+    With a session the letter is served from the pre-rendered store (rendered and stored on a miss).
+    """
     from app.services.examiner_portal import ResolvedPortalExaminer
 
     if not isinstance(resolved, ResolvedPortalExaminer):
@@ -541,34 +544,29 @@ async def build_examiner_appointment_letter_for_roster(
         examiner_type = ExaminerType(str(examiner_type))
 
     if session is not None:
-        reference_number = await resolve_appointment_letter_reference_number(
-            session,
-            examination_id=int(exam.id),
-            subject_id=int(subject.id),
-            examiner_type=examiner_type,
-            subject_code=subject_display_code(subject) or subject.code or "",
-            entity_id=examiner.id,
-        )
-    else:
-        from app.services.examiner_appointment_letter_reference import appointment_reference_number_fallback
-
-        reference_number = appointment_reference_number_fallback(
-            examination_id=int(exam.id),
-            subject_code=subject_display_code(subject) or subject.code or "",
-            entity_id=examiner.id,
+        from app.services.examiner_appointment_letter_batch import (
+            build_roster_letter_job,
+            get_or_render_letter,
+            load_appointment_letter_batch_context,
         )
 
-    coordination_context = (
-        await _load_cohort_coordination_for_letter(
+        batch = await load_appointment_letter_batch_context(
             session,
             examination_id=int(exam.id),
             subject_id=int(subject.id),
-            examiner_id=examiner.id,
+            examiner_ids=[examiner.id],
+            examiner_types=[examiner_type],
         )
-        if session is not None
-        else _empty_coordination_letter_context()
-    )
+        job = build_roster_letter_job(batch, examiner)
+        return await get_or_render_letter(job), job.filename
+
+    from app.services.examiner_appointment_letter_reference import appointment_reference_number_fallback
 
+    reference_number = appointment_reference_number_fallback(
+        examination_id=int(exam.id),
+        subject_code=subject_display_code(subject) or subject.code or "",
+        entity_id=examiner.id,
+    )
     context = _base_appointment_context(
         examination_label_str=exam_label_str,
         invitee_name=examiner.name,
@@ -577,33 +575,13 @@ async def build_examiner_appointment_letter_for_roster(
         examiner_type_label=_examiner_type_label(examiner_type),
         subject=subject,
         region=examiner.region.value if isinstance(examiner.region, Region) else str(examiner.region),
-        coordination_context=coordination_context,
-        signatory_context=await _load_signatory_context(session, int(exam.id), int(subject.id))
-            if session is not None
-            else None,
+        coordination_context=_empty_coordination_letter_context(),
     )
-    if session is not None:
-        context.update(
-            await _build_appointment_fee_context(
-                session,
-                examination_id=int(exam.id),
-                examiner_type=examiner_type,
-                region=examiner.region,
-                subject_id=int(subject.id),
-            )
-        )
-
-    letter_date = (
-        await _load_letter_date(session, int(exam.id))
-        if session is not None
-        else datetime.now(timezone.utc)
-    )
-
     pdf_bytes = await asyncio.to_thread(
         _render_appointment_letter_pdf_sync,
         context=context,
         reference_number=reference_number,
-        letter_date=letter_date,
+        letter_date=datetime.now(timezone.utc),
     )
     fn = f"appointment_letter_{_sanitize_filename_part(examiner.name)}.pdf"
     return pdf_bytes, fn
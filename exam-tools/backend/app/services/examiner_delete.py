@@ -30,6 +30,7 @@ from app.schemas.examiner_delete import (
     ExaminerManualAllocationItem,
 )
 from app.services.examiner_invitation import subject_display_code
+from app.services.examiner_quota_counters import RosterQuotaBucket, adjust_quota_counters
 from app.services.subject_marking_group import sync_subject_cohort_memberships
 
 
@@ -189,6 +190,13 @@ async def delete_examiner_with_cleanup(
         )
     )
 
+    await adjust_quota_counters(
+        session,
+        examination_id=examination_id,
+        subject_ids=subject_ids_before,
+        bucket=RosterQuotaBucket.for_examiner(examiner),
+        delta=-1,
+    )
     await session.delete(examiner)
     await session.flush()
 
@@ -201,6 +209,7 @@ async def delete_examiner_with_cleanup(
             session,
             examination_id=examination_id,
             subject_id=sid,
+            examiner_ids=[examiner_id],
         )
 
 
@@ -24,6 +24,7 @@ from app.models import (
     Subject,
 )
 from app.services.coordination_schedule import format_coordination_range, validate_coordination_range
+from app.services.examiner_quota_counters import RosterQuotaBucket, move_quota_counters
 from app.services.examiner_reference_code import assign_reference_code_to_examiner
 from app.services.examiner_regional_quota import (
     assert_examiner_regional_quota_allowed,
@@ -331,6 +332,7 @@ async def _finalize_invitation_acceptance(
         session,
         examination_id=int(inv.examination_id),
         subject_id=int(inv.subject_id),
+        examiner_ids=[examiner.id],
     )
 
     now = datetime.utcnow()
@@ -525,6 +527,7 @@ async def update_examiner_invitation_details(
             options=(selectinload(Examiner.subjects),),
         )
         if examiner is not None:
+            quota_bucket_before = RosterQuotaBucket.for_examiner(examiner)
             if name is not _UPDATE_FIELD_MISSING:
                 examiner.name = new_name
             if examiner_type is not _UPDATE_FIELD_MISSING:
@@ -534,6 +537,13 @@ async def update_examiner_invitation_details(
             if gender is not _UPDATE_FIELD_MISSING:
                 examiner.gender = new_gender
             examiner.updated_at = datetime.utcnow()
+            await move_quota_counters(
+                session,
+                examination_id=int(examiner.examination_id),
+                subject_ids=[int(es.subject_id) for es in examiner.subjects],
+                before=quota_bucket_before,
+                after=RosterQuotaBucket.for_examiner(examiner),
+            )
             await session.flush()
 
     return inv
@@ -0,0 +1,203 @@
+"""Materialized examiner roster counters backing subject quota checks.
+
+``subject_examiner_quota_counters`` holds one row per (examination, subject, region,
+role, gender bucket) with the number of roster examiners linked to that subject. The
+counters are adjusted in the same transaction as the roster change (subject link sync,
+role/region/gender edits, deletes), so quota checks, projections and status pages read
+a few primary-key rows instead of recounting the roster.
+
+Rows are keyed by home region rather than quota region group: regrouping regions needs
+no rebuild, and group totals are summed through the examination's region -> group map.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Examiner,
+    ExaminerSubject,
+    ExaminerType,
+    Region,
+    SubjectExaminerQuotaCounter,
+)
+
+GENDER_OTHER = ""
+
+_COUNTER_KEY = ("examination_id", "subject_id", "region", "examiner_type", "gender")
+
+
+def gender_bucket(gender: str | None) -> str:
+    """Gender caps only cover Male/Female; everything else shares one bucket."""
+    return gender if gender in ("Male", "Female") else GENDER_OTHER
+
+
+@dataclass(frozen=True)
+class RosterQuotaBucket:
+    region: Region
+    examiner_type: ExaminerType
+    gender: str
+
+    @classmethod
+    def of(cls, region: Region | str, examiner_type: ExaminerType | str, gender: str | None) -> RosterQuotaBucket:
+        if not isinstance(region, Region):
+            region = Region(str(region))
+        if not isinstance(examiner_type, ExaminerType):
+            examiner_type = ExaminerType(str(examiner_type))
+        return cls(region=region, examiner_type=examiner_type, gender=gender_bucket(gender))
+
+    @classmethod
+    def for_examiner(cls, examiner: Examiner) -> RosterQuotaBucket:
+        return cls.of(examiner.region, examiner.examiner_type, examiner.gender)
+
+
+RosterCounts = dict[RosterQuotaBucket, int]
+
+
+async def adjust_quota_counters(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_ids: Iterable[int],
+    bucket: RosterQuotaBucket,
+    delta: int,
+) -> None:
+    """Add ``delta`` to the bucket's counter for each subject (one upsert statement)."""
+    sids = sorted({int(s) for s in subject_ids})
+    if not sids or delta == 0:
+        return
+    now = datetime.utcnow()
+    stmt = pg_insert(SubjectExaminerQuotaCounter).values(
+        [
+            {
+                "examination_id": examination_id,
+                "subject_id": sid,
+                "region": bucket.region,
+                "examiner_type": bucket.examiner_type,
+                "gender": bucket.gender,
+                "examiner_count": max(delta, 0),
+                "updated_at": now,
+            }
+            for sid in sids
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_COUNTER_KEY),
+        set_={
+            "examiner_count": func.greatest(SubjectExaminerQuotaCounter.examiner_count + delta, 0),
+            "updated_at": now,
+        },
+    )
+    await session.execute(stmt)
+
+
+async def move_quota_counters(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_ids: Iterable[int],
+    before: RosterQuotaBucket,
+    after: RosterQuotaBucket,
+) -> None:
+    """Move one examiner from ``before`` to ``after`` on each of their subjects."""
+    if before == after:
+        return
+    sids = list(subject_ids)
+    await adjust_quota_counters(session, examination_id=examination_id, subject_ids=sids, bucket=before, delta=-1)
+    await adjust_quota_counters(session, examination_id=examination_id, subject_ids=sids, bucket=after, delta=1)
+
+
+async def load_quota_counters(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+) -> RosterCounts:
+    stmt = select(
+        SubjectExaminerQuotaCounter.region,
+        SubjectExaminerQuotaCounter.examiner_type,
+        SubjectExaminerQuotaCounter.gender,
+        SubjectExaminerQuotaCounter.examiner_count,
+    ).where(
+        SubjectExaminerQuotaCounter.examination_id == examination_id,
+        SubjectExaminerQuotaCounter.subject_id == subject_id,
+        SubjectExaminerQuotaCounter.examiner_count > 0,
+    )
+    counts: RosterCounts = {}
+    for region, examiner_type, gender, n in (await session.execute(stmt)).all():
+        bucket = RosterQuotaBucket.of(region, examiner_type, gender)
+        counts[bucket] = counts.get(bucket, 0) + int(n)
+    return counts
+
+
+async def examiner_bucket_on_subject(
+    session: AsyncSession,
+    *,
+    examiner_id: UUID,
+    subject_id: int,
+) -> RosterQuotaBucket | None:
+    """Bucket the examiner currently counts in for ``subject_id`` (None if not linked)."""
+    stmt = (
+        select(Examiner.region, Examiner.examiner_type, Examiner.gender)
+        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
+        .where(Examiner.id == examiner_id, ExaminerSubject.subject_id == subject_id)
+    )
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        return None
+    return RosterQuotaBucket.of(row[0], row[1], row[2])
+
+
+def counts_without(counts: RosterCounts, bucket: RosterQuotaBucket | None) -> RosterCounts:
+    if bucket is None or counts.get(bucket, 0) <= 0:
+        return counts
+    out = dict(counts)
+    out[bucket] -= 1
+    return out
+
+
+async def rebuild_quota_counters(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int | None = None,
+) -> None:
+    """Recompute counters from the roster (repair tool; normal writes adjust incrementally)."""
+    del_stmt = delete(SubjectExaminerQuotaCounter).where(
+        SubjectExaminerQuotaCounter.examination_id == examination_id
+    )
+    if subject_id is not None:
+        del_stmt = del_stmt.where(SubjectExaminerQuotaCounter.subject_id == subject_id)
+    await session.execute(del_stmt)
+
+    gender_col = case((Examiner.gender.in_(["Male", "Female"]), Examiner.gender), else_=literal(GENDER_OTHER))
+    links = (
+        select(
+            Examiner.examination_id,
+            ExaminerSubject.subject_id,
+            Examiner.region,
+            Examiner.examiner_type,
+            gender_col.label("gender"),
+        )
+        .select_from(ExaminerSubject)
+        .join(Examiner, Examiner.id == ExaminerSubject.examiner_id)
+        .where(Examiner.examination_id == examination_id)
+    )
+    if subject_id is not None:
+        links = links.where(ExaminerSubject.subject_id == subject_id)
+    links = links.subquery()
+    key_cols = [links.c[name] for name in _COUNTER_KEY]
+    source = select(*key_cols, func.count(), func.now()).group_by(*key_cols)
+    await session.execute(
+        pg_insert(SubjectExaminerQuotaCounter).from_select(
+            [*_COUNTER_KEY, "examiner_count", "updated_at"],
+            source,
+        )
+    )
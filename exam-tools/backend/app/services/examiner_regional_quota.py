@@ -11,16 +11,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models import (
-    Examiner,
     ExaminerInvitation,
     ExaminerInvitationStatus,
-    ExaminerSubject,
     ExaminerType,
     ExaminationExaminerQuotaRegionGroup,
     ExaminationExaminerQuotaRegionGroupRegion,
     Region,
     SubjectExaminerRegionQuota,
 )
+from app.services.examiner_quota_counters import (
+    RosterCounts,
+    counts_without,
+    examiner_bucket_on_subject,
+    load_quota_counters,
+)
 from app.services.examiner_reference_code import ROLE_SHORT_CODES
 
 
@@ -99,6 +103,18 @@ async def _load_region_to_group(
     return mapping
 
 
+def _region_to_group_from_groups(
+    groups: list[ExaminationExaminerQuotaRegionGroup],
+) -> dict[Region, tuple[UUID, str]]:
+    """Same mapping as ``_load_region_to_group`` from groups already loaded with their regions."""
+    mapping: dict[Region, tuple[UUID, str]] = {}
+    for group in groups:
+        for member in group.regions:
+            reg = member.region if isinstance(member.region, Region) else Region(str(member.region))
+            mapping[reg] = (group.id, group.name)
+    return mapping
+
+
 async def resolve_group_for_region(
     session: AsyncSession,
     *,
@@ -132,34 +148,73 @@ async def list_quotas_for_subject(
     return list((await session.execute(stmt)).scalars().all())
 
 
-async def count_gender_distribution(
+async def load_roster_counts(
     session: AsyncSession,
     *,
     examination_id: int,
     subject_id: int,
     exclude_examiner_id: UUID | None = None,
-) -> GenderDistribution:
-    stmt = (
-        select(Examiner.gender)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-            Examiner.gender.in_(["Male", "Female"]),
-        )
-    )
+) -> RosterCounts:
+    """Materialized roster counters for one subject (one indexed read, plus one if excluding)."""
+    counts = await load_quota_counters(session, examination_id=examination_id, subject_id=subject_id)
     if exclude_examiner_id is not None:
-        stmt = stmt.where(Examiner.id != exclude_examiner_id)
-    rows = (await session.execute(stmt)).scalars().all()
+        bucket = await examiner_bucket_on_subject(session, examiner_id=exclude_examiner_id, subject_id=subject_id)
+        counts = counts_without(counts, bucket)
+    return counts
+
+
+def gender_distribution_from_counts(counts: RosterCounts) -> GenderDistribution:
     dist = GenderDistribution()
-    for gender in rows:
-        if gender == "Male":
-            dist.male += 1
-        elif gender == "Female":
-            dist.female += 1
+    for bucket, n in counts.items():
+        if bucket.gender == "Male":
+            dist.male += n
+        elif bucket.gender == "Female":
+            dist.female += n
     return dist
 
 
+def roster_distribution_from_counts(
+    counts: RosterCounts,
+    region_to_group: dict[Region, tuple[UUID, str]],
+) -> dict[UUID, GroupDistribution]:
+    dist = _empty_distribution()
+    for bucket, n in counts.items():
+        group_info = region_to_group.get(bucket.region)
+        if group_info is None:
+            continue
+        group_id, _ = group_info
+        dist[group_id].total += n
+        dist[group_id].by_role[bucket.examiner_type] = dist[group_id].by_role.get(bucket.examiner_type, 0) + n
+    return dict(dist)
+
+
+def roster_by_region_from_counts(
+    counts: RosterCounts,
+    region_to_group: dict[Region, tuple[UUID, str]],
+) -> dict[Region, int]:
+    by_region: dict[Region, int] = defaultdict(int)
+    for bucket, n in counts.items():
+        if bucket.region in region_to_group:
+            by_region[bucket.region] += n
+    return dict(by_region)
+
+
+async def count_gender_distribution(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    exclude_examiner_id: UUID | None = None,
+) -> GenderDistribution:
+    counts = await load_roster_counts(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        exclude_examiner_id=exclude_examiner_id,
+    )
+    return gender_distribution_from_counts(counts)
+
+
 def _merge_gender_additional(
     base: GenderDistribution,
     additional: dict[int, GenderDistribution] | None,
@@ -182,29 +237,13 @@ async def count_roster_distribution(
     exclude_examiner_id: UUID | None = None,
 ) -> dict[UUID, GroupDistribution]:
     region_to_group = await _load_region_to_group(session, examination_id)
-    stmt = (
-        select(Examiner)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-        )
+    counts = await load_roster_counts(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        exclude_examiner_id=exclude_examiner_id,
     )
-    if exclude_examiner_id is not None:
-        stmt = stmt.where(Examiner.id != exclude_examiner_id)
-    examiners = list((await session.execute(stmt)).scalars().all())
-
-    dist = _empty_distribution()
-    for ex in examiners:
-        if ex.region is None:
-            continue
-        group_info = region_to_group.get(ex.region)
-        if group_info is None:
-            continue
-        group_id, _ = group_info
-        dist[group_id].total += 1
-        dist[group_id].by_role[ex.examiner_type] = dist[group_id].by_role.get(ex.examiner_type, 0) + 1
-    return dict(dist)
+    return roster_distribution_from_counts(counts, region_to_group)
 
 
 async def count_roster_by_region(
@@ -215,26 +254,13 @@ async def count_roster_by_region(
     exclude_examiner_id: UUID | None = None,
 ) -> dict[Region, int]:
     region_to_group = await _load_region_to_group(session, examination_id)
-    stmt = (
-        select(Examiner.region)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-        )
+    counts = await load_roster_counts(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        exclude_examiner_id=exclude_examiner_id,
     )
-    if exclude_examiner_id is not None:
-        stmt = stmt.where(Examiner.id != exclude_examiner_id)
-    rows = (await session.execute(stmt)).scalars().all()
-    counts: dict[Region, int] = defaultdict(int)
-    for region in rows:
-        if region is None:
-            continue
-        reg = region if isinstance(region, Region) else Region(str(region))
-        if reg not in region_to_group:
-            continue
-        counts[reg] += 1
-    return dict(counts)
+    return roster_by_region_from_counts(counts, region_to_group)
 
 
 def count_proposed_by_region(proposed: list[ProposedExaminerRow]) -> dict[Region, int]:
@@ -402,20 +428,25 @@ async def would_exceed_quota(
 
     group_id: UUID | None = None
     group_name: str | None = None
+    region_to_group: dict[Region, tuple[UUID, str]] = {}
     if has_regional_quotas:
-        try:
-            group_id, group_name = await resolve_group_for_region(
-                session, examination_id=examination_id, region=region
+        region_to_group = await _load_region_to_group(session, examination_id)
+        if region not in region_to_group:
+            return QuotaExceedResult(
+                exceeded=True,
+                message="This region is not assigned to a quota region group for this examination.",
             )
-        except ValueError as exc:
-            return QuotaExceedResult(exceeded=True, message=str(exc))
+        group_id, group_name = region_to_group[region]
 
-        dist = await count_roster_distribution(
-            session,
-            examination_id=examination_id,
-            subject_id=subject_id,
-            exclude_examiner_id=exclude_examiner_id,
-        )
+    counts = await load_roster_counts(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        exclude_examiner_id=exclude_examiner_id,
+    )
+
+    if has_regional_quotas:
+        dist = roster_distribution_from_counts(counts, region_to_group)
         total_count, role_count = _merge_additional(
             dist, additional, subject_id=subject_id, group_id=group_id, examiner_type=examiner_type
         )
@@ -453,12 +484,7 @@ async def would_exceed_quota(
             )
 
     if has_gender_quotas:
-        gender_dist = await count_gender_distribution(
-            session,
-            examination_id=examination_id,
-            subject_id=subject_id,
-            exclude_examiner_id=exclude_examiner_id,
-        )
+        gender_dist = gender_distribution_from_counts(counts)
         merged_gender = _merge_gender_additional(
             gender_dist, additional_gender, subject_id=subject_id
         )
@@ -642,12 +668,13 @@ async def assess_proposed_examiners(
     examination_id: int,
     subject_id: int,
     proposed: list[ProposedExaminerRow],
+    roster_counts: RosterCounts | None = None,
 ) -> dict:
     quotas = await list_quotas_for_subject(session, examination_id=examination_id, subject_id=subject_id)
-    dist = await count_roster_distribution(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    if roster_counts is None:
+        roster_counts = await load_roster_counts(session, examination_id=examination_id, subject_id=subject_id)
     region_to_group = await _load_region_to_group(session, examination_id)
+    dist = roster_distribution_from_counts(roster_counts, region_to_group)
 
     additional: dict[tuple[int, UUID], GroupDistribution] = defaultdict(GroupDistribution)
     additional_gender: dict[int, GenderDistribution] = defaultdict(GenderDistribution)
@@ -753,9 +780,7 @@ async def assess_proposed_examiners(
         ]
         _apply_quota_percents(role_rows, key_field="examiner_type")
 
-    gender_dist = await count_gender_distribution(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    gender_dist = gender_distribution_from_counts(roster_counts)
     merged_gender = _merge_gender_additional(gender_dist, additional_gender, subject_id=subject_id)
     summary_by_gender: list[dict] = []
     for gender_label in ("Male", "Female"):
@@ -879,19 +904,20 @@ async def build_subject_quota_projection_response(
         subject_id=subject_id,
         statuses=statuses,
     )
+    roster_counts = await load_roster_counts(session, examination_id=examination_id, subject_id=subject_id)
     assessment = await assess_proposed_examiners(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
         proposed=proposed,
+        roster_counts=roster_counts,
     )
 
     settings = await get_quota_settings_for_subject(
         session, examination_id=examination_id, subject_id=subject_id
     )
-    dist = await count_roster_distribution(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    region_to_group = await _load_region_to_group(session, examination_id)
+    dist = roster_distribution_from_counts(roster_counts, region_to_group)
     roster_total = sum((current.total for current in dist.values()), 0)
     combined_roster_total = roster_total + assessment["proposed_count"]
     subject_over_cap = (
@@ -919,9 +945,7 @@ async def build_subject_quota_projection_response(
     quotas = await list_quotas_for_subject(
         session, examination_id=examination_id, subject_id=subject_id
     )
-    roster_by_region = await count_roster_by_region(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    roster_by_region = roster_by_region_from_counts(roster_counts, region_to_group)
     proposed_by_region = count_proposed_by_region(proposed)
     region_breakdown = build_region_breakdown_rows(
         groups,
@@ -980,15 +1004,13 @@ async def build_subject_quota_status_response(
     quotas = await list_quotas_for_subject(
         session, examination_id=examination_id, subject_id=subject_id
     )
-    dist = await count_roster_distribution(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    region_to_group = _region_to_group_from_groups(groups)
+    roster_counts = await load_roster_counts(session, examination_id=examination_id, subject_id=subject_id)
+    dist = roster_distribution_from_counts(roster_counts, region_to_group)
     settings = await get_quota_settings_for_subject(
         session, examination_id=examination_id, subject_id=subject_id
     )
-    gender_dist = await count_gender_distribution(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    gender_dist = gender_distribution_from_counts(roster_counts)
     roster_total = sum((current.total for current in dist.values()), 0)
 
     group_rows = [
@@ -1078,9 +1100,7 @@ async def build_subject_quota_status_response(
             )
         )
 
-    roster_by_region = await count_roster_by_region(
-        session, examination_id=examination_id, subject_id=subject_id
-    )
+    roster_by_region = roster_by_region_from_counts(roster_counts, region_to_group)
     region_breakdown = build_region_breakdown_rows(
         groups,
         quotas,
@@ -2,13 +2,11 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
 from datetime import datetime
 from typing import cast
 from uuid import UUID
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import HTTPException
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -35,8 +33,8 @@ from app.services.exam_timetable_pdf import load_examination_or_raise
 from app.services.centre_resolution import (
     centre_scope_school_ids_for_inspector_scope,
     membership_scope_for_inspector_scope,
-    resolve_centre_for_school,
 )
+from app.services.centre_resolution_index import get_centre_resolution_index
 
 
 async def _staff_center_filtered_timetable_entries(
@@ -206,26 +204,18 @@ async def aggregate_executive_centres(
     if exam is None:
         return []
 
-    stmt = select(School).where(School.id.in_(school_ids))
-    schools = list((await session.execute(stmt)).scalars().all())
-
-    centre_cache: dict[UUID, ExaminationCentre] = {}
-    centre_to_schools: dict[UUID, list[School]] = defaultdict(list)
-
-    for sch in schools:
-        try:
-            centre = await resolve_centre_for_school(
-                session,
-                exam_id,
-                sch.id,
-                membership_scope=membership_scope_for_inspector_scope(
-                    exam, ExamInspectorSubjectScope.ALL
-                ),
-            )
-        except HTTPException:
-            continue
-        centre_cache[centre.id] = centre
-        centre_to_schools[centre.id].append(sch)
+    index = await get_centre_resolution_index(session, exam_id)
+    membership_scope = membership_scope_for_inspector_scope(exam, ExamInspectorSubjectScope.ALL)
+    centre_ids = {
+        centre_id
+        for sid in school_ids
+        if (centre_id := index.resolve_centre_id(sid, membership_scope=membership_scope)) is not None
+    }
+    if not centre_ids:
+        return []
+
+    centre_result = await session.execute(select(ExaminationCentre).where(ExaminationCentre.id.in_(centre_ids)))
+    centre_cache: dict[UUID, ExaminationCentre] = {c.id: c for c in centre_result.scalars().all()}
 
     posting_counts: dict[UUID, int] = {}
     if centre_cache:
@@ -240,30 +230,30 @@ async def aggregate_executive_centres(
         pc_result = await session.execute(pc_stmt)
         posting_counts = {row[0]: int(row[1]) for row in pc_result.all()}
 
-    items: list[ExecutiveCentreListItem] = []
-    for centre_id, _cluster_schools in centre_to_schools.items():
-        centre = centre_cache[centre_id]
-        scope_ids = await centre_scope_school_ids_for_inspector_scope(
-            session, centre, ExamInspectorSubjectScope.ALL
-        )
-        active_scope = scope_ids & school_ids
-        if not active_scope:
-            continue
-
-        cand_stmt = select(func.count()).select_from(ExaminationCandidate).where(
-            ExaminationCandidate.examination_id == exam_id,
-            ExaminationCandidate.school_id.in_(active_scope),
-        )
-        candidate_count = int((await session.execute(cand_stmt)).scalar_one())
+    active_scopes: dict[UUID, set[UUID]] = {}
+    for centre_id in centre_cache:
+        active_scope = index.inspector_scope_school_ids(centre_id, ExamInspectorSubjectScope.ALL) & school_ids
+        if active_scope:
+            active_scopes[centre_id] = active_scope
 
-        schools_with_candidates = 0
-        for sid in active_scope:
-            c_stmt = select(func.count()).select_from(ExaminationCandidate).where(
+    cand_by_school: dict[UUID, int] = {}
+    all_active = set().union(*active_scopes.values()) if active_scopes else set()
+    if all_active:
+        cand_stmt = (
+            select(ExaminationCandidate.school_id, func.count())
+            .where(
                 ExaminationCandidate.examination_id == exam_id,
-                ExaminationCandidate.school_id == sid,
+                ExaminationCandidate.school_id.in_(all_active),
             )
-            if int((await session.execute(c_stmt)).scalar_one()) > 0:
-                schools_with_candidates += 1
+            .group_by(ExaminationCandidate.school_id)
+        )
+        cand_by_school = {row[0]: int(row[1]) for row in (await session.execute(cand_stmt)).all()}
+
+    items: list[ExecutiveCentreListItem] = []
+    for centre_id, active_scope in active_scopes.items():
+        centre = centre_cache[centre_id]
+        candidate_count = sum(cand_by_school.get(sid, 0) for sid in active_scope)
+        schools_with_candidates = sum(1 for sid in active_scope if cand_by_school.get(sid, 0) > 0)
 
         region_str = centre.region.value if centre.region is not None else "—"
         zone_str = centre.zone.value if centre.zone is not None else "—"
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import math
-from collections.abc import Callable, Iterable
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Iterable
 from decimal import Decimal
 from uuid import UUID
 
@@ -37,7 +38,11 @@ from app.services.exam_official_compensation import (
     compensation_for_official_at_days,
     compensation_from_rate_row,
 )
-from app.services.finance_official_statistics import list_centres_for_official_statistics
+from app.services.finance_invigilator_bulk import load_examination_invigilator_data
+from app.services.finance_official_statistics import (
+    list_centres_for_official_statistics,
+    load_officials_grouped_by_centre,
+)
 from app.services.finance_school_summary import load_officials_for_centre
 from app.services.sms.phone import normalize_msisdn
 from app.services.subject_scope import posting_matches_timetable_filter
@@ -324,9 +329,31 @@ async def build_inspector_analysis_row_for_centre(
     total_candidates = await resolve_centre_candidate_total(
         session, examination_id, centre, subject_filter, invigilator_item
     )
-    exam_days = len(invigilator_item.days)
-    paid_phones = unique_phones_from_paid_inspectors(officials)
     posting_pairs = await load_posting_user_pairs_for_centre(session, examination_id, centre.id)
+    return inspector_analysis_row_from_inputs(
+        centre,
+        subject_filter=subject_filter,
+        officials=officials,
+        posting_pairs=posting_pairs,
+        exam_days=len(invigilator_item.days),
+        total_candidates=total_candidates,
+        rates_map=rates_map,
+        candidates_per_inspector=candidates_per_inspector,
+    )
+
+
+def inspector_analysis_row_from_inputs(
+    centre: ExaminationCentre,
+    *,
+    subject_filter: TimetableDownloadFilter,
+    officials: list[ExamCentreOfficial],
+    posting_pairs: list[tuple[InspectorExamPosting, User]],
+    exam_days: int,
+    total_candidates: int,
+    rates_map: dict[ExamOfficialDesignation, ExaminationDesignationRate],
+    candidates_per_inspector: int = DEFAULT_INSPECTOR_CANDIDATES_RATIO,
+) -> FinanceCentreInspectorAnalysisRow:
+    paid_phones = unique_phones_from_paid_inspectors(officials)
     posted_phones = unique_phones_from_posted_inspectors(
         posting_pairs, subject_filter=subject_filter
     )
@@ -372,31 +399,111 @@ async def build_inspector_analysis_shell(
     )
 
 
-async def build_finance_inspector_analysis(
+async def load_posting_user_pairs_by_centre(
+    session: AsyncSession,
+    examination_id: int,
+) -> dict[UUID, list[tuple[InspectorExamPosting, User]]]:
+    stmt = (
+        select(InspectorExamPosting, User)
+        .join(User, User.id == InspectorExamPosting.inspector_user_id)
+        .where(InspectorExamPosting.examination_id == examination_id)
+    )
+    grouped: dict[UUID, list[tuple[InspectorExamPosting, User]]] = defaultdict(list)
+    for posting, user in (await session.execute(stmt)).all():
+        grouped[posting.examination_centre_id].append((posting, user))
+    return grouped
+
+
+async def count_registered_candidates_by_school(
+    session: AsyncSession,
+    exam_id: int,
+) -> dict[UUID, int]:
+    stmt = (
+        select(ExaminationCandidate.school_id, func.count())
+        .where(
+            ExaminationCandidate.examination_id == exam_id,
+            ExaminationCandidate.school_id.isnot(None),
+        )
+        .group_by(ExaminationCandidate.school_id)
+    )
+    return {row[0]: int(row[1]) for row in (await session.execute(stmt)).all()}
+
+
+async def iter_inspector_analysis_rows(
     session: AsyncSession,
     examination_id: int,
     subject_filter: TimetableDownloadFilter,
     *,
-    build_invigilator_item: Callable[..., object],
     candidates_per_inspector: int = DEFAULT_INSPECTOR_CANDIDATES_RATIO,
-) -> FinanceCentreInspectorAnalysisResponse:
+) -> AsyncIterator[FinanceCentreInspectorAnalysisRow]:
+    """Rows in centre code order from examination-wide loads (no per-centre queries)."""
     from app.services.exam_official_compensation import load_designation_rates_map
 
     centres = await list_centres_for_official_statistics(session, examination_id, subject_filter)
+    if not centres:
+        return
     rates_map = await load_designation_rates_map(session, examination_id)
-    centre_rows: list[FinanceCentreInspectorAnalysisRow] = []
+    officials_by_centre = await load_officials_grouped_by_centre(session, examination_id, subject_filter)
+    postings_by_centre = await load_posting_user_pairs_by_centre(session, examination_id)
+    registered_by_school = await count_registered_candidates_by_school(session, examination_id)
+    bulk = await load_examination_invigilator_data(session, examination_id)
+
     for centre in sorted(centres, key=lambda row: (str(row.code), str(row.name))):
-        centre_rows.append(
-            await build_inspector_analysis_row_for_centre(
+        invigilator_item = bulk.invigilator_item(centre, subject_filter)
+        scope_ids = bulk.centre_scope_ids(centre.id, subject_filter)
+        # Same preference as resolve_centre_candidate_total: peak day, else registered count.
+        total_candidates = total_candidates_from_invigilator_item(invigilator_item) if scope_ids else 0
+        if scope_ids and total_candidates <= 0:
+            total_candidates = sum(registered_by_school.get(sid, 0) for sid in scope_ids)
+        yield inspector_analysis_row_from_inputs(
+            centre,
+            subject_filter=subject_filter,
+            officials=officials_by_centre.get(centre.id, []),
+            posting_pairs=postings_by_centre.get(centre.id, []),
+            exam_days=len(invigilator_item.days),
+            total_candidates=total_candidates,
+            rates_map=rates_map,
+            candidates_per_inspector=candidates_per_inspector,
+        )
+
+
+async def build_finance_inspector_analysis(
+    session: AsyncSession,
+    examination_id: int,
+    subject_filter: TimetableDownloadFilter,
+    *,
+    build_invigilator_item: Callable[..., object] | None = None,
+    candidates_per_inspector: int = DEFAULT_INSPECTOR_CANDIDATES_RATIO,
+) -> FinanceCentreInspectorAnalysisResponse:
+    """All centres; the per-centre path is only used when ``build_invigilator_item`` is injected."""
+    from app.services.exam_official_compensation import load_designation_rates_map
+
+    centre_rows: list[FinanceCentreInspectorAnalysisRow] = []
+    if build_invigilator_item is None:
+        centre_rows = [
+            row
+            async for row in iter_inspector_analysis_rows(
                 session,
                 examination_id,
-                centre,
                 subject_filter,
-                build_invigilator_item=build_invigilator_item,
                 candidates_per_inspector=candidates_per_inspector,
-                rates_map=rates_map,
             )
-        )
+        ]
+    else:
+        centres = await list_centres_for_official_statistics(session, examination_id, subject_filter)
+        rates_map = await load_designation_rates_map(session, examination_id)
+        for centre in sorted(centres, key=lambda row: (str(row.code), str(row.name))):
+            centre_rows.append(
+                await build_inspector_analysis_row_for_centre(
+                    session,
+                    examination_id,
+                    centre,
+                    subject_filter,
+                    build_invigilator_item=build_invigilator_item,
+                    candidates_per_inspector=candidates_per_inspector,
+                    rates_map=rates_map,
+                )
+            )
     return FinanceCentreInspectorAnalysisResponse(
         examination_id=examination_id,
         subject_filter=subject_filter.value if hasattr(subject_filter, "value") else str(subject_filter),
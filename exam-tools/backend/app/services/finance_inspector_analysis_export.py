@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import io
 import re
+from collections.abc import Iterable
 from datetime import UTC, datetime
 
 from openpyxl import Workbook
@@ -13,6 +14,7 @@ from openpyxl.worksheet.worksheet import Worksheet
 
 from app.schemas.examination import FinanceCentreInspectorAnalysisRow
 from app.schemas.timetable import TimetableDownloadFilter
+from app.services.finance_inspector_analysis import sum_inspector_analysis_rows
 from app.services.finance_school_summary import subject_filter_filename_suffix
 
 SHEET_NAME = "Inspector analysis"
@@ -485,15 +487,19 @@ def _apply_print_setup(ws: Worksheet, header_row: int) -> None:
 
 
 def inspector_analysis_workbook_bytes(
-    rows: list[FinanceCentreInspectorAnalysisRow],
+    rows: Iterable[FinanceCentreInspectorAnalysisRow],
     *,
-    totals: FinanceCentreInspectorAnalysisRow,
+    totals: FinanceCentreInspectorAnalysisRow | None = None,
     exam_label: str,
     subject_filter: TimetableDownloadFilter,
     candidates_per_inspector: int = 300,
     export_variant: str = "full",
     export_style: str = "standard",
 ) -> bytes:
+    """``rows`` may be any iterable (e.g. the bulk row iterator); totals are summed when omitted."""
+    rows = list(rows)
+    if totals is None:
+        totals = sum_inspector_analysis_rows(rows)
     rich = export_style == "rich"
     headers = _headers_for_variant(export_variant, export_style=export_style)
     variance_cols = _variance_col_indices(headers)
@@ -0,0 +1,156 @@
+"""Examination-wide invigilator day counts for finance reporting.
+
+``_build_finance_centre_invigilator_item`` in the examinations router resolves the
+timetable and centre scope for one centre at a time. Finance reports cover every
+centre, so this module resolves scopes from the cached centre index and rolls each
+centre's per-day counts up from the examination's day-summary cube with the same rules
+(candidate-linked schedule codes per membership scope, unique candidates per day,
+one invigilator per 30 candidates).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CentreStructureMode, ExaminationCentre, Subject, SubjectType
+from app.schemas.examination import (
+    FinanceCentreDayInvigilatorRow,
+    FinanceCentreInvigilatorSummaryItem,
+    TimetableEntry,
+)
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services.centre_resolution import timetable_filters_for_memberships
+from app.services.centre_resolution_index import CentreResolutionIndex, get_centre_resolution_index
+from app.services.day_summary_cube import DaySummaryCube, get_day_summary_cube, invigilators_required
+
+
+@dataclass(frozen=True)
+class ExaminationInvigilatorData:
+    """Everything needed to compute invigilator days for any centre of one examination."""
+
+    examination_id: int
+    index: CentreResolutionIndex
+    cube: DaySummaryCube
+    schedule_type_by_code: dict[str, SubjectType]
+
+    @property
+    def entries(self) -> list[TimetableEntry]:
+        return self.cube.entries
+
+    @property
+    def codes_by_school(self) -> dict[UUID, frozenset[str]]:
+        return self.cube.codes_by_school
+
+    def filter_codes_by_subject_type(
+        self,
+        codes: set[str] | frozenset[str],
+        subject_filter: TimetableDownloadFilter,
+    ) -> set[str]:
+        """In-memory ``filter_schedule_codes_by_subject_type``."""
+        if subject_filter == TimetableDownloadFilter.ALL:
+            return set(codes)
+        wanted = SubjectType.CORE if subject_filter == TimetableDownloadFilter.CORE_ONLY else SubjectType.ELECTIVE
+        return {c for c in codes if self.schedule_type_by_code.get(c) == wanted}
+
+    def centre_scope_ids(self, centre_id: UUID, subject_filter: TimetableDownloadFilter) -> set[UUID]:
+        return self.index.scope_ids_for_subject_filter(
+            centre_id, self.index.host_overview_school_ids(centre_id), subject_filter=subject_filter
+        )
+
+    def centre_schedule_codes(
+        self,
+        centre_id: UUID,
+        scope_ids: set[UUID],
+        subject_filter: TimetableDownloadFilter,
+    ) -> set[str]:
+        """Same codes as the router's centre timetable (per-school membership scopes on SPLIT)."""
+        if self.index.mode != CentreStructureMode.SPLIT:
+            codes: set[str] = set()
+            for sid in scope_ids:
+                codes |= self.codes_by_school.get(sid, frozenset())
+            return self.filter_codes_by_subject_type(codes, subject_filter)
+
+        out: set[str] = set()
+        for sid in scope_ids:
+            memberships = self.index.school_membership_scopes_at_centre(sid, centre_id)
+            if not memberships:
+                continue
+            school_codes = self.codes_by_school.get(sid)
+            if not school_codes:
+                continue
+            for filt in timetable_filters_for_memberships(set(memberships), subject_filter):
+                out |= self.filter_codes_by_subject_type(school_codes, filt)
+        return out
+
+    def invigilator_item(
+        self,
+        centre: ExaminationCentre,
+        subject_filter: TimetableDownloadFilter,
+    ) -> FinanceCentreInvigilatorSummaryItem:
+        item = FinanceCentreInvigilatorSummaryItem(
+            center_id=centre.id,
+            center_code=str(centre.code),
+            center_name=str(centre.name),
+            days=[],
+        )
+        scope_ids = self.centre_scope_ids(centre.id, subject_filter)
+        if not scope_ids:
+            return item
+
+        codes = self.centre_schedule_codes(centre.id, scope_ids, subject_filter)
+        entries = [e for e in self.entries if e.subject_code in codes]
+        if not entries:
+            return item
+
+        codes_by_day: dict[date, set[str]] = defaultdict(set)
+        for ent in entries:
+            codes_by_day[ent.examination_date].add(str(ent.subject_code).strip())
+
+        days: list[FinanceCentreDayInvigilatorRow] = []
+        for day in sorted(codes_by_day):
+            unique = self.cube.unique_candidates(day, scope_ids, codes_by_day[day])
+            days.append(
+                FinanceCentreDayInvigilatorRow(
+                    examination_date=day,
+                    unique_candidates=unique,
+                    invigilators_required=invigilators_required(unique),
+                )
+            )
+        return item.model_copy(update={"days": days})
+
+    async def build_invigilator_item(
+        self,
+        session: AsyncSession,
+        examination_id: int,
+        centre: ExaminationCentre,
+        subject_filter: TimetableDownloadFilter,
+    ) -> FinanceCentreInvigilatorSummaryItem:
+        """Drop-in for the injected ``build_invigilator_item`` callables used by finance services."""
+        return self.invigilator_item(centre, subject_filter)
+
+
+async def load_examination_invigilator_data(
+    session: AsyncSession,
+    examination_id: int,
+) -> ExaminationInvigilatorData:
+    """Resolve memberships, the day-summary cube and subject types (cached parts skip their queries)."""
+    index = await get_centre_resolution_index(session, examination_id)
+    cube = await get_day_summary_cube(session, examination_id)
+
+    subject_rows = (
+        await session.execute(select(Subject.code, Subject.original_code, Subject.subject_type))
+    ).all()
+    schedule_type_by_code = {(original_code or code): subject_type for code, original_code, subject_type in subject_rows}
+
+    return ExaminationInvigilatorData(
+        examination_id=examination_id,
+        index=index,
+        cube=cube,
+        schedule_type_by_code=schedule_type_by_code,
+    )
@@ -1,6 +1,7 @@
 """Per-centre examination official statistics for finance and super-admin reporting."""
 
 from collections import defaultdict
+from collections.abc import AsyncIterator
 from uuid import UUID
 
 from sqlalchemy import select
@@ -31,6 +32,7 @@ from app.services.finance_school_summary import (
     invigilator_headcount,
     load_officials_for_centre,
 )
+from app.services.finance_invigilator_bulk import load_examination_invigilator_data
 
 TOTALS_ROW_ID = UUID(int=0)
 
@@ -175,30 +177,49 @@ async def build_official_statistics_shell(
     )
 
 
-async def build_finance_centre_official_statistics(
+async def iter_official_statistics_rows(
     session: AsyncSession,
     examination_id: int,
     subject_filter: TimetableDownloadFilter,
     *,
-    build_invigilator_item,
-) -> FinanceCentreOfficialStatisticsResponse:
-    """``build_invigilator_item`` is injected to avoid circular imports from examinations router."""
+    build_invigilator_item=None,
+) -> AsyncIterator[FinanceCentreOfficialStatisticsRow]:
+    """Rows in centre code order; expected days come from one bulk load unless a builder is injected."""
     centres = await list_centres_for_official_statistics(session, examination_id, subject_filter)
     officials_by_centre = await load_officials_grouped_by_centre(
         session, examination_id, subject_filter
     )
-    centre_rows: list[FinanceCentreOfficialStatisticsRow] = []
+    if build_invigilator_item is None and centres:
+        bulk = await load_examination_invigilator_data(session, examination_id)
+        build_invigilator_item = bulk.build_invigilator_item
     for centre in sorted(centres, key=lambda row: (str(row.code), str(row.name))):
-        centre_rows.append(
-            await build_statistics_row_for_centre(
-                session,
-                examination_id,
-                centre,
-                subject_filter,
-                build_invigilator_item=build_invigilator_item,
-                officials=officials_by_centre.get(centre.id, []),
-            )
+        yield await build_statistics_row_for_centre(
+            session,
+            examination_id,
+            centre,
+            subject_filter,
+            build_invigilator_item=build_invigilator_item,
+            officials=officials_by_centre.get(centre.id, []),
+        )
+
+
+async def build_finance_centre_official_statistics(
+    session: AsyncSession,
+    examination_id: int,
+    subject_filter: TimetableDownloadFilter,
+    *,
+    build_invigilator_item=None,
+) -> FinanceCentreOfficialStatisticsResponse:
+    """Rows for every centre; ``build_invigilator_item`` overrides the bulk engine (e.g. in tests)."""
+    centre_rows = [
+        row
+        async for row in iter_official_statistics_rows(
+            session,
+            examination_id,
+            subject_filter,
+            build_invigilator_item=build_invigilator_item,
         )
+    ]
     return FinanceCentreOfficialStatisticsResponse(
         examination_id=examination_id,
         subject_filter=subject_filter.value if hasattr(subject_filter, "value") else str(subject_filter),
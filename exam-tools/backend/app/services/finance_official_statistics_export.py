@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import io
 import re
+from collections.abc import Iterable
 
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
@@ -11,6 +12,7 @@ from openpyxl.utils import get_column_letter
 
 from app.schemas.examination import FinanceCentreOfficialStatisticsRow
 from app.schemas.timetable import TimetableDownloadFilter
+from app.services.finance_official_statistics import sum_statistics_rows
 from app.services.finance_school_summary import subject_filter_filename_suffix
 
 SHEET_NAME = "Official statistics"
@@ -98,12 +100,16 @@ def _row_values(row: FinanceCentreOfficialStatisticsRow) -> list[object]:
 
 
 def official_statistics_workbook_bytes(
-    rows: list[FinanceCentreOfficialStatisticsRow],
+    rows: Iterable[FinanceCentreOfficialStatisticsRow],
     *,
-    totals: FinanceCentreOfficialStatisticsRow,
+    totals: FinanceCentreOfficialStatisticsRow | None = None,
     exam_label: str,
     subject_filter: TimetableDownloadFilter,
 ) -> bytes:
+    """``rows`` may be any iterable (e.g. the bulk row iterator); totals are summed when omitted."""
+    rows = list(rows)
+    if totals is None:
+        totals = sum_statistics_rows(rows)
     wb = Workbook()
     ws = wb.active
     ws.title = SHEET_NAME[:31]
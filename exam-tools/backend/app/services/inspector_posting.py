@@ -23,6 +23,7 @@ from app.services.centre_resolution import (
     get_examination_centre_or_404,
     schools_in_centre_scope_ordered,
 )
+from app.services.centre_resolution_index import CentreResolutionIndex, get_centre_resolution_index
 
 
 def subject_matches_scope(scope: ExamInspectorSubjectScope, subject: Subject) -> bool:
@@ -241,13 +242,11 @@ async def union_scope_school_ids_for_inspector_postings(
     postings: list[InspectorExamPosting],
 ) -> set[UUID]:
     out: set[UUID] = set()
+    indexes: dict[int, CentreResolutionIndex] = {}
     for p in postings:
-        centre = await session.get(ExaminationCentre, p.examination_centre_id)
-        if centre is None:
-            continue
-        out |= await centre_scope_school_ids_for_inspector_scope(
-            session, centre, p.subject_scope
-        )
+        if p.examination_id not in indexes:
+            indexes[p.examination_id] = await get_centre_resolution_index(session, p.examination_id)
+        out |= indexes[p.examination_id].inspector_scope_school_ids(p.examination_centre_id, p.subject_scope)
     return out
 
 
@@ -0,0 +1,178 @@
+"""Per-examination in-memory index of examiner reference codes for lunch coupon scans.
+
+Each index holds, for one examination, every examiner with a reference code plus the
+subject ids (and display codes) they are rostered on, so a scan is resolved with a
+dict lookup. Indexes are cached per process: within ``lunch_coupon_index_ttl_seconds``
+they are used as-is, after that a single aggregate query compares the roster version
+(examiner count / latest update / subject link hash) and reloads on change. Only
+examinations that exist are cached, and at most ``_CACHE_SIZE`` of them.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from cachetools import LRUCache
+from sqlalchemy import String, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models import Examination, Examiner, ExaminerSubject
+from app.services.exam_official_export import examination_label
+
+RosterVersion = tuple[int, datetime | None, int, str | None]
+
+
+@dataclass(frozen=True)
+class IndexedExaminer:
+    examiner_id: UUID
+    examination_id: int
+    reference_code: str
+    name: str
+    examiner_type: object
+    region: object
+    # subject_id -> schedule code shown on the coupon (original_code, else code)
+    subject_codes: dict[int, str]
+
+    @property
+    def subject_ids(self) -> frozenset[int]:
+        return frozenset(self.subject_codes)
+
+    def single_subject_id(self) -> int | None:
+        if len(self.subject_codes) != 1:
+            return None
+        return next(iter(self.subject_codes))
+
+    def subject_codes_for_overlap(self, overlap: set[int]) -> list[str]:
+        return sorted(code for sid, code in self.subject_codes.items() if sid in overlap)
+
+
+@dataclass(frozen=True)
+class LunchCouponCodeIndex:
+    examination_id: int
+    examination_name: str | None
+    examination_created_at: datetime
+    version: RosterVersion
+    by_code: dict[str, IndexedExaminer]
+
+    def lookup(self, reference_code: str) -> IndexedExaminer | None:
+        return self.by_code.get(reference_code.strip().upper())
+
+
+@dataclass
+class _CacheSlot:
+    index: LunchCouponCodeIndex
+    checked_at: float
+
+
+_CACHE_SIZE = 64
+_cache: LRUCache[int, _CacheSlot] = LRUCache(maxsize=_CACHE_SIZE)
+
+
+async def roster_version(session: AsyncSession, examination_id: int) -> RosterVersion:
+    examiner_stats = (
+        select(func.count(Examiner.id).label("n"), func.max(Examiner.updated_at).label("latest"))
+        .where(Examiner.examination_id == examination_id)
+        .subquery()
+    )
+    # ExaminerSubject has no id or timestamps; hash the ordered (examiner, subject) pairs instead.
+    pair = cast(ExaminerSubject.examiner_id, String) + literal(":") + cast(ExaminerSubject.subject_id, String)
+    link_stats = (
+        select(
+            func.count(ExaminerSubject.subject_id).label("n"),
+            func.md5(
+                func.string_agg(
+                    pair, aggregate_order_by(literal(","), ExaminerSubject.examiner_id, ExaminerSubject.subject_id)
+                )
+            ).label("digest"),
+        )
+        .join(Examiner, Examiner.id == ExaminerSubject.examiner_id)
+        .where(Examiner.examination_id == examination_id)
+        .subquery()
+    )
+    row = (
+        await session.execute(
+            select(examiner_stats.c.n, examiner_stats.c.latest, link_stats.c.n, link_stats.c.digest)
+        )
+    ).one()
+    return (int(row[0] or 0), row[1], int(row[2] or 0), row[3])
+
+
+def build_index(
+    examination: Examination | None,
+    examination_id: int,
+    examiners: list[Examiner],
+    *,
+    version: RosterVersion = (0, None, 0, None),
+) -> LunchCouponCodeIndex:
+    by_code: dict[str, IndexedExaminer] = {}
+    for examiner in examiners:
+        code = (examiner.reference_code or "").strip().upper()
+        if not code:
+            continue
+        subject_codes: dict[int, str] = {}
+        for es in examiner.subjects:
+            subject = es.subject
+            if subject is None:
+                continue
+            orig = (subject.original_code or "").strip()
+            subject_codes[int(es.subject_id)] = orig if orig else subject.code
+        by_code[code] = IndexedExaminer(
+            examiner_id=examiner.id,
+            examination_id=examination_id,
+            reference_code=code,
+            name=examiner.name,
+            examiner_type=examiner.examiner_type,
+            region=examiner.region,
+            subject_codes=subject_codes,
+        )
+    return LunchCouponCodeIndex(
+        examination_id=examination_id,
+        examination_name=examination_label(examination) if examination is not None else None,
+        examination_created_at=(examination.created_at if examination is not None else None) or datetime.min,
+        version=version,
+        by_code=by_code,
+    )
+
+
+async def get_lunch_coupon_code_index(session: AsyncSession, examination_id: int) -> LunchCouponCodeIndex:
+    now = time.monotonic()
+    slot = _cache.get(examination_id)
+    if slot is not None and now - slot.checked_at < settings.lunch_coupon_index_ttl_seconds:
+        return slot.index
+
+    version: RosterVersion | None = None
+    if slot is not None:
+        version = await roster_version(session, examination_id)
+        if slot.index.version == version:
+            slot.checked_at = now
+            return slot.index
+
+    # The id comes from the scanned QR payload: never cache an index for an unknown examination.
+    exam = await session.get(Examination, examination_id)
+    if exam is None:
+        _cache.pop(examination_id, None)
+        return build_index(None, examination_id, [])
+    if version is None:
+        version = await roster_version(session, examination_id)
+    stmt = (
+        select(Examiner)
+        .where(Examiner.examination_id == examination_id, Examiner.reference_code.isnot(None))
+        .options(selectinload(Examiner.subjects).selectinload(ExaminerSubject.subject))
+    )
+    examiners = list((await session.execute(stmt)).scalars().all())
+    index = build_index(exam, examination_id, examiners, version=version)
+    _cache[examination_id] = _CacheSlot(index=index, checked_at=now)
+    return index
+
+
+def invalidate_lunch_coupon_code_index(examination_id: int | None = None) -> None:
+    if examination_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(examination_id, None)
@@ -17,7 +17,7 @@ from app.services.exam_official_export import examination_label
 from app.services.examiner_qr_payload import build_examiner_qr_payload
 from app.services.examiner_sort import sort_examiners
 from app.services.pdf_generator import PdfGenerator, render_html
-from app.services.qr_code import generate_qr_code_base64
+from app.services.qr_code import generate_qr_code_svg_data_uris
 from app.services.subject_marking_group import load_group
 
 COUPONS_PER_PAGE = 10
@@ -219,22 +219,16 @@ async def generate_lunch_coupons_pdf(
     )
     brand_color, brand_color_soft, _ = resolve_brand_color(color)
 
-    coupons: list[dict] = []
-    for examiner in examiners:
-        ref = (examiner.reference_code or "").strip().upper()
-        payload = build_examiner_qr_payload(examination_id, ref)
-        coupons.append(
-            {
-                "name": examiner.name,
-                "reference_code": ref,
-                "qr_base64": generate_qr_code_base64(
-                    payload,
-                    box_size=14,
-                    border=2,
-                    error_correction=qrcode.constants.ERROR_CORRECT_M,
-                ),
-            }
-        )
+    refs = [(examiner.reference_code or "").strip().upper() for examiner in examiners]
+    qr_srcs = generate_qr_code_svg_data_uris(
+        (build_examiner_qr_payload(examination_id, ref) for ref in refs),
+        border=2,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+    )
+    coupons: list[dict] = [
+        {"name": examiner.name, "reference_code": ref, "qr_src": qr_src}
+        for examiner, ref, qr_src in zip(examiners, refs, qr_srcs, strict=True)
+    ]
 
     exam_label = examination_label(exam)
     sub_label = _subject_label(subject)
@@ -3,17 +3,30 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
-from datetime import date, datetime
-from uuid import UUID
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID, uuid4
 
+from fastapi import HTTPException, status
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.models import Examiner, ExaminerSubject, Examination, LunchCouponVerification
+from app.schemas.lunch_coupon_verify import (
+    LunchCouponBatchScan,
+    LunchCouponBatchScanResult,
+    LunchCouponBatchVerifyResponse,
+)
 from app.services.exam_official_export import examination_label
 from app.services.examiner_invitation import _examiner_type_label
 from app.services.examiner_qr_payload import parse_examiner_qr_scan
+from app.services.lunch_coupon_code_index import (
+    IndexedExaminer,
+    LunchCouponCodeIndex,
+    get_lunch_coupon_code_index,
+)
 
 
 def _subject_codes_for_overlap(examiner: Examiner, overlap: set[int]) -> list[str]:
@@ -365,6 +378,227 @@ async def verify_and_record_lunch_coupon(
     }
 
 
+def _indexed_examiner_payload(
+    index: LunchCouponCodeIndex,
+    examiner: IndexedExaminer,
+    overlap: set[int],
+) -> dict:
+    return {
+        "valid": True,
+        "reference_code": examiner.reference_code,
+        "name": examiner.name,
+        "examiner_type": examiner.examiner_type.value,
+        "examiner_type_label": _examiner_type_label(examiner.examiner_type),
+        "region": examiner.region.value,
+        "subject_codes": examiner.subject_codes_for_overlap(overlap),
+        "examiner_id": examiner.examiner_id,
+        "examination_id": index.examination_id,
+        "examination_name": index.examination_name,
+    }
+
+
+async def resolve_scan_from_code_index(
+    session: AsyncSession,
+    raw_scan: str,
+    *,
+    examination_ids: Sequence[int],
+    officer_subject_ids_by_exam: dict[int, set[int]] | None,
+) -> dict:
+    """Same rules as ``resolve_examiner_for_scan_payload`` answered from the cached code index.
+
+    Legacy plain codes (no examination prefix) still need the cross-examination DB lookup
+    to pick an examination; the payload itself always comes from the index.
+    """
+    examination_id, code = parse_examiner_qr_scan(raw_scan)
+    if not code:
+        return {"valid": False, "message": "Reference code is required."}
+    not_found = {"valid": False, "message": "No examiner with this code on your roster."}
+
+    if examination_id is None:
+        resolved = await resolve_examiner_for_scan(
+            session,
+            code,
+            examination_ids=examination_ids,
+            officer_subject_ids_by_exam=officer_subject_ids_by_exam,
+        )
+        if resolved is None:
+            return not_found
+        examination_id = resolved[1]
+    elif officer_subject_ids_by_exam is not None and int(examination_id) not in set(examination_ids):
+        return not_found
+
+    index = await get_lunch_coupon_code_index(session, int(examination_id))
+    examiner = index.lookup(code)
+    if examiner is None:
+        return not_found
+    subject_id = examiner.single_subject_id()
+    if subject_id is None:
+        return not_found
+    if officer_subject_ids_by_exam is not None:
+        if subject_id not in officer_subject_ids_by_exam.get(int(examination_id), set()):
+            return not_found
+    return _indexed_examiner_payload(index, examiner, {subject_id})
+
+
+# Device clocks may run slightly fast; scans up to this far ahead are clamped to the server time.
+_SCAN_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _server_now() -> datetime:
+    return datetime.now(UTC)
+
+
+def _scan_day_and_time(scanned_at: datetime | None, now: datetime) -> tuple[date, datetime] | str:
+    """Verification day (server day) and naive-UTC ``verified_at`` for a scan, or a rejection message.
+
+    Device timestamps are untrusted: naive values are read as UTC, times more than
+    ``_SCAN_CLOCK_SKEW`` ahead of ``now`` are rejected (smaller drift is clamped), and
+    only scans from the current server day are accepted.
+    """
+    scanned = now if scanned_at is None else scanned_at
+    if scanned.tzinfo is None:
+        scanned = scanned.replace(tzinfo=UTC)
+    if scanned > now + _SCAN_CLOCK_SKEW:
+        return "Scan time is ahead of the server clock."
+    scanned = min(scanned, now)
+    if scanned.astimezone().date() != now.astimezone().date():
+        return "Scan is not from today's session."
+    return scanned.astimezone().date(), scanned.astimezone(UTC).replace(tzinfo=None)
+
+
+async def _load_existing_verifications(
+    session: AsyncSession,
+    keys: set[tuple[int, UUID, date]],
+) -> dict[tuple[int, UUID, date], LunchCouponVerification]:
+    if not keys:
+        return {}
+    stmt = (
+        select(LunchCouponVerification)
+        .where(
+            LunchCouponVerification.examination_id.in_({k[0] for k in keys}),
+            LunchCouponVerification.examiner_id.in_({k[1] for k in keys}),
+            LunchCouponVerification.verification_date.in_({k[2] for k in keys}),
+        )
+        .options(selectinload(LunchCouponVerification.verified_by))
+    )
+    out: dict[tuple[int, UUID, date], LunchCouponVerification] = {}
+    for row in (await session.execute(stmt)).scalars().all():
+        key = (int(row.examination_id), row.examiner_id, row.verification_date)
+        if key in keys:
+            out[key] = row
+    return out
+
+
+async def verify_and_record_lunch_coupon_scans(
+    session: AsyncSession,
+    *,
+    examination_ids: Sequence[int],
+    officer_subject_ids_by_exam: dict[int, set[int]] | None,
+    scans: Sequence[LunchCouponBatchScan],
+    verified_by_id: UUID,
+) -> list[dict]:
+    """Verify queued scans from the code index and record them with one idempotent insert.
+
+    Results are returned in scan order. Re-uploading a batch, or the same examiner twice on
+    one day, yields ``already_verified`` rather than an error or a duplicate row.
+    """
+    results: list[dict] = []
+    pending: dict[tuple[int, UUID, date], tuple[int, datetime]] = {}
+    now = _server_now()
+    for scan in scans:
+        result = await resolve_scan_from_code_index(
+            session,
+            scan.reference_code,
+            examination_ids=examination_ids,
+            officer_subject_ids_by_exam=officer_subject_ids_by_exam,
+        )
+        result["client_scan_id"] = scan.client_scan_id
+        results.append(result)
+        if not result.get("valid"):
+            continue
+        scan_time = _scan_day_and_time(scan.scanned_at, now)
+        if isinstance(scan_time, str):
+            result.update(valid=False, message=scan_time)
+            continue
+        verify_date, verified_at = scan_time
+        key = (result["examination_id"], result["examiner_id"], verify_date)
+        result["verification_date"] = verify_date
+        if key not in pending:
+            pending[key] = (len(results) - 1, verified_at)
+
+    inserted: set[tuple[int, UUID, date]] = set()
+    if pending:
+        created_at = now.replace(tzinfo=None)
+        values = [
+            {
+                "id": uuid4(),
+                "examination_id": key[0],
+                "examiner_id": key[1],
+                "reference_code": results[pos]["reference_code"],
+                "verification_date": key[2],
+                "verified_by_id": verified_by_id,
+                "verified_at": verified_at,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            for key, (pos, verified_at) in pending.items()
+        ]
+        stmt = (
+            pg_insert(LunchCouponVerification)
+            .values(values)
+            .on_conflict_do_nothing(constraint="uq_lunch_coupon_verifications_exam_examiner_date")
+            .returning(
+                LunchCouponVerification.examination_id,
+                LunchCouponVerification.examiner_id,
+                LunchCouponVerification.verification_date,
+            )
+        )
+        inserted = {(int(r[0]), r[1], r[2]) for r in (await session.execute(stmt)).all()}
+
+    existing = await _load_existing_verifications(session, set(pending) - inserted)
+    for pos, result in enumerate(results):
+        if not result.get("valid"):
+            continue
+        key = (result["examination_id"], result["examiner_id"], result["verification_date"])
+        first_pos, verified_at = pending[key]
+        if key in inserted and pos == first_pos:
+            result.update(already_verified=False, verified_at=verified_at, recorded=True)
+            continue
+        prior = existing.get(key)
+        if prior is not None:
+            verified_at = prior.verified_at
+            verified_by_name = prior.verified_by.full_name if prior.verified_by else None
+        else:
+            verified_by_name = None
+        result.update(
+            valid=False,
+            already_verified=True,
+            verified_at=verified_at,
+            verified_by_name=verified_by_name,
+            recorded=False,
+            message=_already_verified_message(verified_at=verified_at, verified_by_name=verified_by_name),
+        )
+    return results
+
+
+def check_batch_scan_count(count: int) -> None:
+    limit = settings.lunch_coupon_batch_max_scans
+    if count > limit:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Too many scans in one upload (maximum {limit}).",
+        )
+
+
+def lunch_coupon_batch_response(results: list[dict]) -> LunchCouponBatchVerifyResponse:
+    return LunchCouponBatchVerifyResponse(
+        results=[LunchCouponBatchScanResult(**r) for r in results],
+        recorded_count=sum(1 for r in results if r.get("recorded")),
+        already_verified_count=sum(1 for r in results if r.get("already_verified")),
+        invalid_count=sum(1 for r in results if not r.get("valid") and not r.get("already_verified")),
+    )
+
+
 async def list_lunch_coupon_verifications(
     session: AsyncSession,
     *,
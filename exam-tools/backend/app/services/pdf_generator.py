@@ -1,5 +1,6 @@
 """PDF generation service using WeasyPrint."""
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -284,6 +285,12 @@ class PdfGenerator:
         return None
 
 
+@lru_cache(maxsize=8)
+def template_environment(templates_dir: str) -> Environment:
+    """Jinja environment per templates directory; compiled templates are cached on it."""
+    return Environment(loader=FileSystemLoader(templates_dir))
+
+
 def render_html(context: dict[str, Any], template_path: str, templates_dir: Path | None = None) -> str:
     """
     Render an HTML template with the given context.
@@ -300,7 +307,6 @@ def render_html(context: dict[str, Any], template_path: str, templates_dir: Path
         # Default to app/templates if not specified
         templates_dir = Path(__file__).parent.parent / "templates"
 
-    env = Environment(loader=FileSystemLoader(str(templates_dir)))
-    template = env.get_template(template_path)
+    template = template_environment(str(templates_dir)).get_template(template_path)
     html_output = template.render(context)
     return html_output
@@ -1,25 +1,34 @@
-"""QR code image generation for examiner reference codes and similar payloads."""
+"""QR code image generation for examiner reference codes and similar payloads.
+
+Matrices and encoded images are memoized per (payload, options) with LRU eviction, so
+reprinting a cohort's coupons or allocation forms does not re-encode the same codes.
+PDF templates should prefer the SVG data URIs: they are built straight from the module
+matrix as one vector path, which skips PIL on our side and PNG decoding in WeasyPrint.
+"""
 
 from __future__ import annotations
 
 import base64
 import io
+from collections.abc import Iterable
+from functools import lru_cache
 
 import qrcode
 
+# Distinct (payload, options) entries kept per cache; a full national examiner roster fits.
+QR_CACHE_SIZE = 8192
 
-def generate_qr_code_base64(
-    payload: str,
-    *,
-    box_size: int = 10,
-    border: int = 4,
-    error_correction: int = qrcode.constants.ERROR_CORRECT_L,
-) -> str:
-    """Return a base64-encoded PNG for the given payload (no data: prefix)."""
+QrMatrix = tuple[tuple[bool, ...], ...]
+
+
+def _payload_text(payload: str) -> str:
     text = payload.strip()
     if not text:
         raise ValueError("QR payload must not be empty.")
+    return text
+
 
+def _build_qr(text: str, *, box_size: int, border: int, error_correction: int) -> qrcode.QRCode:
     qr = qrcode.QRCode(
         version=1,
         error_correction=error_correction,
@@ -28,9 +37,100 @@ def generate_qr_code_base64(
     )
     qr.add_data(text)
     qr.make(fit=True)
+    return qr
+
 
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _qr_matrix(text: str, border: int, error_correction: int) -> QrMatrix:
+    qr = _build_qr(text, box_size=1, border=border, error_correction=error_correction)
+    return tuple(tuple(bool(cell) for cell in row) for row in qr.get_matrix())
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _qr_png_base64(text: str, box_size: int, border: int, error_correction: int) -> str:
+    qr = _build_qr(text, box_size=box_size, border=border, error_correction=error_correction)
     img = qr.make_image(fill_color="black", back_color="white")
     buffer = io.BytesIO()
     img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return base64.b64encode(buffer.read()).decode("utf-8")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def _svg_from_matrix(matrix: QrMatrix) -> str:
+    """One ``<path>`` of horizontal runs of dark modules, in module units."""
+    size = len(matrix)
+    runs: list[str] = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(runs)}" fill="#000"/></svg>'
+    )
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _qr_svg(text: str, border: int, error_correction: int) -> str:
+    return _svg_from_matrix(_qr_matrix(text, border, error_correction))
+
+
+def generate_qr_code_base64(
+    payload: str,
+    *,
+    box_size: int = 10,
+    border: int = 4,
+    error_correction: int = qrcode.constants.ERROR_CORRECT_L,
+) -> str:
+    """Return a base64-encoded PNG for the given payload (no data: prefix)."""
+    return _qr_png_base64(_payload_text(payload), box_size, border, error_correction)
+
+
+def generate_qr_code_svg(
+    payload: str,
+    *,
+    border: int = 4,
+    error_correction: int = qrcode.constants.ERROR_CORRECT_L,
+) -> str:
+    """Return a standalone SVG document for the payload (scales to whatever box the template gives it)."""
+    return _qr_svg(_payload_text(payload), border, error_correction)
+
+
+def qr_code_svg_data_uri(
+    payload: str,
+    *,
+    border: int = 4,
+    error_correction: int = qrcode.constants.ERROR_CORRECT_L,
+) -> str:
+    """``data:image/svg+xml`` URI for ``<img src=...>`` in PDF templates."""
+    svg = generate_qr_code_svg(payload, border=border, error_correction=error_correction)
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode("ascii")
+
+
+def generate_qr_code_svg_data_uris(
+    payloads: Iterable[str],
+    *,
+    border: int = 4,
+    error_correction: int = qrcode.constants.ERROR_CORRECT_L,
+) -> list[str]:
+    """SVG data URIs for a whole cohort, in input order; repeated payloads are encoded once."""
+    by_payload: dict[str, str] = {}
+    out: list[str] = []
+    for payload in payloads:
+        uri = by_payload.get(payload)
+        if uri is None:
+            uri = qr_code_svg_data_uri(payload, border=border, error_correction=error_correction)
+            by_payload[payload] = uri
+        out.append(uri)
+    return out
+
+
+def clear_qr_code_cache() -> None:
+    for cached in (_qr_matrix, _qr_png_base64, _qr_svg):
+        cached.cache_clear()
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import math
 import time
+from dataclasses import dataclass, field
 from uuid import UUID
 
 from sqlalchemy import delete, select
@@ -39,7 +40,13 @@ from app.schemas.script_allocation import (
     ExaminerTypeSchema,
     UnassignedEnvelopeItem,
 )
-from app.services.script_allocation_milp import EligiblePair, SlackTarget, solve_script_allocation_milp
+from app.services.examiner_quota_counters import RosterQuotaBucket, adjust_quota_counters
+from app.services.script_allocation_milp import (
+    EligiblePair,
+    MilpSolveResult,
+    SlackTarget,
+    solve_script_allocation_milp,
+)
 from app.services.script_allocation_regional_greedy import (
     regional_greedy_solve,
     ordered_marking_regions as greedy_ordered_marking_regions,
@@ -984,13 +991,21 @@ async def run_regional_greedy_allocation_solve(
     return run
 
 
-async def run_decomposed_allocation_solve_by_region(
-    session: AsyncSession,
-    allocation: Allocation,
-    *,
-    created_by_id: UUID | None,
+@dataclass
+class DecomposedRegionSolve:
+    """Outcome of the per-(marking region, series) MILP sequence, before any DB writes."""
+
+    pair_assignments: list[EligiblePair] = field(default_factory=list)
+    subgroup_stats: list[dict[str, object]] = field(default_factory=list)
+    objective_sum: float = 0.0
+    solve_time_sec: float = 0.0
+    failure: MilpSolveResult | None = None
+
+
+def solve_decomposed_by_region(
     rows: list[tuple[ScriptEnvelope, ScriptPackingSeries, School]],
     examiners: list[Examiner],
+    *,
     region_parsed: dict[Region, set[Region]],
     quota_by_type_subject: dict[tuple[ExaminerType, int], int],
     unassigned_penalty: float,
@@ -998,10 +1013,9 @@ async def run_decomposed_allocation_solve_by_region(
     fairness_weight: float,
     school_cohesion_weight: float,
     prefer_larger_booklets_epsilon: float,
-    enable_post_rebalance: bool,
-    rebalance_tolerance_booklets: int,
     marking_region_solve_order: list[Region] | None,
-) -> AllocationRun:
+) -> DecomposedRegionSolve:
+    """Marking regions in solve order, each split into series buckets; stops at the first failed MILP."""
     pool_regions = {ex.region for ex in examiners if ex.region is not None}
     region_order = greedy_ordered_marking_regions(
         set(region_parsed.keys()),
@@ -1012,10 +1026,7 @@ async def run_decomposed_allocation_solve_by_region(
     time_budget = float(time_limit_sec)
     subgroups_milp_finished = 0
     assigned_global: set[UUID] = set()
-    subgroup_stats: list[dict[str, object]] = []
-    pair_assignments_all: list[EligiblePair] = []
-    objective_sum = 0.0
-    rebalance_stats: dict[str, object] | None = None
+    out = DecomposedRegionSolve()
 
     for marking_region in region_order:
         rem_rows = [row for row in rows if row[0].id not in assigned_global]
@@ -1028,7 +1039,7 @@ async def run_decomposed_allocation_solve_by_region(
             cross_marking_region_rules=region_parsed,
         )
         if not pairs_g:
-            subgroup_stats.append(
+            out.subgroup_stats.append(
                 {
                     "marking_region": marking_region.value,
                     "series_number": 0,
@@ -1076,7 +1087,9 @@ async def run_decomposed_allocation_solve_by_region(
                 school_cohesion_weight=school_cohesion_weight,
                 prefer_larger_booklets_epsilon=prefer_larger_booklets_epsilon,
             )
-            time_budget -= time.perf_counter() - t_solve_start
+            elapsed = time.perf_counter() - t_solve_start
+            out.solve_time_sec += elapsed
+            time_budget -= elapsed
             if time_budget < 0.0:
                 time_budget = 0.0
             subgroups_milp_finished += 1
@@ -1087,7 +1100,7 @@ async def run_decomposed_allocation_solve_by_region(
                 milp_out.status_code,
                 proven_optimal=milp_out.proven_optimal,
             )
-            subgroup_stats.append(
+            out.subgroup_stats.append(
                 {
                     "marking_region": marking_region.value,
                     "series_number": int(s),
@@ -1102,29 +1115,71 @@ async def run_decomposed_allocation_solve_by_region(
             )
 
             if not milp_out.success:
-                run = AllocationRun(
-                    allocation_id=allocation.id,
-                    status=_run_status_for_failure(milp_out.message, milp_out.status_code),
-                    objective_value=milp_out.objective,
-                    solver_message=(milp_out.message or "")[:4000] or None,
-                    created_by_id=created_by_id,
-                    solver_stats={
-                        "solve_mode": AllocationSolveModeSchema.decomposed.value,
-                        "subgroups": subgroup_stats,
-                        "milp_status": milp_out.status_code,
-                        "eligibility_mode": "region",
-                    },
-                )
-                session.add(run)
-                await session.flush()
-                return run
+                out.failure = milp_out
+                return out
 
             for p in milp_out.pair_assignments:
                 assigned_global.add(p.envelope_id)
-                pair_assignments_all.append(p)
+                out.pair_assignments.append(p)
             if milp_out.objective is not None:
-                objective_sum += float(milp_out.objective)
+                out.objective_sum += float(milp_out.objective)
+
+    return out
+
+
+async def run_decomposed_allocation_solve_by_region(
+    session: AsyncSession,
+    allocation: Allocation,
+    *,
+    created_by_id: UUID | None,
+    rows: list[tuple[ScriptEnvelope, ScriptPackingSeries, School]],
+    examiners: list[Examiner],
+    region_parsed: dict[Region, set[Region]],
+    quota_by_type_subject: dict[tuple[ExaminerType, int], int],
+    unassigned_penalty: float,
+    time_limit_sec: float,
+    fairness_weight: float,
+    school_cohesion_weight: float,
+    prefer_larger_booklets_epsilon: float,
+    enable_post_rebalance: bool,
+    rebalance_tolerance_booklets: int,
+    marking_region_solve_order: list[Region] | None,
+) -> AllocationRun:
+    solved = solve_decomposed_by_region(
+        rows,
+        examiners,
+        region_parsed=region_parsed,
+        quota_by_type_subject=quota_by_type_subject,
+        unassigned_penalty=unassigned_penalty,
+        time_limit_sec=time_limit_sec,
+        fairness_weight=fairness_weight,
+        school_cohesion_weight=school_cohesion_weight,
+        prefer_larger_booklets_epsilon=prefer_larger_booklets_epsilon,
+        marking_region_solve_order=marking_region_solve_order,
+    )
+    subgroup_stats = solved.subgroup_stats
+    if solved.failure is not None:
+        milp_out = solved.failure
+        run = AllocationRun(
+            allocation_id=allocation.id,
+            status=_run_status_for_failure(milp_out.message, milp_out.status_code),
+            objective_value=milp_out.objective,
+            solver_message=(milp_out.message or "")[:4000] or None,
+            created_by_id=created_by_id,
+            solver_stats={
+                "solve_mode": AllocationSolveModeSchema.decomposed.value,
+                "subgroups": subgroup_stats,
+                "milp_status": milp_out.status_code,
+                "eligibility_mode": "region",
+            },
+        )
+        session.add(run)
+        await session.flush()
+        return run
 
+    pair_assignments_all = solved.pair_assignments
+    assigned_global = {p.envelope_id for p in pair_assignments_all}
+    rebalance_stats: dict[str, object] | None = None
     if enable_post_rebalance:
         all_eligible_pairs, _ = build_eligible_pairs(
             rows,
@@ -1148,7 +1203,7 @@ async def run_decomposed_allocation_solve_by_region(
     run = AllocationRun(
         allocation_id=allocation.id,
         status=AllocationRunStatus.OPTIMAL,
-        objective_value=objective_sum,
+        objective_value=solved.objective_sum,
         solver_message=None,
         created_by_id=created_by_id,
         solver_stats={
@@ -1627,11 +1682,27 @@ async def sync_examiner_subjects(
     subject_ids: list[int],
 ) -> None:
     # Avoid relationship .clear() — it can lazy-load / emit IO in a sync context under AsyncSession.
-    await session.execute(delete(ExaminerSubject).where(ExaminerSubject.examiner_id == examiner.id))
+    removed = (
+        await session.execute(
+            delete(ExaminerSubject)
+            .where(ExaminerSubject.examiner_id == examiner.id)
+            .returning(ExaminerSubject.subject_id)
+        )
+    ).scalars().all()
     await session.flush()
     for sid in subject_ids:
         session.add(ExaminerSubject(examiner_id=examiner.id, subject_id=sid))
 
+    previous = {int(s) for s in removed}
+    current = {int(s) for s in subject_ids}
+    bucket = RosterQuotaBucket.for_examiner(examiner)
+    await adjust_quota_counters(
+        session, examination_id=int(examiner.examination_id), subject_ids=previous - current, bucket=bucket, delta=-1
+    )
+    await adjust_quota_counters(
+        session, examination_id=int(examiner.examination_id), subject_ids=current - previous, bucket=bucket, delta=1
+    )
+
 
 async def sync_examiner_zones(session: AsyncSession, examiner: Examiner, zones: list[Zone]) -> None:
     """No-op: per-examiner allowed zones were removed; use examiner groups + cross_marking_rules."""
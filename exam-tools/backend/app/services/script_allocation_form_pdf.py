@@ -28,7 +28,7 @@ from app.models import (
 from app.services.exam_official_export import examination_label
 from app.services.examiner_qr_payload import build_examiner_qr_payload
 from app.services.pdf_generator import PdfGenerator, render_html
-from app.services.qr_code import generate_qr_code_base64
+from app.services.qr_code import qr_code_svg_data_uri
 
 MAX_COPIES = 20
 TEMPLATE_REL = "script-allocation/scripts-allocation-form.html"
@@ -157,7 +157,7 @@ def _render_one_examiner_pdf_sync(
     qr_payload = (
         build_examiner_qr_payload(examination_id, reference_code) if reference_code else None
     )
-    qr_code_base64 = generate_qr_code_base64(qr_payload) if qr_payload else None
+    qr_code_src = qr_code_svg_data_uri(qr_payload) if qr_payload else None
     rows_with_tones = _annotate_series_tones(rows)
     pages = _paginate_allocation_rows(rows_with_tones)
     main_html = render_html(
@@ -169,7 +169,7 @@ def _render_one_examiner_pdf_sync(
             "examiner_name": examiner_name,
             "examiner_region": examiner_region,
             "reference_code": reference_code,
-            "qr_code_base64": qr_code_base64,
+            "qr_code_src": qr_code_src,
             "pages": pages,
             "total_count": total_count,
             "generated_at": generated_at,
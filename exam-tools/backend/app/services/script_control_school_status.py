@@ -5,7 +5,7 @@ from __future__ import annotations
 from typing import Literal
 from uuid import UUID
 
-from sqlalchemy import distinct, func, or_, select
+from sqlalchemy import ColumnElement, Select, and_, case, distinct, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -34,16 +34,6 @@ from app.services.script_control import subject_series_count_map
 SchoolStatusFilter = Literal["all", "missing", "partial", "complete", "verified"]
 
 
-def _series_slot_verified_regular(ps: ScriptPackingSeries) -> bool:
-    if ps.no_scripts:
-        return True
-    return len(ps.envelopes) > 0 and all(e.verified_at is not None for e in ps.envelopes)
-
-
-def _series_slot_verified_irregular(ps: IrregularScriptPackingSeries) -> bool:
-    return len(ps.envelopes) > 0 and all(e.verified_at is not None for e in ps.envelopes)
-
-
 def _overall_status(
     expected: int,
     recorded: int,
@@ -118,23 +108,42 @@ async def _subject_has_paper_on_timetable(session: AsyncSession, exam_id: int, s
     return False
 
 
-async def _schools_with_subject_registrations(
-    session: AsyncSession,
+def _packing_models(irregular: bool) -> tuple[type, type]:
+    if irregular:
+        return IrregularScriptPackingSeries, IrregularScriptEnvelope
+    return ScriptPackingSeries, ScriptEnvelope
+
+
+def _school_status_select(
     *,
     examination_id: int,
     subject_id: int,
+    paper_number: int,
+    expected_series: int,
+    irregular: bool,
     region: Region | None,
     zone: Zone | None,
     school_q: str | None,
-) -> list[tuple[School, int]]:
-    """Schools with at least one registered candidate for subject; returns (school, candidate_count)."""
-    stmt = (
+) -> tuple[Select, ColumnElement[str]]:
+    """One row per school with registrations: (School, registered, recorded, verified, booklets, status).
+
+    Envelope counts are aggregated per packing series, then series per school, so the
+    status rules of ``_overall_status`` run in SQL and the grid can filter/sort/page there.
+    A series slot is verified when it has envelopes and all are verified (or, for regular
+    scripts, when it is marked no-scripts). Returns the select and its status expression.
+    """
+    series_model, envelope_model = _packing_models(irregular)
+    packing_scope = (
+        series_model.examination_id == examination_id,
+        series_model.subject_id == subject_id,
+        series_model.paper_number == paper_number,
+    )
+
+    registered = (
         select(
-            School,
+            ExaminationCandidate.school_id.label("school_id"),
             func.count(distinct(ExaminationCandidate.id)).label("candidate_count"),
         )
-        .select_from(School)
-        .join(ExaminationCandidate, ExaminationCandidate.school_id == School.id)
         .join(
             ExaminationCandidateSubject,
             ExaminationCandidateSubject.examination_candidate_id == ExaminationCandidate.id,
@@ -144,8 +153,59 @@ async def _schools_with_subject_registrations(
             ExaminationCandidate.school_id.isnot(None),
             ExaminationCandidateSubject.subject_id == subject_id,
         )
-        .group_by(School.id)
-        .order_by(School.code)
+        .group_by(ExaminationCandidate.school_id)
+        .subquery("registered")
+    )
+
+    envelopes = (
+        select(
+            envelope_model.packing_series_id.label("packing_series_id"),
+            func.count(envelope_model.id).label("envelope_count"),
+            func.count(envelope_model.verified_at).label("verified_count"),
+            func.sum(envelope_model.booklet_count).label("booklets"),
+        )
+        .join(series_model, series_model.id == envelope_model.packing_series_id)
+        .where(*packing_scope)
+        .group_by(envelope_model.packing_series_id)
+        .subquery("envelopes")
+    )
+    envelope_count = func.coalesce(envelopes.c.envelope_count, 0)
+    slot_verified = and_(envelope_count > 0, envelopes.c.verified_count == envelope_count)
+    if not irregular:
+        slot_verified = or_(series_model.no_scripts.is_(True), slot_verified)
+
+    slots = (
+        select(
+            series_model.school_id.label("school_id"),
+            func.count(series_model.id).label("recorded"),
+            func.count(series_model.id).filter(slot_verified).label("verified"),
+            func.coalesce(func.sum(envelopes.c.booklets), 0).label("booklets"),
+        )
+        .outerjoin(envelopes, envelopes.c.packing_series_id == series_model.id)
+        .where(*packing_scope, series_model.series_number.between(1, expected_series))
+        .group_by(series_model.school_id)
+        .subquery("slots")
+    )
+
+    recorded = func.coalesce(slots.c.recorded, 0)
+    verified = func.coalesce(slots.c.verified, 0)
+    status = case(
+        (recorded == 0, "missing"),
+        (recorded < expected_series, "partial"),
+        (verified >= expected_series, "verified"),
+        else_="complete",
+    )
+    stmt = (
+        select(
+            School,
+            registered.c.candidate_count,
+            recorded.label("recorded_series"),
+            verified.label("verified_series"),
+            func.coalesce(slots.c.booklets, 0).label("total_booklets"),
+            status.label("overall_status"),
+        )
+        .join(registered, registered.c.school_id == School.id)
+        .outerjoin(slots, slots.c.school_id == School.id)
     )
     if region is not None:
         stmt = stmt.where(School.region == region)
@@ -154,12 +214,49 @@ async def _schools_with_subject_registrations(
     if school_q and school_q.strip():
         pattern = f"%{school_q.strip()}%"
         stmt = stmt.where(or_(School.code.ilike(pattern), School.name.ilike(pattern)))
+    return stmt, status
+
 
-    result = await session.execute(stmt)
-    return [(row[0], int(row[1])) for row in result.all()]
+async def _school_status_counts(session: AsyncSession, grid: Select) -> ScriptControlSchoolStatusCounts:
+    sub = grid.subquery("grid")
+    rollup = select(sub.c.overall_status, func.count()).group_by(sub.c.overall_status)
+    counts = ScriptControlSchoolStatusCounts()
+    for overall, n in (await session.execute(rollup)).all():
+        setattr(counts, overall, int(n))
+        counts.total += int(n)
+    return counts
 
 
-async def build_script_control_school_status_rows(
+async def _series_items_for_schools(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    paper_number: int,
+    expected_series: int,
+    irregular: bool,
+    school_ids: list[UUID],
+) -> dict[UUID, list[ScriptPackingSeries | IrregularScriptPackingSeries]]:
+    series_model, _ = _packing_models(irregular)
+    stmt = (
+        select(series_model)
+        .where(
+            series_model.examination_id == examination_id,
+            series_model.subject_id == subject_id,
+            series_model.paper_number == paper_number,
+            series_model.school_id.in_(school_ids),
+            series_model.series_number.between(1, expected_series),
+        )
+        .order_by(series_model.series_number)
+        .options(selectinload(series_model.envelopes))
+    )
+    by_school: dict[UUID, list[ScriptPackingSeries | IrregularScriptPackingSeries]] = {}
+    for ps in (await session.execute(stmt)).scalars().unique().all():
+        by_school.setdefault(ps.school_id, []).append(ps)
+    return by_school
+
+
+async def page_script_control_school_status(
     session: AsyncSession,
     *,
     examination_id: int,
@@ -170,101 +267,59 @@ async def build_script_control_school_status_rows(
     zone: Zone | None = None,
     school_q: str | None = None,
     status_filter: SchoolStatusFilter = "all",
-) -> tuple[list[ScriptControlSchoolStatusRow], ScriptControlSchoolStatusCounts]:
+    skip: int = 0,
+    limit: int | None = None,
+) -> tuple[list[ScriptControlSchoolStatusRow], int, ScriptControlSchoolStatusCounts]:
+    """One page of the school-status grid, its filtered total and status counts.
+
+    Status, filtering, ordering and paging run in SQL; series detail (envelopes) is only
+    loaded for the schools on the returned page.
+    """
     await load_examination_or_raise(session, examination_id)
     sub = await session.get(Subject, subject_id)
     if sub is None:
-        return [], ScriptControlSchoolStatusCounts()
+        return [], 0, ScriptControlSchoolStatusCounts()
 
     if not await _subject_has_paper_on_timetable(session, examination_id, subject_id, paper_number):
-        return [], ScriptControlSchoolStatusCounts()
+        return [], 0, ScriptControlSchoolStatusCounts()
 
     cmap = await subject_series_count_map(session, examination_id)
     expected_series = max(1, cmap.get(subject_id, 1))
 
-    schools_with_counts = await _schools_with_subject_registrations(
-        session,
+    grid, status = _school_status_select(
         examination_id=examination_id,
         subject_id=subject_id,
+        paper_number=paper_number,
+        expected_series=expected_series,
+        irregular=irregular,
         region=region,
         zone=zone,
         school_q=school_q,
     )
-    if not schools_with_counts:
-        return [], ScriptControlSchoolStatusCounts()
+    counts = await _school_status_counts(session, grid)
+    total = counts.total if status_filter == "all" else getattr(counts, status_filter)
+    if total == 0 or (limit is not None and skip >= total):
+        return [], total, counts
 
-    school_ids = [sch.id for sch, _ in schools_with_counts]
-    reg_by_school = {sch.id: cnt for sch, cnt in schools_with_counts}
+    page_stmt = grid.order_by(School.code, School.id).offset(skip)
+    if status_filter != "all":
+        page_stmt = page_stmt.where(status == status_filter)
+    if limit is not None:
+        page_stmt = page_stmt.limit(limit)
+    page = (await session.execute(page_stmt)).all()
 
-    if irregular:
-        pack_stmt = (
-            select(IrregularScriptPackingSeries)
-            .where(
-                IrregularScriptPackingSeries.examination_id == examination_id,
-                IrregularScriptPackingSeries.subject_id == subject_id,
-                IrregularScriptPackingSeries.paper_number == paper_number,
-                IrregularScriptPackingSeries.school_id.in_(school_ids),
-            )
-            .options(selectinload(IrregularScriptPackingSeries.envelopes))
-        )
-        pack_result = await session.execute(pack_stmt)
-        packings = list(pack_result.scalars().unique().all())
-        by_school: dict[UUID, dict[int, IrregularScriptPackingSeries]] = {}
-        for ps in packings:
-            by_school.setdefault(ps.school_id, {})[ps.series_number] = ps
-        verify_fn = _series_slot_verified_irregular
-    else:
-        pack_stmt = (
-            select(ScriptPackingSeries)
-            .where(
-                ScriptPackingSeries.examination_id == examination_id,
-                ScriptPackingSeries.subject_id == subject_id,
-                ScriptPackingSeries.paper_number == paper_number,
-                ScriptPackingSeries.school_id.in_(school_ids),
-            )
-            .options(selectinload(ScriptPackingSeries.envelopes))
-        )
-        pack_result = await session.execute(pack_stmt)
-        packings = list(pack_result.scalars().unique().all())
-        by_school = {}
-        for ps in packings:
-            by_school.setdefault(ps.school_id, {})[ps.series_number] = ps
-        verify_fn = _series_slot_verified_regular
+    series_by_school = await _series_items_for_schools(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        paper_number=paper_number,
+        expected_series=expected_series,
+        irregular=irregular,
+        school_ids=[row[0].id for row in page],
+    )
 
     rows: list[ScriptControlSchoolStatusRow] = []
-    counts = ScriptControlSchoolStatusCounts()
-
-    for sch, reg_count in schools_with_counts:
-        series_map = by_school.get(sch.id, {})
-        series_items: list[ScriptControlAdminRow] = []
-        recorded = 0
-        verified = 0
-        total_booklets = 0
-        for sn in range(1, expected_series + 1):
-            ps = series_map.get(sn)
-            if ps is None:
-                continue
-            recorded += 1
-            if verify_fn(ps):
-                verified += 1
-            row = _packing_to_admin_row(ps, sch=sch, sub=sub, irregular=irregular)
-            series_items.append(row)
-            total_booklets += row.total_booklets
-
-        overall = _overall_status(expected_series, recorded, verified)
-        counts.total += 1
-        if overall == "missing":
-            counts.missing += 1
-        elif overall == "partial":
-            counts.partial += 1
-        elif overall == "complete":
-            counts.complete += 1
-        else:
-            counts.verified += 1
-
-        if status_filter != "all" and overall != status_filter:
-            continue
-
+    for sch, reg_count, recorded, verified, total_booklets, overall in page:
         rows.append(
             ScriptControlSchoolStatusRow(
                 school_id=sch.id,
@@ -278,14 +333,43 @@ async def build_script_control_school_status_rows(
                 subject_original_code=sub.original_code,
                 subject_name=sub.name,
                 paper_number=paper_number,
-                registered_candidates=reg_count,
+                registered_candidates=int(reg_count),
                 expected_series=expected_series,
-                recorded_series=recorded,
-                verified_series=verified,
-                total_booklets=total_booklets,
+                recorded_series=int(recorded),
+                verified_series=int(verified),
+                total_booklets=int(total_booklets),
                 overall_status=overall,
-                series_items=series_items,
+                series_items=[
+                    _packing_to_admin_row(ps, sch=sch, sub=sub, irregular=irregular)
+                    for ps in series_by_school.get(sch.id, [])
+                ],
             )
         )
+    return rows, total, counts
 
+
+async def build_script_control_school_status_rows(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    paper_number: int,
+    irregular: bool,
+    region: Region | None = None,
+    zone: Zone | None = None,
+    school_q: str | None = None,
+    status_filter: SchoolStatusFilter = "all",
+) -> tuple[list[ScriptControlSchoolStatusRow], ScriptControlSchoolStatusCounts]:
+    """Every matching row (unpaged); see ``page_script_control_school_status``."""
+    rows, _, counts = await page_script_control_school_status(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        paper_number=paper_number,
+        irregular=irregular,
+        region=region,
+        zone=zone,
+        school_q=school_q,
+        status_filter=status_filter,
+    )
     return rows, counts
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import script_envelope_cap
 from app.services.examiner_portal import generate_portal_token
+from app.services.examiner_quota_counters import RosterQuotaBucket, adjust_quota_counters
 from app.models import (
     Examination,
     ExaminationCandidate,
@@ -52,6 +53,20 @@ SIM_RANDOM_SEED = 20260421
 SIM_DEFAULT_SERIES_COUNT = 6
 SIM_SUBJECT_CODE = "C704"
 SIM_SUBJECT_NAME = "Core Mathematics"
+# One chief per roster; everyone else is drawn from these role weights.
+SIM_EXAMINER_ROLE_WEIGHTS: dict[ExaminerType, float] = {
+    ExaminerType.ASSISTANT_CHIEF: 0.08,
+    ExaminerType.TEAM_LEADER: 0.24,
+    ExaminerType.ASSISTANT: 0.68,
+}
+
+
+def simulated_examiner_type(rng: random.Random, position: int) -> ExaminerType:
+    """Role for the ``position``-th (0-based) simulated examiner."""
+    if position == 0:
+        return ExaminerType.CHIEF
+    roles = list(SIM_EXAMINER_ROLE_WEIGHTS)
+    return rng.choices(roles, weights=[SIM_EXAMINER_ROLE_WEIGHTS[r] for r in roles], k=1)[0]
 
 
 def _deterministic_envelope_counts(
@@ -211,6 +226,7 @@ async def _load_school_rows(session: AsyncSession) -> list[School]:
 def _distribution_by_school_id(
     rng: random.Random,
     schools: list[School],
+    total_candidates: int = SIM_TOTAL_CANDIDATES,
 ) -> dict[UUID, int]:
     n = len(schools)
 
@@ -230,16 +246,16 @@ def _distribution_by_school_id(
 
     min_total = sum(lo for lo, _ in bounds)
     max_total = sum(hi for _, hi in bounds)
-    if not (min_total <= SIM_TOTAL_CANDIDATES <= max_total):
+    if not (min_total <= total_candidates <= max_total):
         raise ValueError(
-            f"Cannot allocate {SIM_TOTAL_CANDIDATES} candidates across {n} schools "
+            f"Cannot allocate {total_candidates} candidates across {n} schools "
             f"with configured category bounds; feasible range is [{min_total}, {max_total}]"
         )
 
     rng.shuffle(bounds)
     counts = [rng.randint(lo, hi) for lo, hi in bounds]
     current_total = sum(counts)
-    diff = SIM_TOTAL_CANDIDATES - current_total
+    diff = total_candidates - current_total
 
     if diff > 0:
         expandable = [i for i, ((_, hi), count) in enumerate(zip(bounds, counts, strict=False)) if count < hi]
@@ -262,7 +278,7 @@ def _distribution_by_school_id(
             counts[i] -= 1
             diff += 1
 
-    if sum(counts) != SIM_TOTAL_CANDIDATES:
+    if sum(counts) != total_candidates:
         raise ValueError("Failed to rebalance school candidate distribution to required total.")
 
     return {school.id: counts[i] for i, school in enumerate(schools)}
@@ -410,13 +426,11 @@ async def _seed_examiners(
     if not eligible_regions:
         raise ValueError("No region/zone data found from schools for examiner generation.")
 
-    types = [ExaminerType.CHIEF, ExaminerType.ASSISTANT_CHIEF, ExaminerType.TEAM_LEADER, ExaminerType.ASSISTANT]
-    weights = [0.08, 0.24, 0.68]
     start = int(existing or 0)
     needed = SIM_EXAMINER_COUNT - start
     for i in range(needed):
         region = rng.choice(eligible_regions)
-        examiner_type = rng.choices(types, weights=weights, k=1)[0]
+        examiner_type = simulated_examiner_type(rng, start + i)
         examiner = Examiner(
             examination_id=examination_id,
             name=f"Core Math Examiner {start + i + 1:03d}",
@@ -428,6 +442,13 @@ async def _seed_examiners(
         session.add(examiner)
         await session.flush()
         session.add(ExaminerSubject(examiner_id=examiner.id, subject_id=subject_id))
+        await adjust_quota_counters(
+            session,
+            examination_id=examination_id,
+            subject_ids=[subject_id],
+            bucket=RosterQuotaBucket.for_examiner(examiner),
+            delta=1,
+        )
         await session.flush()
         from app.services.examiner_reference_code import assign_reference_code_to_examiner  # noqa: PLC0415
 
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Collection
 from datetime import datetime, time, timezone
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import delete, select
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -326,43 +328,6 @@ async def ensure_default_cohort(
     return group
 
 
-async def sync_default_cohort_members(
-    session: AsyncSession,
-    *,
-    examination_id: int,
-    subject_id: int,
-) -> None:
-    group = await ensure_default_cohort(
-        session,
-        examination_id=examination_id,
-        subject_id=subject_id,
-    )
-    stmt = (
-        select(Examiner.id)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-        )
-    )
-    examiner_ids = list(dict.fromkeys((await session.execute(stmt)).scalars().all()))
-
-    await session.execute(
-        delete(SubjectMarkingGroupMember).where(SubjectMarkingGroupMember.group_id == group.id)
-    )
-    for eid in examiner_ids:
-        session.add(
-            SubjectMarkingGroupMember(
-                group_id=group.id,
-                examiner_id=eid,
-                examination_id=examination_id,
-                subject_id=subject_id,
-            )
-        )
-    group.updated_at = datetime.utcnow()
-    await session.flush()
-
-
 async def _validate_examiners_on_subject(
     session: AsyncSession,
     *,
@@ -392,65 +357,46 @@ async def _validate_examiners_on_subject(
         )
 
 
-async def _examiner_ids_for_regions(
-    session: AsyncSession,
-    *,
-    examination_id: int,
-    subject_id: int,
-    regions: list[Region],
-) -> list[UUID]:
-    if not regions:
-        return []
-    region_set = set(regions)
-    stmt = (
-        select(Examiner.id)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-            Examiner.region.in_(region_set),
-        )
-    )
-    return list(dict.fromkeys((await session.execute(stmt)).scalars().all()))
+# (group_id, examiner_id) rows of subject_marking_group_members
+MembershipKey = tuple[UUID, UUID]
+# examiner_id -> (region, examiner_type) for examiners on the subject
+SubjectExaminers = dict[UUID, tuple[Region | None, ExaminerType]]
 
 
-async def _examiner_ids_for_roles(
+async def _subject_examiners(
     session: AsyncSession,
     *,
     examination_id: int,
     subject_id: int,
-    roles: list[ExaminerType],
-) -> list[UUID]:
-    if not roles:
-        return []
-    role_set = set(roles)
+    examiner_ids: Collection[UUID] | None = None,
+) -> SubjectExaminers:
     stmt = (
-        select(Examiner.id)
+        select(Examiner.id, Examiner.region, Examiner.examiner_type)
         .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
         .where(
             Examiner.examination_id == examination_id,
             ExaminerSubject.subject_id == subject_id,
-            Examiner.examiner_type.in_(role_set),
         )
     )
-    return list(dict.fromkeys((await session.execute(stmt)).scalars().all()))
-
-
-async def _subject_examiner_ids(
-    session: AsyncSession,
-    *,
-    examination_id: int,
-    subject_id: int,
-) -> set[UUID]:
-    stmt = (
-        select(Examiner.id)
-        .join(ExaminerSubject, ExaminerSubject.examiner_id == Examiner.id)
-        .where(
-            Examiner.examination_id == examination_id,
-            ExaminerSubject.subject_id == subject_id,
-        )
-    )
-    return set((await session.execute(stmt)).scalars().all())
+    if examiner_ids is not None:
+        stmt = stmt.where(Examiner.id.in_(list(examiner_ids)))
+    return {row[0]: (row[1], row[2]) for row in (await session.execute(stmt)).all()}
+
+
+def _matches_rules(
+    regions: Collection[Region],
+    roles: Collection[ExaminerType],
+    region: Region | None,
+    examiner_type: ExaminerType,
+) -> bool:
+    """Region and role rules combine with AND; a cohort without rules matches nobody."""
+    if not regions and not roles:
+        return False
+    if regions and region not in regions:
+        return False
+    if roles and examiner_type not in roles:
+        return False
+    return True
 
 
 async def _rule_matched_member_ids(
@@ -461,128 +407,192 @@ async def _rule_matched_member_ids(
     regions: list[Region],
     roles: list[ExaminerType],
 ) -> set[UUID]:
-    region_ids: set[UUID] | None = None
-    role_ids: set[UUID] | None = None
-    if regions:
-        region_ids = set(
-            await _examiner_ids_for_regions(
-                session,
-                examination_id=examination_id,
-                subject_id=subject_id,
-                regions=regions,
-            )
-        )
-    if roles:
-        role_ids = set(
-            await _examiner_ids_for_roles(
-                session,
-                examination_id=examination_id,
-                subject_id=subject_id,
-                roles=roles,
-            )
-        )
-    if region_ids is not None and role_ids is not None:
-        return region_ids & role_ids
-    if region_ids is not None:
-        return region_ids
-    if role_ids is not None:
-        return role_ids
-    return set()
+    if not regions and not roles:
+        return set()
+    examiners = await _subject_examiners(session, examination_id=examination_id, subject_id=subject_id)
+    region_set, role_set = set(regions), set(roles)
+    return {
+        eid
+        for eid, (region, examiner_type) in examiners.items()
+        if _matches_rules(region_set, role_set, region, examiner_type)
+    }
 
 
-def _compute_cohort_member_ids(
-    group: SubjectMarkingGroup,
+def desired_cohort_memberships(
+    groups: list[SubjectMarkingGroup],
     *,
-    subject_examiner_ids: set[UUID],
-    rule_matched_ids: set[UUID],
-) -> list[UUID]:
-    """Resolve member IDs for one non-default cohort during auto-sync."""
-    has_rules = bool(group.source_regions or group.source_roles)
-    if has_rules:
-        rule_matched = rule_matched_ids & subject_examiner_ids
-        current_member_ids = {m.examiner_id for m in group.members}
-        manual_preserved = (current_member_ids & subject_examiner_ids) - rule_matched
-        final_ids = rule_matched | manual_preserved
-    else:
-        current_member_ids = {m.examiner_id for m in group.members}
-        final_ids = current_member_ids & subject_examiner_ids
-    return list(dict.fromkeys(final_ids))
+    examiners: SubjectExaminers,
+    current: set[MembershipKey],
+) -> set[MembershipKey]:
+    """Target membership of *groups* for the examiners in ``examiners`` and ``current``.
+
+    The default cohort holds every subject examiner. A rule cohort gains every examiner
+    matching its rules and keeps manually added members still on the subject; a cohort
+    without rules only drops examiners who left the subject.
+    """
+    desired: set[MembershipKey] = set()
+    for group in groups:
+        if group.is_default:
+            desired.update((group.id, eid) for eid in examiners)
+            continue
+        regions = {r.region for r in group.source_regions}
+        roles = {r.examiner_type for r in group.source_roles}
+        for eid, (region, examiner_type) in examiners.items():
+            if (group.id, eid) in current or _matches_rules(regions, roles, region, examiner_type):
+                desired.add((group.id, eid))
+    return desired
 
 
-async def _rewrite_group_members(
+async def _current_memberships(
+    session: AsyncSession,
+    *,
+    group_ids: list[UUID],
+    examiner_ids: Collection[UUID] | None = None,
+) -> set[MembershipKey]:
+    stmt = select(SubjectMarkingGroupMember.group_id, SubjectMarkingGroupMember.examiner_id).where(
+        SubjectMarkingGroupMember.group_id.in_(group_ids)
+    )
+    if examiner_ids is not None:
+        stmt = stmt.where(SubjectMarkingGroupMember.examiner_id.in_(list(examiner_ids)))
+    return {(row[0], row[1]) for row in (await session.execute(stmt)).all()}
+
+
+async def _apply_membership_diff(
     session: AsyncSession,
     *,
-    group_id: UUID,
     examination_id: int,
     subject_id: int,
-    member_ids: list[UUID],
-) -> None:
-    await session.execute(
-        delete(SubjectMarkingGroupMember).where(SubjectMarkingGroupMember.group_id == group_id)
-    )
-    for eid in member_ids:
-        session.add(
-            SubjectMarkingGroupMember(
-                group_id=group_id,
-                examiner_id=eid,
-                examination_id=examination_id,
-                subject_id=subject_id,
+    current: set[MembershipKey],
+    desired: set[MembershipKey],
+) -> set[UUID]:
+    """Delete and insert only the changed rows; returns the ids of the groups that changed."""
+    removed = current - desired
+    added = desired - current
+    if removed:
+        await session.execute(
+            delete(SubjectMarkingGroupMember).where(
+                tuple_(SubjectMarkingGroupMember.group_id, SubjectMarkingGroupMember.examiner_id).in_(
+                    sorted(removed, key=str)
+                )
             )
         )
+    if added:
+        now = datetime.utcnow()
+        await session.execute(
+            pg_insert(SubjectMarkingGroupMember)
+            .values(
+                [
+                    {
+                        "group_id": gid,
+                        "examiner_id": eid,
+                        "examination_id": examination_id,
+                        "subject_id": subject_id,
+                        "created_at": now,
+                    }
+                    for gid, eid in sorted(added, key=str)
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+    return {gid for gid, _ in removed | added}
 
 
-async def sync_rule_based_cohort_members(
+async def _sync_cohort_members(
     session: AsyncSession,
     *,
     examination_id: int,
     subject_id: int,
+    is_default: bool | None,
+    examiner_ids: Collection[UUID] | None,
 ) -> None:
+    """Diff-based membership sync for the subject's cohorts (optionally only some examiners).
+
+    Memberships of one examiner depend only on that examiner and the cohort rules, so
+    restricting to ``examiner_ids`` gives the same result as a full sync for them.
+    """
+    if examiner_ids is not None:
+        examiner_ids = set(examiner_ids)
+        if not examiner_ids:
+            return
     stmt = (
         select(SubjectMarkingGroup)
         .where(
             SubjectMarkingGroup.examination_id == examination_id,
             SubjectMarkingGroup.subject_id == subject_id,
-            SubjectMarkingGroup.is_default.is_(False),
         )
-        .options(*_group_load_options())
+        .options(
+            selectinload(SubjectMarkingGroup.source_regions),
+            selectinload(SubjectMarkingGroup.source_roles),
+        )
     )
+    if is_default is not None:
+        stmt = stmt.where(SubjectMarkingGroup.is_default.is_(is_default))
     groups = list((await session.execute(stmt)).scalars().all())
     if not groups:
         return
 
-    subject_examiner_ids = await _subject_examiner_ids(
+    examiners = await _subject_examiners(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
+        examiner_ids=examiner_ids,
     )
+    current = await _current_memberships(
+        session,
+        group_ids=[g.id for g in groups],
+        examiner_ids=examiner_ids,
+    )
+    desired = desired_cohort_memberships(groups, examiners=examiners, current=current)
+    changed = await _apply_membership_diff(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        current=current,
+        desired=desired,
+    )
+    if changed:
+        now = datetime.utcnow()
+        for group in groups:
+            if group.id in changed:
+                group.updated_at = now
+    await session.flush()
 
-    for group in groups:
-        regions = [r.region for r in group.source_regions]
-        roles = [r.examiner_type for r in group.source_roles]
-        rule_matched_ids: set[UUID] = set()
-        if regions or roles:
-            rule_matched_ids = await _rule_matched_member_ids(
-                session,
-                examination_id=examination_id,
-                subject_id=subject_id,
-                regions=regions,
-                roles=roles,
-            )
-        member_ids = _compute_cohort_member_ids(
-            group,
-            subject_examiner_ids=subject_examiner_ids,
-            rule_matched_ids=rule_matched_ids,
-        )
-        await _rewrite_group_members(
-            session,
-            group_id=group.id,
-            examination_id=examination_id,
-            subject_id=subject_id,
-            member_ids=member_ids,
-        )
-        group.updated_at = datetime.utcnow()
 
-    await session.flush()
+async def sync_default_cohort_members(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    examiner_ids: Collection[UUID] | None = None,
+) -> None:
+    await ensure_default_cohort(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+    )
+    await _sync_cohort_members(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        is_default=True,
+        examiner_ids=examiner_ids,
+    )
+
+
+async def sync_rule_based_cohort_members(
+    session: AsyncSession,
+    *,
+    examination_id: int,
+    subject_id: int,
+    examiner_ids: Collection[UUID] | None = None,
+) -> None:
+    await _sync_cohort_members(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        is_default=False,
+        examiner_ids=examiner_ids,
+    )
 
 
 async def sync_subject_cohort_memberships(
@@ -590,16 +600,41 @@ async def sync_subject_cohort_memberships(
     *,
     examination_id: int,
     subject_id: int,
+    examiner_ids: Collection[UUID] | None = None,
 ) -> None:
-    await sync_default_cohort_members(
+    """Bring every cohort of the subject up to date, touching only rows that change.
+
+    Pass ``examiner_ids`` after roster edits to re-evaluate just those examiners.
+    """
+    await ensure_default_cohort(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
     )
-    await sync_rule_based_cohort_members(
+    await _sync_cohort_members(
+        session,
+        examination_id=examination_id,
+        subject_id=subject_id,
+        is_default=None,
+        examiner_ids=examiner_ids,
+    )
+
+
+async def _rewrite_group_members(
+    session: AsyncSession,
+    *,
+    group_id: UUID,
+    examination_id: int,
+    subject_id: int,
+    member_ids: list[UUID],
+) -> None:
+    current = await _current_memberships(session, group_ids=[group_id])
+    await _apply_membership_diff(
         session,
         examination_id=examination_id,
         subject_id=subject_id,
+        current=current,
+        desired={(group_id, eid) for eid in member_ids},
     )
 
 
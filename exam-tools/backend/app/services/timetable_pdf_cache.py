@@ -0,0 +1,351 @@
+"""Stored timetable PDFs keyed by the rows they are rendered from.
+
+A timetable PDF depends only on the examination, school, programme, subject filter,
+layout options and the (already scope-filtered) schedule rows. Downloads resolve those
+rows with a few cheap queries, fingerprint them (schedule ids + ``updated_at`` act as the
+schedule version) and serve the stored file for that fingerprint, rendering only on a
+miss. The fingerprint doubles as the ETag, so clients revalidating an unchanged
+timetable get a 304 without any rendering or transfer.
+
+Schedule edits change the fingerprint of every affected document; ``invalidate_timetable_pdfs``
+additionally drops the examination's stored files so stale renders do not accumulate.
+``start_timetable_prerender_job`` renders the full timetables and every candidate
+school's timetable, in every layout variant, ahead of publication so download traffic
+is served from storage. Pre-render job state lives in the process that started the job:
+polling must reach the same worker, and a restart loses the job (stored PDFs are kept).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID, uuid4
+
+try:
+    from google.cloud.exceptions import NotFound
+except ImportError:
+    NotFound = Exception  # type: ignore[misc,assignment]
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import ExaminationCandidate, ExaminationCandidateSubject
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services.exam_documents import _get_gcs_bucket, storage_base_dir
+from app.services.timetable_service import TimetableDocument, render_timetable_pdf, resolve_timetable_document
+
+logger = logging.getLogger(__name__)
+
+# Bump when templates/timetables/timetable.html or the render context changes.
+TIMETABLE_PDF_LAYOUT_VERSION = 1
+
+_STORAGE_DIR_NAME = "timetable-pdfs"
+
+# (merge_by_date, orientation) combinations offered by the download endpoints.
+TIMETABLE_PDF_LAYOUTS: tuple[tuple[bool, str], ...] = (
+    (False, "portrait"),
+    (False, "landscape"),
+    (True, "portrait"),
+    (True, "landscape"),
+)
+
+
+def normalize_timetable_orientation(orientation: str | None) -> str:
+    """Map a requested orientation onto ``TIMETABLE_PDF_LAYOUTS`` (the template renders anything else as portrait)."""
+    return "landscape" if (orientation or "").strip().lower() == "landscape" else "portrait"
+
+
+def timetable_pdf_fingerprint(
+    document: TimetableDocument,
+    *,
+    merge_by_date: bool = False,
+    orientation: str = "portrait",
+) -> str:
+    school = document.school
+    programme = document.programme
+    payload = json.dumps(
+        {
+            "layout": TIMETABLE_PDF_LAYOUT_VERSION,
+            "exam": [document.exam.id, document.exam.updated_at],
+            "school": [school.id, school.updated_at] if school is not None else None,
+            "programme": [programme.id, programme.updated_at] if programme is not None else None,
+            "subject_filter": document.subject_filter.value,
+            "schedules": sorted([s.id, s.updated_at] for s in document.schedules),
+            "merge_by_date": merge_by_date,
+            "orientation": orientation,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def timetable_pdf_etag(fingerprint: str) -> str:
+    return f'"{fingerprint}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True when an ``If-None-Match`` header lists *etag* (weak or strong) or ``*``."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+# --- Stored PDFs ----------------------------------------------------------------------------
+
+
+def _uses_gcs() -> bool:
+    return settings.storage_backend.lower() == "gcs"
+
+
+def _exam_prefix(examination_id: int) -> str:
+    return f"{_STORAGE_DIR_NAME}/{examination_id}/"
+
+
+def stored_timetable_key(examination_id: int, fingerprint: str) -> str:
+    return f"{_exam_prefix(examination_id)}{fingerprint}.pdf"
+
+
+def _gcs_timetable_key(rel: str) -> str:
+    prefix = (settings.gcs_timetable_pdfs_prefix or "").strip().strip("/")
+    return f"{prefix}/{rel}" if prefix else rel
+
+
+def _local_timetable_path(rel: str) -> Path:
+    return storage_base_dir().resolve().parent / rel
+
+
+def read_stored_timetable_pdf(examination_id: int, fingerprint: str) -> bytes | None:
+    rel = stored_timetable_key(examination_id, fingerprint)
+    if _uses_gcs():
+        try:
+            return _get_gcs_bucket().blob(_gcs_timetable_key(rel)).download_as_bytes()
+        except NotFound:
+            return None
+    path = _local_timetable_path(rel)
+    if not path.is_file():
+        return None
+    return path.read_bytes()
+
+
+def write_stored_timetable_pdf(examination_id: int, fingerprint: str, pdf_bytes: bytes) -> None:
+    rel = stored_timetable_key(examination_id, fingerprint)
+    if _uses_gcs():
+        _get_gcs_bucket().blob(_gcs_timetable_key(rel)).upload_from_string(pdf_bytes, content_type="application/pdf")
+        return
+    path = _local_timetable_path(rel)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(pdf_bytes)
+    tmp.replace(path)
+
+
+def _delete_stored_timetable_pdfs(examination_id: int) -> None:
+    prefix = _exam_prefix(examination_id)
+    if _uses_gcs():
+        bucket = _get_gcs_bucket()
+        for blob in bucket.list_blobs(prefix=_gcs_timetable_key(prefix)):
+            try:
+                blob.delete()
+            except NotFound:
+                pass
+        return
+    shutil.rmtree(_local_timetable_path(prefix), ignore_errors=True)
+
+
+async def invalidate_timetable_pdfs(examination_id: int) -> None:
+    """Drop every stored timetable PDF of the examination (call after schedule changes)."""
+    try:
+        await asyncio.to_thread(_delete_stored_timetable_pdfs, examination_id)
+    except Exception:
+        # Stale files are never served (their fingerprint no longer matches); only log.
+        logger.exception("Could not clear stored timetable PDFs for examination %s", examination_id)
+
+
+async def get_or_render_timetable_pdf(
+    document: TimetableDocument,
+    fingerprint: str,
+    *,
+    merge_by_date: bool = False,
+    orientation: str = "portrait",
+) -> bytes:
+    """Serve the stored PDF for *fingerprint*; render and store it on a miss."""
+    exam_id = document.exam.id
+    stored = await asyncio.to_thread(read_stored_timetable_pdf, exam_id, fingerprint)
+    if stored is not None:
+        return stored
+    pdf_bytes = await render_timetable_pdf(document, merge_by_date=merge_by_date, orientation=orientation)
+    try:
+        await asyncio.to_thread(write_stored_timetable_pdf, exam_id, fingerprint, pdf_bytes)
+    except Exception:
+        logger.exception("Could not store timetable PDF %s for examination %s", fingerprint, exam_id)
+    return pdf_bytes
+
+
+# --- Pre-rendering --------------------------------------------------------------------------
+
+
+async def _candidate_codes_by_school(session: AsyncSession, examination_id: int) -> dict[UUID, set[str]]:
+    stmt = (
+        select(ExaminationCandidate.school_id, ExaminationCandidateSubject.subject_code)
+        .join(
+            ExaminationCandidateSubject,
+            ExaminationCandidateSubject.examination_candidate_id == ExaminationCandidate.id,
+        )
+        .where(
+            ExaminationCandidate.examination_id == examination_id,
+            ExaminationCandidate.school_id.isnot(None),
+        )
+        .distinct()
+    )
+    out: dict[UUID, set[str]] = defaultdict(set)
+    for school_id, code in (await session.execute(stmt)).all():
+        if code:
+            out[school_id].add(str(code).strip())
+    return out
+
+
+async def prerender_examination_timetables(
+    session: AsyncSession,
+    examination_id: int,
+    *,
+    progress: Callable[[int, int], None] | None = None,
+) -> dict[str, int]:
+    """Store the full timetables (per subject filter) and each candidate school's timetable.
+
+    Every document is stored in each of ``TIMETABLE_PDF_LAYOUTS``. School documents use the school's candidate subject codes, which is what the
+    my-school and my-depot downloads resolve for a single school. Documents are resolved
+    on *session* first, then missing PDFs are rendered concurrently without the session.
+    """
+    documents = [
+        await resolve_timetable_document(session, examination_id, subject_filter=subject_filter)
+        for subject_filter in TimetableDownloadFilter
+    ]
+    codes_by_school = await _candidate_codes_by_school(session, examination_id)
+    for school_id in sorted(codes_by_school, key=str):
+        documents.append(
+            await resolve_timetable_document(
+                session,
+                examination_id,
+                school_id=school_id,
+                explicit_schedule_codes=codes_by_school[school_id],
+            )
+        )
+
+    keyed = {
+        timetable_pdf_fingerprint(doc, merge_by_date=merge_by_date, orientation=orientation): (
+            doc,
+            merge_by_date,
+            orientation,
+        )
+        for doc in documents
+        for merge_by_date, orientation in TIMETABLE_PDF_LAYOUTS
+    }
+    total = len(keyed)
+    done = 0
+    rendered = 0
+    semaphore = asyncio.Semaphore(settings.timetable_prerender_concurrency)
+
+    async def ensure(fingerprint: str, document: TimetableDocument, merge_by_date: bool, orientation: str) -> None:
+        nonlocal done, rendered
+        async with semaphore:
+            stored = await asyncio.to_thread(read_stored_timetable_pdf, examination_id, fingerprint)
+            if stored is None:
+                pdf_bytes = await render_timetable_pdf(document, merge_by_date=merge_by_date, orientation=orientation)
+                await asyncio.to_thread(write_stored_timetable_pdf, examination_id, fingerprint, pdf_bytes)
+                rendered += 1
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    await asyncio.gather(*(ensure(fp, *variant) for fp, variant in keyed.items()))
+    return {
+        "document_count": total,
+        "rendered_count": rendered,
+        "reused_count": total - rendered,
+    }
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Finished jobs kept for polling; oldest finished jobs are dropped first.
+_MAX_FINISHED_JOBS = 50
+
+
+@dataclass
+class TimetablePrerenderJob:
+    id: UUID
+    examination_id: int
+    status: str = JOB_QUEUED
+    processed_documents: int = 0
+    total_documents: int = 0
+    rendered_count: int = 0
+    reused_count: int = 0
+    error_message: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+
+# Per-process: jobs are only visible to, and only survive as long as, the worker that started them.
+_jobs: dict[UUID, TimetablePrerenderJob] = {}
+_tasks: set[asyncio.Task[None]] = set()
+
+
+def _prune_finished_jobs() -> None:
+    finished = sorted(
+        (j for j in _jobs.values() if j.finished_at is not None),
+        key=lambda j: j.finished_at or j.created_at,
+    )
+    for job in finished[: max(len(finished) - _MAX_FINISHED_JOBS, 0)]:
+        _jobs.pop(job.id, None)
+
+
+async def _run_prerender_job(job: TimetablePrerenderJob) -> None:
+    from app.dependencies.database import get_sessionmanager
+
+    def on_progress(done: int, total: int) -> None:
+        job.processed_documents = done
+        job.total_documents = total
+
+    job.status = JOB_RUNNING
+    try:
+        async with get_sessionmanager().session() as session:
+            result = await prerender_examination_timetables(session, job.examination_id, progress=on_progress)
+        job.total_documents = result["document_count"]
+        job.rendered_count = result["rendered_count"]
+        job.reused_count = result["reused_count"]
+        job.status = JOB_COMPLETED
+    except Exception as exc:
+        logger.exception("Timetable pre-render job %s failed", job.id)
+        job.status = JOB_FAILED
+        job.error_message = str(exc)
+    finally:
+        job.finished_at = datetime.utcnow()
+        _prune_finished_jobs()
+
+
+def start_timetable_prerender_job(examination_id: int) -> TimetablePrerenderJob:
+    """Pre-render the examination's timetables on a background task and return the job for polling."""
+    job = TimetablePrerenderJob(id=uuid4(), examination_id=examination_id)
+    _jobs[job.id] = job
+    task = asyncio.create_task(_run_prerender_job(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+def get_timetable_prerender_job(job_id: UUID) -> TimetablePrerenderJob | None:
+    return _jobs.get(job_id)
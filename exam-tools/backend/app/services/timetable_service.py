@@ -4,6 +4,7 @@ from __future__ import annotations
 import asyncio
 import logging
 from collections import defaultdict
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, time
 from pathlib import Path
 from typing import Any
@@ -332,16 +333,25 @@ async def get_candidate_schedule_codes_for_centre_scope(
     return out
 
 
-async def generate_timetable_pdf(
+@dataclass
+class TimetableDocument:
+    """Rows a timetable PDF is rendered from (the schedules already filtered to the requested scope)."""
+
+    exam: Examination
+    school: School | None
+    programme: Programme | None
+    subject_filter: TimetableDownloadFilter
+    schedules: list[ExaminationSchedule]
+
+
+async def resolve_timetable_document(
     session: AsyncSession,
     exam_id: int,
     school_id: UUID | None = None,
     programme_id: int | None = None,
     subject_filter: TimetableDownloadFilter = TimetableDownloadFilter.ALL,
-    merge_by_date: bool = False,
-    orientation: str = "portrait",
     explicit_schedule_codes: set[str] | None = None,
-) -> bytes:
+) -> TimetableDocument:
     exam_stmt = select(Examination).where(Examination.id == exam_id)
     exam_result = await session.execute(exam_stmt)
     exam = exam_result.scalar_one_or_none()
@@ -409,8 +419,23 @@ async def generate_timetable_pdf(
             subject_filter,
         )
 
+    return TimetableDocument(
+        exam=exam,
+        school=school,
+        programme=programme,
+        subject_filter=subject_filter,
+        schedules=schedules,
+    )
+
+
+async def render_timetable_pdf(
+    document: TimetableDocument,
+    *,
+    merge_by_date: bool = False,
+    orientation: str = "portrait",
+) -> bytes:
     paper_entries: list[dict[str, Any]] = []
-    for schedule in schedules:
+    for schedule in document.schedules:
         papers_list = schedule.papers if schedule.papers else []
         display_subject_code = schedule.subject_code
 
@@ -600,10 +625,10 @@ async def generate_timetable_pdf(
             })
 
     context = {
-        "exam": exam,
-        "school": school,
-        "programme": programme,
-        "subject_filter": subject_filter.value,
+        "exam": document.exam,
+        "school": document.school,
+        "programme": document.programme,
+        "subject_filter": document.subject_filter.value,
         "schedule_entries": schedule_entries,
         "total_entries": len(combined_entries),
         "merge_by_date": merge_by_date,
@@ -629,3 +654,24 @@ async def generate_timetable_pdf(
     # WeasyPrint is CPU-heavy and synchronous; run off the asyncio event loop so other
     # requests keep working and clients/proxies do not time out waiting for a response.
     return await asyncio.to_thread(pdf_gen.render_pdf)
+
+
+async def generate_timetable_pdf(
+    session: AsyncSession,
+    exam_id: int,
+    school_id: UUID | None = None,
+    programme_id: int | None = None,
+    subject_filter: TimetableDownloadFilter = TimetableDownloadFilter.ALL,
+    merge_by_date: bool = False,
+    orientation: str = "portrait",
+    explicit_schedule_codes: set[str] | None = None,
+) -> bytes:
+    document = await resolve_timetable_document(
+        session,
+        exam_id,
+        school_id=school_id,
+        programme_id=programme_id,
+        subject_filter=subject_filter,
+        explicit_schedule_codes=explicit_schedule_codes,
+    )
+    return await render_timetable_pdf(document, merge_by_date=merge_by_date, orientation=orientation)
@@ -0,0 +1,94 @@
+"""Allocation benchmark harness: synthetic instances, strategy runs, regression comparison."""
+from __future__ import annotations
+
+import json
+
+from app.models import Region
+from app.schemas.script_allocation import AllocationSolveOptions
+from app.services.allocation_benchmark import (
+    STRATEGIES,
+    BenchmarkInstanceSpec,
+    build_allocation_instance,
+    compare_benchmark_reports,
+    region_cross_marking_rules,
+    run_allocation_benchmark,
+)
+from app.services.script_allocation import solve_decomposed_by_region
+
+TINY = BenchmarkInstanceSpec(name="tiny", total_candidates=900, examiner_count=8, series_count=2, school_count=4)
+
+
+def test_instance_is_reproducible_from_seed() -> None:
+    a = build_allocation_instance(TINY)
+    b = build_allocation_instance(TINY)
+    assert a.stats() == b.stats()
+    assert [env.id for env, _s, _sch in a.rows] == [env.id for env, _s, _sch in b.rows]
+    assert [ex.id for ex in a.examiners] == [ex.id for ex in b.examiners]
+    assert a.stats()["schools"] == 4
+    assert a.total_booklets <= TINY.total_candidates
+    assert all(0 < env.booklet_count <= 50 for env, _s, _sch in a.rows)
+
+
+def test_region_rules_never_mark_own_region() -> None:
+    regions = [Region.ASHANTI, Region.CENTRAL, Region.VOLTA]
+    rules = region_cross_marking_rules(regions, span=5)
+    assert set(rules) == set(regions)
+    assert all(region not in allowed and len(allowed) == 2 for region, allowed in rules.items())
+    assert region_cross_marking_rules([Region.VOLTA], span=2) == {}
+
+
+def test_decomposed_solve_assigns_each_envelope_once() -> None:
+    instance = build_allocation_instance(TINY)
+    solved = solve_decomposed_by_region(
+        instance.rows,
+        instance.examiners,
+        region_parsed=instance.region_rules,
+        quota_by_type_subject=instance.quota_by_type_subject,
+        unassigned_penalty=1.0,
+        time_limit_sec=10.0,
+        fairness_weight=0.25,
+        school_cohesion_weight=0.0,
+        prefer_larger_booklets_epsilon=0.0,
+        marking_region_solve_order=None,
+    )
+    assert solved.failure is None
+    env_ids = [p.envelope_id for p in solved.pair_assignments]
+    assert len(env_ids) == len(set(env_ids))
+    assert solved.solve_time_sec > 0
+
+
+def test_report_covers_every_strategy_and_is_json() -> None:
+    report = run_allocation_benchmark([TINY], options=AllocationSolveOptions(time_limit_sec=10))
+    json.dumps(report)
+
+    [inst] = report["instances"]
+    assert [r["strategy"] for r in inst["results"]] == list(STRATEGIES)
+    envelopes = inst["stats"]["envelopes"]
+    for res in inst["results"]:
+        assert res["status"] == "ok"
+        assert res["assigned_envelopes"] + res["unassigned_envelopes"] == envelopes
+        assert res["peak_memory_bytes"] > 0
+    greedy = inst["results"][-1]
+    assert greedy["objective"] is None
+
+
+def test_compare_flags_slowdowns_failures_and_unassigned_growth() -> None:
+    def report(build: float, solve: float, unassigned: int, status: str = "ok") -> dict:
+        result = {
+            "strategy": "monolithic",
+            "status": status,
+            "build_sec": build,
+            "solve_sec": solve,
+            "unassigned_booklets": unassigned,
+        }
+        return {"instances": [{"name": "small", "results": [result]}]}
+
+    base = report(0.5, 4.0, 100)
+    assert compare_benchmark_reports(base, report(0.5, 4.5, 100)) == []
+    assert compare_benchmark_reports(base, report(0.5, 9.0, 100)) == ["small/monolithic: time 4.50s -> 9.50s"]
+    assert compare_benchmark_reports(base, report(0.5, 4.0, 120)) == [
+        "small/monolithic: unassigned booklets 100 -> 120"
+    ]
+    [failed] = compare_benchmark_reports(base, report(0.5, 4.0, 100, status="failed"))
+    assert failed.startswith("small/monolithic: solve failed")
+    assert compare_benchmark_reports({"instances": []}, report(9.0, 9.0, 999)) == []
@@ -0,0 +1,95 @@
+"""Streaming zip downloads for admin attendance sheets."""
+
+import io
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.admin_attendance_zip import stream_attendance_sheets_zip
+from app.services.admin_examiner_attendance_zip import stream_examiner_attendance_sheets_zip
+from app.services.streaming_zip import ZipStreamEntry, stream_zip
+
+
+def _sheet(stored_path: str, original_filename: str) -> SimpleNamespace:
+    return SimpleNamespace(stored_path=stored_path, original_filename=original_filename)
+
+
+def _local_storage(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr("app.config.settings.storage_backend", "local")
+    monkeypatch.setattr("app.config.settings.storage_path", str(tmp_path / "documents"))
+
+
+def test_stream_zip_stores_compressed_formats_and_deflates_text() -> None:
+    entries = [
+        ZipStreamEntry("sheet.pdf", lambda: [b"%PDF-", b"1.7 body"]),
+        ZipStreamEntry("notes.txt", lambda: [b"a" * 10_000]),
+    ]
+    archive = b"".join(stream_zip(entries))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.read("sheet.pdf") == b"%PDF-1.7 body"
+        assert zf.read("notes.txt") == b"a" * 10_000
+        assert zf.getinfo("sheet.pdf").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_stream_zip_yields_before_later_entries_are_opened() -> None:
+    opened: list[str] = []
+
+    def chunks(name: str) -> list[bytes]:
+        opened.append(name)
+        return [b"x" * 1024]
+
+    stream = stream_zip([ZipStreamEntry(n, lambda n=n: chunks(n)) for n in ("a.pdf", "b.pdf")])
+    first = next(stream)
+    assert first.startswith(b"PK")
+    assert opened == ["a.pdf"]
+    b"".join(stream)
+    assert opened == ["a.pdf", "b.pdf"]
+
+
+def test_stream_attendance_sheets_zip_reads_local_files(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    _local_storage(monkeypatch, tmp_path)
+    folder = tmp_path / "attendance-sheets" / "7"
+    folder.mkdir(parents=True)
+    (folder / "a.pdf").write_bytes(b"first")
+    (folder / "b.jpg").write_bytes(b"second")
+
+    sheets = [
+        _sheet("attendance-sheets/7/a.pdf", "sheet.pdf"),
+        _sheet("attendance-sheets/7/b.jpg", "sheet.pdf"),
+    ]
+    archive = b"".join(stream_attendance_sheets_zip(sheets))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.namelist() == ["sheet.pdf", "sheet_2.pdf"]
+        assert zf.read("sheet_2.pdf") == b"second"
+
+
+def test_stream_examiner_attendance_sheets_zip_reads_local_files(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    _local_storage(monkeypatch, tmp_path)
+    folder = tmp_path / "examiner-marking-attendance-sheets" / "3"
+    folder.mkdir(parents=True)
+    (folder / "day1.png").write_bytes(b"png-bytes")
+
+    archive = b"".join(
+        stream_examiner_attendance_sheets_zip([_sheet("examiner-marking-attendance-sheets/3/day1.png", "day1.png")])
+    )
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.read("day1.png") == b"png-bytes"
+
+
+def test_stream_attendance_sheets_zip_validates_eagerly() -> None:
+    with pytest.raises(ValueError, match="no sheets"):
+        stream_attendance_sheets_zip([])
+    with pytest.raises(ValueError, match="too many files"):
+        stream_attendance_sheets_zip([_sheet(f"attendance-sheets/1/{i}.pdf", f"{i}.pdf") for i in range(501)])
+
+
+def test_stream_attendance_sheets_zip_missing_file_aborts_stream(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    _local_storage(monkeypatch, tmp_path)
+    stream = stream_attendance_sheets_zip([_sheet("attendance-sheets/7/missing.pdf", "missing.pdf")])
+    with pytest.raises(FileNotFoundError):
+        b"".join(stream)
@@ -0,0 +1,69 @@
+"""In-memory bank branch directory index: substring filters, paging and version reloads."""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import bank_branch_index
+from app.services.bank_branch_index import BankBranchIndex, IndexedBankBranch
+from app.services.bank_branch_query import distinct_bank_names, list_bank_branches
+
+T0 = datetime(2026, 1, 1)
+
+
+def _branch(code: str, bank: str, branch: str) -> IndexedBankBranch:
+    return IndexedBankBranch(uuid4(), code, bank, branch, T0, T0)
+
+
+BRANCHES = [
+    _branch("130101", "GCB BANK LTD", "Accra Main"),
+    _branch("130102", "GCB BANK LTD", "Kumasi  Adum"),
+    _branch("280101", "ABSA BANK GHANA", "Accra High Street"),
+    _branch("300101", "APEX BANK", "Tamale"),
+]
+
+
+def test_filters_match_substring_semantics_in_picker_order() -> None:
+    index = BankBranchIndex.build(BRANCHES)
+
+    assert [b.bank_code for b in index.filter()] == ["280101", "300101", "130101", "130102"]
+    assert [b.bank_code for b in index.filter(search="accra")] == ["280101", "130101"]
+    assert [b.bank_code for b in index.filter(search="BANK g")] == ["280101"]
+    assert [b.bank_code for b in index.filter(search="kumasi adum")] == ["130102"]
+    assert [b.bank_code for b in index.filter(bank_name="gcb", branch_name="main")] == ["130101"]
+    assert [b.bank_code for b in index.filter(bank_name_exact="GCB BANK LTD")] == ["130101", "130102"]
+    assert index.filter(bank_name_exact="gcb bank ltd") == []
+    # search takes precedence over the per-field filters, as in the directory query
+    assert [b.bank_code for b in index.filter(search="tamale", bank_name="gcb")] == ["300101"]
+    assert index.filter(search="zzz") == []
+
+
+def test_distinct_bank_names_filter_by_substring() -> None:
+    index = BankBranchIndex.build(BRANCHES)
+
+    assert index.distinct_bank_names() == ["ABSA BANK GHANA", "APEX BANK", "GCB BANK LTD"]
+    assert index.distinct_bank_names("ap") == ["APEX BANK"]
+    assert index.distinct_bank_names("bank") == ["ABSA BANK GHANA", "APEX BANK", "GCB BANK LTD"]
+
+
+@pytest.mark.asyncio
+async def test_queries_page_from_cached_index_and_reload_on_version_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bank_branch_index, "_cache", {})
+    monkeypatch.setattr("app.config.settings.bank_branch_index_ttl_seconds", 0)
+    version = AsyncMock(side_effect=[(4, T0), (4, T0), (5, T0)])
+    monkeypatch.setattr(bank_branch_index, "directory_version", version)
+    rows = [(b.id, b.bank_code, b.bank_name, b.branch_name, b.created_at, b.updated_at) for b in BRANCHES]
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=rows))
+
+    page, total = await list_bank_branches(session, search="bank", skip=1, limit=2)
+    names = await distinct_bank_names(session, q="a", limit=2)
+    await list_bank_branches(session)
+
+    assert total == 4
+    assert [b.bank_code for b in page] == ["300101", "130101"]
+    assert names == ["ABSA BANK GHANA", "APEX BANK"]
+    assert version.await_count == 3
+    assert session.execute.await_count == 2
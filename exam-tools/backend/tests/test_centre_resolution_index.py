@@ -0,0 +1,93 @@
+"""In-memory centre resolution index mirrors centre_resolution lookups."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.models import CentreStructureMode, ExaminationCentreMembershipScope, ExamInspectorSubjectScope
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services import centre_resolution_index
+from app.services.centre_resolution_index import CentreResolutionIndex, get_centre_resolution_index
+
+CORE = ExaminationCentreMembershipScope.CORE
+ELECTIVE = ExaminationCentreMembershipScope.ELECTIVE
+ALL = ExaminationCentreMembershipScope.ALL
+
+
+def _split_index():
+    centre_a, centre_b = uuid4(), uuid4()
+    both, core_only, elective_only = uuid4(), uuid4(), uuid4()
+    index = CentreResolutionIndex.from_memberships(
+        1,
+        CentreStructureMode.SPLIT,
+        [
+            (both, centre_a, CORE),
+            (both, centre_b, ELECTIVE),
+            (core_only, centre_a, CORE),
+            (elective_only, centre_a, ELECTIVE),
+        ],
+    )
+    return index, centre_a, centre_b, both, core_only, elective_only
+
+
+def test_split_all_scope_falls_back_core_then_elective() -> None:
+    index, centre_a, centre_b, both, _core_only, elective_only = _split_index()
+
+    assert index.resolve_centre_id(both, membership_scope=ALL) == centre_a
+    assert index.resolve_centre_id(both, membership_scope=ELECTIVE) == centre_b
+    assert index.resolve_centre_id(elective_only, membership_scope=ALL) == centre_a
+    assert index.resolve_centre_id(uuid4(), membership_scope=ALL) is None
+
+
+def test_split_scope_sets_and_counts() -> None:
+    index, centre_a, centre_b, both, core_only, elective_only = _split_index()
+
+    assert index.centre_school_ids(centre_a) == {both, core_only}
+    assert index.host_overview_school_ids(centre_a) == {both, core_only, elective_only}
+    assert index.inspector_scope_school_ids(centre_a, ExamInspectorSubjectScope.ALL) == {both, core_only, elective_only}
+    assert index.inspector_scope_school_ids(centre_a, "ELECTIVE") == {elective_only}
+    assert index.hosted_school_count(centre_b, membership_scope=ELECTIVE) == 1
+    assert index.school_membership_scopes_at_centre(both, centre_a) == {CORE}
+    assert not index.centre_has_membership_for_subject_filter(
+        centre_b, subject_filter=TimetableDownloadFilter.CORE_ONLY
+    )
+    assert index.scope_ids_for_subject_filter(
+        centre_a, {both, core_only, elective_only}, subject_filter=TimetableDownloadFilter.ELECTIVE_ONLY
+    ) == {elective_only}
+
+
+def test_unified_ignores_subject_filter() -> None:
+    centre, school = uuid4(), uuid4()
+    index = CentreResolutionIndex.from_memberships(2, "UNIFIED", [(school, centre, "ALL")])
+
+    assert index.resolve_centre_id(school, membership_scope=ALL) == centre
+    assert index.inspector_scope_school_ids(centre, ExamInspectorSubjectScope.CORE) == {school}
+    assert index.scope_ids_for_subject_filter(
+        centre, {school}, subject_filter=TimetableDownloadFilter.CORE_ONLY
+    ) == {school}
+
+
+@pytest.mark.asyncio
+async def test_get_index_reuses_cache_until_version_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(centre_resolution_index, "_index_cache", {})
+    centre, school = uuid4(), uuid4()
+    versions = [("UNIFIED", 1, None, 1, None), ("UNIFIED", 1, None, 1, None), ("UNIFIED", 2, None, 1, None)]
+    monkeypatch.setattr(
+        centre_resolution_index, "centre_topology_version", AsyncMock(side_effect=versions)
+    )
+    rows = MagicMock()
+    rows.all.return_value = [(school, centre, ALL)]
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=rows)
+
+    first = await get_centre_resolution_index(session, 3)
+    second = await get_centre_resolution_index(session, 3)
+    third = await get_centre_resolution_index(session, 3)
+
+    assert first is second
+    assert third is not first
+    assert session.execute.await_count == 2
+    assert third.centre_school_ids(centre) == {school}
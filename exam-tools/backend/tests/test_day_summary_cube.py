@@ -0,0 +1,99 @@
+"""Day-summary cube: per-day sitting roll-ups, cache versioning and the shared summary builder."""
+
+from datetime import date, time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.schemas.examination import TimetableEntry
+from app.services import day_summary_cube as dsc
+from app.services.day_summary_cube import DaySummaryCube
+
+DAY1 = date(2026, 5, 4)
+DAY2 = date(2026, 5, 5)
+SCHOOL_A = uuid4()
+SCHOOL_B = uuid4()
+
+
+def _entry(code: str, paper: int, day: date, hour: int = 9) -> TimetableEntry:
+    return TimetableEntry(
+        subject_code=code,
+        subject_name=code,
+        paper=paper,
+        examination_date=day,
+        examination_time=time(hour, 0),
+    )
+
+
+ENTRIES = [_entry("MATH", 1, DAY1), _entry("MATH", 2, DAY1, 13), _entry("ART", 1, DAY1, 13), _entry("ART", 2, DAY2)]
+ROWS = [
+    (1, SCHOOL_A, "MATH", None),
+    (1, SCHOOL_A, "ART", 1),
+    (2, SCHOOL_A, " MATH ", 2),
+    (3, SCHOOL_B, "ART", None),
+    (4, SCHOOL_B, "ART", 2),
+    (5, SCHOOL_B, "", None),
+]
+
+
+def test_cube_counts_slots_and_unique_candidates_per_day() -> None:
+    cube = DaySummaryCube.build(1, ENTRIES, ROWS)
+
+    assert cube.candidates(DAY1, "MATH", SCHOOL_A) == 2
+    assert cube.candidates(DAY1, "ART", SCHOOL_A) == 1
+    assert cube.slot_total(DAY1, "ART", [SCHOOL_A, SCHOOL_B]) == 2
+    assert cube.slot_total(DAY2, "ART", [SCHOOL_A, SCHOOL_B]) == 2
+    # Candidate 1 sits both MATH and ART on DAY1 but counts once.
+    assert cube.unique_candidates(DAY1, [SCHOOL_A, SCHOOL_B], ["MATH", "ART"]) == 3
+    assert cube.unique_candidates(DAY1, [SCHOOL_A], ["ART"]) == 1
+    assert cube.unique_candidates(DAY1, [SCHOOL_A], []) == 0
+    assert cube.codes_by_school == {SCHOOL_A: frozenset({"MATH", "ART"}), SCHOOL_B: frozenset({"ART"})}
+
+
+@pytest.mark.asyncio
+async def test_cube_is_rebuilt_only_when_version_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dsc, "_cube_cache", {})
+    version = AsyncMock(side_effect=[("v1",), ("v1",), ("v2",)])
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=ROWS))
+    with (
+        patch.object(dsc, "day_summary_version", new=version),
+        patch.object(dsc, "load_schedules_for_exam", new=AsyncMock(return_value=[])),
+        patch.object(dsc, "schedules_to_entries", return_value=ENTRIES),
+    ):
+        first = await dsc.get_day_summary_cube(session, 7)
+        again = await dsc.get_day_summary_cube(session, 7)
+        rebuilt = await dsc.get_day_summary_cube(session, 7)
+
+    assert again is first
+    assert rebuilt is not first
+    assert session.execute.await_count == 2
+    assert dsc._cube_cache[7] is rebuilt
+
+
+@pytest.mark.asyncio
+async def test_staff_day_summary_rolls_up_scope_from_cube() -> None:
+    from app.routers.examinations import _build_staff_day_summary_for_scope
+
+    cube = DaySummaryCube.build(1, ENTRIES, ROWS)
+    school_a = SimpleNamespace(id=SCHOOL_A, code="A", name="School A")
+    school_b = SimpleNamespace(id=SCHOOL_B, code="B", name="School B")
+
+    summary = await _build_staff_day_summary_for_scope(
+        AsyncMock(),
+        1,
+        DAY1,
+        {SCHOOL_A},
+        [school_a, school_b],
+        preloaded_entries=ENTRIES,
+        cube=cube,
+    )
+
+    assert [s.code for s in summary.schools] == ["A"]
+    assert [(s.subject_code, s.papers_label, s.counts_by_school, s.row_total) for s in summary.slots] == [
+        ("MATH", "1 & 2", [2], 2),
+        ("ART", "1", [1], 1),
+    ]
+    assert (summary.unique_candidates, summary.invigilators_required) == (2, 1)
@@ -0,0 +1,159 @@
+"""Set-based examination candidate import: validation errors, single lookups, chunked upserts, jobs."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import examination_candidate_import as imp
+from app.services import examination_candidate_import_jobs as jobs
+
+SCHOOL = SimpleNamespace(id=uuid4(), code="S1")
+PROGRAMME = SimpleNamespace(id=7, code="P1")
+MATHS = SimpleNamespace(id=1, code="MTH", original_code="301", name="Maths")
+ENGLISH = SimpleNamespace(id=2, code="ENG", original_code=None, name="English")
+
+
+def _result(scalars: list | None = None, rows: list | None = None) -> MagicMock:
+    res = MagicMock()
+    res.scalars.return_value.all.return_value = scalars or []
+    res.all.return_value = rows or []
+    return res
+
+
+class _Session:
+    """Routes statements by kind and records them; begin_nested is a no-op savepoint."""
+
+    def __init__(self, fail_chunks: bool = False) -> None:
+        self.statements: list = []
+        self.fail_chunks = fail_chunks
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        if "FROM schools" in sql:
+            return _result(scalars=[SCHOOL])
+        if "FROM programmes" in sql:
+            return _result(scalars=[PROGRAMME])
+        if "FROM subjects" in sql:
+            return _result(scalars=[MATHS, ENGLISH])
+        if sql.startswith("INSERT INTO examination_candidates"):
+            regs = [v for k, v in stmt.compile().params.items() if k.startswith("registration_number")]
+            if self.fail_chunks and len(regs) > 1:
+                raise RuntimeError("chunk failed")
+            if "BAD" in regs:
+                raise RuntimeError("value too long")
+            return _result(rows=[(r, i) for i, r in enumerate(regs, start=100)])
+        return _result()
+
+    def sql(self, prefix: str) -> list[str]:
+        out = []
+        for stmt, _params in self.statements:
+            sql = str(stmt.compile(dialect=postgresql.dialect()))
+            if sql.startswith(prefix):
+                out.append(sql)
+        return out
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Registration Number": ["R1", "", "R3", "R4", "R5", "R6", "R1"],
+            "Name": ["Ama", "Kofi", "", "Esi", "Yaw", "Abena", "Ama Mensah"],
+            "School Code": ["S1", "S1", "S1", "NOPE", "S1", "S1", "S1"],
+            "Programme Code": ["P1", "P1", "P1", "P1", "P1", float("nan"), "P1"],
+            "DOB": ["2008-01-02", "", "", "", "", "", "2008-01-02"],
+            "Subject Original Codes": ["301, ENG", "", "", "", "999", "ENG", "301"],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_import_reports_row_errors_in_sheet_order() -> None:
+    session = _Session()
+    total, successful, errors = await imp.import_candidates_dataframe(session, 1, _frame())
+
+    assert total == 7
+    assert successful == 3  # R1 (twice) and R6
+    assert [(e.row_number, e.field, e.error_message) for e in errors] == [
+        (3, "registration_number", "registration_number is required"),
+        (4, "name", "name (or full_name) is required"),
+        (5, "school_code", "Unknown school_code 'NOPE'"),
+        (6, "subject_original_codes", "Unknown subject code(s): 999"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_resolves_subjects_once_and_upserts_in_one_chunk() -> None:
+    session = _Session()
+    await imp.import_candidates_dataframe(session, 1, _frame())
+
+    assert len(session.sql("SELECT subjects")) == 1
+    upserts = session.sql("INSERT INTO examination_candidates")
+    assert len(upserts) == 1
+    assert "ON CONFLICT ON CONSTRAINT uq_examination_candidate_reg_number DO UPDATE" in upserts[0]
+    assert "RETURNING" in upserts[0]
+
+    links = [p for stmt, p in session.statements if isinstance(p, list)]
+    assert len(links) == 1
+    # R6 takes English; the last R1 row wins, so R1 keeps only Maths (stored by original code).
+    assert sorted((r["examination_candidate_id"], r["subject_code"]) for r in links[0]) == [(100, "ENG"), (101, "301")]
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_is_retried_per_row_with_database_errors() -> None:
+    df = pd.DataFrame({"registration_number": ["R1", "BAD", "R3"], "name": ["A", "B", "C"]})
+    session = _Session(fail_chunks=True)
+    with patch.object(imp.settings, "candidate_import_chunk_size", 10):
+        total, successful, errors = await imp.import_candidates_dataframe(session, 1, df)
+
+    assert (total, successful) == (3, 2)
+    assert [(e.row_number, e.error_message, e.field) for e in errors] == [(3, "Database error: value too long", None)]
+
+
+@pytest.mark.asyncio
+async def test_progress_is_reported_per_chunk() -> None:
+    df = pd.DataFrame({"registration_number": [f"R{i}" for i in range(5)], "name": ["N"] * 5})
+    seen: list[tuple[int, int]] = []
+    with patch.object(imp.settings, "candidate_import_chunk_size", 2):
+        await imp.import_candidates_dataframe(_Session(), 1, df, progress=lambda d, t: seen.append((d, t)))
+    assert seen == [(2, 5), (4, 5), (5, 5)]
+
+
+@pytest.mark.asyncio
+async def test_import_job_runs_in_background_and_commits() -> None:
+    session = AsyncMock()
+
+    @asynccontextmanager
+    async def _session():
+        yield session
+
+    manager = SimpleNamespace(session=_session)
+
+    async def fake_import(_session, _examination_id, df, *, progress=None):
+        progress(len(df), len(df))
+        return len(df), len(df), []
+
+    with (
+        patch("app.dependencies.database.get_sessionmanager", return_value=manager),
+        patch.object(jobs, "import_candidates_dataframe", new=fake_import),
+    ):
+        job = jobs.start_candidate_import_job(9, pd.DataFrame({"registration_number": ["R1", "R2"]}))
+        assert job.status == jobs.JOB_QUEUED
+        await asyncio.gather(*jobs._tasks)
+
+    assert jobs.get_candidate_import_job(job.id) is job
+    assert job.status == jobs.JOB_COMPLETED
+    assert (job.processed_candidates, job.total_candidates, job.successful, job.failed) == (2, 2, 2, 0)
+    session.commit.assert_awaited_once()
@@ -0,0 +1,131 @@
+"""Batch appointment letters: shared context, fingerprinted storage and render-on-miss."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from app.models import ExaminerAllowanceType, ExaminerType, Region, SubjectType
+from app.services.examiner_appointment_letter_batch import (
+    AppointmentLetterBatchContext,
+    build_roster_letter_job,
+    choose_letter_cohorts,
+    get_or_render_letter,
+    read_stored_letter,
+    stored_letter_key,
+    write_stored_letter,
+)
+
+
+def _batch(**overrides: object) -> AppointmentLetterBatchContext:
+    values: dict[str, object] = {
+        "examination": SimpleNamespace(id=4, year=2026, exam_series="MAY/JUNE", exam_type="NAPTEX"),
+        "subject": SimpleNamespace(id=9, name="Mathematics", code="MATH", original_code="MATH301", subject_type=SubjectType.CORE),
+        "examination_label": "2026 MAY/JUNE NAPTEX Core Subjects Examinations",
+        "letter_date": datetime(2026, 5, 1),
+        "signatory_context": {"signatory_name": "Director"},
+        "default_coordination": {"coordination_venue": "HQ"},
+        "coordination_by_examiner": {},
+        "configured_references": {ExaminerType.ASSISTANT: "CTVET/EX/01"},
+        "role_rates": {(ExaminerType.ASSISTANT, ExaminerAllowanceType.INCONVENIENCE): Decimal("100")},
+        "marking_rates": {(9, 2): Decimal("3.5")},
+        "travel_rates": {},
+        "travel_zones": {},
+        "travel_zone_names": {},
+        "travel_role_factors": {},
+    }
+    values.update(overrides)
+    return AppointmentLetterBatchContext(**values)  # type: ignore[arg-type]
+
+
+def _examiner(**overrides: object) -> SimpleNamespace:
+    values: dict[str, object] = {
+        "id": uuid4(),
+        "name": "Ama Mensah",
+        "phone_number": "0240000000",
+        "examiner_type": ExaminerType.ASSISTANT,
+        "region": Region.ASHANTI,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _local_storage(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr("app.config.settings.storage_backend", "local")
+    monkeypatch.setattr("app.config.settings.storage_path", str(tmp_path / "documents"))
+
+
+def test_choose_letter_cohorts_prefers_named_non_default_group() -> None:
+    examiner_id = uuid4()
+    default = SimpleNamespace(is_default=True, name="All examiners")
+    beta = SimpleNamespace(is_default=False, name="Beta")
+    alpha = SimpleNamespace(is_default=False, name="Alpha")
+    lone_id = uuid4()
+
+    chosen = choose_letter_cohorts([(examiner_id, default), (examiner_id, beta), (examiner_id, alpha), (lone_id, default)])
+
+    assert chosen[examiner_id] is alpha
+    assert chosen[lone_id] is default
+
+
+def test_build_roster_letter_job_uses_shared_inputs() -> None:
+    examiner = _examiner()
+    batch = _batch(coordination_by_examiner={examiner.id: {"coordination_venue": "Kumasi"}})
+
+    job = build_roster_letter_job(batch, examiner)
+
+    assert job.reference_number == "CTVET/EX/01"
+    assert job.context["invitee_name"] == "Ama Mensah"
+    assert job.context["coordination_venue"] == "Kumasi"
+    assert job.context["signatory_name"] == "Director"
+    assert job.context["inconvenience_allowance"] is not None
+    assert job.filename == "appointment_letter_AmaMensah.pdf"
+
+
+def test_letter_fingerprint_changes_with_context() -> None:
+    examiner = _examiner()
+    first = build_roster_letter_job(_batch(), examiner)
+    same = build_roster_letter_job(_batch(), examiner)
+    moved = build_roster_letter_job(_batch(letter_date=datetime(2026, 5, 2)), examiner)
+
+    assert first.fingerprint == same.fingerprint
+    assert first.fingerprint != moved.fingerprint
+
+
+def test_write_stored_letter_replaces_stale_render(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    _local_storage(monkeypatch, tmp_path)
+    examiner = _examiner()
+    old_job = build_roster_letter_job(_batch(), examiner)
+    new_job = build_roster_letter_job(_batch(letter_date=datetime(2026, 6, 1)), examiner)
+
+    write_stored_letter(old_job, b"%PDF-old")
+    write_stored_letter(new_job, b"%PDF-new")
+
+    assert read_stored_letter(new_job) == b"%PDF-new"
+    assert read_stored_letter(old_job) is None
+    assert stored_letter_key(new_job).startswith(f"examiner-appointment-letters/4/9/{examiner.id}-")
+
+
+@pytest.mark.asyncio
+async def test_get_or_render_letter_renders_once(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    _local_storage(monkeypatch, tmp_path)
+    job = build_roster_letter_job(_batch(), _examiner())
+    calls: list[str] = []
+
+    def _fake_render(*, reference_number, **_kwargs) -> bytes:
+        calls.append(reference_number)
+        return b"%PDF-rendered"
+
+    with patch(
+        "app.services.examiner_appointment_letter_batch._render_appointment_letter_pdf_sync",
+        side_effect=_fake_render,
+    ):
+        assert await get_or_render_letter(job) == b"%PDF-rendered"
+        assert await get_or_render_letter(job) == b"%PDF-rendered"
+
+    assert calls == ["CTVET/EX/01"]
@@ -0,0 +1,196 @@
+"""Materialized examiner quota counters: bucket maths, counter-backed checks, roster hooks."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import ExaminerType, Region
+from app.services.examiner_quota_counters import (
+    GENDER_OTHER,
+    RosterQuotaBucket,
+    adjust_quota_counters,
+    counts_without,
+)
+from app.services.examiner_regional_quota import (
+    SubjectQuotaSettings,
+    gender_distribution_from_counts,
+    roster_by_region_from_counts,
+    roster_distribution_from_counts,
+    would_exceed_quota,
+)
+from app.services.script_allocation import sync_examiner_subjects
+
+NORTH = uuid4()
+SOUTH = uuid4()
+REGION_TO_GROUP = {
+    Region.NORTHERN: (NORTH, "North"),
+    Region.SAVANNAH: (NORTH, "North"),
+    Region.CENTRAL: (SOUTH, "South"),
+}
+
+
+def _counts() -> dict[RosterQuotaBucket, int]:
+    return {
+        RosterQuotaBucket.of(Region.NORTHERN, ExaminerType.ASSISTANT, "Female"): 3,
+        RosterQuotaBucket.of(Region.SAVANNAH, ExaminerType.TEAM_LEADER, "Male"): 1,
+        RosterQuotaBucket.of(Region.CENTRAL, ExaminerType.ASSISTANT, None): 2,
+        # Region outside every quota group still counts towards gender caps.
+        RosterQuotaBucket.of(Region.VOLTA, ExaminerType.ASSISTANT, "Male"): 4,
+    }
+
+
+def test_bucket_normalizes_gender_and_string_enums() -> None:
+    bucket = RosterQuotaBucket.of("Northern", "assistant_examiner", "Unknown")
+    assert bucket.region == Region.NORTHERN
+    assert bucket.examiner_type == ExaminerType.ASSISTANT
+    assert bucket.gender == GENDER_OTHER
+    assert RosterQuotaBucket.of(Region.NORTHERN, ExaminerType.ASSISTANT, "Female").gender == "Female"
+
+
+def test_distributions_from_counts() -> None:
+    counts = _counts()
+    dist = roster_distribution_from_counts(counts, REGION_TO_GROUP)
+    assert dist[NORTH].total == 4
+    assert dist[NORTH].by_role == {ExaminerType.ASSISTANT: 3, ExaminerType.TEAM_LEADER: 1}
+    assert dist[SOUTH].total == 2
+
+    gender = gender_distribution_from_counts(counts)
+    assert (gender.male, gender.female) == (5, 3)
+
+    assert roster_by_region_from_counts(counts, REGION_TO_GROUP) == {
+        Region.NORTHERN: 3,
+        Region.SAVANNAH: 1,
+        Region.CENTRAL: 2,
+    }
+
+
+def test_counts_without_never_goes_negative() -> None:
+    bucket = RosterQuotaBucket.of(Region.CENTRAL, ExaminerType.ASSISTANT, None)
+    counts = {bucket: 1}
+    assert counts_without(counts, bucket) == {bucket: 0}
+    assert counts_without({bucket: 0}, bucket) == {bucket: 0}
+    assert counts_without(counts, None) is counts
+
+
+@pytest.mark.asyncio
+async def test_would_exceed_quota_reads_counters_once() -> None:
+    quotas = [SimpleNamespace(group_id=NORTH, examiner_type=None, quota_count=4)]
+    load_counters = AsyncMock(return_value=_counts())
+    with (
+        patch(
+            "app.services.examiner_regional_quota.list_quotas_for_subject",
+            new=AsyncMock(return_value=quotas),
+        ),
+        patch(
+            "app.services.examiner_regional_quota.get_quota_settings_for_subject",
+            new=AsyncMock(return_value=SubjectQuotaSettings(female_quota=10)),
+        ),
+        patch(
+            "app.services.examiner_regional_quota._load_region_to_group",
+            new=AsyncMock(return_value=REGION_TO_GROUP),
+        ),
+        patch("app.services.examiner_regional_quota.load_quota_counters", new=load_counters),
+    ):
+        full = await would_exceed_quota(
+            AsyncMock(),
+            examination_id=1,
+            subject_id=10,
+            region=Region.SAVANNAH,
+            examiner_type=ExaminerType.ASSISTANT,
+            gender="Female",
+        )
+        south = await would_exceed_quota(
+            AsyncMock(),
+            examination_id=1,
+            subject_id=10,
+            region=Region.CENTRAL,
+            examiner_type=ExaminerType.ASSISTANT,
+            gender="Female",
+        )
+
+    assert full.exceeded is True
+    assert full.group_name == "North"
+    assert south.exceeded is False
+    assert load_counters.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_would_exceed_quota_excludes_edited_examiner() -> None:
+    quotas = [SimpleNamespace(group_id=NORTH, examiner_type=None, quota_count=4)]
+    own_bucket = RosterQuotaBucket.of(Region.NORTHERN, ExaminerType.ASSISTANT, "Female")
+    with (
+        patch(
+            "app.services.examiner_regional_quota.list_quotas_for_subject",
+            new=AsyncMock(return_value=quotas),
+        ),
+        patch(
+            "app.services.examiner_regional_quota.get_quota_settings_for_subject",
+            new=AsyncMock(return_value=SubjectQuotaSettings()),
+        ),
+        patch(
+            "app.services.examiner_regional_quota._load_region_to_group",
+            new=AsyncMock(return_value=REGION_TO_GROUP),
+        ),
+        patch("app.services.examiner_regional_quota.load_quota_counters", new=AsyncMock(return_value=_counts())),
+        patch(
+            "app.services.examiner_regional_quota.examiner_bucket_on_subject",
+            new=AsyncMock(return_value=own_bucket),
+        ),
+    ):
+        result = await would_exceed_quota(
+            AsyncMock(),
+            examination_id=1,
+            subject_id=10,
+            region=Region.SAVANNAH,
+            examiner_type=ExaminerType.ASSISTANT,
+            exclude_examiner_id=uuid4(),
+        )
+
+    assert result.exceeded is False
+
+
+@pytest.mark.asyncio
+async def test_adjust_quota_counters_is_one_clamped_upsert() -> None:
+    session = AsyncMock()
+    bucket = RosterQuotaBucket.of(Region.NORTHERN, ExaminerType.ASSISTANT, "Male")
+    await adjust_quota_counters(session, examination_id=1, subject_ids=[10, 11, 10], bucket=bucket, delta=-1)
+
+    session.execute.assert_awaited_once()
+    stmt = session.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+    assert "ON CONFLICT (EXAMINATION_ID, SUBJECT_ID, REGION, EXAMINER_TYPE, GENDER) DO UPDATE" in sql
+    assert "GREATEST" in sql
+
+    session.execute.reset_mock()
+    await adjust_quota_counters(session, examination_id=1, subject_ids=[], bucket=bucket, delta=1)
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_sync_examiner_subjects_moves_counters_between_subjects() -> None:
+    examiner = SimpleNamespace(
+        id=uuid4(),
+        examination_id=1,
+        region=Region.CENTRAL,
+        examiner_type=ExaminerType.ASSISTANT,
+        gender="Male",
+    )
+    removed = MagicMock()
+    removed.scalars.return_value.all.return_value = [10, 11]
+    session = AsyncMock()
+    session.add = MagicMock()
+    session.execute = AsyncMock(return_value=removed)
+    adjust = AsyncMock()
+
+    with patch("app.services.script_allocation.adjust_quota_counters", new=adjust):
+        await sync_examiner_subjects(session, examiner, [11, 12])
+
+    bucket = RosterQuotaBucket.of(Region.CENTRAL, ExaminerType.ASSISTANT, "Male")
+    calls = [(c.kwargs["subject_ids"], c.kwargs["delta"]) for c in adjust.await_args_list]
+    assert calls == [({10}, -1), ({12}, 1)]
+    assert all(c.kwargs["bucket"] == bucket for c in adjust.await_args_list)
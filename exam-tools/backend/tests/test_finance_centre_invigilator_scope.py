@@ -120,6 +120,10 @@ async def test_build_finance_centre_invigilator_item_uses_membership_scope_and_e
             "app.routers.examinations._build_staff_day_summary_for_scope",
             mock_day_summary,
         ),
+        patch(
+            "app.routers.examinations.get_day_summary_cube",
+            new_callable=AsyncMock,
+        ) as mock_cube,
     ):
         item = await _build_finance_centre_invigilator_item(
             session, 1, centre, TimetableDownloadFilter.CORE_ONLY
@@ -131,6 +135,8 @@ async def test_build_finance_centre_invigilator_item_uses_membership_scope_and_e
     assert call_kwargs["subject_filter"] == TimetableDownloadFilter.CORE_ONLY
     assert call_kwargs["exam_centre"] is centre
     assert mock_timetable_entries.await_args.args[2] == scope_ids
+    mock_cube.assert_awaited_once_with(session, 1)
+    assert mock_day_summary.await_args.kwargs["cube"] is mock_cube.return_value
 
     assert len(item.days) == 1
     assert item.days[0].unique_candidates == 25
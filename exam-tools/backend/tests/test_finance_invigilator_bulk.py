@@ -0,0 +1,94 @@
+"""Bulk invigilator day counts used by finance centre reports."""
+
+from datetime import date, time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.models import CentreStructureMode, ExaminationCentreMembershipScope, SubjectType
+from app.schemas.examination import TimetableEntry
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services.centre_resolution_index import CentreResolutionIndex
+from app.services.day_summary_cube import DaySummaryCube
+from app.services.finance_invigilator_bulk import ExaminationInvigilatorData
+
+DAY1 = date(2026, 5, 4)
+DAY2 = date(2026, 5, 5)
+
+
+def _entry(code: str, paper: int, day: date) -> TimetableEntry:
+    return TimetableEntry(
+        subject_code=code,
+        subject_name=code,
+        paper=paper,
+        examination_date=day,
+        examination_time=time(9, 0),
+    )
+
+
+def _data(mode: CentreStructureMode, memberships, subjects_by_school) -> ExaminationInvigilatorData:
+    entries = [_entry("MATH", 1, DAY1), _entry("MATH", 2, DAY2), _entry("ART", 1, DAY2)]
+    rows = [
+        (cand_id, sid, code, series)
+        for sid, by_cand in subjects_by_school.items()
+        for cand_id, subject_rows in by_cand.items()
+        for code, series in subject_rows
+    ]
+    return ExaminationInvigilatorData(
+        examination_id=1,
+        index=CentreResolutionIndex.from_memberships(1, mode, memberships),
+        cube=DaySummaryCube.build(1, entries, rows),
+        schedule_type_by_code={"MATH": SubjectType.CORE, "ART": SubjectType.ELECTIVE},
+    )
+
+
+def test_unified_counts_unique_candidates_per_day() -> None:
+    centre = SimpleNamespace(id=uuid4(), code="C1", name="Centre")
+    school = uuid4()
+    data = _data(
+        CentreStructureMode.UNIFIED,
+        [(school, centre.id, ExaminationCentreMembershipScope.ALL)],
+        {school: {1: [("MATH", None)], 2: [("MATH", 2), ("ART", None)], 3: [("ART", 1)]}},
+    )
+
+    item = data.invigilator_item(centre, TimetableDownloadFilter.ALL)
+
+    assert [(d.examination_date, d.unique_candidates, d.invigilators_required) for d in item.days] == [
+        (DAY1, 1, 1),
+        (DAY2, 3, 1),
+    ]
+    core = data.invigilator_item(centre, TimetableDownloadFilter.CORE_ONLY)
+    assert [(d.examination_date, d.unique_candidates) for d in core.days] == [(DAY1, 1), (DAY2, 2)]
+
+
+def test_split_only_counts_papers_for_membership_at_centre() -> None:
+    core_centre = SimpleNamespace(id=uuid4(), code="C1", name="Core")
+    elective_centre = SimpleNamespace(id=uuid4(), code="C2", name="Elective")
+    school = uuid4()
+    data = _data(
+        CentreStructureMode.SPLIT,
+        [
+            (school, core_centre.id, ExaminationCentreMembershipScope.CORE),
+            (school, elective_centre.id, ExaminationCentreMembershipScope.ELECTIVE),
+        ],
+        {school: {i: [("MATH", None), ("ART", None)] for i in range(31)}},
+    )
+
+    core_item = data.invigilator_item(core_centre, TimetableDownloadFilter.ALL)
+    elective_item = data.invigilator_item(elective_centre, TimetableDownloadFilter.ALL)
+
+    assert [(d.examination_date, d.invigilators_required) for d in core_item.days] == [(DAY1, 2), (DAY2, 2)]
+    assert [(d.examination_date, d.unique_candidates) for d in elective_item.days] == [(DAY2, 31)]
+    assert data.invigilator_item(elective_centre, TimetableDownloadFilter.CORE_ONLY).days == []
+
+
+@pytest.mark.asyncio
+async def test_build_invigilator_item_matches_injected_signature() -> None:
+    centre = SimpleNamespace(id=uuid4(), code="C1", name="Centre")
+    data = _data(CentreStructureMode.UNIFIED, [], {})
+
+    item = await data.build_invigilator_item(None, 1, centre, TimetableDownloadFilter.ALL)
+
+    assert item.center_code == "C1"
+    assert item.days == []
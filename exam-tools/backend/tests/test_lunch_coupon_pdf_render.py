@@ -5,7 +5,7 @@ from __future__ import annotations
 import pytest
 
 from app.services.lunch_coupon_pdf import _render_lunch_coupons_pdf_sync
-from app.services.qr_code import generate_qr_code_base64
+from app.services.qr_code import qr_code_svg_data_uri
 
 pytest.importorskip("weasyprint", reason="WeasyPrint required for HTML→PDF in this test")
 
@@ -18,7 +18,7 @@ def _sample_coupons(count: int) -> list[dict]:
             {
                 "name": f"Examiner {index}",
                 "reference_code": ref,
-                "qr_base64": generate_qr_code_base64(f"1:{ref}"),
+                "qr_src": qr_code_svg_data_uri(f"1:{ref}"),
             }
         )
     return coupons
@@ -34,7 +34,9 @@ def test_generate_qr_code_base64_rejects_empty_payload() -> None:
 
 
 def test_render_context_includes_qr_when_reference_code_present() -> None:
-    with patch("app.services.script_allocation_form_pdf.generate_qr_code_base64", return_value="abc123") as mock_qr:
+    with patch(
+        "app.services.script_allocation_form_pdf.qr_code_svg_data_uri", return_value="data:image/svg+xml;base64,abc"
+    ) as mock_qr:
         with patch("app.services.script_allocation_form_pdf.render_html") as mock_render:
             mock_render.return_value = "<html></html>"
             with patch("app.services.script_allocation_form_pdf.PdfGenerator") as mock_gen:
@@ -62,7 +64,7 @@ def test_render_context_includes_qr_when_reference_code_present() -> None:
     mock_qr.assert_called_once_with("42:MATH301-NAE1")
     context = mock_render.call_args[0][0]
     assert context["reference_code"] == "MATH301-NAE1"
-    assert context["qr_code_base64"] == "abc123"
+    assert context["qr_code_src"] == "data:image/svg+xml;base64,abc"
 
 
 @pytest.mark.asyncio
@@ -702,7 +704,7 @@ def test_render_lunch_coupons_pdf_passes_brand_and_cohort_context() -> None:
             _render_lunch_coupons_pdf_sync(
                 examination_label_str="2026 MAY/JUNE",
                 subject_label="MATH301 — Mathematics",
-                coupons=[{"name": "Jane", "reference_code": "MATH301-NAE1", "qr_base64": "abc"}],
+                coupons=[{"name": "Jane", "reference_code": "MATH301-NAE1", "qr_src": "data:image/svg+xml;base64,abc"}],
                 brand_color="#1E3A5F",
                 brand_color_soft="#F2F4F7",
                 cohort_name="North cohort",
@@ -712,3 +714,180 @@ def test_render_lunch_coupons_pdf_passes_brand_and_cohort_context() -> None:
     assert context["brand_color"] == "#1E3A5F"
     assert context["brand_color_soft"] == "#F2F4F7"
     assert context["cohort_name"] == "North cohort"
+
+
+def _indexed_examiner(subject_codes: dict[int, str], *, code: str = "MATH301-NAE1"):
+    from app.services.lunch_coupon_code_index import IndexedExaminer
+
+    return IndexedExaminer(
+        examiner_id=uuid4(),
+        examination_id=42,
+        reference_code=code,
+        name="Jane Doe",
+        examiner_type=ExaminerType.ASSISTANT,
+        region=Region.ASHANTI,
+        subject_codes=subject_codes,
+    )
+
+
+def _code_index(*examiners):
+    from datetime import datetime
+
+    from app.services.lunch_coupon_code_index import LunchCouponCodeIndex
+
+    return LunchCouponCodeIndex(
+        examination_id=42,
+        examination_name="2026 MAY/JUNE",
+        examination_created_at=datetime(2026, 1, 1),
+        version=(len(examiners), None, 0, None),
+        by_code={e.reference_code: e for e in examiners},
+    )
+
+
+def test_build_code_index_skips_blank_codes_and_uses_original_subject_code() -> None:
+    from app.services.lunch_coupon_code_index import build_index
+
+    es = MagicMock(subject_id=10, subject=MagicMock(code="301", original_code="MATH301"))
+    with_code = MagicMock(reference_code=" math301-nae1 ", subjects=[es], examiner_type=ExaminerType.ASSISTANT)
+    without_code = MagicMock(reference_code="", subjects=[])
+
+    index = build_index(None, 42, [with_code, without_code])
+
+    assert list(index.by_code) == ["MATH301-NAE1"]
+    assert index.lookup("math301-nae1").subject_codes == {10: "MATH301"}
+
+
+@pytest.mark.asyncio
+async def test_get_code_index_reuses_cache_within_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.services import lunch_coupon_code_index
+
+    monkeypatch.setattr(lunch_coupon_code_index, "_cache", {})
+    monkeypatch.setattr(lunch_coupon_code_index, "examination_label", lambda exam: "2026 MAY/JUNE")
+    monkeypatch.setattr("app.config.settings.lunch_coupon_index_ttl_seconds", 60)
+    version = AsyncMock(return_value=(0, None, 0, None))
+    monkeypatch.setattr(lunch_coupon_code_index, "roster_version", version)
+    session = AsyncMock()
+    session.get = AsyncMock(return_value=MagicMock(created_at=None))
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute = AsyncMock(return_value=result)
+
+    first = await lunch_coupon_code_index.get_lunch_coupon_code_index(session, 42)
+    second = await lunch_coupon_code_index.get_lunch_coupon_code_index(session, 42)
+
+    assert first is second
+    version.assert_awaited_once()
+    session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_code_index_does_not_cache_unknown_examination(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.services import lunch_coupon_code_index
+
+    monkeypatch.setattr(lunch_coupon_code_index, "_cache", {})
+    version = AsyncMock(return_value=(0, None, 0, None))
+    monkeypatch.setattr(lunch_coupon_code_index, "roster_version", version)
+    session = AsyncMock()
+    session.get = AsyncMock(return_value=None)
+
+    index = await lunch_coupon_code_index.get_lunch_coupon_code_index(session, 999999)
+
+    assert index.by_code == {}
+    assert lunch_coupon_code_index._cache == {}
+    version.assert_not_awaited()
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resolve_scan_from_code_index_checks_officer_subjects() -> None:
+    from app.services.lunch_coupon_verify import resolve_scan_from_code_index
+
+    examiner = _indexed_examiner({10: "MATH301"})
+    with patch(
+        "app.services.lunch_coupon_verify.get_lunch_coupon_code_index",
+        new=AsyncMock(return_value=_code_index(examiner)),
+    ):
+        ok = await resolve_scan_from_code_index(
+            AsyncMock(), "42:math301-nae1", examination_ids=[42], officer_subject_ids_by_exam={42: {10}}
+        )
+        wrong_subject = await resolve_scan_from_code_index(
+            AsyncMock(), "42:MATH301-NAE1", examination_ids=[42], officer_subject_ids_by_exam={42: {11}}
+        )
+        other_exam = await resolve_scan_from_code_index(
+            AsyncMock(), "7:MATH301-NAE1", examination_ids=[42], officer_subject_ids_by_exam={42: {10}}
+        )
+
+    assert ok["valid"] is True
+    assert ok["examiner_id"] == examiner.examiner_id
+    assert ok["subject_codes"] == ["MATH301"]
+    assert ok["examination_name"] == "2026 MAY/JUNE"
+    assert wrong_subject["valid"] is False
+    assert other_exam["valid"] is False
+
+
+@pytest.mark.asyncio
+async def test_verify_scans_batch_records_once_and_flags_repeats() -> None:
+    from datetime import UTC, date, datetime
+
+    from app.schemas.lunch_coupon_verify import LunchCouponBatchScan
+    from app.services.lunch_coupon_verify import lunch_coupon_batch_response, verify_and_record_lunch_coupon_scans
+
+    examiner = _indexed_examiner({10: "MATH301"})
+    day = date(2026, 6, 27)
+    insert_result = MagicMock()
+    insert_result.all.return_value = [(42, examiner.examiner_id, day)]
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=insert_result)
+
+    scans = [
+        LunchCouponBatchScan(reference_code="42:MATH301-NAE1", scanned_at=datetime(2026, 6, 27, 12, 0), client_scan_id="a"),
+        LunchCouponBatchScan(reference_code="42:MATH301-NAE1", scanned_at=datetime(2026, 6, 27, 12, 5), client_scan_id="b"),
+        LunchCouponBatchScan(reference_code="42:UNKNOWN", client_scan_id="c"),
+    ]
+    with (
+        patch(
+            "app.services.lunch_coupon_verify.get_lunch_coupon_code_index",
+            new=AsyncMock(return_value=_code_index(examiner)),
+        ),
+        patch("app.services.lunch_coupon_verify._server_now", return_value=datetime(2026, 6, 27, 12, 30, tzinfo=UTC)),
+    ):
+        results = await verify_and_record_lunch_coupon_scans(
+            session,
+            examination_ids=[42],
+            officer_subject_ids_by_exam={42: {10}},
+            scans=scans,
+            verified_by_id=uuid4(),
+        )
+
+    assert [r["client_scan_id"] for r in results] == ["a", "b", "c"]
+    assert results[0]["recorded"] is True
+    assert results[0]["verification_date"] == day
+    assert results[1]["already_verified"] is True
+    assert results[1]["recorded"] is False
+    assert results[2]["valid"] is False
+    session.execute.assert_awaited_once()
+    response = lunch_coupon_batch_response(results)
+    assert (response.recorded_count, response.already_verified_count, response.invalid_count) == (1, 1, 1)
+
+
+def test_scan_day_and_time_rejects_future_and_other_day_scans() -> None:
+    from datetime import UTC, date, datetime, timedelta
+
+    from app.services.lunch_coupon_verify import _scan_day_and_time
+
+    now = datetime(2026, 6, 27, 12, 0, tzinfo=UTC)
+
+    assert _scan_day_and_time(None, now) == (date(2026, 6, 27), datetime(2026, 6, 27, 12, 0))
+    assert _scan_day_and_time(now + timedelta(minutes=2), now) == (date(2026, 6, 27), datetime(2026, 6, 27, 12, 0))
+    assert _scan_day_and_time(now + timedelta(hours=1), now) == "Scan time is ahead of the server clock."
+    assert _scan_day_and_time(datetime(2026, 6, 26, 12, 0), now) == "Scan is not from today's session."
+
+
+def test_check_batch_scan_count_rejects_oversized_upload(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.services.lunch_coupon_verify import check_batch_scan_count
+
+    monkeypatch.setattr("app.config.settings.lunch_coupon_batch_max_scans", 2)
+    check_batch_scan_count(2)
+    with pytest.raises(HTTPException) as exc_info:
+        check_batch_scan_count(3)
+    assert exc_info.value.status_code == 422
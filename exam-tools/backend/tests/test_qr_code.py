@@ -0,0 +1,62 @@
+"""QR asset layer: memoized PNG/SVG encodings and cohort batch generation."""
+
+from __future__ import annotations
+
+import base64
+import re
+
+import pytest
+import qrcode
+
+from app.services import qr_code
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    qr_code.clear_qr_code_cache()
+    yield
+    qr_code.clear_qr_code_cache()
+
+
+def _dark_modules_in_svg(svg: str) -> int:
+    path = re.search(r'<path d="([^"]*)"', svg).group(1)
+    return sum(int(n) for n in re.findall(r"h(\d+)v1", path))
+
+
+def test_svg_paths_cover_exactly_the_dark_modules() -> None:
+    qr = qrcode.QRCode(border=2, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data("42:MATH301-NAE1")
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+
+    svg = qr_code.generate_qr_code_svg(" 42:MATH301-NAE1 ", border=2, error_correction=qrcode.constants.ERROR_CORRECT_M)
+
+    assert svg.startswith("<svg") and f'viewBox="0 0 {len(matrix)} {len(matrix)}"' in svg
+    assert _dark_modules_in_svg(svg) == sum(sum(row) for row in matrix)
+
+
+def test_encodings_are_memoized_per_payload_and_options() -> None:
+    first = qr_code.generate_qr_code_base64("NAE1")
+    assert qr_code.generate_qr_code_base64(" NAE1") == first
+    assert qr_code._qr_png_base64.cache_info().hits == 1
+    assert qr_code.generate_qr_code_base64("NAE1", box_size=4) != first
+
+    qr_code.generate_qr_code_svg("NAE1")
+    qr_code.generate_qr_code_svg("NAE1")
+    assert qr_code._qr_svg.cache_info().hits == 1
+
+
+def test_batch_data_uris_keep_order_and_encode_repeats_once() -> None:
+    uris = qr_code.generate_qr_code_svg_data_uris(["1:A", "1:B", "1:A"], border=2)
+
+    assert uris[0] == uris[2] != uris[1]
+    assert all(u.startswith("data:image/svg+xml;base64,") for u in uris)
+    assert base64.b64decode(uris[1].split(",", 1)[1]).startswith(b"<svg")
+    assert qr_code._qr_svg.cache_info().misses == 2
+
+
+def test_empty_payload_is_rejected_for_every_format() -> None:
+    with pytest.raises(ValueError, match="empty"):
+        qr_code.generate_qr_code_svg(" ")
+    with pytest.raises(ValueError, match="empty"):
+        qr_code.generate_qr_code_svg_data_uris(["1:A", ""])
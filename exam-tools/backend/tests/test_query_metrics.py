@@ -0,0 +1,102 @@
+"""SQL statement instrumentation: engine hooks, N+1 shapes, route aggregates and query budgets."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import query_metrics as qm
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    qm.install_query_metrics(engine)
+    qm.install_query_metrics(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+    yield engine
+    engine.dispose()
+
+
+def test_statement_shape_collapses_values_and_in_lists() -> None:
+    first = qm.statement_shape("SELECT *  FROM items\nWHERE id = $1 AND name IN ($2, $3, $4)")
+    second = qm.statement_shape("SELECT * FROM items WHERE id = $7 AND name IN ($8)")
+    assert first == second == "SELECT * FROM items WHERE id = ? AND name IN (?)"
+    assert qm.statement_shape("SELECT 'x', 42, col::text") == "SELECT ?, ?, col::text"
+
+
+def test_tracks_only_statements_inside_scope(engine) -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with qm.track_queries() as stats:
+            for item_id in (1, 2, 3):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+            conn.execute(text("SELECT count(*) FROM items"))
+
+    assert stats.count == 4
+    assert stats.db_time_ms > 0
+    assert stats.shapes.most_common(1) == [("SELECT name FROM items WHERE id = ?", 3)]
+    assert stats.repeated_shapes(2) == [("SELECT name FROM items WHERE id = ?", 3)]
+    assert stats.repeated_shapes(3) == []
+    durations = [ms for ms, _ in stats.slowest]
+    assert len(durations) == 4
+    assert durations == sorted(durations, reverse=True)
+
+
+def test_assert_max_queries_enforces_budget_and_repeats(engine) -> None:
+    with engine.connect() as conn, qm.assert_max_queries(2):
+        conn.execute(text("SELECT count(*) FROM items"))
+
+    with pytest.raises(AssertionError, match="3 SQL statements executed"), engine.connect() as conn:
+        with qm.assert_max_queries(2):
+            for item_id in (1, 2, 3):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+
+    with pytest.raises(AssertionError, match="3x SELECT name"), engine.connect() as conn:
+        with qm.assert_max_queries(10, max_repeats=2):
+            for item_id in (1, 2, 3):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+
+
+def test_route_aggregates_flag_n_plus_one_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(qm, "_routes", {})
+    monkeypatch.setattr("app.config.settings.query_metrics_repeat_threshold", 2)
+    light = qm.QueryStats()
+    light.record("SELECT 1", 1.0)
+    heavy = qm.QueryStats()
+    for i in range(3):
+        heavy.record(f"SELECT name FROM items WHERE id = {i}", 2.0 + i)
+
+    qm.record_route_queries("GET /items", light)
+    qm.record_route_queries("GET /items", heavy)
+    qm.record_route_queries("GET /health-ish", light)
+    snapshot = qm.query_metrics_snapshot()
+
+    assert [row["route"] for row in snapshot] == ["GET /items", "GET /health-ish"]
+    items = snapshot[0]
+    assert (items["requests"], items["queries"], items["max_queries"], items["avg_queries"]) == (2, 4, 3, 2.0)
+    assert items["n_plus_one_requests"] == 1
+    assert items["repeated_statements"] == [{"statement": "SELECT name FROM items WHERE id = ?", "count": 3}]
+    assert items["slowest_statements"][0] == {"statement": "SELECT name FROM items WHERE id = ?", "duration_ms": 4.0}
+
+    qm.reset_query_metrics()
+    assert qm.query_metrics_snapshot() == []
+
+
+@pytest.mark.asyncio
+async def test_query_metrics_endpoint_returns_route_rows(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.routers.admin_system import delete_query_metrics, get_query_metrics
+
+    monkeypatch.setattr(qm, "_routes", {})
+    stats = qm.QueryStats()
+    stats.record("SELECT 1", 1.5)
+    qm.record_route_queries("GET /examinations/{exam_id}", stats)
+
+    rows = await get_query_metrics(MagicMock())
+    assert [(r.route, r.queries, r.slowest_statements[0].duration_ms) for r in rows] == [
+        ("GET /examinations/{exam_id}", 1, 1.5)
+    ]
+    await delete_query_metrics(MagicMock())
+    assert await get_query_metrics(MagicMock()) == []
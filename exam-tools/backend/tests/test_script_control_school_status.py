@@ -1,8 +1,10 @@
 """Unit tests for script control school-status helpers."""
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
+import pytest
+
 from app.schemas.script_control import ScriptControlSchoolStatusCounts
 from app.services.script_control_school_status import _overall_status
 
@@ -62,3 +64,124 @@ def test_packing_to_admin_row_shape() -> None:
     assert row.school_code == "SCH01"
     assert row.total_booklets == 10
     assert row.series_number == 1
+
+
+def _compiled(stmt) -> str:
+    from sqlalchemy.dialects import postgresql
+
+    return str(stmt.compile(dialect=postgresql.dialect())).lower()
+
+
+def test_school_status_select_aggregates_in_sql() -> None:
+    from app.services.script_control_school_status import _school_status_select
+
+    regular, _ = _school_status_select(
+        examination_id=1,
+        subject_id=2,
+        paper_number=1,
+        expected_series=3,
+        irregular=False,
+        region=None,
+        zone=None,
+        school_q="abc",
+    )
+    sql = _compiled(regular)
+    assert "script_envelopes" in sql
+    assert "no_scripts" in sql
+    assert "case when" in sql
+    assert "ilike" in sql
+
+    irregular, _ = _school_status_select(
+        examination_id=1,
+        subject_id=2,
+        paper_number=1,
+        expected_series=3,
+        irregular=True,
+        region=None,
+        zone=None,
+        school_q=None,
+    )
+    sql = _compiled(irregular)
+    assert "irregular_script_envelopes" in sql
+    assert "no_scripts" not in sql
+
+
+@pytest.mark.asyncio
+async def test_page_school_status_pushes_filter_and_paging_to_sql() -> None:
+    from app.services import script_control_school_status as svc
+
+    sch = MagicMock()
+    sch.id = uuid4()
+    sch.code = "SCH01"
+    sch.name = "Test School"
+    sch.region = None
+    sch.zone = None
+    sub = MagicMock()
+    sub.code = "ENG"
+    sub.original_code = None
+    sub.name = "English"
+
+    rollup = MagicMock()
+    rollup.all.return_value = [("missing", 4), ("partial", 2), ("verified", 1)]
+    page = MagicMock()
+    page.all.return_value = [(sch, 25, 1, 0, 0, "partial")]
+    series = MagicMock()
+    series.scalars.return_value.unique.return_value.all.return_value = []
+
+    session = AsyncMock()
+    session.get = AsyncMock(return_value=sub)
+    session.execute = AsyncMock(side_effect=[rollup, page, series])
+
+    with (
+        patch.object(svc, "load_examination_or_raise", new=AsyncMock()),
+        patch.object(svc, "_subject_has_paper_on_timetable", new=AsyncMock(return_value=True)),
+        patch.object(svc, "subject_series_count_map", new=AsyncMock(return_value={2: 2})),
+    ):
+        rows, total, counts = await svc.page_script_control_school_status(
+            session,
+            examination_id=1,
+            subject_id=2,
+            paper_number=1,
+            irregular=False,
+            status_filter="partial",
+            skip=0,
+            limit=50,
+        )
+
+    assert (counts.total, counts.missing, counts.partial, counts.verified) == (7, 4, 2, 1)
+    assert total == 2
+    assert [r.overall_status for r in rows] == ["partial"]
+    assert rows[0].expected_series == 2
+    page_sql = _compiled(session.execute.await_args_list[1].args[0])
+    assert "limit" in page_sql and "offset" in page_sql
+
+
+@pytest.mark.asyncio
+async def test_page_school_status_skips_queries_past_last_page() -> None:
+    from app.services import script_control_school_status as svc
+
+    rollup = MagicMock()
+    rollup.all.return_value = [("complete", 3)]
+    session = AsyncMock()
+    session.get = AsyncMock(return_value=MagicMock())
+    session.execute = AsyncMock(side_effect=[rollup])
+
+    with (
+        patch.object(svc, "load_examination_or_raise", new=AsyncMock()),
+        patch.object(svc, "_subject_has_paper_on_timetable", new=AsyncMock(return_value=True)),
+        patch.object(svc, "subject_series_count_map", new=AsyncMock(return_value={})),
+    ):
+        rows, total, counts = await svc.page_script_control_school_status(
+            session,
+            examination_id=1,
+            subject_id=2,
+            paper_number=1,
+            irregular=True,
+            skip=10,
+            limit=10,
+        )
+
+    assert rows == []
+    assert total == 3
+    assert counts.complete == 3
+    assert session.execute.await_count == 1
@@ -0,0 +1,111 @@
+"""Set-diff cohort membership sync: target memberships and delta-only writes."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import ExaminerType, Region
+from app.services import subject_marking_group as smg
+
+E_NORTH_ASSISTANT = uuid4()
+E_NORTH_CHIEF = uuid4()
+E_SOUTH_ASSISTANT = uuid4()
+EXAMINERS = {
+    E_NORTH_ASSISTANT: (Region.NORTHERN, ExaminerType.ASSISTANT),
+    E_NORTH_CHIEF: (Region.NORTHERN, ExaminerType.CHIEF),
+    E_SOUTH_ASSISTANT: (Region.CENTRAL, ExaminerType.ASSISTANT),
+}
+
+
+def _group(*, is_default: bool = False, regions=(), roles=()) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid4(),
+        is_default=is_default,
+        source_regions=[SimpleNamespace(region=r) for r in regions],
+        source_roles=[SimpleNamespace(examiner_type=r) for r in roles],
+    )
+
+
+def test_desired_memberships_follow_rules_and_keep_manual_members() -> None:
+    default = _group(is_default=True)
+    northern_assistants = _group(regions=[Region.NORTHERN], roles=[ExaminerType.ASSISTANT])
+    manual = _group()
+    departed = uuid4()
+    current = {
+        (northern_assistants.id, E_SOUTH_ASSISTANT),
+        (manual.id, E_NORTH_CHIEF),
+        (manual.id, departed),
+    }
+
+    desired = smg.desired_cohort_memberships(
+        [default, northern_assistants, manual],
+        examiners=EXAMINERS,
+        current=current,
+    )
+
+    assert desired == {
+        *((default.id, eid) for eid in EXAMINERS),
+        (northern_assistants.id, E_NORTH_ASSISTANT),
+        (northern_assistants.id, E_SOUTH_ASSISTANT),
+        (manual.id, E_NORTH_CHIEF),
+    }
+
+
+@pytest.mark.asyncio
+async def test_apply_diff_writes_only_changed_rows() -> None:
+    gid = uuid4()
+    session = AsyncMock()
+    current = {(gid, E_NORTH_ASSISTANT), (gid, E_NORTH_CHIEF)}
+
+    unchanged = await smg._apply_membership_diff(
+        session, examination_id=1, subject_id=2, current=current, desired=set(current)
+    )
+    assert unchanged == set()
+    session.execute.assert_not_awaited()
+
+    changed = await smg._apply_membership_diff(
+        session,
+        examination_id=1,
+        subject_id=2,
+        current=current,
+        desired={(gid, E_NORTH_ASSISTANT), (gid, E_SOUTH_ASSISTANT)},
+    )
+    assert changed == {gid}
+    assert session.execute.await_count == 2
+    delete_stmt, insert_stmt = (c.args[0] for c in session.execute.await_args_list)
+    assert delete_stmt.is_delete
+    assert insert_stmt.is_insert
+    params = insert_stmt.compile(dialect=postgresql.dialect()).params
+    assert [v for k, v in params.items() if k.startswith("examiner_id")] == [E_SOUTH_ASSISTANT]
+
+
+@pytest.mark.asyncio
+async def test_sync_for_changed_examiners_scopes_every_query() -> None:
+    group = _group(regions=[Region.NORTHERN])
+    session = AsyncMock()
+    session.execute.side_effect = [
+        MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[group])))),
+        MagicMock(all=MagicMock(return_value=[(E_NORTH_CHIEF, Region.NORTHERN, ExaminerType.CHIEF)])),
+        MagicMock(all=MagicMock(return_value=[])),
+        MagicMock(),
+    ]
+
+    await smg.sync_rule_based_cohort_members(session, examination_id=1, subject_id=2, examiner_ids=[E_NORTH_CHIEF])
+
+    statements = [c.args[0] for c in session.execute.await_args_list]
+    assert len(statements) == 4
+    for stmt in statements[1:3]:
+        assert "IN" in str(stmt.compile())
+    assert statements[3].is_insert
+    assert group.updated_at is not None
+    session.flush.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_sync_with_no_changed_examiners_does_nothing() -> None:
+    session = AsyncMock()
+    await smg.sync_rule_based_cohort_members(session, examination_id=1, subject_id=2, examiner_ids=[])
+    session.execute.assert_not_awaited()
@@ -0,0 +1,153 @@
+"""Stored timetable PDFs: fingerprints, ETag revalidation, render-once storage and pre-rendering."""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.schemas.timetable import TimetableDownloadFilter
+from app.services import timetable_pdf_cache as cache
+from app.services.timetable_service import TimetableDocument
+
+T0 = datetime(2026, 4, 1, 8, 0)
+T1 = datetime(2026, 4, 2, 8, 0)
+
+
+def _document(*, schedule_updated: datetime = T0, school=None, exam_id: int = 5) -> TimetableDocument:
+    return TimetableDocument(
+        exam=SimpleNamespace(id=exam_id, updated_at=T0),
+        school=school,
+        programme=None,
+        subject_filter=TimetableDownloadFilter.ALL,
+        schedules=[SimpleNamespace(id=1, updated_at=schedule_updated), SimpleNamespace(id=2, updated_at=T0)],
+    )
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    with (
+        patch.object(cache.settings, "storage_backend", "local"),
+        patch.object(cache.settings, "storage_path", str(tmp_path / "documents")),
+    ):
+        yield tmp_path
+
+
+def test_fingerprint_tracks_schedule_version_scope_and_layout() -> None:
+    base = cache.timetable_pdf_fingerprint(_document())
+    assert cache.timetable_pdf_fingerprint(_document()) == base
+    assert cache.timetable_pdf_fingerprint(_document(schedule_updated=T1)) != base
+    assert cache.timetable_pdf_fingerprint(_document(), orientation="landscape") != base
+    school = SimpleNamespace(id=uuid4(), updated_at=T0)
+    assert cache.timetable_pdf_fingerprint(_document(school=school)) != base
+
+
+def test_etag_matching_accepts_lists_weak_tags_and_wildcard() -> None:
+    etag = cache.timetable_pdf_etag("abc")
+    assert cache.etag_matches('"x", W/"abc"', etag)
+    assert cache.etag_matches("*", etag)
+    assert not cache.etag_matches('"abcd"', etag)
+    assert not cache.etag_matches(None, etag)
+
+
+@pytest.mark.asyncio
+async def test_pdf_is_rendered_once_then_served_from_storage(local_storage) -> None:
+    document = _document()
+    fingerprint = cache.timetable_pdf_fingerprint(document)
+    render = AsyncMock(return_value=b"%PDF-1")
+    with patch.object(cache, "render_timetable_pdf", new=render):
+        first = await cache.get_or_render_timetable_pdf(document, fingerprint)
+        second = await cache.get_or_render_timetable_pdf(document, fingerprint)
+
+    assert first == second == b"%PDF-1"
+    render.assert_awaited_once()
+    assert (local_storage / cache.stored_timetable_key(5, fingerprint)).is_file()
+
+    await cache.invalidate_timetable_pdfs(5)
+    assert cache.read_stored_timetable_pdf(5, fingerprint) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_storage")
+async def test_response_is_304_when_client_has_current_version() -> None:
+    from app.routers.examinations import _timetable_pdf_response
+
+    document = _document()
+    etag = cache.timetable_pdf_etag(cache.timetable_pdf_fingerprint(document))
+    render = AsyncMock(return_value=b"%PDF-1")
+    with patch.object(cache, "render_timetable_pdf", new=render):
+        fresh = await _timetable_pdf_response(
+            document, "t.pdf", if_none_match=None, merge_by_date=False, orientation="portrait"
+        )
+        cached = await _timetable_pdf_response(
+            document, "t.pdf", if_none_match=etag, merge_by_date=False, orientation="portrait"
+        )
+
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] == etag
+    assert fresh.body == b"%PDF-1"
+    assert cached.status_code == 304
+    assert cached.body == b""
+    render.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_storage")
+async def test_response_stores_unknown_orientations_as_portrait() -> None:
+    from app.routers.examinations import _timetable_pdf_response
+
+    document = _document()
+    render = AsyncMock(return_value=b"%PDF-1")
+    with patch.object(cache, "render_timetable_pdf", new=render):
+        responses = [
+            await _timetable_pdf_response(
+                document, "t.pdf", if_none_match=None, merge_by_date=False, orientation=orientation
+            )
+            for orientation in ("portrait", "Portrait", "foo")
+        ]
+        landscape = await _timetable_pdf_response(
+            document, "t.pdf", if_none_match=None, merge_by_date=False, orientation=" Landscape"
+        )
+
+    assert {r.headers["etag"] for r in responses} == {
+        cache.timetable_pdf_etag(cache.timetable_pdf_fingerprint(document))
+    }
+    assert landscape.headers["etag"] == cache.timetable_pdf_etag(
+        cache.timetable_pdf_fingerprint(document, orientation="landscape")
+    )
+    assert [c.kwargs["orientation"] for c in render.await_args_list] == ["portrait", "landscape"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_storage")
+async def test_prerender_renders_each_distinct_document_once() -> None:
+    school_a, school_b = uuid4(), uuid4()
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(
+        all=MagicMock(return_value=[(school_a, "MATH"), (school_b, "MATH"), (school_b, None)])
+    )
+
+    async def resolve(_session, exam_id, school_id=None, **_kw):
+        # All three full timetables resolve to the same rows; each school is distinct.
+        school = SimpleNamespace(id=school_id, updated_at=T0) if school_id else None
+        return _document(school=school, exam_id=exam_id)
+
+    seen: list[tuple[int, int]] = []
+    render = AsyncMock(return_value=b"%PDF-1")
+    with (
+        patch.object(cache, "resolve_timetable_document", new=resolve),
+        patch.object(cache, "render_timetable_pdf", new=render),
+    ):
+        first = await cache.prerender_examination_timetables(session, 5, progress=lambda d, t: seen.append((d, t)))
+        again = await cache.prerender_examination_timetables(session, 5)
+
+    # Three distinct documents, each in every layout variant.
+    variants = len(cache.TIMETABLE_PDF_LAYOUTS)
+    assert first == {"document_count": 3 * variants, "rendered_count": 3 * variants, "reused_count": 0}
+    assert again == {"document_count": 3 * variants, "rendered_count": 0, "reused_count": 3 * variants}
+    assert seen[-1] == (3 * variants, 3 * variants)
+    assert render.await_count == 3 * variants
+    assert {(c.kwargs["merge_by_date"], c.kwargs["orientation"]) for c in render.await_args_list} == set(
+        cache.TIMETABLE_PDF_LAYOUTS
+    )
@@ -0,0 +1,63 @@
+"""add credit reservations and per-minute api usage rollups
+
+Revision ID: c4e7a9b2d310
+Revises: be281c6e6782
+Create Date: 2026-02-02 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a9b2d310'
+down_revision = 'be281c6e6782'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user_credits',
+        sa.Column('reserved_balance', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False),
+    )
+
+    op.create_table('api_usage_minutes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('api_key_id', sa.UUID(), nullable=False),
+    sa.Column('request_count', sa.Integer(), nullable=False),
+    sa.Column('verification_count', sa.Integer(), nullable=False),
+    sa.Column('success_count', sa.Integer(), nullable=False),
+    sa.Column('total_duration_ms', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['portal_users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_start', 'user_id', 'api_key_id', name='uq_api_usage_minute')
+    )
+    op.create_index(op.f('ix_api_usage_minutes_api_key_id'), 'api_usage_minutes', ['api_key_id'], unique=False)
+    op.create_index(op.f('ix_api_usage_minutes_bucket_start'), 'api_usage_minutes', ['bucket_start'], unique=False)
+    op.create_index(op.f('ix_api_usage_minutes_user_id'), 'api_usage_minutes', ['user_id'], unique=False)
+
+    # Backfill rollups from the raw usage rows recorded so far
+    op.execute("""
+        INSERT INTO api_usage_minutes
+            (bucket_start, user_id, api_key_id, request_count, verification_count, success_count, total_duration_ms)
+        SELECT
+            date_trunc('minute', request_timestamp),
+            user_id,
+            COALESCE(api_key_id, '00000000-0000-0000-0000-000000000000'::uuid),
+            count(*),
+            COALESCE(sum(verification_count), 0),
+            count(*) FILTER (WHERE response_status = 200),
+            COALESCE(sum(duration_ms), 0)
+        FROM api_usage
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_api_usage_minutes_user_id'), table_name='api_usage_minutes')
+    op.drop_index(op.f('ix_api_usage_minutes_bucket_start'), table_name='api_usage_minutes')
+    op.drop_index(op.f('ix_api_usage_minutes_api_key_id'), table_name='api_usage_minutes')
+    op.drop_table('api_usage_minutes')
+    op.drop_column('user_credits', 'reserved_balance')
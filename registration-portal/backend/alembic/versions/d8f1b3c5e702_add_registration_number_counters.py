@@ -0,0 +1,50 @@
+"""add registration number counters
+
+Revision ID: d8f1b3c5e702
+Revises: c4e7a9b2d310
+Create Date: 2026-02-09 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd8f1b3c5e702'
+down_revision = 'c4e7a9b2d310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('registration_number_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('school_id', sa.Integer(), nullable=False),
+    sa.Column('registration_exam_id', sa.Integer(), nullable=False),
+    sa.Column('prefix', sa.String(length=20), nullable=False),
+    sa.Column('next_sequence', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['registration_exam_id'], ['registration_exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('school_id', 'registration_exam_id', 'prefix', name='uq_registration_number_counter')
+    )
+    op.create_index(op.f('ix_registration_number_counters_registration_exam_id'), 'registration_number_counters', ['registration_exam_id'], unique=False)
+
+    # Seed counters from the structured numbers issued so far:
+    # [F/R/P][5-char school code][2-digit year][4-digit sequence]
+    op.execute("""
+        INSERT INTO registration_number_counters (school_id, registration_exam_id, prefix, next_sequence)
+        SELECT
+            school_id,
+            registration_exam_id,
+            left(registration_number, 8),
+            max(right(registration_number, 4)::integer) + 1
+        FROM registration_candidates
+        WHERE school_id IS NOT NULL
+          AND registration_number ~ '^[FRP].{7}[0-9]{4}$'
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_registration_number_counters_registration_exam_id'), table_name='registration_number_counters')
+    op.drop_table('registration_number_counters')
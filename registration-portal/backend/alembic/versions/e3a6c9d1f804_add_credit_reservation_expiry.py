@@ -0,0 +1,23 @@
+"""add credit reservation expiry
+
+Revision ID: e3a6c9d1f804
+Revises: d8f1b3c5e702
+Create Date: 2026-02-10 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e3a6c9d1f804'
+down_revision = 'd8f1b3c5e702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('user_credits', sa.Column('reservation_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_credits', 'reservation_expires_at')
@@ -38,6 +38,10 @@ class Settings(BaseSettings):
     certificate_request_photo_height: int = 600
     # Max file size for candidate/certificate request photos
     photo_max_file_size: int = 2 * 1024 * 1024  # 2MB
+    # Worker processes for bulk photo validation/resize/background jobs (0 = one per CPU core, 1 = one job at a time in-process)
+    bulk_photo_workers: int = 0
+    # Photos fetched from storage concurrently while streaming a photo export archive
+    photo_export_prefetch: int = 8
     # National ID (and document scans): any dimensions; max file size only
     national_id_max_file_size: int = 5 * 1024 * 1024  # 5MB
     # File upload settings
@@ -83,6 +87,21 @@ class Settings(BaseSettings):
     api_key_max_rate_limit_per_minute: int = 1000
     api_key_bulk_request_max_items: int = 100
     api_key_usage_retention_days: int = 90
+    api_key_auth_cache_ttl_seconds: int = 300  # How long a verified API key skips bcrypt (0 disables the cache)
+    api_key_auth_cache_max_size: int = 10000
+    # Buffered API usage / credit ledger writer
+    api_usage_flush_interval_seconds: float = 1.0
+    api_usage_flush_batch_size: int = 500
+    api_usage_buffer_max_size: int = 20000  # Requests flush inline (backpressure) beyond this
+    # Reserved credit not settled within this time (e.g. a worker crashed) is released again
+    credit_reservation_ttl_seconds: int = 600
+    # Rate limit store shared by workers: "sqlite" (one file per host) or "memory" (per process)
+    rate_limit_backend: str = "sqlite"
+    rate_limit_sqlite_path: str = "storage/rate_limits.sqlite3"
+    # Per client IP on /public/results/check (0 disables); set trusted_proxy_hops first when behind a proxy
+    public_result_check_rate_limit_per_minute: int = 0
+    # Reverse proxies (e.g. Traefik) in front of the API whose X-Forwarded-For entries are trusted (0: none)
+    trusted_proxy_hops: int = 0
     # Credit system settings
     credit_cost_per_verification: int = 8
     credit_minimum_purchase: int = 10
@@ -91,12 +110,13 @@ class Settings(BaseSettings):
     result_access_pin_default_max_uses: int = 5
     result_access_pin_length: int = 6
     result_access_serial_length: int = 8
+    published_results_snapshot_ttl_seconds: int = 30  # How long a worker serves its results snapshot before a version check
     # CORS settings (CORS_ORIGINS: comma-separated list of allowed origins)
     cors_origins: str | list[str] = "http://localhost:3001,http://127.0.0.1:3001,https://frontend.localhost,https://localhost,http://frontend.localhost,http://localhost"
     cors_allow_credentials: bool = True
     cors_allow_methods: str | list[str] = "*"
     cors_allow_headers: str | list[str] = "*"
-    cors_expose_headers: str | list[str] = "Content-Disposition,content-disposition"
+    cors_expose_headers: str | list[str] = "Content-Disposition,content-disposition,X-RateLimit-Limit,X-RateLimit-Remaining,X-RateLimit-Reset,Retry-After"
 
     @field_validator("cors_origins", mode="before")
     @classmethod
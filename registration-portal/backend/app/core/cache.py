@@ -1,9 +1,12 @@
 """Caching utilities for authentication and user lookups."""
+import hashlib
+import hmac
 from typing import Any
 from uuid import UUID
 
 from cachetools import TTLCache
 
+from app.config import settings
 from app.models import PortalUser
 
 # Cache for user lookups by ID (TTL: 5 minutes)
@@ -14,6 +17,14 @@ user_cache: TTLCache[UUID, PortalUser] = TTLCache(maxsize=1000, ttl=300)
 # Max size: 1000 users
 user_email_cache: TTLCache[str, PortalUser] = TTLCache(maxsize=1000, ttl=300)
 
+# Cache of verified API keys: HMAC-SHA256 of the presented key -> (api_key_id, key_hash).
+# A hit lets authentication skip bcrypt; the key row is still loaded and must be active with
+# the same hash, so revoked, deleted or rotated keys never authenticate from the cache.
+api_key_cache: TTLCache[str, tuple[UUID, str]] = TTLCache(
+    maxsize=settings.api_key_auth_cache_max_size,
+    ttl=max(settings.api_key_auth_cache_ttl_seconds, 1),
+)
+
 
 def get_cached_user(user_id: UUID) -> PortalUser | None:
     """Get user from cache by ID."""
@@ -41,3 +52,32 @@ def invalidate_user_cache(user_id: UUID | None = None, email: str | None = None)
         user = user_email_cache.pop(email)
         if user and user.id in user_cache:
             user_cache.pop(user.id)
+
+
+def api_key_fingerprint(api_key: str) -> str:
+    """Keyed hash of a presented API key (the plain key itself is never kept in memory)."""
+    return hmac.new(settings.secret_key.encode("utf-8"), api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def get_cached_api_key(api_key: str) -> tuple[UUID, str] | None:
+    """Get (api_key_id, key_hash) for a previously verified API key."""
+    if settings.api_key_auth_cache_ttl_seconds <= 0:
+        return None
+    return api_key_cache.get(api_key_fingerprint(api_key))
+
+
+def set_cached_api_key(api_key: str, api_key_id: UUID, key_hash: str) -> None:
+    """Remember that the presented API key matched the stored key hash."""
+    if settings.api_key_auth_cache_ttl_seconds <= 0:
+        return
+    api_key_cache[api_key_fingerprint(api_key)] = (api_key_id, key_hash)
+
+
+def invalidate_api_key_cache(api_key_id: UUID | None = None) -> None:
+    """Drop cached verifications of one API key (all keys when api_key_id is None)."""
+    if api_key_id is None:
+        api_key_cache.clear()
+        return
+    for fingerprint, (cached_id, _key_hash) in list(api_key_cache.items()):
+        if cached_id == api_key_id:
+            api_key_cache.pop(fingerprint, None)
@@ -1,4 +1,5 @@
 """API key authentication dependencies."""
+import asyncio
 from typing import Annotated
 from uuid import UUID
 
@@ -7,6 +8,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_cached_api_key, invalidate_api_key_cache, set_cached_api_key
 from app.core.security import verify_refresh_token_hash
 from app.dependencies.database import DBSessionDep
 from app.models import ApiKey, PortalUser
@@ -60,23 +62,36 @@ async def get_api_key_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Extract key prefix for efficient filtering (first 15 characters)
-    key_prefix = api_key[:15] if len(api_key) >= 15 else api_key
-
-    # Find API keys with matching prefix and active status
-    stmt = select(ApiKey).where(
-        ApiKey.key_prefix == key_prefix,
-        ApiKey.is_active == True
-    )
-    result = await session.execute(stmt)
-    candidate_keys = result.scalars().all()
-
-    # Find matching key by verifying hash
+    # Fast path: this exact key was verified recently. The row is still loaded so that
+    # deactivation, deletion or a new hash takes effect immediately.
     api_key_obj = None
-    for candidate in candidate_keys:
-        if verify_refresh_token_hash(api_key, candidate.key_hash):
+    cached = get_cached_api_key(api_key)
+    if cached is not None:
+        cached_id, cached_hash = cached
+        candidate = await session.get(ApiKey, cached_id)
+        if candidate is not None and candidate.is_active and candidate.key_hash == cached_hash:
             api_key_obj = candidate
-            break
+        else:
+            invalidate_api_key_cache(cached_id)
+
+    if api_key_obj is None:
+        # Extract key prefix for efficient filtering (first 15 characters)
+        key_prefix = api_key[:15] if len(api_key) >= 15 else api_key
+
+        # Find API keys with matching prefix and active status
+        stmt = select(ApiKey).where(
+            ApiKey.key_prefix == key_prefix,
+            ApiKey.is_active == True
+        )
+        result = await session.execute(stmt)
+        candidate_keys = result.scalars().all()
+
+        # Find matching key by verifying hash (bcrypt runs off the event loop)
+        for candidate in candidate_keys:
+            if await asyncio.to_thread(verify_refresh_token_hash, api_key, candidate.key_hash):
+                api_key_obj = candidate
+                set_cached_api_key(api_key, candidate.id, candidate.key_hash)
+                break
 
     if not api_key_obj:
         raise HTTPException(
@@ -23,6 +23,8 @@ from app.routers import (
     dashboard_verification,
 )
 from app.config import logging_settings, settings
+from app.services.api_usage_tracker import usage_writer
+from app.services.bulk_photo_validation import shutdown_photo_pool
 from starlette.types import ASGIApp
 
 SENSITIVE_KEYS = {"password", "token", "authorization"}
@@ -109,7 +111,13 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         # Ensure SYSTEM_ADMIN user exists
         async with sessionmanager.session() as session:
             await ensure_system_admin_user(session)
-        yield
+        # Buffered API usage / credit ledger writes
+        usage_writer.start(sessionmanager.session)
+        try:
+            yield
+        finally:
+            await usage_writer.stop()
+            shutdown_photo_pool()
     # Shutdown handled by context manager
 
 
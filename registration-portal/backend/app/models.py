@@ -3,6 +3,7 @@ import enum
 import uuid
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
@@ -440,6 +441,22 @@ class RegistrationCandidate(Base):
     payments = relationship("Payment", back_populates="registration_candidate")
 
 
+class RegistrationNumberCounter(Base):
+    """Next registration number sequence per school, exam and number prefix (e.g. "FCH00125")."""
+
+    __tablename__ = "registration_number_counters"
+
+    id = Column(Integer, primary_key=True)
+    school_id = Column(Integer, ForeignKey("schools.id", ondelete="CASCADE"), nullable=False)
+    registration_exam_id = Column(Integer, ForeignKey("registration_exams.id", ondelete="CASCADE"), nullable=False, index=True)
+    prefix = Column(String(20), nullable=False)
+    next_sequence = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("school_id", "registration_exam_id", "prefix", name="uq_registration_number_counter"),
+    )
+
+
 class RegistrationSubjectSelection(Base):
     __tablename__ = "registration_subject_selections"
 
@@ -1005,6 +1022,10 @@ class UserCredit(Base):
     balance = Column(Numeric(10, 2), default=0, nullable=False)
     total_purchased = Column(Numeric(10, 2), default=0, nullable=False)
     total_used = Column(Numeric(10, 2), default=0, nullable=False)
+    # Credit held for in-flight verification requests; available = balance - reserved_balance
+    reserved_balance = Column(Numeric(10, 2), default=0, server_default="0", nullable=False)
+    # Pushed forward by every reservation; holds not settled by then are released by the usage writer
+    reservation_expires_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -1077,6 +1098,31 @@ class ApiUsage(Base):
     user = relationship("PortalUser", foreign_keys=[user_id])
 
 
+# api_usage_minutes.api_key_id for dashboard requests (no API key)
+DASHBOARD_USAGE_KEY_ID = uuid.UUID(int=0)
+
+
+class ApiUsageMinute(Base):
+    """Per-minute API usage rollup per user and API key, maintained by the usage writer."""
+
+    __tablename__ = "api_usage_minutes"
+
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("portal_users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Not a foreign key: DASHBOARD_USAGE_KEY_ID stands in for dashboard requests so the
+    # rollup key stays non-null (NULLs never conflict in the upsert's unique constraint)
+    api_key_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    request_count = Column(Integer, default=0, nullable=False)
+    verification_count = Column(Integer, default=0, nullable=False)
+    success_count = Column(Integer, default=0, nullable=False)
+    total_duration_ms = Column(BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "user_id", "api_key_id", name="uq_api_usage_minute"),
+    )
+
+
 class ResultAccessPin(Base):
     """Model for PIN and serial number combinations used to limit access to public results.
 
@@ -93,7 +93,7 @@ from app.schemas.school import (
     BulkUploadError,
 )
 from app.utils.school import check_school_profile_completion
-from app.utils.registration import generate_unique_registration_number
+from app.utils.registration import RegistrationNumberAllocator
 from app.services.subject_selection import (
     normalize_exam_series,
     validate_subject_selections,
@@ -113,7 +113,7 @@ from app.schemas.schedule import (
 from app.services.index_slip_service import generate_index_slip_pdf
 from app.services.photo_storage import PhotoStorageService
 from app.core.security import get_password_hash
-from app.core.cache import invalidate_user_cache
+from app.core.cache import invalidate_api_key_cache, invalidate_user_cache
 from app.config import settings
 from app.schemas.programme import (
     ProgrammeCreate,
@@ -233,6 +233,7 @@ from app.services.result_service import (
     get_candidate_results,
     unblock_result,
 )
+from app.services.published_results_snapshot import invalidate_published_results
 from app.services.result_access_pin_service import (
     generate_pin_serial_combinations,
     validate_pin_serial,
@@ -3489,6 +3490,8 @@ async def import_candidates(
     successful = 0
     failed = 0
     errors: list[BulkUploadError] = []
+    # Reserve registration numbers per school up front; unused ones are released before commit
+    registration_numbers = RegistrationNumberAllocator(session, block_size=total_rows)
 
     def get_col(row_data: Any, key: str, default: str = "") -> str:
         """Get column value as string; always trim leading and trailing whitespace."""
@@ -3676,7 +3679,7 @@ async def import_candidates(
             reg_num = registration_number_str.strip()
             check_stmt = select(RegistrationCandidate).where(RegistrationCandidate.registration_number == reg_num)
             check_result = await session.execute(check_stmt)
-            if check_result.scalar_one_or_none():
+            if check_result.scalar_one_or_none() or registration_numbers.is_reserved(reg_num):
                 errors.append(BulkUploadError(row_number=row_number, error_message=f"registration_number '{reg_num}' already exists", field="registration_number"))
                 failed += 1
                 continue
@@ -3686,7 +3689,7 @@ async def import_candidates(
                 failed += 1
                 continue
             try:
-                reg_num = await generate_unique_registration_number(session, exam_id, school_id, candidate_registration_type)
+                reg_num = await registration_numbers.allocate(exam_id, school_id, candidate_registration_type)
             except (ValueError, RuntimeError) as e:
                 errors.append(BulkUploadError(row_number=row_number, error_message=str(e), field="registration_number"))
                 failed += 1
@@ -3740,6 +3743,7 @@ async def import_candidates(
                 )
         successful += 1
 
+    await registration_numbers.release_unused()
     await session.commit()
     return BulkUploadResponse(total_rows=total_rows, successful=successful, failed=failed, errors=errors)
 
@@ -3875,126 +3879,157 @@ def sanitize_folder_name(name: str) -> str:
     return sanitized
 
 
-@router.get("/candidates/photos/export")
-async def export_candidate_photos(
-    session: DBSessionDep,
-    current_user: SystemAdminDep,
-    exam_id: int = Query(..., description="Exam ID (required)"),
-    school_id: int | None = Query(None, description="Filter by school ID"),
-) -> StreamingResponse:
-    """Export candidate photos as a ZIP file, named by registration number. Exam ID is required."""
-    # Initialize photo storage service
+class _ZipStreamSink(io.RawIOBase):
+    """Unseekable sink for ``zipfile``: collects written bytes until they are drained."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _candidate_photo_zip_path(
+    registration_number: str,
+    file_name: str,
+    mime_type: str | None,
+    school_code: str | None,
+    school_name: str | None,
+    flat: bool,
+) -> str:
+    """ZIP path for a candidate photo, named by registration number."""
+    # Determine file extension
+    file_ext = Path(file_name).suffix
+    if not file_ext:
+        # Try to determine from mime type
+        file_ext = ".png" if mime_type == "image/png" else ".jpg"
+
+    photo_filename = f"{registration_number}{file_ext}"
+    if flat:
+        # Flat structure when school is filtered
+        return photo_filename
+
+    # Organize by school folder: {school_code}-{school_name:20}
+    school_code_sanitized = sanitize_folder_name(school_code or "")
+    school_name_sanitized = sanitize_folder_name(school_name or "")
+    # Take first 20 characters of school name
+    school_name_short = school_name_sanitized[:20] if school_name_sanitized else "unknown"
+    school_folder = f"{school_code_sanitized}-{school_name_short}" if school_code_sanitized else school_name_short
+    return f"{school_folder}/{photo_filename}"
+
+
+async def _stream_candidate_photos_zip(exam_id: int, school_id: int | None):
+    """
+    Stream a ZIP of candidate photos entry by entry.
+
+    Candidates are read through a server-side cursor in a session owned by the stream (the
+    request session is closed before the body is sent), photos are fetched from storage with
+    up to ``photo_export_prefetch`` requests in flight, and entries are STORED since JPEG/PNG
+    data does not compress further.
+    """
+    import asyncio
+    from collections import deque
+    from app.dependencies.database import get_sessionmanager
+
+    logger = logging.getLogger(__name__)
     photo_storage_service = PhotoStorageService()
 
-    # Build query for candidates with photos
-    # exam_id is required, so we always filter by it
-    base_stmt = (
-        select(RegistrationCandidate, RegistrationCandidatePhoto, School, RegistrationExam)
+    stmt = (
+        select(
+            RegistrationCandidate.id,
+            RegistrationCandidate.registration_number,
+            RegistrationCandidatePhoto.file_path,
+            RegistrationCandidatePhoto.file_name,
+            RegistrationCandidatePhoto.mime_type,
+            School.code.label("school_code"),
+            School.name.label("school_name"),
+        )
         .join(RegistrationCandidatePhoto, RegistrationCandidate.id == RegistrationCandidatePhoto.registration_candidate_id)
         .join(School, RegistrationCandidate.school_id == School.id)
-        .join(RegistrationExam, RegistrationCandidate.registration_exam_id == RegistrationExam.id)
         .where(RegistrationCandidate.registration_exam_id == exam_id)
+        .order_by(School.code, RegistrationCandidate.registration_number)
+        .execution_options(yield_per=500)
     )
-
     # Apply school filter if provided
     if school_id is not None:
-        base_stmt = base_stmt.where(RegistrationCandidate.school_id == school_id)
-
-    # Execute query
-    result = await session.execute(base_stmt)
-    candidate_photo_school_exam_tuples = result.all()
+        stmt = stmt.where(RegistrationCandidate.school_id == school_id)
 
-    if not candidate_photo_school_exam_tuples:
-        # Return empty ZIP if no photos found
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            pass
-        zip_buffer.seek(0)
+    sink = _ZipStreamSink()
+    pending: deque = deque()
+    max_in_flight = max(1, settings.photo_export_prefetch)
 
-        # Get exam info for filename (exam_id is required)
-        exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
-        exam_result = await session.execute(exam_stmt)
-        exam = exam_result.scalar_one_or_none()
-        if exam:
-            if exam.exam_series:
-                filename = f"{exam.exam_type}_{exam.year}_{exam.exam_series}_photos.zip"
-            else:
-                filename = f"{exam.exam_type}_{exam.year}_photos.zip"
-        else:
-            filename = f"exam_{exam_id}_photos.zip"
-
-        content_disposition = f'attachment; filename="{filename}"'
-        return StreamingResponse(
-            iter([zip_buffer.getvalue()]),
-            media_type="application/zip",
-            headers={
-                "Content-Disposition": content_disposition,
-                "Access-Control-Expose-Headers": "Content-Disposition",
-            },
+    def add_entry(row, photo_content: bytes) -> None:
+        zip_path = _candidate_photo_zip_path(
+            row.registration_number, row.file_name, row.mime_type, row.school_code, row.school_name, flat=school_id is not None
         )
+        zip_file.writestr(zip_path, photo_content)
 
-    # Create ZIP file in memory
-    zip_buffer = io.BytesIO()
-    logger = logging.getLogger(__name__)
-
-    # Determine filename - exam_id is required, so we always use exam info
-    # Use the exam from first result (all should have same exam if filtered)
-    exam = candidate_photo_school_exam_tuples[0][3]
-    if exam.exam_series:
-        filename = f"{exam.exam_type}_{exam.year}_{exam.exam_series}_photos.zip"
-    else:
-        filename = f"{exam.exam_type}_{exam.year}_photos.zip"
-
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for candidate, photo, school, exam in candidate_photo_school_exam_tuples:
-            try:
-                # Retrieve photo file
-                photo_content = await photo_storage_service.retrieve(photo.file_path)
-
-                # Determine file extension
-                file_ext = Path(photo.file_name).suffix
-                if not file_ext:
-                    # Try to determine from mime type
-                    if photo.mime_type == "image/jpeg" or photo.mime_type == "image/jpg":
-                        file_ext = ".jpg"
-                    elif photo.mime_type == "image/png":
-                        file_ext = ".png"
-                    else:
-                        file_ext = ".jpg"  # Default
-
-                # Create filename using registration number
-                photo_filename = f"{candidate.registration_number}{file_ext}"
-
-                # Determine ZIP path
-                if school_id is None:
-                    # Organize by school folder: {school_code}-{school_name:20}
-                    school_code_sanitized = sanitize_folder_name(school.code if school.code else "")
-                    school_name_sanitized = sanitize_folder_name(school.name if school.name else "")
-                    # Take first 20 characters of school name
-                    school_name_short = school_name_sanitized[:20] if school_name_sanitized else "unknown"
-
-                    if school_code_sanitized:
-                        school_folder = f"{school_code_sanitized}-{school_name_short}"
-                    else:
-                        school_folder = school_name_short if school_name_short else "unknown"
+    async def finish_oldest() -> bytes:
+        row, task = pending.popleft()
+        try:
+            add_entry(row, await task)
+        except Exception as e:
+            # Log error but continue with other photos
+            logger.warning(f"Failed to add photo for candidate {row.id} (registration {row.registration_number}): {e}")
+        return sink.drain()
 
-                    zip_path = f"{school_folder}/{photo_filename}"
-                else:
-                    # Flat structure when school is filtered
-                    zip_path = photo_filename
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zip_file:
+            async with get_sessionmanager().session() as session:
+                rows = await session.stream(stmt)
+                async for row in rows:
+                    pending.append((row, asyncio.create_task(photo_storage_service.retrieve(row.file_path))))
+                    if len(pending) >= max_in_flight:
+                        chunk = await finish_oldest()
+                        if chunk:
+                            yield chunk
+            while pending:
+                chunk = await finish_oldest()
+                if chunk:
+                    yield chunk
+        # Central directory
+        yield sink.drain()
+    finally:
+        for _, task in pending:
+            task.cancel()
 
-                # Add to ZIP
-                zip_file.writestr(zip_path, photo_content)
 
-            except Exception as e:
-                # Log error but continue with other photos
-                logger.warning(f"Failed to add photo for candidate {candidate.id} (registration {candidate.registration_number}): {e}")
+@router.get("/candidates/photos/export")
+async def export_candidate_photos(
+    session: DBSessionDep,
+    current_user: SystemAdminDep,
+    exam_id: int = Query(..., description="Exam ID (required)"),
+    school_id: int | None = Query(None, description="Filter by school ID"),
+) -> StreamingResponse:
+    """Export candidate photos as a ZIP file, named by registration number. Exam ID is required.
 
-    zip_buffer.seek(0)
+    The archive is streamed as photos are fetched, so the download starts immediately.
+    """
+    # Get exam info for filename (exam_id is required)
+    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
+    exam_result = await session.execute(exam_stmt)
+    exam = exam_result.scalar_one_or_none()
+    if exam:
+        if exam.exam_series:
+            filename = f"{exam.exam_type}_{exam.year}_{exam.exam_series}_photos.zip"
+        else:
+            filename = f"{exam.exam_type}_{exam.year}_photos.zip"
+    else:
+        filename = f"exam_{exam_id}_photos.zip"
 
     content_disposition = f'attachment; filename="{filename}"'
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        _stream_candidate_photos_zip(exam_id, school_id),
         media_type="application/zip",
         headers={
             "Content-Disposition": content_disposition,
@@ -6790,6 +6825,7 @@ async def delete_result_block(
     block.updated_at = datetime.utcnow()
 
     await session.commit()
+    invalidate_published_results(block.registration_exam_id)
 
 
 # Result Access PIN/Serial Endpoints
@@ -10432,6 +10468,9 @@ async def deactivate_api_user(
             key.is_active = False
 
     await session.commit()
+    if revoke_keys:
+        for key in keys:
+            invalidate_api_key_cache(key.id)
 
 
 @router.get("/api-users/{user_id}/usage", response_model=ApiUserUsageStats)
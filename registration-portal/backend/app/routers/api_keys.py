@@ -1,13 +1,13 @@
 """API key management endpoints."""
-from datetime import datetime, timedelta
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.api_key_generator import generate_api_key, hash_api_key
+from app.core.cache import invalidate_api_key_cache
 from app.dependencies.auth import get_current_active_user
 from app.dependencies.database import DBSessionDep
 from app.models import ApiKey, PortalUser, Role
@@ -120,40 +120,17 @@ async def get_api_key_usage(
             detail="API key not found",
         )
 
-    # Get usage stats
-    from app.models import ApiUsage
+    # Get usage stats (from the per-minute rollups)
+    from app.services.api_analytics import get_api_key_usage_stats
 
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Today's requests
-    stmt_today = select(func.count(ApiUsage.id)).where(
-        ApiUsage.api_key_id == key_id,
-        ApiUsage.request_timestamp >= today_start,
-    )
-    result_today = await session.execute(stmt_today)
-    requests_today = result_today.scalar() or 0
-
-    # This month's requests
-    stmt_month = select(func.count(ApiUsage.id)).where(
-        ApiUsage.api_key_id == key_id,
-        ApiUsage.request_timestamp >= month_start,
-    )
-    result_month = await session.execute(stmt_month)
-    requests_this_month = result_month.scalar() or 0
-
-    # Average duration
-    stmt_avg = select(func.avg(ApiUsage.duration_ms)).where(ApiUsage.api_key_id == key_id)
-    result_avg = await session.execute(stmt_avg)
-    avg_duration = result_avg.scalar()
+    stats = await get_api_key_usage_stats(session, key_id)
 
     return ApiKeyUsageStats(
         total_requests=api_key.total_requests,
         total_verifications=api_key.total_verifications,
-        requests_today=requests_today,
-        requests_this_month=requests_this_month,
-        average_duration_ms=float(avg_duration) if avg_duration else None,
+        requests_today=stats["requests_today"],
+        requests_this_month=stats["requests_this_month"],
+        average_duration_ms=stats["average_duration_ms"],
         last_used_at=api_key.last_used_at,
     )
 
@@ -190,6 +167,8 @@ async def update_api_key(
         api_key.is_active = update_data.is_active
 
     await session.commit()
+    if update_data.is_active is not None:
+        invalidate_api_key_cache(api_key.id)
     await session.refresh(api_key)
 
     return ApiKeyResponse.model_validate(api_key)
@@ -214,3 +193,4 @@ async def delete_api_key(
 
     await session.delete(api_key)
     await session.commit()
+    invalidate_api_key_cache(key_id)
@@ -3,21 +3,20 @@ import logging
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials
 
 from app.dependencies.api_key_auth import api_key_security, get_api_key_user
 from app.dependencies.database import DBSessionDep
 from app.models import ApiKey, ApiRequestSource, ApiRequestType, PortalUser
-from app.routers.dashboard_verification import verify_dashboard_candidate
+from app.routers.dashboard_verification import verify_bulk_items, verify_dashboard_candidate
 from app.schemas.result import PublicResultCheckRequest, PublicResultResponse
 from app.schemas.verification import (
     BulkVerificationRequest,
     BulkVerificationResponse,
-    VerificationItemResponse,
 )
 from app.services.api_usage_tracker import record_api_usage
-from app.services.credit_service import check_credit_balance
+from app.services.credit_service import release_credit, reserve_credit
 from app.services.rate_limiter import rate_limiter
 from app.config import settings
 
@@ -37,6 +36,7 @@ async def verify_single_candidate(
 @router.post("")
 async def verify_candidates(
     request: Request,
+    http_response: Response,
     session: DBSessionDep,
     authorization: HTTPAuthorizationCredentials | None = Depends(api_key_security),
     x_api_key: str | None = Header(None, alias="X-API-Key"),
@@ -75,8 +75,9 @@ async def verify_candidates(
     else:
         required_credits = cost
 
-    has_credit = await check_credit_balance(session, user.id, required_credits)
-    if not has_credit:
+    # Check rate limit (shared across workers)
+    limit_result = await rate_limiter.hit(f"api_key:{api_key.id}", api_key.rate_limit_per_minute)
+    if not limit_result.allowed:
         await record_api_usage(
             session,
             user_id=user.id,
@@ -84,78 +85,43 @@ async def verify_candidates(
             request_source=ApiRequestSource.API_KEY,
             request_type=ApiRequestType.BULK if is_bulk else ApiRequestType.SINGLE,
             verification_count=0,
-            response_status=status.HTTP_402_PAYMENT_REQUIRED,
+            response_status=status.HTTP_429_TOO_MANY_REQUESTS,
             duration_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000),
             start_time=start_time,
         )
         raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Insufficient credit. Required: {required_credits} credit(s) for this request ({len(bulk_request.items) if is_bulk else 1} verification(s)).",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=limit_result.headers,
         )
+    http_response.headers.update(limit_result.headers)
 
-    # Check rate limit
-    is_allowed, remaining = rate_limiter.check_rate_limit(
-        api_key.id,
-        api_key.rate_limit_per_minute,
-        api_key.request_count_reset_at,
-    )
-    if not is_allowed:
+    # Hold the credit now; the usage writer deducts what is billed and releases the rest
+    has_credit = await reserve_credit(session, user.id, required_credits)
+    if not has_credit:
         await record_api_usage(
             session,
             user_id=user.id,
             api_key_id=api_key.id,
             request_source=ApiRequestSource.API_KEY,
-            request_type=ApiRequestType.SINGLE,
+            request_type=ApiRequestType.BULK if is_bulk else ApiRequestType.SINGLE,
             verification_count=0,
-            response_status=status.HTTP_429_TOO_MANY_REQUESTS,
+            response_status=status.HTTP_402_PAYMENT_REQUIRED,
             duration_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000),
             start_time=start_time,
         )
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded",
-            headers={"X-RateLimit-Remaining": "0"},
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=f"Insufficient credit. Required: {required_credits} credit(s) for this request ({len(bulk_request.items) if is_bulk else 1} verification(s)).",
         )
 
+    usage_recorded = False
     try:
         if is_bulk:
-            # Bulk request (bulk_request already parsed above)
-            results = []
-            successful = 0
-            failed = 0
-
-            for item in bulk_request.items:
-                try:
-                    result = await verify_single_candidate(item, session)
-                    results.append(
-                        VerificationItemResponse(
-                            success=True,
-                            request=item,
-                            result=result,
-                            error=None,
-                        )
-                    )
-                    successful += 1
-                except Exception as e:
-                    results.append(
-                        VerificationItemResponse(
-                            success=False,
-                            request=item,
-                            result=None,
-                            error=str(e),
-                        )
-                    )
-                    failed += 1
-
+            # Bulk request (bulk_request already parsed above): resolved in one batch
+            response = await verify_bulk_items(bulk_request.items, session)
             verification_count = len(bulk_request.items)
             response_status = status.HTTP_200_OK
-
-            response = BulkVerificationResponse(
-                total=len(bulk_request.items),
-                successful=successful,
-                failed=failed,
-                results=results,
-            )
         else:
             # Single request
             single_request = PublicResultCheckRequest(**body)
@@ -176,7 +142,9 @@ async def verify_candidates(
             response_status=response_status,
             duration_ms=duration_ms,
             start_time=start_time,
+            reserved_credits=required_credits,
         )
+        usage_recorded = True
 
         return response
 
@@ -199,7 +167,9 @@ async def verify_candidates(
             response_status=response_status,
             duration_ms=duration_ms,
             start_time=start_time,
+            reserved_credits=required_credits,
         )
+        usage_recorded = True
         # Re-raise the HTTP exception
         raise
     except Exception as e:
@@ -215,9 +185,15 @@ async def verify_candidates(
             response_status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             duration_ms=duration_ms,
             start_time=start_time,
+            reserved_credits=required_credits,
         )
+        usage_recorded = True
         logger.error(f"Error in verification: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during verification",
         )
+    finally:
+        if not usage_recorded:
+            # Cancelled (e.g. client disconnected) or failed before usage was recorded
+            await release_credit(session, user.id, required_credits)
@@ -1,7 +1,7 @@
 """Public endpoints (no authentication required)."""
 import logging
 import os
-from fastapi import APIRouter, HTTPException, status, File, UploadFile, Form, Request, Query, Body, Depends
+from fastapi import APIRouter, HTTPException, status, File, UploadFile, Form, Request, Response, Query, Body, Depends
 from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select, and_, or_, func
@@ -10,9 +10,6 @@ from datetime import datetime, timedelta, date, time
 
 from app.dependencies.database import DBSessionDep
 from app.services.photo_storage import PhotoStorageService
-
-logger = logging.getLogger(__name__)
-
 from app.models import (
     RegistrationExam,
     ExamRegistrationPeriod,
@@ -20,7 +17,6 @@ from app.models import (
     CandidateResult,
     Subject,
     Grade,
-    SubjectType,
     RegistrationCandidatePhoto,
     ExaminationSchedule,
 )
@@ -30,8 +26,14 @@ from app.schemas.result import (
     PublicResultResponse,
     PublicSubjectResult,
 )
-from app.services.result_service import check_result_blocks, get_candidate_results
+from app.services.result_service import get_candidate_results
 from app.services.result_access_pin_service import validate_pin_serial
+from app.services.rate_limiter import rate_limiter
+from app.utils.client_ip import get_client_ip
+from app.services.published_results_snapshot import get_published_results, resolve_exam
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/public", tags=["public"])
 
@@ -186,6 +188,8 @@ async def list_available_exams(session: DBSessionDep) -> list[RegistrationExamRe
 async def check_public_results(
     check_data: PublicResultCheckRequest,
     session: DBSessionDep,
+    request: Request,
+    response: Response,
 ) -> PublicResultResponse:
     """Check results using index_number, registration_number, exam_type, exam_series, year.
 
@@ -208,6 +212,21 @@ async def check_public_results(
         },
     )
 
+    # Throttle PIN/Serial guessing per client IP (shared across workers)
+    if settings.public_result_check_rate_limit_per_minute > 0:
+        client_ip = get_client_ip(request)
+        limit_result = await rate_limiter.hit(
+            f"public_results:{client_ip}", settings.public_result_check_rate_limit_per_minute
+        )
+        if not limit_result.allowed:
+            logger.warning("Public results check rate limited", extra={"client_ip": client_ip})
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many result check attempts. Please try again shortly.",
+                headers=limit_result.headers,
+            )
+        response.headers.update(limit_result.headers)
+
     # PIN/Serial are required for public results access
     if not check_data.pin or not check_data.serial_number:
         raise HTTPException(
@@ -222,65 +241,10 @@ async def check_public_results(
             detail="Either registration number or index number is required",
         )
 
-    # Step 1: Find the exam by exam_type, exam_series, and year to get the exam.id
-    # Use case-insensitive matching for exam_type and exam_series to handle variations
-    exam_type_input = check_data.exam_type.strip() if check_data.exam_type else ""
-    exam_series_input = check_data.exam_series.strip() if check_data.exam_series else ""
-
+    # Step 1: Resolve the exam from the cached exam directory (case-insensitive exact match,
+    # then bidirectional partial match)
     # Don't log exam query details to avoid exposing search patterns
-
-    # First, let's see what exams exist with this year
-    all_exams_stmt = select(RegistrationExam).where(RegistrationExam.year == check_data.year)
-    all_exams_result = await session.execute(all_exams_stmt)
-    all_exams = list(all_exams_result.scalars().all())
-    logger.debug(
-        "Exams found for year",
-        extra={
-            "year": check_data.year,
-            "exam_count": len(all_exams),
-        },
-    )
-
-    # Try exact case-insensitive match first
-    exam_stmt = select(RegistrationExam).where(
-        and_(
-            RegistrationExam.exam_type.ilike(exam_type_input),
-            RegistrationExam.exam_series.ilike(exam_series_input),
-            RegistrationExam.year == check_data.year,
-        )
-    )
-    exam_result = await session.execute(exam_stmt)
-    exam = exam_result.scalar_one_or_none()
-
-    # Strategy 2: Bidirectional partial match
-    # Check if either the input contains the DB value OR the DB value contains the input
-    if not exam:
-        # Don't log detailed matching attempts to avoid exposing internal logic
-        # For each exam in the year, check bidirectional matching
-        for db_exam in all_exams:
-            db_exam_type = db_exam.exam_type.strip() if db_exam.exam_type else ""
-            db_exam_series = db_exam.exam_series.strip() if db_exam.exam_series else ""
-
-            # Case-insensitive bidirectional matching
-            # Check if input contains DB value OR DB value contains input
-            type_matches = (
-                exam_type_input.lower() in db_exam_type.lower() or
-                db_exam_type.lower() in exam_type_input.lower()
-            )
-            series_matches = (
-                exam_series_input.lower() in db_exam_series.lower() or
-                db_exam_series.lower() in exam_series_input.lower()
-            )
-
-            if type_matches and series_matches:
-                logger.debug(
-                    "Found exam using bidirectional partial matching",
-                    extra={
-                        "exam_id": db_exam.id,
-                    },
-                )
-                exam = db_exam
-                break
+    exam = await resolve_exam(session, check_data.exam_type or "", check_data.exam_series or "", check_data.year)
 
     if exam:
         logger.debug(
@@ -292,13 +256,7 @@ async def check_public_results(
             },
         )
     else:
-        logger.warning(
-            "Exam not found",
-            extra={
-                "year": check_data.year,
-                "exam_count_for_year": len(all_exams),
-            },
-        )
+        logger.warning("Exam not found", extra={"year": check_data.year})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Examination not found",
@@ -318,30 +276,11 @@ async def check_public_results(
             detail="Results for this examination have not been published yet",
         )
 
-    # Step 2: Find the candidate using the exam.id (registration_exam_id) and registration_number or index_number
+    # Step 2: Find the candidate in the exam's published results snapshot by
+    # registration_number or index_number (one hash lookup, no per-request queries)
     # Don't log registration_number or index_number for security
-    if check_data.registration_number:
-        candidate_stmt = select(RegistrationCandidate).where(
-            and_(
-                RegistrationCandidate.registration_exam_id == exam.id,
-                RegistrationCandidate.registration_number == check_data.registration_number,
-            )
-        )
-        if check_data.index_number:
-            candidate_stmt = candidate_stmt.where(
-                RegistrationCandidate.index_number == check_data.index_number
-            )
-    else:
-        # Use index_number as primary identifier when registration_number is not provided
-        candidate_stmt = select(RegistrationCandidate).where(
-            and_(
-                RegistrationCandidate.registration_exam_id == exam.id,
-                RegistrationCandidate.index_number == check_data.index_number,
-            )
-        )
-
-    candidate_result = await session.execute(candidate_stmt)
-    candidate = candidate_result.scalar_one_or_none()
+    snapshot, blocks = await get_published_results(session, exam)
+    candidate = snapshot.find(check_data.registration_number, check_data.index_number)
 
     if not candidate:
         logger.warning(
@@ -360,12 +299,12 @@ async def check_public_results(
     logger.debug(
         "Candidate found",
         extra={
-            "candidate_id": candidate.id,
+            "candidate_id": candidate.candidate_id,
             "exam_id": exam.id,
         },
     )
 
-    # Validate PIN/Serial using the candidate's registration_number
+    # Validate PIN/Serial using the candidate's registration_number (binds/counts PIN use in the DB)
     is_valid, error_message = await validate_pin_serial(
         session=session,
         pin=check_data.pin,
@@ -380,7 +319,7 @@ async def check_public_results(
             extra={
                 "error": error_message,
                 "exam_id": exam.id,
-                "candidate_id": candidate.id,
+                "candidate_id": candidate.candidate_id,
             },
         )
         await session.rollback()
@@ -389,19 +328,12 @@ async def check_public_results(
             detail=error_message or "Invalid PIN or Serial Number",
         )
 
-    # Check if results are administratively blocked
-    is_blocked = await check_result_blocks(
-        session,
-        exam.id,
-        candidate_id=candidate.id,
-        school_id=candidate.school_id,
-    )
-
-    if is_blocked:
+    # Check if results are administratively blocked (blocks overlaid from memory)
+    if blocks.is_blocked(exam.id, candidate.candidate_id, candidate.school_id, None):
         logger.warning(
             "Results blocked for candidate",
             extra={
-                "candidate_id": candidate.id,
+                "candidate_id": candidate.candidate_id,
                 "exam_id": exam.id,
             },
         )
@@ -410,180 +342,20 @@ async def check_public_results(
             detail="Your results are currently blocked. Please contact the examination board.",
         )
 
-    # Step 3: Get all results for this candidate using exam.id and candidate.id
-    # If exam.results_published is True, show all results regardless of individual is_published status
-    # Don't log detailed result fetching to reduce verbosity
-    # Don't filter by is_published since exam.results_published=True means all results should be visible
-    results = await get_candidate_results(session, exam.id, candidate.id, check_blocks=False, only_published=False)
-
-    # Also query directly to verify results exist
-    direct_results_stmt = select(CandidateResult).where(
-        and_(
-            CandidateResult.registration_candidate_id == candidate.id,
-            CandidateResult.registration_exam_id == exam.id,
-        )
-    ).options(selectinload(CandidateResult.subject))
-    direct_results_result = await session.execute(direct_results_stmt)
-    direct_results = list(direct_results_result.scalars().all())
-
-    logger.debug(
-        "Results fetched from database",
-        extra={
-            "exam_id": exam.id,
-            "candidate_id": candidate.id,
-            "result_count": len(results),
-        },
-    )
-
-    # Get all subjects the candidate registered for
-    from app.models import RegistrationSubjectSelection
-
-    subject_selections_stmt = (
-        select(RegistrationSubjectSelection)
-        .where(RegistrationSubjectSelection.registration_candidate_id == candidate.id)
-        .options(selectinload(RegistrationSubjectSelection.subject))
-    )
-    subject_selections_result = await session.execute(subject_selections_stmt)
-    subject_selections = subject_selections_result.scalars().all()
-
-    logger.debug(
-        "Subject selections found",
-        extra={
-            "candidate_id": candidate.id,
-            "selection_count": len(subject_selections),
-        },
-    )
-
-    # Build results list - key by subject_id for lookup
-    # Also create a map by subject_code for fallback matching when subject_id is NULL or doesn't match
-    results_dict_by_id = {r.subject_id: r for r in results}
-    results_dict_by_code = {}
-    for r in results:
-        if r.subject:
-            if r.subject.code:
-                # Use subject.code (case-insensitive)
-                results_dict_by_code[r.subject.code.upper()] = r
-                results_dict_by_code[r.subject.code.lower()] = r
-            if r.subject.original_code:
-                # Also index by original_code (case-insensitive)
-                results_dict_by_code[r.subject.original_code.upper()] = r
-                results_dict_by_code[r.subject.original_code.lower()] = r
-
-    subject_results: list[PublicSubjectResult] = []
-
-    # Don't log detailed matching process to avoid exposing internal logic
-
-    # Build results with subject type information for sorting
-    result_items: list[tuple[RegistrationSubjectSelection, CandidateResult | None, SubjectType | None]] = []
-
-    for selection in subject_selections:
-        subject_id = selection.subject_id
-        # First try to match by subject_id
-        result = results_dict_by_id.get(subject_id) if subject_id else None
-
-        # If no match and subject_id is NULL, try matching by subject_code (case-insensitive)
-        if not result and selection.subject_code:
-            result = (
-                results_dict_by_code.get(selection.subject_code.upper()) or
-                results_dict_by_code.get(selection.subject_code.lower())
-            )
-
-        # Get subject type for sorting (CORE before ELECTIVE)
-        subject_type = None
-        if selection.subject:
-            subject_type = selection.subject.subject_type
-        elif result and result.subject:
-            subject_type = result.subject.subject_type
-
-        result_items.append((selection, result, subject_type))
-
-    # Sort: CORE subjects first, then ELECTIVE subjects, then by subject_code within each group
-    def sort_key(item: tuple[RegistrationSubjectSelection, CandidateResult | None, SubjectType | None]) -> tuple[int, str]:
-        selection, result, subject_type = item
-        # CORE = 0 (comes first), ELECTIVE = 1, None = 2 (comes last)
-        type_order = 0 if subject_type == SubjectType.CORE else (1 if subject_type == SubjectType.ELECTIVE else 2)
-        return (type_order, selection.subject_code)
-
-    result_items.sort(key=sort_key)
-
-    # Build the final results list with only subject_code and grade
-    for selection, result, subject_type in result_items:
-        grade = None
-        if result:
-            subject_id = selection.subject_id if selection.subject_id else result.subject_id
-            subject_blocked = await check_result_blocks(
-                session,
-                exam.id,
-                candidate_id=candidate.id,
-                school_id=candidate.school_id,
-                subject_id=subject_id,
-            )
-            if not subject_blocked:
-                grade = result.grade
-
-        # Use original_code if available, otherwise fall back to subject_code
-        display_code = selection.subject_code
-        if selection.subject and selection.subject.original_code:
-            display_code = selection.subject.original_code
-
-        subject_results.append(
-            PublicSubjectResult(
-                subject_code=display_code,
-                subject_name=selection.subject_name,
-                grade=grade,
-            )
-        )
+    # Step 3: Subject results were matched and ordered (CORE, ELECTIVE, then by subject code)
+    # when the snapshot was built; subject-level blocks hide individual grades
+    response_data = snapshot.response(candidate, blocks)
 
     logger.info(
         "Results check completed successfully",
         extra={
             "exam_id": exam.id,
-            "candidate_id": candidate.id,
-            "subject_results_count": len(subject_results),
+            "candidate_id": candidate.candidate_id,
+            "subject_results_count": len(response_data.results),
         },
     )
 
-    # Load related data (school, programme, photo)
-    await session.refresh(candidate, ["school", "programme", "photo"])
-
-    # Get school name
-    school_name = None
-    school_code = None
-    if candidate.school:
-        school_name = candidate.school.name
-        school_code = candidate.school.code
-
-    # Get programme name
-    programme_name = None
-    programme_code = None
-    if candidate.programme:
-        programme_name = candidate.programme.name
-        programme_code = candidate.programme.code
-    elif candidate.programme_code:
-        # Fallback to programme_code if programme relationship is not set
-        programme_code = candidate.programme_code
-
-    # Get photo URL if available
-    photo_url = None
-    if candidate.photo:
-        # Construct photo URL for public endpoint
-        photo_url = f"/api/v1/public/candidates/{candidate.id}/photo"
-
-    return PublicResultResponse(
-        candidate_name=candidate.name,
-        index_number=candidate.index_number,
-        registration_number=candidate.registration_number,
-        exam_type=exam.exam_type,
-        exam_series=exam.exam_series,
-        year=exam.year,
-        results=subject_results,
-        exam_published=exam.results_published,
-        school_name=school_name,
-        school_code=school_code,
-        programme_name=programme_name,
-        programme_code=programme_code,
-        photo_url=photo_url,
-    )
+    return response_data
 
 
 @router.get("/candidates/{candidate_id}/photo")
@@ -60,7 +60,7 @@ from app.services.template_generator import generate_candidate_template
 from app.schemas.user import SchoolUserCreate, UserUpdate
 from app.schemas.auth import UserResponse
 from app.core.security import get_password_hash
-from app.utils.registration import generate_unique_registration_number
+from app.utils.registration import generate_unique_registration_number, RegistrationNumberAllocator
 from app.config import settings
 from app.services.subject_selection import (
     auto_select_subjects_for_programme,
@@ -1014,6 +1014,8 @@ async def bulk_upload_candidates(
     successful = 0
     failed = 0
     errors: list[BulkUploadError] = []
+    # Reserve registration numbers for the whole file up front; unused ones are released before commit
+    registration_numbers = RegistrationNumberAllocator(session, block_size=total_rows)
 
     for idx, row in df.iterrows():
         row_number = int(idx) + 2  # +2 because rows are 1-indexed and header is row 1
@@ -1362,7 +1364,7 @@ async def bulk_upload_candidates(
                         continue
 
             # Generate registration number (candidate_registration_type already determined above)
-            registration_number = await generate_unique_registration_number(session, exam_id, current_user.school_id, candidate_registration_type)
+            registration_number = await registration_numbers.allocate(exam_id, current_user.school_id, candidate_registration_type)
 
             # Create candidate
             new_candidate = RegistrationCandidate(
@@ -1421,6 +1423,7 @@ async def bulk_upload_candidates(
 
     # Commit all successful candidates
     try:
+        await registration_numbers.release_unused()
         await session.commit()
     except Exception as e:
         await session.rollback()
@@ -2919,11 +2922,14 @@ async def _process_bulk_photo_validation_background(job_id: int, file_data: list
             job.updated_at = datetime.utcnow()
             await session.commit()
 
-            # Process validation with progress callback
-            def progress_callback(current: int, total: int):
-                # Update job progress (this is synchronous callback, so we can't update DB here)
-                # Progress will be updated after processing completes
-                pass
+            # Record progress as results come back (about every 2% of the upload)
+            progress_step = max(1, len(file_data) // 50)
+
+            async def progress_callback(current: int, total: int):
+                if current % progress_step == 0 and current < total:
+                    job.progress_current = current
+                    job.updated_at = datetime.utcnow()
+                    await session.commit()
 
             # Process bulk validation
             results, zip_bytes = await process_bulk_photo_validation(
@@ -1,13 +1,45 @@
-"""Service for API usage analytics and statistics."""
+"""Service for API usage analytics and statistics.
+
+Statistics are read from the per-minute ``ApiUsageMinute`` rollups written by the usage
+writer (see ``api_usage_tracker``) rather than by scanning raw ``ApiUsage`` rows, so date
+filters apply at minute granularity.
+"""
 from datetime import datetime, timedelta
-from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
 from sqlalchemy import select, func, and_, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import ApiUsage, ApiKey, ApiRequestType
+from app.models import ApiUsageMinute, ApiKey
+
+
+def _period_starts(now: datetime) -> tuple[datetime, datetime, datetime]:
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = now - timedelta(days=7)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return today_start, week_start, month_start
+
+
+def _requests_since(start: datetime):
+    return func.coalesce(
+        func.sum(case((ApiUsageMinute.bucket_start >= start, ApiUsageMinute.request_count), else_=0)), 0
+    )
+
+
+def _date_conditions(start_date: Optional[datetime], end_date: Optional[datetime]) -> list:
+    conditions = []
+    if start_date:
+        conditions.append(ApiUsageMinute.bucket_start >= start_date.replace(second=0, microsecond=0))
+    if end_date:
+        conditions.append(ApiUsageMinute.bucket_start <= end_date)
+    return conditions
+
+
+def _average_duration(total_duration_ms, total_requests) -> Optional[float]:
+    if not total_requests or total_duration_ms is None:
+        return None
+    return float(total_duration_ms) / total_requests or None
 
 
 async def get_user_usage_stats(
@@ -28,71 +60,31 @@ async def get_user_usage_stats(
     Returns:
         Dictionary with usage statistics
     """
-    # Build base query
-    base_conditions = [ApiUsage.user_id == user_id]
-
-    if start_date:
-        base_conditions.append(ApiUsage.request_timestamp >= start_date)
-    if end_date:
-        base_conditions.append(ApiUsage.request_timestamp <= end_date)
-
-    # Total requests
-    total_stmt = select(func.count(ApiUsage.id)).where(and_(*base_conditions))
-    total_result = await session.execute(total_stmt)
-    total_requests = total_result.scalar() or 0
-
-    # Total verifications
-    verification_stmt = select(func.sum(ApiUsage.verification_count)).where(and_(*base_conditions))
-    verification_result = await session.execute(verification_stmt)
-    total_verifications = verification_result.scalar() or 0
-
-    # Successful requests (status 200)
-    success_conditions = base_conditions + [ApiUsage.response_status == 200]
-    success_stmt = select(func.count(ApiUsage.id)).where(and_(*success_conditions))
-    success_result = await session.execute(success_stmt)
-    successful_requests = success_result.scalar() or 0
-
-    # Failed requests
-    failed_requests = total_requests - successful_requests
-
-    # Average duration
-    avg_duration_stmt = select(func.avg(ApiUsage.duration_ms)).where(and_(*base_conditions))
-    avg_duration_result = await session.execute(avg_duration_stmt)
-    avg_duration = avg_duration_result.scalar()
-
-    # Get date ranges for period stats
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = now - timedelta(days=7)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Today's requests
-    today_conditions = base_conditions + [ApiUsage.request_timestamp >= today_start]
-    today_stmt = select(func.count(ApiUsage.id)).where(and_(*today_conditions))
-    today_result = await session.execute(today_stmt)
-    requests_today = today_result.scalar() or 0
-
-    # This week's requests
-    week_conditions = base_conditions + [ApiUsage.request_timestamp >= week_start]
-    week_stmt = select(func.count(ApiUsage.id)).where(and_(*week_conditions))
-    week_result = await session.execute(week_stmt)
-    requests_this_week = week_result.scalar() or 0
-
-    # This month's requests
-    month_conditions = base_conditions + [ApiUsage.request_timestamp >= month_start]
-    month_stmt = select(func.count(ApiUsage.id)).where(and_(*month_conditions))
-    month_result = await session.execute(month_stmt)
-    requests_this_month = month_result.scalar() or 0
-
+    conditions = [ApiUsageMinute.user_id == user_id, *_date_conditions(start_date, end_date)]
+    today_start, week_start, month_start = _period_starts(datetime.utcnow())
+
+    stmt = select(
+        func.coalesce(func.sum(ApiUsageMinute.request_count), 0).label("total_requests"),
+        func.coalesce(func.sum(ApiUsageMinute.verification_count), 0).label("total_verifications"),
+        func.coalesce(func.sum(ApiUsageMinute.success_count), 0).label("successful_requests"),
+        func.sum(ApiUsageMinute.total_duration_ms).label("total_duration_ms"),
+        _requests_since(today_start).label("requests_today"),
+        _requests_since(week_start).label("requests_this_week"),
+        _requests_since(month_start).label("requests_this_month"),
+    ).where(and_(*conditions))
+    row = (await session.execute(stmt)).one()
+
+    total_requests = int(row.total_requests)
+    successful_requests = int(row.successful_requests)
     return {
         "total_requests": total_requests,
-        "total_verifications": total_verifications or 0,
-        "requests_today": requests_today,
-        "requests_this_week": requests_this_week,
-        "requests_this_month": requests_this_month,
+        "total_verifications": int(row.total_verifications),
+        "requests_today": int(row.requests_today),
+        "requests_this_week": int(row.requests_this_week),
+        "requests_this_month": int(row.requests_this_month),
         "successful_requests": successful_requests,
-        "failed_requests": failed_requests,
-        "average_duration_ms": float(avg_duration) if avg_duration else None,
+        "failed_requests": total_requests - successful_requests,
+        "average_duration_ms": _average_duration(row.total_duration_ms, total_requests),
     }
 
 
@@ -114,32 +106,25 @@ async def get_api_key_usage_stats(
     Returns:
         Dictionary with usage statistics
     """
-    base_conditions = [ApiUsage.api_key_id == api_key_id]
-
-    if start_date:
-        base_conditions.append(ApiUsage.request_timestamp >= start_date)
-    if end_date:
-        base_conditions.append(ApiUsage.request_timestamp <= end_date)
-
-    # Total requests
-    total_stmt = select(func.count(ApiUsage.id)).where(and_(*base_conditions))
-    total_result = await session.execute(total_stmt)
-    total_requests = total_result.scalar() or 0
-
-    # Total verifications
-    verification_stmt = select(func.sum(ApiUsage.verification_count)).where(and_(*base_conditions))
-    verification_result = await session.execute(verification_stmt)
-    total_verifications = verification_result.scalar() or 0
-
-    # Average duration
-    avg_duration_stmt = select(func.avg(ApiUsage.duration_ms)).where(and_(*base_conditions))
-    avg_duration_result = await session.execute(avg_duration_stmt)
-    avg_duration = avg_duration_result.scalar()
-
+    conditions = [ApiUsageMinute.api_key_id == api_key_id, *_date_conditions(start_date, end_date)]
+    today_start, _, month_start = _period_starts(datetime.utcnow())
+
+    stmt = select(
+        func.coalesce(func.sum(ApiUsageMinute.request_count), 0).label("total_requests"),
+        func.coalesce(func.sum(ApiUsageMinute.verification_count), 0).label("total_verifications"),
+        func.sum(ApiUsageMinute.total_duration_ms).label("total_duration_ms"),
+        _requests_since(today_start).label("requests_today"),
+        _requests_since(month_start).label("requests_this_month"),
+    ).where(and_(*conditions))
+    row = (await session.execute(stmt)).one()
+
+    total_requests = int(row.total_requests)
     return {
         "total_requests": total_requests,
-        "total_verifications": total_verifications or 0,
-        "average_duration_ms": float(avg_duration) if avg_duration else None,
+        "total_verifications": int(row.total_verifications),
+        "requests_today": int(row.requests_today),
+        "requests_this_month": int(row.requests_this_month),
+        "average_duration_ms": _average_duration(row.total_duration_ms, total_requests),
     }
 
 
@@ -165,26 +150,19 @@ async def get_usage_timeline(
     start_date = end_date - timedelta(days=days)
 
     # Build query based on period
-    if period == "daily":
-        date_trunc = func.date_trunc("day", ApiUsage.request_timestamp)
-    elif period == "weekly":
-        date_trunc = func.date_trunc("week", ApiUsage.request_timestamp)
-    elif period == "monthly":
-        date_trunc = func.date_trunc("month", ApiUsage.request_timestamp)
-    else:
-        date_trunc = func.date_trunc("day", ApiUsage.request_timestamp)
+    unit = {"daily": "day", "weekly": "week", "monthly": "month"}.get(period, "day")
+    date_trunc = func.date_trunc(unit, ApiUsageMinute.bucket_start)
 
     stmt = (
         select(
             date_trunc.label("period"),
-            func.count(ApiUsage.id).label("request_count"),
-            func.sum(ApiUsage.verification_count).label("verification_count"),
+            func.sum(ApiUsageMinute.request_count).label("request_count"),
+            func.sum(ApiUsageMinute.verification_count).label("verification_count"),
         )
         .where(
             and_(
-                ApiUsage.user_id == user_id,
-                ApiUsage.request_timestamp >= start_date,
-                ApiUsage.request_timestamp <= end_date,
+                ApiUsageMinute.user_id == user_id,
+                *_date_conditions(start_date, end_date),
             )
         )
         .group_by(date_trunc)
@@ -224,28 +202,20 @@ async def get_top_api_keys(
     Returns:
         List of dictionaries with API key info and usage stats
     """
-    base_conditions = [
-        ApiUsage.user_id == user_id,
-        ApiUsage.api_key_id.isnot(None),
-    ]
-
-    if start_date:
-        base_conditions.append(ApiUsage.request_timestamp >= start_date)
-    if end_date:
-        base_conditions.append(ApiUsage.request_timestamp <= end_date)
-
+    request_count = func.sum(ApiUsageMinute.request_count)
     stmt = (
         select(
             ApiKey.id,
             ApiKey.name,
             ApiKey.key_prefix,
-            func.count(ApiUsage.id).label("request_count"),
-            func.sum(ApiUsage.verification_count).label("verification_count"),
+            request_count.label("request_count"),
+            func.sum(ApiUsageMinute.verification_count).label("verification_count"),
         )
-        .join(ApiKey, ApiUsage.api_key_id == ApiKey.id)
-        .where(and_(*base_conditions))
+        # Dashboard rollups carry a placeholder key id and drop out of this join
+        .join(ApiKey, ApiUsageMinute.api_key_id == ApiKey.id)
+        .where(and_(ApiUsageMinute.user_id == user_id, *_date_conditions(start_date, end_date)))
         .group_by(ApiKey.id, ApiKey.name, ApiKey.key_prefix)
-        .order_by(func.count(ApiUsage.id).desc())
+        .order_by(request_count.desc())
         .limit(limit)
     )
 
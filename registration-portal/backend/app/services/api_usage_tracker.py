@@ -1,21 +1,52 @@
-"""Service for tracking API usage and billing."""
+"""Service for tracking API usage and billing.
+
+Verification endpoints reserve credit up front (``credit_service.reserve_credit``) and
+hand the outcome to ``record_api_usage``, which only appends a ``UsageEvent`` to an
+in-process buffer. The background ``UsageWriter`` (started in the app lifespan) drains
+the buffer every ``api_usage_flush_interval_seconds`` and writes each batch in one
+transaction:
+
+- ``ApiUsage`` rows in one bulk insert,
+- per-minute ``ApiUsageMinute`` rollups (read by ``api_analytics``) in one upsert,
+- API key counters, one UPDATE per key,
+- credit settlement, one UPDATE and one aggregated USAGE ledger entry per user, which
+  deducts what was billed and releases the reservations.
+
+If a batch fails, its events are retried one at a time so one bad event (e.g. a usage row
+for an API key deleted meanwhile) cannot hold up the rest. Events that still fail are
+dead-lettered: logged in full, with their credit settled on its own so billing and the
+reservation are not lost. The writer also periodically releases reservations past their
+TTL (``credit_service.expire_credit_reservations``).
+
+Without a running writer (scripts, tests) events are written inline on the caller's session.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models import (
+    DASHBOARD_USAGE_KEY_ID,
     ApiKey,
     ApiUsage,
+    ApiUsageMinute,
     ApiRequestSource,
     ApiRequestType,
-    PortalUser,
 )
-from app.services.credit_service import check_credit_balance, deduct_credit
+from app.services.credit_service import check_credit_balance, expire_credit_reservations, settle_credit_usage
+
+logger = logging.getLogger(__name__)
 
 
 async def check_and_deduct_credit(
@@ -46,6 +77,245 @@ async def check_and_deduct_credit(
     # Deduct credit (will be done after successful verification)
 
 
+@dataclass(frozen=True)
+class UsageEvent:
+    """One finished verification request waiting to be written."""
+
+    user_id: UUID
+    api_key_id: Optional[UUID]
+    request_source: ApiRequestSource
+    request_type: ApiRequestType
+    verification_count: int
+    response_status: int
+    duration_ms: int
+    start_time: datetime
+    billed: Decimal
+    reserved: Decimal
+
+
+def _settlement_description(verifications: int, billed_requests: int) -> str:
+    return f"Credit used for {verifications} verification(s) across {billed_requests} request(s)"
+
+
+async def write_usage_batch(session: AsyncSession, events: list[UsageEvent]) -> None:
+    """Write a batch of usage events in one transaction (see module docstring)."""
+    if not events:
+        return
+
+    await session.execute(
+        insert(ApiUsage),
+        [
+            {
+                "api_key_id": e.api_key_id,
+                "user_id": e.user_id,
+                "request_source": e.request_source,
+                "request_type": e.request_type,
+                "verification_count": e.verification_count,
+                "request_timestamp": e.start_time,
+                "response_status": e.response_status,
+                "duration_ms": e.duration_ms,
+            }
+            for e in events
+        ],
+    )
+
+    rollups: dict[tuple[datetime, UUID, UUID], list[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    key_stats: dict[UUID, list] = {}
+    credit: dict[UUID, list] = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0, 0])
+    for e in events:
+        bucket = e.start_time.replace(second=0, microsecond=0)
+        row = rollups[(bucket, e.user_id, e.api_key_id or DASHBOARD_USAGE_KEY_ID)]
+        row[0] += 1
+        row[1] += e.verification_count
+        row[2] += 1 if e.response_status == 200 else 0
+        row[3] += e.duration_ms
+
+        if e.api_key_id:
+            stats = key_stats.setdefault(e.api_key_id, [0, 0, e.start_time])
+            stats[0] += 1
+            stats[1] += e.verification_count
+            stats[2] = max(stats[2], e.start_time)
+
+        if e.billed or e.reserved:
+            totals = credit[e.user_id]
+            totals[0] += e.billed
+            totals[1] += e.reserved
+            if e.billed:
+                totals[2] += 1
+                totals[3] += e.verification_count
+
+    stmt = pg_insert(ApiUsageMinute).values(
+        [
+            {
+                "bucket_start": bucket,
+                "user_id": user_id,
+                "api_key_id": api_key_id,
+                "request_count": requests,
+                "verification_count": verifications,
+                "success_count": successes,
+                "total_duration_ms": duration,
+            }
+            for (bucket, user_id, api_key_id), (requests, verifications, successes, duration) in sorted(rollups.items())
+        ]
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_api_usage_minute",
+            set_={
+                "request_count": ApiUsageMinute.request_count + stmt.excluded.request_count,
+                "verification_count": ApiUsageMinute.verification_count + stmt.excluded.verification_count,
+                "success_count": ApiUsageMinute.success_count + stmt.excluded.success_count,
+                "total_duration_ms": ApiUsageMinute.total_duration_ms + stmt.excluded.total_duration_ms,
+            },
+        )
+    )
+
+    # Sorted so concurrent flushes from other workers lock rows in the same order
+    for api_key_id, (requests, verifications, last_used) in sorted(key_stats.items()):
+        await session.execute(
+            update(ApiKey)
+            .where(ApiKey.id == api_key_id)
+            .values(
+                total_requests=ApiKey.total_requests + requests,
+                total_verifications=ApiKey.total_verifications + verifications,
+                last_used_at=func.greatest(func.coalesce(ApiKey.last_used_at, last_used), last_used),
+            )
+        )
+
+    for user_id, (billed, released, billed_requests, verifications) in sorted(credit.items()):
+        await settle_credit_usage(
+            session,
+            user_id,
+            billed,
+            released,
+            description=_settlement_description(verifications, billed_requests),
+        )
+
+    await session.commit()
+
+
+class UsageWriter:
+    """Background task that flushes buffered usage events in batches."""
+
+    def __init__(self) -> None:
+        self._events: list[UsageEvent] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._session_factory = None
+        self._last_expiry_sweep = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory) -> None:
+        """Start flushing; ``session_factory()`` must return an async session context manager."""
+        self._session_factory = session_factory
+        self._task = asyncio.create_task(self._run(), name="api-usage-writer")
+
+    async def stop(self) -> None:
+        """Stop the loop and flush whatever is still buffered (failing events are dead-lettered)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._events:
+            await self.flush()
+
+    async def submit(self, event: UsageEvent) -> None:
+        self._events.append(event)
+        if len(self._events) >= settings.api_usage_flush_batch_size:
+            self._wakeup.set()
+        if len(self._events) >= settings.api_usage_buffer_max_size:
+            # Writer is falling behind: apply backpressure instead of growing without bound
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """
+        Write up to one batch; if it fails, retry its events one at a time.
+
+        Events that fail on their own are dead-lettered, so the buffer always shrinks.
+
+        Returns:
+            True if the batch was written in one transaction, False if it had to be split
+        """
+        batch = self._events[: settings.api_usage_flush_batch_size]
+        if not batch:
+            return True
+        del self._events[: len(batch)]
+        try:
+            async with self._session_factory() as session:
+                await write_usage_batch(session, batch)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write {len(batch)} API usage event(s), retrying one at a time: {e}")
+
+        for event in batch:
+            try:
+                async with self._session_factory() as session:
+                    await write_usage_batch(session, [event])
+            except Exception as e:
+                await self._dead_letter(event, e)
+        return False
+
+    async def _dead_letter(self, event: UsageEvent, error: Exception) -> None:
+        """Log an unwritable event and settle its credit without the usage row."""
+        logger.error(
+            f"Dead-lettered API usage event: {error}",
+            extra={"usage_event": {k: str(v) for k, v in dataclasses.asdict(event).items()}},
+        )
+        if not (event.billed or event.reserved):
+            return
+        try:
+            async with self._session_factory() as session:
+                await settle_credit_usage(
+                    session,
+                    event.user_id,
+                    event.billed,
+                    event.reserved,
+                    description=_settlement_description(event.verification_count, 1 if event.billed else 0),
+                )
+                await session.commit()
+        except Exception as e:
+            # The hold lapses with the reservation TTL; the billed amount is in the log above
+            logger.error(f"Could not settle credit for dead-lettered usage event of user {event.user_id}: {e}")
+
+    async def _expire_reservations(self) -> None:
+        now = time.monotonic()
+        if now - self._last_expiry_sweep < settings.credit_reservation_ttl_seconds:
+            return
+        self._last_expiry_sweep = now
+        try:
+            async with self._session_factory() as session:
+                released = await expire_credit_reservations(session)
+        except Exception as e:
+            logger.error(f"Failed to release expired credit reservations: {e}", exc_info=True)
+            return
+        if released:
+            logger.warning(f"Released expired credit reservations for {released} user(s)")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.api_usage_flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._events:
+                if not await self.flush():
+                    break
+                if len(self._events) < settings.api_usage_flush_batch_size:
+                    break
+            await self._expire_reservations()
+
+
+# Global usage writer instance (started in the application lifespan)
+usage_writer = UsageWriter()
+
+
 async def record_api_usage(
     session: AsyncSession,
     user_id: UUID,
@@ -56,12 +326,13 @@ async def record_api_usage(
     response_status: int,
     duration_ms: int,
     start_time: datetime,
-) -> ApiUsage:
+    reserved_credits: Decimal = Decimal("0"),
+) -> None:
     """
-    Record API usage and deduct credit.
+    Record API usage and bill it against the credit reserved for the request.
 
     Args:
-        session: Database session
+        session: Database session (only used when the background writer is not running)
         user_id: User ID
         api_key_id: API key ID (None for dashboard requests)
         request_source: Source of request (API_KEY or DASHBOARD)
@@ -70,46 +341,26 @@ async def record_api_usage(
         response_status: HTTP response status code
         duration_ms: Request duration in milliseconds
         start_time: When the request started
-
-    Returns:
-        Created ApiUsage record
+        reserved_credits: Credit reserved for this request with ``reserve_credit``; released
+            when the event is written
     """
     cost = Decimal(str(settings.credit_cost_per_verification))
-    total_cost = cost * verification_count
-
-    # Deduct credit after successful verification (status 200), per individual result
-    if response_status == 200 and total_cost > 0:
-        await deduct_credit(
-            session,
-            user_id,
-            total_cost,
-            description=f"Credit used for {request_source.value} {request_type.value} verification ({verification_count} candidate(s))",
-        )
-
-    # Update API key stats if applicable
-    if api_key_id:
-        stmt = select(ApiKey).where(ApiKey.id == api_key_id)
-        result = await session.execute(stmt)
-        api_key = result.scalar_one_or_none()
+    # Bill successful verifications (status 200), per individual result
+    billed = cost * verification_count if response_status == 200 else Decimal("0")
 
-        if api_key:
-            api_key.total_requests += 1
-            api_key.total_verifications += verification_count
-            api_key.last_used_at = datetime.utcnow()
-
-    # Create usage record
-    usage = ApiUsage(
-        api_key_id=api_key_id,
+    event = UsageEvent(
         user_id=user_id,
+        api_key_id=api_key_id,
         request_source=request_source,
         request_type=request_type,
         verification_count=verification_count,
-        request_timestamp=start_time,
         response_status=response_status,
         duration_ms=duration_ms,
+        start_time=start_time,
+        billed=billed,
+        reserved=reserved_credits,
     )
-    session.add(usage)
-    await session.commit()
-    await session.refresh(usage)
-
-    return usage
+    if usage_writer.running:
+        await usage_writer.submit(event)
+    else:
+        await write_usage_batch(session, [event])
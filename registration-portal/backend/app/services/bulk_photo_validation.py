@@ -1,13 +1,22 @@
-"""Service for bulk photo validation with background processing."""
+"""Service for bulk photo validation with background processing.
 
-import os
+Photos are processed in a pool of worker processes (``bulk_photo_workers``); each worker
+loads the MediaPipe models once when it starts. Results are collected as they complete,
+reported to the progress callback and written straight into the result archive.
+"""
+
+import asyncio
+import inspect
 import io
 import zipfile
 import csv
 import logging
-import tempfile
-from typing import List, Dict, Any, Optional, Tuple
-from pathlib import Path
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple, Callable, AsyncIterator
 from datetime import datetime
 
 from PIL import Image
@@ -17,6 +26,109 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return settings.bulk_photo_workers or os.cpu_count() or 1
+
+
+def _init_worker() -> None:
+    """Load the MediaPipe models once per worker process."""
+    try:
+        from app.services.mediapipe_photo_validation import get_detector, get_segmenter, get_landmarker
+    except ImportError:
+        return
+    get_detector()
+    get_segmenter()
+    get_landmarker()
+
+
+def _get_pool() -> Executor:
+    """
+    Shared worker pool, started on first use.
+
+    With ``bulk_photo_workers`` set to 1 (or a single CPU) jobs run on one dedicated thread
+    instead: they then share this process's MediaPipe models, which must not be used by
+    two jobs at once.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            if _worker_count() <= 1:
+                _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-photo")
+            else:
+                # spawn: forking a process that already runs threads (and MediaPipe) is unsafe
+                _pool = ProcessPoolExecutor(
+                    max_workers=_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+        return _pool
+
+
+def shutdown_photo_pool() -> None:
+    """Stop the worker pool (called on application shutdown)."""
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(func: Callable, jobs: List[tuple]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Run ``func(*job)`` for every job in the worker pool, yielding (job index, result) as
+    jobs complete. At most two jobs per worker process are in flight so large uploads are
+    not copied to the workers all at once; without worker processes one job runs at a time.
+    """
+    global _pool
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    max_in_flight = 2 * _worker_count() if isinstance(pool, ProcessPoolExecutor) else 1
+    pending: Dict[asyncio.Future, int] = {}
+    next_job = 0
+
+    try:
+        while next_job < len(jobs) or pending:
+            while next_job < len(jobs) and len(pending) < max_in_flight:
+                pending[loop.run_in_executor(pool, func, *jobs[next_job])] = next_job
+                next_job += 1
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for the next job
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _report_progress(progress_callback: Optional[Callable], current: int, total: int) -> None:
+    if progress_callback:
+        result = progress_callback(current, total)
+        if inspect.isawaitable(result):
+            await result
+
+
+def _add_to_archive(zipf: zipfile.ZipFile, written: set, arcname: str, data: bytes) -> None:
+    # Uploads may repeat a filename; keep the first one, as a folder would hold only one
+    if arcname not in written:
+        written.add(arcname)
+        zipf.writestr(arcname, data)
+
+
+def _image_content_type(filename: str) -> str:
+    return "image/png" if filename.lower().endswith(".png") else "image/jpeg"
+
 
 class BulkPhotoValidationResult:
     """Result for a single photo validation in bulk processing."""
@@ -29,10 +141,24 @@ class BulkPhotoValidationResult:
         self.validation_details = validation_details or {}
 
 
+def _validate_photo(filename: str, file_bytes: bytes, validation_level: str) -> Optional[str]:
+    """Worker: validate one photo; returns None if valid, otherwise the error message."""
+    try:
+        mime_type = "image/png" if filename.lower().endswith(".png") else "image/jpeg"
+        PhotoValidationService.validate_all(file_bytes, mime_type, validation_level)
+        return None
+    except Exception as e:
+        # Photo validation failed
+        if hasattr(e, "detail") and isinstance(e.detail, dict):
+            errors_list = e.detail.get("errors", [])
+            return "; ".join(errors_list) if errors_list else str(e)
+        return str(e)
+
+
 async def process_bulk_photo_validation(
     files: List[Tuple[str, bytes]],
     validation_level: str = "strict",
-    progress_callback: Optional[callable] = None
+    progress_callback: Optional[Callable] = None
 ) -> Tuple[List[BulkPhotoValidationResult], bytes]:
     """
     Process bulk photo validation and create zip file with results.
@@ -40,110 +166,47 @@ async def process_bulk_photo_validation(
     Args:
         files: List of tuples (filename, file_bytes)
         validation_level: Validation level - "basic", "standard", or "strict"
-        progress_callback: Optional callback function(current, total) for progress updates
+        progress_callback: Optional callback function(current, total) for progress updates;
+            may be a coroutine function
 
     Returns:
         Tuple of (validation_results_list, zip_file_bytes)
     """
-    results: List[BulkPhotoValidationResult] = []
+    results: List[Optional[BulkPhotoValidationResult]] = [None] * len(files)
     total = len(files)
 
-    # Create temporary directories for valid/invalid photos
-    with tempfile.TemporaryDirectory() as temp_dir:
-        valid_dir = os.path.join(temp_dir, "valid")
-        invalid_dir = os.path.join(temp_dir, "invalid")
-        os.makedirs(valid_dir, exist_ok=True)
-        os.makedirs(invalid_dir, exist_ok=True)
-
-        # Process each photo
-        for idx, (filename, file_bytes) in enumerate(files):
-            try:
-                # Update progress
-                if progress_callback:
-                    progress_callback(idx + 1, total)
-
-                # Validate photo
-                try:
-                    # Try to get mime type from filename
-                    mime_type = "image/jpeg"  # Default
-                    if filename.lower().endswith(".png"):
-                        mime_type = "image/png"
-                    elif filename.lower().endswith((".jpg", ".jpeg")):
-                        mime_type = "image/jpeg"
-
-                    # Perform validation
-                    PhotoValidationService.validate_all(file_bytes, mime_type, validation_level)
-
-                    # Photo is valid
-                    results.append(BulkPhotoValidationResult(
-                        filename=filename,
-                        is_valid=True
-                    ))
-
-                    # Copy to valid folder
-                    valid_path = os.path.join(valid_dir, filename)
-                    with open(valid_path, "wb") as f:
-                        f.write(file_bytes)
-
-                except Exception as e:
-                    # Photo validation failed
-                    error_msg = str(e)
-                    if hasattr(e, "detail") and isinstance(e.detail, dict):
-                        errors_list = e.detail.get("errors", [])
-                        error_msg = "; ".join(errors_list) if errors_list else str(e)
-
-                    results.append(BulkPhotoValidationResult(
-                        filename=filename,
-                        is_valid=False,
-                        error_message=error_msg
-                    ))
-
-                    # Copy to invalid folder with error info in filename
-                    base_name = Path(filename).stem
-                    ext = Path(filename).suffix
-                    # Keep original filename but could add error suffix if needed
-                    invalid_path = os.path.join(invalid_dir, filename)
-                    with open(invalid_path, "wb") as f:
-                        f.write(file_bytes)
-
-            except Exception as e:
-                logger.error(f"Error processing photo {filename}: {e}", exc_info=True)
-                results.append(BulkPhotoValidationResult(
-                    filename=filename,
-                    is_valid=False,
-                    error_message=f"Processing error: {str(e)}"
-                ))
-
-        # Generate validation report CSV
-        report_path = os.path.join(temp_dir, "validation_report.csv")
-        with open(report_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Filename", "Status", "Error Message"])
-            for result in results:
-                writer.writerow([
-                    result.filename,
-                    "VALID" if result.is_valid else "INVALID",
-                    result.error_message or ""
-                ])
-
-        # Create zip file
-        zip_bytes = io.BytesIO()
-        with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add valid photos
-            for filename in os.listdir(valid_dir):
-                file_path = os.path.join(valid_dir, filename)
-                zipf.write(file_path, f"valid/{filename}")
-
-            # Add invalid photos
-            for filename in os.listdir(invalid_dir):
-                file_path = os.path.join(invalid_dir, filename)
-                zipf.write(file_path, f"invalid/{filename}")
-
-            # Add validation report
-            zipf.write(report_path, "validation_report.csv")
-
-        zip_bytes.seek(0)
-        return results, zip_bytes.getvalue()
+    zip_bytes = io.BytesIO()
+    written: set = set()
+    with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
+        jobs = [(filename, file_bytes, validation_level) for filename, file_bytes in files]
+        completed = 0
+        async for idx, error_msg in _run_in_pool(_validate_photo, jobs):
+            filename, file_bytes = files[idx]
+            is_valid = error_msg is None
+            results[idx] = BulkPhotoValidationResult(
+                filename=filename,
+                is_valid=is_valid,
+                error_message=error_msg
+            )
+            folder = "valid" if is_valid else "invalid"
+            _add_to_archive(zipf, written, f"{folder}/{filename}", file_bytes)
+
+            completed += 1
+            await _report_progress(progress_callback, completed, total)
+
+        # Add validation report
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(["Filename", "Status", "Error Message"])
+        for result in results:
+            writer.writerow([
+                result.filename,
+                "VALID" if result.is_valid else "INVALID",
+                result.error_message or ""
+            ])
+        zipf.writestr("validation_report.csv", report.getvalue())
+
+    return results, zip_bytes.getvalue()
 
 
 def get_validation_summary(results: List[BulkPhotoValidationResult]) -> Dict[str, Any]:
@@ -171,11 +234,63 @@ class BulkPhotoResizeResult:
         self.error_message = error_message
 
 
+def _resize_photo(
+    filename: str,
+    file_bytes: bytes,
+    target_width: int,
+    target_height: int,
+    maintain_aspect_ratio: bool
+) -> Tuple[Optional[bytes], Optional[Tuple[int, int]], Optional[str]]:
+    """Worker: resize one photo; returns (output_bytes, original_size, error_message)."""
+    try:
+        # Open image
+        image = Image.open(io.BytesIO(file_bytes))
+        original_size = image.size  # (width, height)
+
+        # Resize image
+        if maintain_aspect_ratio:
+            # Resize maintaining aspect ratio, then center on target size with white background
+            image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
+
+            # Create new image with target size and white background
+            resized_image = Image.new("RGB", (target_width, target_height), (255, 255, 255))
+
+            # Calculate position to center the resized image
+            paste_x = (target_width - image.width) // 2
+            paste_y = (target_height - image.height) // 2
+
+            # Paste the resized image onto the white background
+            if image.mode == "RGBA":
+                # Handle transparency
+                resized_image.paste(image, (paste_x, paste_y), image)
+            else:
+                resized_image.paste(image, (paste_x, paste_y))
+        else:
+            # Resize to exact dimensions (may distort aspect ratio)
+            resized_image = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+        # Convert to RGB if necessary (for JPEG output)
+        if resized_image.mode != "RGB":
+            resized_image = resized_image.convert("RGB")
+
+        # Determine output format from filename
+        output_format = "PNG" if filename.lower().endswith(".png") else "JPEG"
+
+        output_bytes = io.BytesIO()
+        resized_image.save(output_bytes, format=output_format, quality=95)
+        return output_bytes.getvalue(), original_size, None
+
+    except Exception as e:
+        logger.error(f"Error resizing photo {filename}: {e}", exc_info=True)
+        return None, None, f"Resize error: {str(e)}"
+
+
 async def process_bulk_photo_resize(
     files: List[Tuple[str, bytes]],
     target_width: int = 155,
     target_height: int = 191,
-    maintain_aspect_ratio: bool = False
+    maintain_aspect_ratio: bool = False,
+    progress_callback: Optional[Callable] = None
 ) -> Tuple[List[BulkPhotoResizeResult], bytes, str, str]:
     """
     Process bulk photo resizing and create zip file with resized photos (or single file if only one).
@@ -185,129 +300,63 @@ async def process_bulk_photo_resize(
         target_width: Target width in pixels (default: 155 for passport photos)
         target_height: Target height in pixels (default: 191 for passport photos)
         maintain_aspect_ratio: If True, maintain aspect ratio and pad if needed. If False, stretch to exact dimensions.
+        progress_callback: Optional callback function(current, total) for progress updates;
+            may be a coroutine function
 
     Returns:
         Tuple of (resize_results_list, file_bytes, content_type, filename)
         - If single file: returns the single file bytes, "image/jpeg" or "image/png", and the filename
         - If multiple files: returns zip bytes, "application/zip", and zip filename
     """
-    results: List[BulkPhotoResizeResult] = []
-
-    # Create temporary directory for resized photos
-    with tempfile.TemporaryDirectory() as temp_dir:
-        resized_dir = os.path.join(temp_dir, "resized")
-        os.makedirs(resized_dir, exist_ok=True)
-
-        # Process each photo
-        for filename, file_bytes in files:
-            try:
-                # Open image
-                image = Image.open(io.BytesIO(file_bytes))
-                original_size = image.size  # (width, height)
-
-                # Resize image
-                if maintain_aspect_ratio:
-                    # Resize maintaining aspect ratio, then center on target size with white background
-                    image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-
-                    # Create new image with target size and white background
-                    resized_image = Image.new("RGB", (target_width, target_height), (255, 255, 255))
-
-                    # Calculate position to center the resized image
-                    paste_x = (target_width - image.width) // 2
-                    paste_y = (target_height - image.height) // 2
-
-                    # Paste the resized image onto the white background
-                    if image.mode == "RGBA":
-                        # Handle transparency
-                        resized_image.paste(image, (paste_x, paste_y), image)
-                    else:
-                        resized_image.paste(image, (paste_x, paste_y))
-                else:
-                    # Resize to exact dimensions (may distort aspect ratio)
-                    resized_image = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-                # Convert to RGB if necessary (for JPEG output)
-                if resized_image.mode != "RGB":
-                    resized_image = resized_image.convert("RGB")
-
-                # Save resized image
-                resized_path = os.path.join(resized_dir, filename)
-
-                # Determine output format from filename
-                output_format = "JPEG"
-                if filename.lower().endswith(".png"):
-                    output_format = "PNG"
-
-                # Save image
-                output_bytes = io.BytesIO()
-                resized_image.save(output_bytes, format=output_format, quality=95)
-
-                # Write to file
-                with open(resized_path, "wb") as f:
-                    f.write(output_bytes.getvalue())
-
-                results.append(BulkPhotoResizeResult(
-                    filename=filename,
-                    success=True,
-                    original_size=original_size
-                ))
-
-            except Exception as e:
-                logger.error(f"Error resizing photo {filename}: {e}", exc_info=True)
-                results.append(BulkPhotoResizeResult(
-                    filename=filename,
-                    success=False,
-                    error_message=f"Resize error: {str(e)}"
-                ))
-
-        # Check if single file - return directly without zip
-        successful_files = [r for r in results if r.success]
-        if len(files) == 1 and len(successful_files) == 1:
-            # Single file - return the file directly
-            single_file_path = os.path.join(resized_dir, successful_files[0].filename)
-            if os.path.exists(single_file_path):
-                with open(single_file_path, "rb") as f:
-                    file_bytes = f.read()
-
-                # Determine content type
-                filename = successful_files[0].filename
-                if filename.lower().endswith(".png"):
-                    content_type = "image/png"
-                else:
-                    content_type = "image/jpeg"
-
-                return results, file_bytes, content_type, filename
-
-        # Multiple files - create zip
-        # Generate resize report CSV
-        report_path = os.path.join(temp_dir, "resize_report.csv")
-        with open(report_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Filename", "Status", "Original Size (WxH)", "Target Size (WxH)", "Error Message"])
-            for result in results:
-                writer.writerow([
-                    result.filename,
-                    "SUCCESS" if result.success else "FAILED",
-                    f"{result.original_size[0]}x{result.original_size[1]}" if result.original_size else "",
-                    f"{target_width}x{target_height}",
-                    result.error_message or ""
-                ])
-
-        # Create zip file
-        zip_bytes = io.BytesIO()
-        with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add resized photos
-            for filename in os.listdir(resized_dir):
-                file_path = os.path.join(resized_dir, filename)
-                zipf.write(file_path, filename)
-
-            # Add resize report
-            zipf.write(report_path, "resize_report.csv")
-
-        zip_bytes.seek(0)
-        zip_filename = f"resized_photos_{target_width}x{target_height}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
-        return results, zip_bytes.getvalue(), "application/zip", zip_filename
+    results: List[Optional[BulkPhotoResizeResult]] = [None] * len(files)
+    total = len(files)
+    single_output: Optional[bytes] = None
+
+    zip_bytes = io.BytesIO()
+    written: set = set()
+    with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
+        jobs = [
+            (filename, file_bytes, target_width, target_height, maintain_aspect_ratio)
+            for filename, file_bytes in files
+        ]
+        completed = 0
+        async for idx, (output, original_size, error_msg) in _run_in_pool(_resize_photo, jobs):
+            filename = files[idx][0]
+            results[idx] = BulkPhotoResizeResult(
+                filename=filename,
+                success=output is not None,
+                original_size=original_size,
+                error_message=error_msg
+            )
+            if output is not None:
+                if total == 1:
+                    single_output = output
+                _add_to_archive(zipf, written, filename, output)
+
+            completed += 1
+            await _report_progress(progress_callback, completed, total)
+
+        # Single file - return the file directly without zip
+        if single_output is not None:
+            filename = results[0].filename
+            return results, single_output, _image_content_type(filename), filename
+
+        # Add resize report
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(["Filename", "Status", "Original Size (WxH)", "Target Size (WxH)", "Error Message"])
+        for result in results:
+            writer.writerow([
+                result.filename,
+                "SUCCESS" if result.success else "FAILED",
+                f"{result.original_size[0]}x{result.original_size[1]}" if result.original_size else "",
+                f"{target_width}x{target_height}",
+                result.error_message or ""
+            ])
+        zipf.writestr("resize_report.csv", report.getvalue())
+
+    zip_filename = f"resized_photos_{target_width}x{target_height}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    return results, zip_bytes.getvalue(), "application/zip", zip_filename
 
 
 def get_resize_summary(results: List[BulkPhotoResizeResult]) -> Dict[str, Any]:
@@ -333,9 +382,25 @@ class BulkBackgroundReplacementResult:
         self.error_message = error_message
 
 
+def _replace_photo_background(
+    filename: str,
+    file_bytes: bytes,
+    background_color: Tuple[int, int, int]
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """Worker: replace the background of one photo; returns (output_bytes, error_message)."""
+    try:
+        from app.services.mediapipe_photo_validation import replace_background
+
+        return replace_background(file_bytes, background_color), None
+    except Exception as e:
+        logger.error(f"Error replacing background for photo {filename}: {e}", exc_info=True)
+        return None, f"Background replacement error: {str(e)}"
+
+
 async def process_bulk_background_replacement(
     files: List[Tuple[str, bytes]],
-    background_color: Tuple[int, int, int] = (255, 255, 255)  # White (RGB)
+    background_color: Tuple[int, int, int] = (255, 255, 255),  # White (RGB)
+    progress_callback: Optional[Callable] = None
 ) -> Tuple[List[BulkBackgroundReplacementResult], bytes, str, str]:
     """
     Process bulk background replacement and create zip file with processed photos (or single file if only one).
@@ -343,93 +408,58 @@ async def process_bulk_background_replacement(
     Args:
         files: List of tuples (filename, file_bytes)
         background_color: RGB tuple for background color (default: white 255, 255, 255)
+        progress_callback: Optional callback function(current, total) for progress updates;
+            may be a coroutine function
 
     Returns:
         Tuple of (replacement_results_list, file_bytes, content_type, filename)
         - If single file: returns the single file bytes, "image/jpeg" or "image/png", and the filename
         - If multiple files: returns zip bytes, "application/zip", and zip filename
     """
-    from app.services.mediapipe_photo_validation import replace_background
-
-    results: List[BulkBackgroundReplacementResult] = []
-
-    # Create temporary directory for processed photos
-    with tempfile.TemporaryDirectory() as temp_dir:
-        processed_dir = os.path.join(temp_dir, "processed")
-        os.makedirs(processed_dir, exist_ok=True)
-
-        # Process each photo
-        for filename, file_bytes in files:
-            try:
-                # Replace background
-                processed_bytes = replace_background(file_bytes, background_color)
-
-                # Save processed image
-                processed_path = os.path.join(processed_dir, filename)
-
-                # Write to file
-                with open(processed_path, "wb") as f:
-                    f.write(processed_bytes)
-
-                results.append(BulkBackgroundReplacementResult(
-                    filename=filename,
-                    success=True
-                ))
-
-            except Exception as e:
-                logger.error(f"Error replacing background for photo {filename}: {e}", exc_info=True)
-                results.append(BulkBackgroundReplacementResult(
-                    filename=filename,
-                    success=False,
-                    error_message=f"Background replacement error: {str(e)}"
-                ))
-
-        # Check if single file - return directly without zip
-        successful_files = [r for r in results if r.success]
-        if len(files) == 1 and len(successful_files) == 1:
-            # Single file - return the file directly
-            single_file_path = os.path.join(processed_dir, successful_files[0].filename)
-            if os.path.exists(single_file_path):
-                with open(single_file_path, "rb") as f:
-                    file_bytes = f.read()
-
-                # Determine content type
-                filename = successful_files[0].filename
-                if filename.lower().endswith(".png"):
-                    content_type = "image/png"
-                else:
-                    content_type = "image/jpeg"
-
-                return results, file_bytes, content_type, filename
-
-        # Multiple files - create zip
-        # Generate replacement report CSV
-        report_path = os.path.join(temp_dir, "background_replacement_report.csv")
-        with open(report_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Filename", "Status", "Background Color (RGB)", "Error Message"])
-            for result in results:
-                writer.writerow([
-                    result.filename,
-                    "SUCCESS" if result.success else "FAILED",
-                    f"{background_color[0]},{background_color[1]},{background_color[2]}",
-                    result.error_message or ""
-                ])
-
-        # Create zip file
-        zip_bytes = io.BytesIO()
-        with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add processed photos
-            for filename in os.listdir(processed_dir):
-                file_path = os.path.join(processed_dir, filename)
-                zipf.write(file_path, filename)
-
-            # Add replacement report
-            zipf.write(report_path, "background_replacement_report.csv")
-
-        zip_bytes.seek(0)
-        zip_filename = f"background_replaced_photos_r{background_color[0]}g{background_color[1]}b{background_color[2]}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
-        return results, zip_bytes.getvalue(), "application/zip", zip_filename
+    results: List[Optional[BulkBackgroundReplacementResult]] = [None] * len(files)
+    total = len(files)
+    single_output: Optional[bytes] = None
+
+    zip_bytes = io.BytesIO()
+    written: set = set()
+    with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zipf:
+        jobs = [(filename, file_bytes, background_color) for filename, file_bytes in files]
+        completed = 0
+        async for idx, (output, error_msg) in _run_in_pool(_replace_photo_background, jobs):
+            filename = files[idx][0]
+            results[idx] = BulkBackgroundReplacementResult(
+                filename=filename,
+                success=output is not None,
+                error_message=error_msg
+            )
+            if output is not None:
+                if total == 1:
+                    single_output = output
+                _add_to_archive(zipf, written, filename, output)
+
+            completed += 1
+            await _report_progress(progress_callback, completed, total)
+
+        # Single file - return the file directly without zip
+        if single_output is not None:
+            filename = results[0].filename
+            return results, single_output, _image_content_type(filename), filename
+
+        # Add replacement report
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(["Filename", "Status", "Background Color (RGB)", "Error Message"])
+        for result in results:
+            writer.writerow([
+                result.filename,
+                "SUCCESS" if result.success else "FAILED",
+                f"{background_color[0]},{background_color[1]},{background_color[2]}",
+                result.error_message or ""
+            ])
+        zipf.writestr("background_replacement_report.csv", report.getvalue())
+
+    zip_filename = f"background_replaced_photos_r{background_color[0]}g{background_color[1]}b{background_color[2]}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    return results, zip_bytes.getvalue(), "application/zip", zip_filename
 
 
 def get_background_replacement_summary(results: List[BulkBackgroundReplacementResult]) -> Dict[str, Any]:
@@ -1,10 +1,12 @@
 """Service for managing user credits."""
+import logging
+from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
@@ -16,6 +18,8 @@ from app.models import (
     Payment,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def get_user_credit(session: AsyncSession, user_id: UUID) -> Optional[UserCredit]:
     """
@@ -55,7 +59,148 @@ async def check_credit_balance(session: AsyncSession, user_id: UUID, required: D
         True if sufficient credit, False otherwise
     """
     credit = await get_user_credit(session, user_id)
-    return credit.balance >= required
+    return credit.balance - credit.reserved_balance >= required
+
+
+async def reserve_credit(session: AsyncSession, user_id: UUID, amount: Decimal) -> bool:
+    """
+    Hold credit for an in-flight verification request.
+
+    The hold is taken with one conditional UPDATE against the available balance
+    (balance - reserved_balance), so concurrent requests from any worker can never
+    reserve more than the user owns. The usage writer releases the hold and deducts
+    what was actually billed when it settles the request (see ``settle_credit_usage``);
+    holds that are never settled lapse after ``credit_reservation_ttl_seconds``
+    (see ``expire_credit_reservations``).
+
+    Args:
+        session: Database session
+        user_id: User ID
+        amount: Amount to hold
+
+    Returns:
+        True if the credit was reserved, False if the available balance is insufficient
+    """
+    if amount <= 0:
+        return True
+
+    stmt = (
+        update(UserCredit)
+        .where(
+            UserCredit.user_id == user_id,
+            UserCredit.balance - UserCredit.reserved_balance >= amount,
+        )
+        .values(
+            reserved_balance=UserCredit.reserved_balance + amount,
+            reservation_expires_at=datetime.utcnow() + timedelta(seconds=settings.credit_reservation_ttl_seconds),
+        )
+        .returning(UserCredit.id)
+    )
+    reserved = (await session.execute(stmt)).scalar_one_or_none() is not None
+    await session.commit()
+    return reserved
+
+
+async def release_credit(session: AsyncSession, user_id: UUID, amount: Decimal) -> None:
+    """
+    Release a reservation whose request ended without recording usage (e.g. client disconnect).
+
+    Best effort: if the release cannot be written, the hold lapses with the reservation TTL.
+
+    Args:
+        session: Database session (rolled back first, it may hold a failed transaction)
+        user_id: User ID
+        amount: Reserved amount to release
+    """
+    if amount <= 0:
+        return
+
+    try:
+        await session.rollback()
+        await session.execute(
+            update(UserCredit)
+            .where(UserCredit.user_id == user_id)
+            .values(reserved_balance=func.greatest(UserCredit.reserved_balance - amount, 0))
+        )
+        await session.commit()
+    except Exception as e:
+        logger.error(f"Could not release {amount} reserved credit for user {user_id}: {e}", exc_info=True)
+
+
+async def expire_credit_reservations(session: AsyncSession) -> int:
+    """
+    Release holds that were not settled before their reservation TTL.
+
+    A user's expiry is pushed forward by every new reservation, so this only clears
+    reserved_balance for users with no reservation in the last TTL; any request that
+    reserved before then has either been settled or will never be (worker crash, lost
+    usage events). A late settlement after the reset cannot drive reserved_balance
+    negative (see ``settle_credit_usage``).
+
+    Args:
+        session: Database session
+
+    Returns:
+        Number of credit accounts whose reservations were released
+    """
+    stmt = (
+        update(UserCredit)
+        .where(
+            UserCredit.reserved_balance > 0,
+            UserCredit.reservation_expires_at < datetime.utcnow(),
+        )
+        .values(reserved_balance=0, reservation_expires_at=None)
+        .returning(UserCredit.user_id)
+    )
+    released = (await session.execute(stmt)).all()
+    await session.commit()
+    return len(released)
+
+
+async def settle_credit_usage(
+    session: AsyncSession,
+    user_id: UUID,
+    billed: Decimal,
+    released: Decimal,
+    description: str,
+) -> None:
+    """
+    Deduct aggregated usage and release the matching reservations (caller commits).
+
+    Writes a single USAGE ledger entry for ``billed`` instead of one per request.
+
+    Args:
+        session: Database session
+        user_id: User ID
+        billed: Credit to deduct from the balance
+        released: Reserved credit to release
+        description: Ledger entry description
+    """
+    stmt = (
+        update(UserCredit)
+        .where(UserCredit.user_id == user_id)
+        .values(
+            balance=UserCredit.balance - billed,
+            total_used=UserCredit.total_used + billed,
+            reserved_balance=func.greatest(UserCredit.reserved_balance - released, 0),
+            updated_at=datetime.utcnow(),
+        )
+        .returning(UserCredit.id, UserCredit.balance)
+    )
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None or billed <= 0:
+        return
+
+    session.add(
+        CreditTransaction(
+            user_id=user_id,
+            user_credit_id=row.id,
+            transaction_type=CreditTransactionType.USAGE,
+            amount=-billed,  # Negative for deduction
+            balance_after=row.balance,
+            description=description,
+        )
+    )
 
 
 async def deduct_credit(
@@ -80,11 +225,12 @@ async def deduct_credit(
         HTTPException: If insufficient credit
     """
     credit = await get_user_credit(session, user_id)
+    available = credit.balance - credit.reserved_balance
 
-    if credit.balance < amount:
+    if available < amount:
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Insufficient credit. Required: {amount}, Available: {credit.balance}",
+            detail=f"Insufficient credit. Required: {amount}, Available: {available}",
         )
 
     # Deduct credit
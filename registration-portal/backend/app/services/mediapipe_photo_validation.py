@@ -9,8 +9,10 @@ import io
 import tempfile
 import logging
 import math
-from typing import Optional, Dict, Any, Tuple
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 
+import numpy as np
 from PIL import Image
 import mediapipe as mp
 from mediapipe.tasks import python
@@ -21,7 +23,6 @@ logger = logging.getLogger(__name__)
 # Try to import OpenCV for LAB color space conversion
 try:
     import cv2
-    import numpy as np
     CV2_AVAILABLE = True
 except ImportError:
     CV2_AVAILABLE = False
@@ -213,20 +214,11 @@ def replace_background(
         mask = segmentation_result.confidence_masks[0]
         mask_image = mask.numpy_view()
 
-        # Load image for pixel access
-        image = Image.open(tmp_path)
-        img_array = image.convert('RGB')
-        img_width, img_height = image.size
-
-        # Create new image with replaced background
-        new_image = Image.new('RGB', (img_width, img_height), background_color)
-
-        # Copy person pixels (where mask > 0.5) from original image
-        for y in range(img_height):
-            for x in range(img_width):
-                if mask_image[y, x] > 0.5:  # Person pixel
-                    pixel = img_array.getpixel((x, y))
-                    new_image.putpixel((x, y), pixel)
+        # Keep person pixels (where mask > 0.5) and fill everything else with the background color
+        rgb = np.asarray(Image.open(tmp_path).convert('RGB'))
+        person = mask_image.reshape(rgb.shape[:2]) > 0.5
+        new_rgb = np.where(person[..., None], rgb, np.array(background_color, dtype=np.uint8))
+        new_image = Image.fromarray(new_rgb.astype(np.uint8), 'RGB')
 
         # Save modified image to bytes
         output = io.BytesIO()
@@ -242,68 +234,98 @@ def replace_background(
                 pass
 
 
-def _is_white_perceptual_lab(r: int, g: int, b: int, reference_white: Tuple[int, int, int] = (255, 255, 255), max_delta_e: float = 15.0) -> Tuple[bool, float]:
-    """
-    Check if a color is perceptually similar to white using LAB color space.
+# Background sampling: corner squares of min(width, height) // 20 pixels (at least 5) that
+# are mostly background, plus this many evenly spaced points along each edge
+BACKGROUND_EDGE_SAMPLES = 20
+# Delta E (OpenCV 8-bit LAB units, CIE76) up to which a pixel counts as white/off-white:
+# < 1 imperceptible, 1-2 close observation, 2-10 at a glance, 10-15 "similar", > 15 different
+WHITE_MAX_DELTA_E = 15.0
+# Share of sampled background pixels that must be white/off-white
+WHITE_MIN_PERCENTAGE = 70.0
 
-    LAB color space is perceptually uniform - colors that are the same distance
-    apart in LAB space appear equally different to the human eye. Delta E measures
-    the perceptual difference between colors.
 
-    Args:
-        r: Red channel (0-255)
-        g: Green channel (0-255)
-        b: Blue channel (0-255)
-        reference_white: Reference white color in RGB (default: pure white 255, 255, 255)
-        max_delta_e: Maximum Delta E threshold for acceptance (default: 15.0)
-                    - ΔE < 1: Not perceptible by human eyes
-                    - ΔE 1-2: Perceptible by close observation
-                    - ΔE 2-10: Perceptible at a glance
-                    - ΔE 10-15: Acceptable for "similar" colors
-                    - ΔE > 15: Clearly different colors
+@lru_cache(maxsize=8)
+def _reference_lab(reference_white: Tuple[int, int, int]) -> "np.ndarray":
+    """LAB value of the reference white (converted once per reference color)."""
+    ref_rgb = np.uint8([[list(reference_white)]])
+    return cv2.cvtColor(ref_rgb, cv2.COLOR_RGB2LAB)[0, 0].astype(np.float64)
 
-    Returns:
-        Tuple of (is_white: bool, delta_e: float)
+
+def _background_sample_indices(background: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Row/column indices of the sampled background pixels (corners and edges).
+
+    ``background`` is the boolean background mask (segmentation confidence < 0.5). A pixel
+    sampled by both a corner and an edge appears twice, as it always has.
+    """
+    img_height, img_width = background.shape
+    sample_size = max(5, min(img_width, img_height) // 20)
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+
+    # Corners that are at least 70% background contribute all their background pixels
+    for x_offset in (0, max(0, img_width - sample_size)):
+        for y_offset in (0, max(0, img_height - sample_size)):
+            region = background[y_offset:y_offset + sample_size, x_offset:x_offset + sample_size]
+            if region.sum() > sample_size * sample_size * 0.7:
+                region_rows, region_cols = np.nonzero(region)
+                rows.append(region_rows + y_offset)
+                cols.append(region_cols + x_offset)
+
+    # Evenly spaced points along the top, bottom, left and right edges
+    steps = np.arange(BACKGROUND_EDGE_SAMPLES) / BACKGROUND_EDGE_SAMPLES
+    xs = (steps * img_width).astype(np.intp)
+    ys = (steps * img_height).astype(np.intp)
+    for y in (0, img_height - 1):
+        edge_xs = xs[background[y, xs]]
+        rows.append(np.full(edge_xs.shape, y, dtype=np.intp))
+        cols.append(edge_xs)
+    for x in (0, img_width - 1):
+        edge_ys = ys[background[ys, x]]
+        rows.append(edge_ys)
+        cols.append(np.full(edge_ys.shape, x, dtype=np.intp))
+
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _white_delta_e(
+    rgb: "np.ndarray",
+    rows: "np.ndarray",
+    cols: "np.ndarray",
+    reference_white: Tuple[int, int, int] = (255, 255, 255),
+    max_delta_e: float = WHITE_MAX_DELTA_E,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Whiteness of the sampled pixels of an RGB image: (is_white mask, Delta E per sample).
+
+    The image is converted to LAB once; Delta E (CIE76) against the reference white is
+    then computed for all samples at once. Without OpenCV an RGB range check (all
+    channels >= 220) is used with a rough Delta E estimate.
     """
     if not CV2_AVAILABLE:
-        # Fallback to RGB range check if OpenCV not available
-        threshold = 220
-        is_white = r >= threshold and g >= threshold and b >= threshold
-        # Estimate Delta E (not accurate without LAB conversion)
-        avg_rgb = (r + g + b) / 3.0
-        delta_e_estimate = abs(255 - avg_rgb) / 255.0 * 100  # Rough estimate
-        return is_white, delta_e_estimate
-
-    try:
-        # Convert reference white to LAB
-        ref_rgb = np.uint8([[[reference_white[2], reference_white[1], reference_white[0]]]])  # BGR format
-        ref_lab = cv2.cvtColor(ref_rgb, cv2.COLOR_BGR2LAB)[0][0]
-        ref_l = float(ref_lab[0])
-        ref_a = float(ref_lab[1])
-        ref_b = float(ref_lab[2])
-
-        # Convert test color to LAB
-        test_rgb = np.uint8([[[b, g, r]]])  # BGR format
-        test_lab = cv2.cvtColor(test_rgb, cv2.COLOR_BGR2LAB)[0][0]
-        test_l = float(test_lab[0])
-        test_a = float(test_lab[1])
-        test_b = float(test_lab[2])
-
-        # Calculate Delta E (CIE76 formula)
-        delta_l = test_l - ref_l
-        delta_a = test_a - ref_a
-        delta_b = test_b - ref_b
-        delta_e = math.sqrt(delta_l**2 + delta_a**2 + delta_b**2)
-
-        is_white = delta_e <= max_delta_e
+        samples = rgb[rows, cols].astype(np.float64)
+        is_white = (samples >= 220).all(axis=1)
+        delta_e = np.abs(255 - samples.mean(axis=1)) / 255.0 * 100  # Rough estimate
         return is_white, delta_e
 
-    except Exception as e:
-        logger.warning(f"Error in LAB color conversion: {e}, falling back to RGB check")
-        # Fallback to RGB range check
-        threshold = 220
-        is_white = r >= threshold and g >= threshold and b >= threshold
-        return is_white, 0.0
+    lab = cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB)
+    delta_e = np.sqrt(((lab[rows, cols].astype(np.float64) - _reference_lab(reference_white)) ** 2).sum(axis=1))
+    return delta_e <= max_delta_e, delta_e
+
+
+def measure_background_whiteness(rgb: "np.ndarray", confidence_mask: "np.ndarray") -> Optional[Tuple[float, float]]:
+    """Percentage of white/off-white background samples and their average Delta E.
+
+    Args:
+        rgb: Image as an (height, width, 3) uint8 RGB array
+        confidence_mask: Person segmentation confidence (height, width); < 0.5 is background
+
+    Returns:
+        (white_percentage, average_delta_e), or None when no background pixel was sampled
+    """
+    rows, cols = _background_sample_indices(np.asarray(confidence_mask) < 0.5)
+    if rows.size == 0:
+        return None
+    is_white, delta_e = _white_delta_e(np.ascontiguousarray(rgb), rows, cols)
+    return float(is_white.mean() * 100), float(delta_e.mean())
 
 
 def _calculate_eye_aspect_ratio(landmarks, eye_indices: list[int]) -> float:
@@ -430,63 +452,16 @@ def _validate_photo_simplified(
                                 mask = segmentation_result.confidence_masks[0]
                                 mask_image = mask.numpy_view()
 
-                                # Load image for pixel access
-                                image = Image.open(tmp_path)
-                                img_array = image.convert('RGB')
-                                img_width, img_height = image.size
-
-                                # Sample background regions (edges and corners)
-                                # Background mask is where segmentation mask is False (0)
-                                background_regions = []
-                                sample_size = max(5, min(img_width, img_height) // 20)  # Sample small regions
-
-                                # Sample corners
-                                for x_offset in [0, img_width - sample_size]:
-                                    for y_offset in [0, img_height - sample_size]:
-                                        if x_offset < img_width and y_offset < img_height:
-                                            # Check if this region is background
-                                            region_mask = mask_image[y_offset:y_offset+sample_size, x_offset:x_offset+sample_size] < 0.5
-                                            if region_mask.sum() > (sample_size * sample_size * 0.7):  # At least 70% background
-                                                for py in range(y_offset, min(y_offset+sample_size, img_height)):
-                                                    for px in range(x_offset, min(x_offset+sample_size, img_width)):
-                                                        if mask_image[py, px] < 0.5:  # Background pixel
-                                                            background_regions.append(img_array.getpixel((px, py)))
-
-                                # Sample edges (top, bottom, left, right)
-                                edge_sample_count = 20
-                                for i in range(edge_sample_count):
-                                    # Top edge
-                                    x = int((i / edge_sample_count) * img_width)
-                                    if mask_image[0, x] < 0.5:
-                                        background_regions.append(img_array.getpixel((x, 0)))
-                                    # Bottom edge
-                                    if mask_image[img_height-1, x] < 0.5:
-                                        background_regions.append(img_array.getpixel((x, img_height-1)))
-                                    # Left edge
-                                    y = int((i / edge_sample_count) * img_height)
-                                    if mask_image[y, 0] < 0.5:
-                                        background_regions.append(img_array.getpixel((0, y)))
-                                    # Right edge
-                                    if mask_image[y, img_width-1] < 0.5:
-                                        background_regions.append(img_array.getpixel((img_width-1, y)))
-
-                                if background_regions:
-                                    # Check if background is white/off-white using LAB color space perceptual matching
-                                    white_count = 0
-                                    total_delta_e = 0.0
-                                    valid_samples = 0
+                                # One RGB decode and LAB conversion; corner/edge samples are
+                                # gathered from the boolean background mask with NumPy
+                                rgb = np.asarray(Image.open(io.BytesIO(image_bytes)).convert('RGB'))
+                                whiteness = measure_background_whiteness(rgb, mask_image)
 
-                                    for r, g, b in background_regions:
-                                        is_white, delta_e = _is_white_perceptual_lab(r, g, b)
-                                        if is_white:
-                                            white_count += 1
-                                        total_delta_e += delta_e
-                                        valid_samples += 1
-
-                                    white_percentage = (white_count / len(background_regions)) * 100 if background_regions else 0.0
-                                    avg_delta_e = total_delta_e / valid_samples if valid_samples > 0 else 0.0
+                                if whiteness is not None:
+                                    # Check if background is white/off-white using LAB color space perceptual matching
+                                    white_percentage, avg_delta_e = whiteness
 
-                                    if white_percentage >= 70.0:
+                                    if white_percentage >= WHITE_MIN_PERCENTAGE:
                                         validations.append({
                                             "name": "Background Color",
                                             "passed": True,
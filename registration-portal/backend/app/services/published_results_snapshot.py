@@ -0,0 +1,433 @@
+"""In-memory snapshots of published exam results for the public result checker.
+
+``/public/results/check`` is the busiest endpoint on release day. Instead of resolving the
+exam, candidate, results, subject selections and blocks with a handful of queries per
+request, each worker keeps an immutable per-exam ``PublishedResultsSnapshot``. It maps
+registration and index numbers to a compact ``SnapshotCandidate``, which holds the
+candidate details and the subject rows already matched, ordered and graded. Active
+result blocks for the exam are overlaid from a small ``ResultBlockSet`` when the
+response is built.
+
+Snapshots are built when ``publish_exam_results`` runs, or lazily on the first check in
+each worker. Within ``published_results_snapshot_ttl_seconds`` they are served as-is.
+After that, one version query (counts and latest updates of the exam's results,
+candidates, subject selections, photos and blocks, plus the latest school, programme
+and subject edits) decides whether to keep the snapshot, reload only the blocks, or
+rebuild. Result, block
+and publication changes in this process call ``invalidate_published_results``.
+"""
+import asyncio
+import logging
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import (
+    CandidateResult,
+    Grade,
+    Programme,
+    RegistrationCandidate,
+    RegistrationCandidatePhoto,
+    RegistrationExam,
+    RegistrationSubjectSelection,
+    ResultBlock,
+    School,
+    Subject,
+    SubjectType,
+)
+from app.schemas.result import PublicResultResponse, PublicSubjectResult
+from app.services.verification_service import ResultBlockSet, match_exam
+
+logger = logging.getLogger(__name__)
+
+
+class PublishedExam(NamedTuple):
+    id: int
+    exam_type: str
+    exam_series: str | None
+    year: int
+    results_published: bool
+
+
+class SnapshotSubject(NamedTuple):
+    subject_code: str  # Display code (subject original_code when set)
+    subject_name: str
+    subject_id: int | None  # Subject checked against subject-level blocks (None when ungraded)
+    grade: Grade | None
+
+
+class SnapshotCandidate(NamedTuple):
+    candidate_id: int
+    name: str
+    index_number: str | None
+    registration_number: str
+    school_id: int | None
+    school_name: str | None
+    school_code: str | None
+    programme_name: str | None
+    programme_code: str | None
+    has_photo: bool
+    subjects: tuple[SnapshotSubject, ...]
+
+
+# (count, latest update) of one table's rows for the exam
+TableVersion = tuple[int, datetime | None]
+# (results_published_at, results, candidates, subject selections, photos,
+#  latest school / programme / subject update)
+ResultsVersion = tuple[
+    datetime | None,
+    TableVersion,
+    TableVersion,
+    TableVersion,
+    TableVersion,
+    datetime | None,
+    datetime | None,
+    datetime | None,
+]
+# (block count, latest block update)
+BlocksVersion = tuple[int, datetime | None]
+
+
+@dataclass(frozen=True)
+class PublishedResultsSnapshot:
+    exam: PublishedExam
+    version: ResultsVersion
+    by_registration_number: Mapping[str, SnapshotCandidate]
+    # None marks an index number shared by several candidates (never answered)
+    by_index_number: Mapping[str, SnapshotCandidate | None]
+
+    def find(self, registration_number: str | None, index_number: str | None) -> SnapshotCandidate | None:
+        """Look up a candidate the way the result check matches identifiers."""
+        if registration_number:
+            candidate = self.by_registration_number.get(registration_number)
+            if candidate is not None and index_number and candidate.index_number != index_number:
+                return None
+            return candidate
+        if index_number:
+            return self.by_index_number.get(index_number)
+        return None
+
+    def response(self, candidate: SnapshotCandidate, blocks: ResultBlockSet) -> PublicResultResponse:
+        exam = self.exam
+        results = [
+            PublicSubjectResult(
+                subject_code=subject.subject_code,
+                subject_name=subject.subject_name,
+                grade=(
+                    None
+                    if subject.grade is None
+                    or blocks.is_blocked(exam.id, candidate.candidate_id, candidate.school_id, subject.subject_id)
+                    else subject.grade
+                ),
+            )
+            for subject in candidate.subjects
+        ]
+        return PublicResultResponse(
+            candidate_name=candidate.name,
+            index_number=candidate.index_number,
+            registration_number=candidate.registration_number,
+            exam_type=exam.exam_type,
+            exam_series=exam.exam_series,
+            year=exam.year,
+            results=results,
+            exam_published=exam.results_published,
+            school_name=candidate.school_name,
+            school_code=candidate.school_code,
+            programme_name=candidate.programme_name,
+            programme_code=candidate.programme_code,
+            photo_url=f"/api/v1/public/candidates/{candidate.candidate_id}/photo" if candidate.has_photo else None,
+        )
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value else value
+
+
+def _candidate_subjects(selections: list, results: list) -> tuple[SnapshotSubject, ...]:
+    """Match subject selections to results and order them (CORE, ELECTIVE, then by code)."""
+    results_by_id = {r.subject_id: r for r in results}
+    results_by_code = {}
+    for r in results:
+        if r.code:
+            results_by_code[r.code.upper()] = r
+            results_by_code[r.code.lower()] = r
+        if r.original_code:
+            results_by_code[r.original_code.upper()] = r
+            results_by_code[r.original_code.lower()] = r
+
+    items = []
+    for selection in selections:
+        result = results_by_id.get(selection.subject_id) if selection.subject_id else None
+        if not result and selection.subject_code:
+            result = (
+                results_by_code.get(selection.subject_code.upper()) or
+                results_by_code.get(selection.subject_code.lower())
+            )
+        if selection.subject_id is not None:
+            subject_type = selection.subject_type
+        else:
+            subject_type = result.subject_type if result else None
+        type_order = 0 if subject_type == SubjectType.CORE else (1 if subject_type == SubjectType.ELECTIVE else 2)
+
+        display_code = selection.original_code if selection.subject_id and selection.original_code else selection.subject_code
+        subject = SnapshotSubject(
+            subject_code=_intern(display_code),
+            subject_name=_intern(selection.subject_name),
+            subject_id=(selection.subject_id or result.subject_id) if result else None,
+            grade=result.grade if result else None,
+        )
+        items.append(((type_order, selection.subject_code), subject))
+
+    items.sort(key=lambda item: item[0])
+    return tuple(subject for _key, subject in items)
+
+
+async def build_published_results_snapshot(
+    session: AsyncSession, exam: PublishedExam, version: ResultsVersion
+) -> PublishedResultsSnapshot:
+    """Load every candidate, result and subject selection of the exam with three queries."""
+    results_stmt = (
+        select(
+            CandidateResult.registration_candidate_id,
+            CandidateResult.subject_id,
+            CandidateResult.grade,
+            Subject.code,
+            Subject.original_code,
+            Subject.subject_type,
+        )
+        .outerjoin(Subject, CandidateResult.subject_id == Subject.id)
+        .where(CandidateResult.registration_exam_id == exam.id)
+    )
+    results_by_candidate: dict[int, list] = defaultdict(list)
+    for row in (await session.execute(results_stmt)).all():
+        results_by_candidate[row.registration_candidate_id].append(row)
+
+    selections_stmt = (
+        select(
+            RegistrationSubjectSelection.registration_candidate_id,
+            RegistrationSubjectSelection.subject_id,
+            RegistrationSubjectSelection.subject_code,
+            RegistrationSubjectSelection.subject_name,
+            Subject.original_code,
+            Subject.subject_type,
+        )
+        .join(RegistrationCandidate, RegistrationSubjectSelection.registration_candidate_id == RegistrationCandidate.id)
+        .outerjoin(Subject, RegistrationSubjectSelection.subject_id == Subject.id)
+        .where(RegistrationCandidate.registration_exam_id == exam.id)
+    )
+    selections_by_candidate: dict[int, list] = defaultdict(list)
+    for row in (await session.execute(selections_stmt)).all():
+        selections_by_candidate[row.registration_candidate_id].append(row)
+
+    candidates_stmt = (
+        select(
+            RegistrationCandidate.id,
+            RegistrationCandidate.firstname,
+            RegistrationCandidate.othername,
+            RegistrationCandidate.lastname,
+            RegistrationCandidate.index_number,
+            RegistrationCandidate.registration_number,
+            RegistrationCandidate.school_id,
+            RegistrationCandidate.programme_code,
+            School.name.label("school_name"),
+            School.code.label("school_code"),
+            Programme.id.label("programme_id"),
+            Programme.name.label("programme_name"),
+            Programme.code.label("programme_code_resolved"),
+            RegistrationCandidatePhoto.id.label("photo_id"),
+        )
+        .outerjoin(School, RegistrationCandidate.school_id == School.id)
+        .outerjoin(Programme, RegistrationCandidate.programme_id == Programme.id)
+        .outerjoin(RegistrationCandidatePhoto, RegistrationCandidatePhoto.registration_candidate_id == RegistrationCandidate.id)
+        .where(RegistrationCandidate.registration_exam_id == exam.id)
+    )
+
+    by_registration_number: dict[str, SnapshotCandidate] = {}
+    by_index_number: dict[str, SnapshotCandidate | None] = {}
+    for row in (await session.execute(candidates_stmt)).all():
+        name_parts = [row.firstname, row.othername, row.lastname] if row.othername else [row.firstname, row.lastname]
+        candidate = SnapshotCandidate(
+            candidate_id=row.id,
+            name=" ".join(name_parts),
+            index_number=row.index_number,
+            registration_number=row.registration_number,
+            school_id=row.school_id,
+            school_name=_intern(row.school_name),
+            school_code=_intern(row.school_code),
+            # Programme relationship first, stored programme_code as fallback
+            programme_name=_intern(row.programme_name),
+            programme_code=_intern(row.programme_code_resolved if row.programme_id is not None else row.programme_code),
+            has_photo=row.photo_id is not None,
+            subjects=_candidate_subjects(selections_by_candidate.get(row.id, []), results_by_candidate.get(row.id, [])),
+        )
+        by_registration_number[candidate.registration_number] = candidate
+        if candidate.index_number:
+            by_index_number[candidate.index_number] = None if candidate.index_number in by_index_number else candidate
+
+    logger.info(
+        "Published results snapshot built",
+        extra={"exam_id": exam.id, "candidate_count": len(by_registration_number)},
+    )
+    return PublishedResultsSnapshot(
+        exam=exam,
+        version=version,
+        by_registration_number=by_registration_number,
+        by_index_number=by_index_number,
+    )
+
+
+async def _load_blocks(session: AsyncSession, exam_id: int) -> ResultBlockSet:
+    stmt = select(ResultBlock).where(and_(ResultBlock.registration_exam_id == exam_id, ResultBlock.is_active == True))
+    return ResultBlockSet(list((await session.execute(stmt)).scalars().all()))
+
+
+async def published_results_version(session: AsyncSession, exam_id: int) -> tuple[ResultsVersion, BlocksVersion]:
+    """
+    One query over everything a snapshot is built from, to detect changes.
+
+    Row counts catch deletions (candidates, selections, photos, results); latest updates
+    catch edits. Schools, programmes and subjects are shared across exams and small, so
+    their latest update is taken over the whole table.
+    """
+
+    def scalar(column, model, exam_column):
+        return select(column).select_from(model).where(exam_column == exam_id).scalar_subquery()
+
+    def candidate_scalar(column, model, candidate_column):
+        return (
+            select(column)
+            .select_from(model)
+            .join(RegistrationCandidate, candidate_column == RegistrationCandidate.id)
+            .where(RegistrationCandidate.registration_exam_id == exam_id)
+            .scalar_subquery()
+        )
+
+    stmt = select(
+        scalar(RegistrationExam.results_published_at, RegistrationExam, RegistrationExam.id),
+        scalar(func.count(CandidateResult.id), CandidateResult, CandidateResult.registration_exam_id),
+        scalar(func.max(CandidateResult.updated_at), CandidateResult, CandidateResult.registration_exam_id),
+        scalar(func.count(RegistrationCandidate.id), RegistrationCandidate, RegistrationCandidate.registration_exam_id),
+        scalar(func.max(RegistrationCandidate.updated_at), RegistrationCandidate, RegistrationCandidate.registration_exam_id),
+        candidate_scalar(
+            func.count(RegistrationSubjectSelection.id),
+            RegistrationSubjectSelection,
+            RegistrationSubjectSelection.registration_candidate_id,
+        ),
+        candidate_scalar(
+            func.max(RegistrationSubjectSelection.updated_at),
+            RegistrationSubjectSelection,
+            RegistrationSubjectSelection.registration_candidate_id,
+        ),
+        candidate_scalar(
+            func.count(RegistrationCandidatePhoto.id),
+            RegistrationCandidatePhoto,
+            RegistrationCandidatePhoto.registration_candidate_id,
+        ),
+        candidate_scalar(
+            func.max(RegistrationCandidatePhoto.updated_at),
+            RegistrationCandidatePhoto,
+            RegistrationCandidatePhoto.registration_candidate_id,
+        ),
+        select(func.max(School.updated_at)).scalar_subquery(),
+        select(func.max(Programme.updated_at)).scalar_subquery(),
+        select(func.max(Subject.updated_at)).scalar_subquery(),
+        scalar(func.count(ResultBlock.id), ResultBlock, ResultBlock.registration_exam_id),
+        scalar(func.max(ResultBlock.updated_at), ResultBlock, ResultBlock.registration_exam_id),
+    )
+    row = (await session.execute(stmt)).one()
+    results_version = (
+        row[0],
+        (int(row[1] or 0), row[2]),
+        (int(row[3] or 0), row[4]),
+        (int(row[5] or 0), row[6]),
+        (int(row[7] or 0), row[8]),
+        row[9],
+        row[10],
+        row[11],
+    )
+    return results_version, (int(row[12] or 0), row[13])
+
+
+@dataclass
+class _CacheSlot:
+    snapshot: PublishedResultsSnapshot
+    blocks: ResultBlockSet
+    blocks_version: BlocksVersion
+    checked_at: float
+
+
+@dataclass
+class _ExamDirectorySlot:
+    exams: list[PublishedExam]
+    checked_at: float
+
+
+_cache: dict[int, _CacheSlot] = {}
+_build_locks: dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+_exam_directory: dict[str, _ExamDirectorySlot] = {}
+_DIRECTORY_KEY = "exams"
+
+
+async def resolve_exam(session: AsyncSession, exam_type: str, exam_series: str, year: int) -> PublishedExam | None:
+    """Match the requested exam against a cached directory of all exams (publication included)."""
+    now = time.monotonic()
+    slot = _exam_directory.get(_DIRECTORY_KEY)
+    if slot is None or now - slot.checked_at >= settings.published_results_snapshot_ttl_seconds:
+        stmt = select(
+            RegistrationExam.id,
+            RegistrationExam.exam_type,
+            RegistrationExam.exam_series,
+            RegistrationExam.year,
+            RegistrationExam.results_published,
+        )
+        exams = [PublishedExam(*row) for row in (await session.execute(stmt)).all()]
+        slot = _exam_directory[_DIRECTORY_KEY] = _ExamDirectorySlot(exams=exams, checked_at=now)
+
+    exams_for_year = [exam for exam in slot.exams if exam.year == year]
+    return match_exam((exam_type.strip(), exam_series.strip(), year), exams_for_year, public=True)
+
+
+async def get_published_results(
+    session: AsyncSession, exam: PublishedExam
+) -> tuple[PublishedResultsSnapshot, ResultBlockSet]:
+    """Snapshot and active blocks for a published exam, rebuilt only when they changed."""
+    slot = _cache.get(exam.id)
+    if slot is not None and time.monotonic() - slot.checked_at < settings.published_results_snapshot_ttl_seconds:
+        return slot.snapshot, slot.blocks
+
+    # One build per exam at a time; concurrent checks wait for it instead of piling on
+    async with _build_locks[exam.id]:
+        now = time.monotonic()
+        slot = _cache.get(exam.id)
+        if slot is not None and now - slot.checked_at < settings.published_results_snapshot_ttl_seconds:
+            return slot.snapshot, slot.blocks
+
+        results_version, blocks_version = await published_results_version(session, exam.id)
+        if slot is not None and slot.snapshot.version == results_version:
+            if slot.blocks_version != blocks_version:
+                slot.blocks = await _load_blocks(session, exam.id)
+                slot.blocks_version = blocks_version
+            slot.checked_at = now
+            return slot.snapshot, slot.blocks
+
+        snapshot = await build_published_results_snapshot(session, exam, results_version)
+        blocks = await _load_blocks(session, exam.id)
+        _cache[exam.id] = _CacheSlot(snapshot=snapshot, blocks=blocks, blocks_version=blocks_version, checked_at=now)
+        return snapshot, blocks
+
+
+def invalidate_published_results(exam_id: int | None = None) -> None:
+    """Drop the snapshot of one exam (or all) and the exam directory in this process."""
+    _exam_directory.clear()
+    if exam_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(exam_id, None)
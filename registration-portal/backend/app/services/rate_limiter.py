@@ -1,90 +1,180 @@
-"""Rate limiting service for API keys."""
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
-from uuid import UUID
-
-from fastapi import HTTPException, status
+"""Rate limiting shared by all API workers.
+
+Limits use GCRA (generic cell rate algorithm): each key stores a single number, its
+theoretical arrival time (TAT). A limit of ``limit`` requests per ``period`` spaces
+requests ``period / limit`` seconds apart and allows a burst of up to ``limit``; every
+check reads and writes that one value, so cost is O(1) no matter how busy the key is.
+
+The TAT lives in a store shared by the worker processes:
+
+- ``sqlite`` (default): a small SQLite file (``rate_limit_sqlite_path``) updated under
+  ``BEGIN IMMEDIATE``, so all uvicorn/gunicorn workers on a host enforce one budget.
+- ``memory``: a per-process dict, for single-worker and development setups.
+"""
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the full budget is available again
+    retry_after: float  # Seconds until the next request is allowed (0 when allowed)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """``X-RateLimit-*`` headers (plus ``Retry-After`` when denied)."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _gcra(tat: float | None, now: float, limit: int, period: float) -> tuple[float | None, RateLimitResult]:
+    """Apply one request to a stored TAT; returns (new TAT or None if denied, result)."""
+    interval = period / limit
+    new_tat = max(tat or now, now) + interval
+    allow_at = new_tat - period
+    if allow_at > now:
+        current = max(tat or now, now)
+        return None, RateLimitResult(
+            allowed=False,
+            limit=limit,
+            remaining=0,
+            reset_after=current - now,
+            retry_after=allow_at - now,
+        )
+    remaining = int((period - (new_tat - now)) / interval + 1e-9)
+    return new_tat, RateLimitResult(
+        allowed=True,
+        limit=limit,
+        remaining=max(0, remaining),
+        reset_after=new_tat - now,
+        retry_after=0.0,
+    )
+
+
+class RateLimitStore(Protocol):
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult: ...
+
+
+class MemoryRateLimitStore:
+    """Per-process TATs; keys whose budget is fully restored are dropped periodically."""
+
+    _PRUNE_EVERY = 1000
+
+    def __init__(self) -> None:
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        now = time.time()
+        with self._lock:
+            new_tat, result = _gcra(self._tats.get(key), now, limit, period)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+            self._hits += 1
+            if self._hits % self._PRUNE_EVERY == 0:
+                self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+        return result
+
+
+class SQLiteRateLimitStore:
+    """TATs in a SQLite file shared by every worker process on the host."""
+
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        self._hits = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            new_tat, result = _gcra(row[0] if row else None, now, limit, period)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat),
+                )
+            self._hits += 1
+            if self._hits % self._PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Build the store selected by ``rate_limit_backend`` (falls back to memory on error)."""
+    if settings.rate_limit_backend == "sqlite":
+        try:
+            return SQLiteRateLimitStore(settings.rate_limit_sqlite_path)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit store {settings.rate_limit_sqlite_path} unavailable, using memory: {e}")
+    return MemoryRateLimitStore()
 
 
 class RateLimiter:
-    """In-memory rate limiter using sliding window approach."""
-
-    def __init__(self):
-        # Store request timestamps per API key
-        # Format: {api_key_id: [timestamp1, timestamp2, ...]}
-        self._requests: Dict[UUID, list[datetime]] = {}
-        # Store rate limits per API key
-        self._rate_limits: Dict[UUID, int] = {}
-        # Store reset times per API key
-        self._reset_times: Dict[UUID, datetime] = {}
-
-    def _cleanup_old_requests(self, api_key_id: UUID, window_minutes: int):
-        """Remove requests outside the time window."""
-        if api_key_id not in self._requests:
-            return
-
-        cutoff = datetime.utcnow() - timedelta(minutes=window_minutes)
-        self._requests[api_key_id] = [
-            ts for ts in self._requests[api_key_id] if ts > cutoff
-        ]
-
-    def check_rate_limit(
-        self,
-        api_key_id: UUID,
-        rate_limit_per_minute: int,
-        reset_at: datetime | None = None,
-    ) -> Tuple[bool, int]:
-        """
-        Check if request is within rate limit.
-
-        Args:
-            api_key_id: API key ID
-            rate_limit_per_minute: Rate limit per minute
-            reset_at: When to reset the counter (from database)
-
-        Returns:
-            Tuple of (is_allowed, remaining_requests)
-        """
-        now = datetime.utcnow()
-
-        # Clean up old requests
-        self._cleanup_old_requests(api_key_id, 1)  # 1 minute window
-
-        # Check if we need to reset based on database reset_at time
-        if reset_at and now >= reset_at:
-            # Reset if database says so
-            if api_key_id in self._requests:
-                del self._requests[api_key_id]
-
-        # Initialize if needed
-        if api_key_id not in self._requests:
-            self._requests[api_key_id] = []
-            self._rate_limits[api_key_id] = rate_limit_per_minute
-
-        # Count requests in the last minute
-        request_count = len(self._requests[api_key_id])
-
-        # Check if limit exceeded
-        if request_count >= rate_limit_per_minute:
-            remaining = 0
-            return False, remaining
-
-        # Add current request
-        self._requests[api_key_id].append(now)
-        remaining = rate_limit_per_minute - (request_count + 1)
-
-        return True, remaining
-
-    def get_remaining_requests(self, api_key_id: UUID, rate_limit_per_minute: int) -> int:
-        """Get remaining requests for an API key."""
-        self._cleanup_old_requests(api_key_id, 1)
-
-        if api_key_id not in self._requests:
-            return rate_limit_per_minute
-
-        request_count = len(self._requests[api_key_id])
-        return max(0, rate_limit_per_minute - request_count)
+    """GCRA rate limiter over a shared store; the store is opened on first use."""
+
+    def __init__(self, store: RateLimitStore | None = None):
+        self._store = store
+
+    @property
+    def store(self) -> RateLimitStore:
+        if self._store is None:
+            self._store = create_rate_limit_store()
+        return self._store
+
+    async def hit(self, key: str, limit: int, period_seconds: float = 60) -> RateLimitResult:
+        """Count one request against ``key`` (``limit`` requests per ``period_seconds``)."""
+        store = self.store
+        if isinstance(store, MemoryRateLimitStore):
+            return store.hit(key, limit, period_seconds)
+        # SQLite may wait on another worker's write lock; keep that off the event loop
+        return await asyncio.to_thread(store.hit, key, limit, period_seconds)
 
 
 # Global rate limiter instance
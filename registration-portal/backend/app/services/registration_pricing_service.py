@@ -1,7 +1,8 @@
 """Service for calculating registration pricing for private candidates."""
 
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterable
 
 from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -427,6 +428,282 @@ async def get_pricing_model_preference(
     )
 
 
+def _pricing_levels(exam_id: int | None, registration_type: str | None) -> list[tuple[int | None, str | None]]:
+    """(exam_id, registration_type) lookups in precedence order: exam+type, exam, global+type, global."""
+    levels: list[tuple[int | None, str | None]] = []
+    if exam_id and registration_type:
+        levels.append((exam_id, registration_type))
+    if exam_id:
+        levels.append((exam_id, None))
+    if registration_type:
+        levels.append((None, registration_type))
+    levels.append((None, None))
+    return levels
+
+
+def _level_conditions(model, exam_id: int | None, registration_type: str | None) -> list:
+    """Conditions matching the active rows of a pricing table at any of the pricing levels."""
+    exam_condition = (
+        or_(model.exam_id == exam_id, model.exam_id.is_(None)) if exam_id else model.exam_id.is_(None)
+    )
+    type_condition = (
+        or_(model.registration_type == registration_type, model.registration_type.is_(None))
+        if registration_type
+        else model.registration_type.is_(None)
+    )
+    return [exam_condition, type_condition, model.is_active == True]
+
+
+def _row_level(row) -> tuple[int | None, str | None]:
+    return row.exam_id, getattr(row.registration_type, "value", row.registration_type)
+
+
+async def get_programme_prices(
+    session: AsyncSession,
+    programme_ids: list[int],
+    exam_id: int | None = None,
+    registration_type: str | None = None
+) -> dict[int, Decimal]:
+    """
+    Get prices for programmes (same precedence as get_programme_price) in one query.
+
+    Args:
+        session: Database session
+        programme_ids: List of programme IDs
+        exam_id: Exam ID (None for global pricing)
+        registration_type: Registration type (free_tvet, private, referral) or None for all types
+
+    Returns:
+        Dictionary mapping programme_id to price
+    """
+    if not programme_ids:
+        return {}
+
+    stmt = select(ProgrammePricing).where(
+        and_(
+            ProgrammePricing.programme_id.in_(programme_ids),
+            *_level_conditions(ProgrammePricing, exam_id, registration_type),
+        )
+    )
+    result = await session.execute(stmt)
+    by_level: dict[tuple, dict[int, Decimal]] = {}
+    for pricing in result.scalars().all():
+        by_level.setdefault(_row_level(pricing), {}).setdefault(pricing.programme_id, Decimal(str(pricing.price)))
+
+    prices: dict[int, Decimal] = {}
+    for level in reversed(_pricing_levels(exam_id, registration_type)):
+        prices.update(by_level.get(level, {}))
+    return prices
+
+
+async def get_tiered_pricing_levels(
+    session: AsyncSession,
+    exam_id: int | None = None,
+    registration_type: str | None = None
+) -> list[list[tuple[int, int | None, Decimal]]]:
+    """
+    Get all active pricing tiers in one query, grouped by pricing level.
+
+    Returns:
+        One list of (min_subjects, max_subjects, price) per pricing level in precedence order,
+        each ordered by min_subjects descending (as get_tiered_pricing picks them)
+    """
+    stmt = (
+        select(RegistrationTieredPricing)
+        .where(and_(*_level_conditions(RegistrationTieredPricing, exam_id, registration_type)))
+        .order_by(RegistrationTieredPricing.min_subjects.desc())
+    )
+    result = await session.execute(stmt)
+    levels = _pricing_levels(exam_id, registration_type)
+    tiers: list[list[tuple[int, int | None, Decimal]]] = [[] for _ in levels]
+    for tier in result.scalars().all():
+        level = _row_level(tier)
+        if level in levels:
+            tiers[levels.index(level)].append((tier.min_subjects, tier.max_subjects, Decimal(str(tier.price))))
+    return tiers
+
+
+@dataclass
+class RegistrationPriceBook:
+    """
+    Prices for one exam and registration type, loaded once by ``load_price_book`` so any
+    number of candidates can be priced in memory.
+    """
+
+    exam_id: int | None
+    registration_type: str | None
+    pricing_model: str | None
+    pricing_model_error: ValueError | None = None
+    application_fee: Decimal = Decimal("0")
+    subject_prices: dict[int, Decimal] = field(default_factory=dict)
+    programme_prices: dict[int, Decimal] = field(default_factory=dict)
+    tiers: list[list[tuple[int, int | None, Decimal]]] = field(default_factory=list)
+
+    def tiered_price(self, subject_count: int) -> Decimal | None:
+        for level_tiers in self.tiers:
+            for min_subjects, max_subjects, price in level_tiers:
+                if min_subjects <= subject_count and (max_subjects is None or max_subjects >= subject_count):
+                    return price
+        return None
+
+    def calculate(
+        self,
+        programme_id: int | None,
+        subject_ids: list[int],
+        include_application_fee: bool = True,
+    ) -> dict[str, Any]:
+        """
+        Price one candidate of this exam and registration type.
+
+        Returns:
+            Same breakdown as ``calculate_registration_amount``
+
+        Raises:
+            ValueError: If pricing is not configured for the pricing model
+        """
+        if self.pricing_model_error is not None:
+            raise self.pricing_model_error
+
+        pricing_model = self.pricing_model
+        exam_id = self.exam_id
+        registration_type_str = self.registration_type
+        application_fee = self.application_fee if include_application_fee else Decimal("0")
+
+        # Check if candidate is free_tvet and pricing model is per_programme
+        is_free_tvet = registration_type_str == RegistrationType.FREE_TVET.value if registration_type_str else False
+
+        has_pricing = False
+        subject_price: Decimal | None = None
+        tiered_price: Decimal | None = None
+        programme_price: Decimal | None = None
+        subject_count = len(subject_ids)
+
+        # Validate pricing model is explicit (not "auto")
+        if pricing_model == "auto":
+            raise ValueError(
+                "Pricing model 'auto' is not allowed. Please configure an explicit pricing model "
+                "(per_subject, tiered, or per_programme)."
+            )
+
+        # For free_tvet candidates with per_programme pricing model
+        use_programme_pricing = False
+        if pricing_model == "per_programme":
+            if not is_free_tvet:
+                raise ValueError(
+                    f"Per-programme pricing model is only valid for FREE TVET candidates. "
+                    f"Current registration type: {registration_type_str}. "
+                    "Please use 'per_subject' or 'tiered' pricing model instead."
+                )
+            programme_price = self.programme_prices.get(programme_id) if programme_id else None
+            if programme_price is None:
+                raise ValueError(
+                    f"Per-programme pricing not configured for programme_id={programme_id}, "
+                    f"exam_id={exam_id}, registration_type={registration_type_str}. "
+                    "Please configure programme pricing or use a different pricing model."
+                )
+            has_pricing = True
+            use_programme_pricing = True
+
+        # For non-programme pricing, use per_subject or tiered
+        if not use_programme_pricing:
+            if pricing_model == "per_subject":
+                prices = {sid: self.subject_prices[sid] for sid in subject_ids if sid in self.subject_prices}
+                if len(prices) == 0:
+                    raise ValueError(
+                        f"Per-subject pricing not configured for exam_id={exam_id}, "
+                        f"registration_type={registration_type_str}. "
+                        "Please configure subject pricing."
+                    )
+                subject_price = sum(prices.values())
+                has_pricing = True
+            elif pricing_model == "tiered":
+                tiered_price = self.tiered_price(subject_count)
+                if tiered_price is None:
+                    raise ValueError(
+                        f"Tiered pricing not configured for subject_count={subject_count}, "
+                        f"exam_id={exam_id}, registration_type={registration_type_str}. "
+                        "Please configure tiered pricing."
+                    )
+                has_pricing = True
+            else:
+                raise ValueError(
+                    f"Invalid pricing model: {pricing_model}. "
+                    "Must be one of: per_subject, tiered, per_programme"
+                )
+
+        # Calculate total
+        if programme_price is not None:
+            total = application_fee + programme_price
+        else:
+            subject_or_tiered = tiered_price if tiered_price is not None else (subject_price or Decimal("0"))
+            total = application_fee + subject_or_tiered
+
+        return {
+            "application_fee": application_fee,
+            "subject_price": subject_price,
+            "tiered_price": tiered_price,
+            "programme_price": programme_price,
+            "total": total,
+            "pricing_model_used": pricing_model,
+            "has_pricing": has_pricing,
+        }
+
+
+async def load_price_book(
+    session: AsyncSession,
+    exam_id: int | None,
+    registration_type: str | None,
+    subject_ids: Iterable[int] = (),
+    programme_ids: Iterable[int] = (),
+    pricing_model: str | None = None,
+) -> RegistrationPriceBook:
+    """
+    Load the prices needed to price candidates of an exam and registration type.
+
+    Only the prices the pricing model uses are loaded: subject prices for ``subject_ids``
+    (per_subject), all tiers (tiered) or programme prices for ``programme_ids``
+    (per_programme). A missing pricing model preference is raised when a candidate is priced.
+
+    Args:
+        session: Database session
+        exam_id: Exam ID
+        registration_type: Registration type (free_tvet, private, referral)
+        subject_ids: Subjects the candidates being priced have selected
+        programme_ids: Programmes of the candidates being priced
+        pricing_model: Explicit pricing model (defaults to the configured preference)
+
+    Returns:
+        RegistrationPriceBook
+    """
+    registration_type = getattr(registration_type, "value", registration_type)
+    pricing_model_error = None
+    if pricing_model is None:
+        try:
+            pricing_model = await get_pricing_model_preference(session, exam_id, registration_type)
+        except ValueError as e:
+            pricing_model_error = e
+
+    book = RegistrationPriceBook(
+        exam_id=exam_id,
+        registration_type=registration_type,
+        pricing_model=pricing_model,
+        pricing_model_error=pricing_model_error,
+    )
+    if pricing_model_error is not None:
+        return book
+
+    book.application_fee = await get_application_fee(session, exam_id, registration_type)
+    if pricing_model == "per_subject":
+        book.subject_prices = await get_subject_prices(session, sorted(set(subject_ids)), exam_id, registration_type)
+    elif pricing_model == "tiered":
+        book.tiers = await get_tiered_pricing_levels(session, exam_id, registration_type)
+    elif pricing_model == "per_programme":
+        book.programme_prices = await get_programme_prices(
+            session, sorted({pid for pid in programme_ids if pid}), exam_id, registration_type
+        )
+    return book
+
+
 async def calculate_registration_amount(
     session: AsyncSession,
     candidate_id: int,
@@ -470,116 +747,21 @@ async def calculate_registration_amount(
     if not candidate:
         raise ValueError(f"Candidate {candidate_id} not found")
 
-    exam_id = candidate.registration_exam_id
-
-    # Get registration type for filtering pricing
-    registration_type_str = candidate.registration_type
-    # Convert enum to string value if it's an enum
-    if isinstance(registration_type_str, RegistrationType):
-        registration_type_str = registration_type_str.value
-
-    # Get pricing model preference for this registration type
-    if pricing_model is None:
-        pricing_model = await get_pricing_model_preference(session, exam_id, registration_type_str)
-
-    # Get application fee
-    application_fee = Decimal("0")
-    if include_application_fee:
-        registration_type_for_fee = candidate.registration_type
-        # Convert enum to string value if it's an enum
-        if isinstance(registration_type_for_fee, RegistrationType):
-            registration_type_for_fee = registration_type_for_fee.value
-        application_fee = await get_application_fee(session, exam_id, registration_type_for_fee)
-
-    # Check if candidate is free_tvet and pricing model is per_programme
-    is_free_tvet = registration_type_str == RegistrationType.FREE_TVET.value if registration_type_str else False
-    programme_id = candidate.programme_id
-
-    # Check if pricing is configured for this exam
-    has_pricing = False
-    subject_price: Decimal | None = None
-    tiered_price: Decimal | None = None
-    programme_price: Decimal | None = None
-
     # Get subject IDs
     subject_ids = [
         sel.subject_id for sel in candidate.subject_selections
         if sel.subject_id is not None
     ]
-    subject_count = len(subject_ids)
 
-    # Validate pricing model is explicit (not "auto")
-    if pricing_model == "auto":
-        raise ValueError(
-            "Pricing model 'auto' is not allowed. Please configure an explicit pricing model "
-            "(per_subject, tiered, or per_programme)."
-        )
-
-    # For free_tvet candidates with per_programme pricing model
-    use_programme_pricing = False
-    if pricing_model == "per_programme":
-        if not is_free_tvet:
-            raise ValueError(
-                f"Per-programme pricing model is only valid for FREE TVET candidates. "
-                f"Current registration type: {registration_type_str}. "
-                "Please use 'per_subject' or 'tiered' pricing model instead."
-            )
-        programme_price = await get_programme_price(session, programme_id, exam_id, registration_type_str)
-        if programme_price is None:
-            raise ValueError(
-                f"Per-programme pricing not configured for programme_id={programme_id}, "
-                f"exam_id={exam_id}, registration_type={registration_type_str}. "
-                "Please configure programme pricing or use a different pricing model."
-            )
-        has_pricing = True
-        use_programme_pricing = True
-
-    # For non-programme pricing, use per_subject or tiered
-    if not use_programme_pricing:
-        if pricing_model == "per_subject":
-            prices = await get_subject_prices(session, subject_ids, exam_id, registration_type_str)
-            if len(prices) == 0:
-                raise ValueError(
-                    f"Per-subject pricing not configured for exam_id={exam_id}, "
-                    f"registration_type={registration_type_str}. "
-                    "Please configure subject pricing."
-                )
-            subject_price = sum(prices.values())
-            has_pricing = True
-        elif pricing_model == "tiered":
-            tiered_price = await get_tiered_pricing(session, subject_count, exam_id, registration_type_str)
-            if tiered_price is None:
-                raise ValueError(
-                    f"Tiered pricing not configured for subject_count={subject_count}, "
-                    f"exam_id={exam_id}, registration_type={registration_type_str}. "
-                    "Please configure tiered pricing."
-                )
-            has_pricing = True
-        else:
-            raise ValueError(
-                f"Invalid pricing model: {pricing_model}. "
-                "Must be one of: per_subject, tiered, per_programme"
-            )
-
-    # Set pricing_model_used
-    pricing_model_used = pricing_model
-
-    # Calculate total
-    if programme_price is not None:
-        total = application_fee + programme_price
-    else:
-        subject_or_tiered = tiered_price if tiered_price is not None else (subject_price or Decimal("0"))
-        total = application_fee + subject_or_tiered
-
-    return {
-        "application_fee": application_fee,
-        "subject_price": subject_price,
-        "tiered_price": tiered_price,
-        "programme_price": programme_price,
-        "total": total,
-        "pricing_model_used": pricing_model_used,
-        "has_pricing": has_pricing,
-    }
+    price_book = await load_price_book(
+        session,
+        candidate.registration_exam_id,
+        candidate.registration_type,
+        subject_ids=subject_ids,
+        programme_ids=[candidate.programme_id] if candidate.programme_id else [],
+        pricing_model=pricing_model,
+    )
+    return price_book.calculate(candidate.programme_id, subject_ids, include_application_fee)
 
 
 async def calculate_price_difference(
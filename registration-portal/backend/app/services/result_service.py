@@ -1,4 +1,5 @@
 """Service for handling results management logic."""
+import logging
 from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID
@@ -18,6 +19,13 @@ from app.models import (
     PortalUser,
     Grade,
 )
+from app.services.published_results_snapshot import (
+    PublishedExam,
+    get_published_results,
+    invalidate_published_results,
+)
+
+logger = logging.getLogger(__name__)
 
 
 async def upload_results_bulk(
@@ -212,6 +220,7 @@ async def upload_results_bulk(
             failed += 1
 
     await session.commit()
+    invalidate_published_results(exam_id)
 
     return {
         "total_processed": len(results),
@@ -281,6 +290,7 @@ async def publish_results_bulk(
         result.updated_at = now
 
     await session.commit()
+    invalidate_published_results(exam_id)
 
     return {
         "total_processed": len(results),
@@ -323,6 +333,15 @@ async def publish_exam_results(
     exam.updated_at = datetime.utcnow()
 
     await session.commit()
+    invalidate_published_results(exam_id)
+    # Warm this worker's results snapshot now rather than on the first public check
+    try:
+        await get_published_results(
+            session,
+            PublishedExam(exam.id, exam.exam_type, exam.exam_series, exam.year, exam.results_published),
+        )
+    except Exception as e:
+        logger.warning(f"Could not build results snapshot for exam {exam_id}: {e}", exc_info=True)
     await session.refresh(exam, ["registration_period"])
 
     return exam
@@ -386,6 +405,7 @@ async def unpublish_results_bulk(
         result.updated_at = now
 
     await session.commit()
+    invalidate_published_results(exam_id)
 
     return {
         "total_processed": len(results),
@@ -425,6 +445,7 @@ async def unpublish_exam_results(session: AsyncSession, exam_id: int) -> Registr
     exam.updated_at = datetime.utcnow()
 
     await session.commit()
+    invalidate_published_results(exam_id)
     await session.refresh(exam, ["registration_period"])
 
     return exam
@@ -669,6 +690,7 @@ async def create_result_block(
 
     session.add(new_block)
     await session.commit()
+    invalidate_published_results(exam_id)
     await session.refresh(new_block)
 
     return new_block
@@ -707,6 +729,7 @@ async def unblock_result(
     candidate_result.updated_at = datetime.utcnow()
 
     await session.commit()
+    invalidate_published_results(candidate_result.registration_exam_id)
     await session.refresh(candidate_result)
 
     return candidate_result
@@ -1,6 +1,12 @@
-"""Service for generating aggregated invoices for school candidates."""
+"""Service for generating aggregated invoices for school candidates.
+
+Candidates are priced in bulk: their subject selections are read in one query and every
+candidate is priced in memory from a single ``RegistrationPriceBook`` for the exam and
+registration type.
+"""
 
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
@@ -8,34 +14,96 @@ from typing import Any
 
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.models import (
     RegistrationCandidate,
     RegistrationExam,
+    RegistrationSubjectSelection,
     School,
     Programme,
     RegistrationType,
 )
-from app.services.registration_pricing_service import calculate_registration_amount
+from app.services.registration_pricing_service import load_price_book
 from app.services.pdf_generator import PdfGenerator, render_html
 
 
-async def calculate_candidate_amount(
-    session: AsyncSession, candidate: RegistrationCandidate
-) -> Decimal:
+@dataclass
+class _PricedCandidate:
+    school_id: int | None
+    programme_id: int | None
+    subject_ids: list[int] = field(default_factory=list)
+    amount: Decimal = Decimal("0")
+
+
+async def _get_exam(session: AsyncSession, exam_id: int) -> RegistrationExam:
+    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
+    exam_result = await session.execute(exam_stmt)
+    exam = exam_result.scalar_one_or_none()
+    if not exam:
+        raise ValueError("Registration exam not found")
+    return exam
+
+
+async def _price_candidates(
+    session: AsyncSession,
+    exam_id: int,
+    registration_type: str,
+    school_id: int | None = None,
+) -> list[_PricedCandidate]:
     """
-    Calculate total registration amount for a candidate.
+    Price every candidate of an exam and registration type (optionally one school's).
 
-    Args:
-        session: Database session
-        candidate: RegistrationCandidate instance
+    Candidates and their subject selections are fetched in one query and priced from a
+    single price book.
 
-    Returns:
-        Total amount as Decimal
+    Raises:
+        ValueError: If pricing is not configured for the exam's pricing model
     """
-    result = await calculate_registration_amount(session, candidate.id)
-    return result["total"]
+    conditions = [
+        RegistrationCandidate.registration_exam_id == exam_id,
+        RegistrationCandidate.registration_type == registration_type,
+    ]
+    if school_id is not None:
+        conditions.append(RegistrationCandidate.school_id == school_id)
+    else:
+        conditions.append(RegistrationCandidate.school_id.isnot(None))  # Only candidates with schools
+
+    stmt = (
+        select(
+            RegistrationCandidate.id,
+            RegistrationCandidate.school_id,
+            RegistrationCandidate.programme_id,
+            RegistrationSubjectSelection.subject_id,
+        )
+        .outerjoin(
+            RegistrationSubjectSelection,
+            RegistrationSubjectSelection.registration_candidate_id == RegistrationCandidate.id,
+        )
+        .where(and_(*conditions))
+    )
+    result = await session.execute(stmt)
+
+    candidates: dict[int, _PricedCandidate] = {}
+    for candidate_id, candidate_school_id, programme_id, subject_id in result.all():
+        candidate = candidates.get(candidate_id)
+        if candidate is None:
+            candidate = candidates[candidate_id] = _PricedCandidate(candidate_school_id, programme_id)
+        if subject_id is not None:
+            candidate.subject_ids.append(subject_id)
+
+    if not candidates:
+        return []
+
+    price_book = await load_price_book(
+        session,
+        exam_id,
+        registration_type,
+        subject_ids={sid for c in candidates.values() for sid in c.subject_ids},
+        programme_ids={c.programme_id for c in candidates.values()},
+    )
+    for candidate in candidates.values():
+        candidate.amount = price_book.calculate(candidate.programme_id, candidate.subject_ids)["total"]
+    return list(candidates.values())
 
 
 async def aggregate_candidates_by_examination(
@@ -56,37 +124,8 @@ async def aggregate_candidates_by_examination(
     Returns:
         Dictionary with exam details, candidate count, and total amount
     """
-    # Query exam
-    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
-    exam_result = await session.execute(exam_stmt)
-    exam = exam_result.scalar_one_or_none()
-    if not exam:
-        raise ValueError("Registration exam not found")
-
-    # Query candidates
-    candidate_stmt = (
-        select(RegistrationCandidate)
-        .where(
-            and_(
-                RegistrationCandidate.school_id == school_id,
-                RegistrationCandidate.registration_exam_id == exam_id,
-                RegistrationCandidate.registration_type == registration_type,
-            )
-        )
-        .options(
-            selectinload(RegistrationCandidate.subject_selections),
-            selectinload(RegistrationCandidate.exam),
-        )
-    )
-
-    candidate_result = await session.execute(candidate_stmt)
-    candidates = candidate_result.scalars().all()
-
-    # Calculate totals
-    total_amount = Decimal("0")
-    for candidate in candidates:
-        amount = await calculate_candidate_amount(session, candidate)
-        total_amount += amount
+    exam = await _get_exam(session, exam_id)
+    candidates = await _price_candidates(session, exam_id, registration_type, school_id)
 
     return {
         "exam_id": exam.id,
@@ -94,7 +133,7 @@ async def aggregate_candidates_by_examination(
         "exam_series": exam.exam_series,
         "year": exam.year,
         "candidate_count": len(candidates),
-        "total_amount": total_amount,
+        "total_amount": sum((c.amount for c in candidates), Decimal("0")),
     }
 
 
@@ -116,56 +155,30 @@ async def aggregate_candidates_by_examination_and_programme(
     Returns:
         Dictionary with exam details, total candidate count, total amount, and programme breakdown
     """
-    # Query exam
-    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
-    exam_result = await session.execute(exam_stmt)
-    exam = exam_result.scalar_one_or_none()
-    if not exam:
-        raise ValueError("Registration exam not found")
-
-    # Query candidates with programme
-    candidate_stmt = (
-        select(RegistrationCandidate)
-        .where(
-            and_(
-                RegistrationCandidate.school_id == school_id,
-                RegistrationCandidate.registration_exam_id == exam_id,
-                RegistrationCandidate.registration_type == registration_type,
-            )
-        )
-        .options(
-            selectinload(RegistrationCandidate.subject_selections),
-            selectinload(RegistrationCandidate.exam),
-            selectinload(RegistrationCandidate.programme),
-        )
-    )
-
-    candidate_result = await session.execute(candidate_stmt)
-    candidates = candidate_result.scalars().all()
+    exam = await _get_exam(session, exam_id)
+    candidates = await _price_candidates(session, exam_id, registration_type, school_id)
 
     # Group by programme
     programme_totals: dict[int, dict[str, Any]] = defaultdict(
-        lambda: {"candidates": [], "total_amount": Decimal("0"), "programme": None}
+        lambda: {"candidate_count": 0, "total_amount": Decimal("0")}
     )
-
     for candidate in candidates:
-        programme_id = candidate.programme_id if candidate.programme_id else 0
-        programme_totals[programme_id]["candidates"].append(candidate)
-        programme_totals[programme_id]["programme"] = candidate.programme
+        totals = programme_totals[candidate.programme_id or 0]
+        totals["candidate_count"] += 1
+        totals["total_amount"] += candidate.amount
+
+    programme_ids = [pid for pid in programme_totals if pid]
+    programmes: dict[int, Programme] = {}
+    if programme_ids:
+        programme_result = await session.execute(select(Programme).where(Programme.id.in_(programme_ids)))
+        programmes = {programme.id: programme for programme in programme_result.scalars().all()}
 
-    # Calculate amounts per programme
     programme_items = []
     grand_total = Decimal("0")
 
     for programme_id, data in programme_totals.items():
-        programme = data["programme"]
-        programme_amount = Decimal("0")
-
-        for candidate in data["candidates"]:
-            amount = await calculate_candidate_amount(session, candidate)
-            programme_amount += amount
-
-        grand_total += programme_amount
+        programme = programmes.get(programme_id)
+        grand_total += data["total_amount"]
 
         if programme:
             programme_items.append(
@@ -173,8 +186,8 @@ async def aggregate_candidates_by_examination_and_programme(
                     "programme_id": programme.id,
                     "programme_code": programme.code,
                     "programme_name": programme.name,
-                    "candidate_count": len(data["candidates"]),
-                    "total_amount": programme_amount,
+                    "candidate_count": data["candidate_count"],
+                    "total_amount": data["total_amount"],
                 }
             )
         else:
@@ -184,8 +197,8 @@ async def aggregate_candidates_by_examination_and_programme(
                     "programme_id": 0,
                     "programme_code": "N/A",
                     "programme_name": "No Programme",
-                    "candidate_count": len(data["candidates"]),
-                    "total_amount": programme_amount,
+                    "candidate_count": data["candidate_count"],
+                    "total_amount": data["total_amount"],
                 }
             )
 
@@ -313,58 +326,31 @@ async def aggregate_candidates_by_school(
     Returns:
         Dictionary with exam details, list of schools with their totals, and grand totals
     """
-    # Query exam
-    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
-    exam_result = await session.execute(exam_stmt)
-    exam = exam_result.scalar_one_or_none()
-    if not exam:
-        raise ValueError("Registration exam not found")
-
-    # Query candidates with school
-    candidate_stmt = (
-        select(RegistrationCandidate)
-        .where(
-            and_(
-                RegistrationCandidate.registration_exam_id == exam_id,
-                RegistrationCandidate.registration_type == registration_type,
-                RegistrationCandidate.school_id.isnot(None),  # Only candidates with schools
-            )
-        )
-        .options(
-            selectinload(RegistrationCandidate.subject_selections),
-            selectinload(RegistrationCandidate.exam),
-            selectinload(RegistrationCandidate.school),
-        )
-    )
-
-    candidate_result = await session.execute(candidate_stmt)
-    candidates = candidate_result.scalars().all()
+    exam = await _get_exam(session, exam_id)
+    candidates = await _price_candidates(session, exam_id, registration_type)
 
     # Group by school
     school_totals: dict[int, dict[str, Any]] = defaultdict(
-        lambda: {"candidates": [], "total_amount": Decimal("0"), "school": None}
+        lambda: {"candidate_count": 0, "total_amount": Decimal("0")}
     )
-
     for candidate in candidates:
-        if candidate.school_id:
-            school_totals[candidate.school_id]["candidates"].append(candidate)
-            school_totals[candidate.school_id]["school"] = candidate.school
+        totals = school_totals[candidate.school_id]
+        totals["candidate_count"] += 1
+        totals["total_amount"] += candidate.amount
+
+    schools: dict[int, School] = {}
+    if school_totals:
+        school_result = await session.execute(select(School).where(School.id.in_(list(school_totals))))
+        schools = {school.id: school for school in school_result.scalars().all()}
 
-    # Calculate amounts per school
     school_items = []
     grand_total = Decimal("0")
     grand_candidate_count = 0
 
     for school_id, data in school_totals.items():
-        school = data["school"]
-        school_amount = Decimal("0")
-
-        for candidate in data["candidates"]:
-            amount = await calculate_candidate_amount(session, candidate)
-            school_amount += amount
-
-        grand_total += school_amount
-        grand_candidate_count += len(data["candidates"])
+        school = schools.get(school_id)
+        grand_total += data["total_amount"]
+        grand_candidate_count += data["candidate_count"]
 
         if school:
             school_items.append(
@@ -372,8 +358,8 @@ async def aggregate_candidates_by_school(
                     "school_id": school.id,
                     "school_code": school.code,
                     "school_name": school.name,
-                    "candidate_count": len(data["candidates"]),
-                    "total_amount": school_amount,
+                    "candidate_count": data["candidate_count"],
+                    "total_amount": data["total_amount"],
                 }
             )
 
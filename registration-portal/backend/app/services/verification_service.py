@@ -0,0 +1,359 @@
+"""Batched candidate verification for the dashboard and API key verification endpoints.
+
+A bulk request used to run the single-item lookup per item: every item re-read the
+year's exams, resolved its exam, then fetched the candidate, results, subject
+selections and one block query per graded subject. ``verify_candidates_batch``
+resolves each distinct (exam_type, exam_series, year) once from one exam query, fetches
+the candidates of each exam with one ``IN`` query, and loads results, subject
+selections and active result blocks for all matched candidates in bulk. Responses and
+per-item errors are the same as the single-item lookup produced.
+"""
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.exam_codes import normalize_exam_series, normalize_exam_type
+from app.models import (
+    CandidateResult,
+    RegistrationCandidate,
+    RegistrationExam,
+    RegistrationSubjectSelection,
+    ResultBlock,
+    ResultBlockType,
+    SubjectType,
+)
+from app.schemas.result import PublicResultCheckRequest, PublicResultResponse, PublicSubjectResult
+
+logger = logging.getLogger(__name__)
+
+# (exam_type, exam_series, year) after code normalization
+ExamKey = tuple[str, str, int]
+
+
+def _exam_key(request_data: PublicResultCheckRequest) -> ExamKey:
+    exam_type_input = normalize_exam_type(request_data.exam_type) if request_data.exam_type else ""
+    exam_series_input = normalize_exam_series(request_data.exam_series) if request_data.exam_series else ""
+    return exam_type_input, exam_series_input, request_data.year
+
+
+def match_exam(
+    key: ExamKey, exams_for_year: Sequence[RegistrationExam], *, public: bool = False
+) -> RegistrationExam | None:
+    """
+    Exact case-insensitive match first, then bidirectional partial match (first hit wins).
+
+    With ``public`` (the public result checker), an empty series matches an exam of the
+    right type and year whatever its series, as ``/public/results/check`` always has;
+    verification requests only match an empty series to exams without one.
+    """
+    exam_type_input, exam_series_input, _year = key
+
+    exact: list[RegistrationExam] = []
+    for exam in exams_for_year:
+        if (exam.exam_type or "").lower() != exam_type_input.lower():
+            continue
+        if exam_series_input:
+            if (exam.exam_series or "").lower() != exam_series_input.lower():
+                continue
+        elif exam.exam_series not in (None, ""):
+            continue
+        exact.append(exam)
+    if len(exact) > 1:
+        raise MultipleResultsFound("Multiple rows were found when one or none was required")
+    if exact:
+        return exact[0]
+
+    for db_exam in exams_for_year:
+        db_exam_type = db_exam.exam_type.strip() if db_exam.exam_type else ""
+        db_exam_series = db_exam.exam_series.strip() if db_exam.exam_series else ""
+        type_matches = (
+            exam_type_input.lower() in db_exam_type.lower() or
+            db_exam_type.lower() in exam_type_input.lower()
+        )
+        if exam_series_input:
+            series_matches = (
+                exam_series_input.lower() in db_exam_series.lower() or
+                db_exam_series.lower() in exam_series_input.lower()
+            )
+        else:
+            series_matches = public or not db_exam_series
+        if type_matches and series_matches:
+            return db_exam
+    return None
+
+
+def _match_candidate(
+    request_data: PublicResultCheckRequest,
+    candidates: Sequence[RegistrationCandidate],
+) -> RegistrationCandidate | None:
+    matches = [
+        c for c in candidates
+        if (not request_data.registration_number or c.registration_number == request_data.registration_number)
+        and (not request_data.index_number or c.index_number == request_data.index_number)
+    ]
+    if len(matches) > 1:
+        raise MultipleResultsFound("Multiple rows were found when one or none was required")
+    return matches[0] if matches else None
+
+
+class ResultBlockSet:
+    """Active result blocks held in memory, answered like ``check_result_blocks``."""
+
+    def __init__(self, blocks: Sequence[ResultBlock]) -> None:
+        self._keys: set[tuple] = set()
+        for block in blocks:
+            if block.block_type == ResultBlockType.CANDIDATE_ALL:
+                self._keys.add(("candidate", block.registration_exam_id, block.registration_candidate_id, None))
+            elif block.block_type == ResultBlockType.CANDIDATE_SUBJECT:
+                self._keys.add(("candidate", block.registration_exam_id, block.registration_candidate_id, block.subject_id))
+            elif block.block_type == ResultBlockType.SCHOOL_ALL:
+                self._keys.add(("school", block.registration_exam_id, block.school_id, None))
+            elif block.block_type == ResultBlockType.SCHOOL_SUBJECT:
+                self._keys.add(("school", block.registration_exam_id, block.school_id, block.subject_id))
+
+    def is_blocked(self, exam_id: int, candidate_id: int, school_id: int | None, subject_id: int | None) -> bool:
+        keys = [("candidate", exam_id, candidate_id, None)]
+        if subject_id:
+            keys.append(("candidate", exam_id, candidate_id, subject_id))
+        if school_id:
+            keys.append(("school", exam_id, school_id, None))
+            if subject_id:
+                keys.append(("school", exam_id, school_id, subject_id))
+        return any(key in self._keys for key in keys)
+
+
+def _build_response(
+    exam: RegistrationExam,
+    candidate: RegistrationCandidate,
+    results: Sequence[CandidateResult],
+    subject_selections: Sequence[RegistrationSubjectSelection],
+    blocks: ResultBlockSet,
+) -> PublicResultResponse:
+    # Key results by subject_id, with subject code / original code fallback (case-insensitive)
+    results_dict_by_id = {r.subject_id: r for r in results}
+    results_dict_by_code: dict[str, CandidateResult] = {}
+    for r in results:
+        if r.subject:
+            if r.subject.code:
+                results_dict_by_code[r.subject.code.upper()] = r
+                results_dict_by_code[r.subject.code.lower()] = r
+            if r.subject.original_code:
+                results_dict_by_code[r.subject.original_code.upper()] = r
+                results_dict_by_code[r.subject.original_code.lower()] = r
+
+    result_items: list[tuple[RegistrationSubjectSelection, CandidateResult | None, SubjectType | None]] = []
+    for selection in subject_selections:
+        subject_id = selection.subject_id
+        result = results_dict_by_id.get(subject_id) if subject_id else None
+        if not result and selection.subject_code:
+            result = (
+                results_dict_by_code.get(selection.subject_code.upper()) or
+                results_dict_by_code.get(selection.subject_code.lower())
+            )
+        subject_type = None
+        if selection.subject:
+            subject_type = selection.subject.subject_type
+        elif result and result.subject:
+            subject_type = result.subject.subject_type
+        result_items.append((selection, result, subject_type))
+
+    # CORE subjects first, then ELECTIVE, then by subject_code within each group
+    def sort_key(item: tuple[RegistrationSubjectSelection, CandidateResult | None, SubjectType | None]) -> tuple[int, str]:
+        selection, _result, subject_type = item
+        type_order = 0 if subject_type == SubjectType.CORE else (1 if subject_type == SubjectType.ELECTIVE else 2)
+        return (type_order, selection.subject_code)
+
+    result_items.sort(key=sort_key)
+
+    subject_results: list[PublicSubjectResult] = []
+    for selection, result, _subject_type in result_items:
+        grade = None
+        if result:
+            subject_id = selection.subject_id if selection.subject_id else result.subject_id
+            if not blocks.is_blocked(exam.id, candidate.id, candidate.school_id, subject_id):
+                grade = result.grade
+        subject_results.append(
+            PublicSubjectResult(
+                subject_code=selection.subject_code,
+                subject_name=selection.subject_name,
+                grade=grade,
+            )
+        )
+
+    programme_name = None
+    programme_code = None
+    if candidate.programme:
+        programme_name = candidate.programme.name
+        programme_code = candidate.programme.code
+    elif candidate.programme_code:
+        programme_code = candidate.programme_code
+
+    return PublicResultResponse(
+        candidate_name=candidate.name,
+        index_number=candidate.index_number,
+        registration_number=candidate.registration_number,
+        exam_type=exam.exam_type,
+        exam_series=exam.exam_series,
+        year=exam.year,
+        results=subject_results,
+        exam_published=exam.results_published,
+        school_name=candidate.school.name if candidate.school else None,
+        school_code=candidate.school.code if candidate.school else None,
+        programme_name=programme_name,
+        programme_code=programme_code,
+        photo_url=f"/api/v1/public/candidates/{candidate.id}/photo" if candidate.photo else None,
+    )
+
+
+async def verify_candidates_batch(
+    session: AsyncSession,
+    items: Sequence[PublicResultCheckRequest],
+) -> list[PublicResultResponse | Exception]:
+    """
+    Verify many candidates at once (dashboard can see unpublished results).
+
+    Returns one entry per item, in order: the response, or the exception the single-item
+    lookup would have raised for it (HTTPException for 400/404).
+    """
+    outcomes: list[PublicResultResponse | Exception | None] = [None] * len(items)
+    keys: dict[int, ExamKey] = {}
+    for pos, item in enumerate(items):
+        if not item.registration_number and not item.index_number:
+            outcomes[pos] = HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Either registration_number or index_number must be provided",
+            )
+        else:
+            keys[pos] = _exam_key(item)
+    if not keys:
+        return outcomes  # type: ignore[return-value]
+
+    # Step 1: resolve each distinct exam key once from the exams of the requested years
+    years = sorted({key[2] for key in keys.values()})
+    exams_result = await session.execute(select(RegistrationExam).where(RegistrationExam.year.in_(years)))
+    exams_by_year: dict[int, list[RegistrationExam]] = defaultdict(list)
+    for exam in exams_result.scalars().all():
+        exams_by_year[exam.year].append(exam)
+
+    resolved: dict[ExamKey, RegistrationExam | Exception] = {}
+    for key in set(keys.values()):
+        try:
+            exam = match_exam(key, exams_by_year.get(key[2], []))
+        except Exception as e:
+            resolved[key] = e
+            continue
+        if exam is None:
+            logger.warning(
+                "Exam not found",
+                extra={"year": key[2], "exam_count_for_year": len(exams_by_year.get(key[2], []))},
+            )
+            resolved[key] = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Examination not found")
+        else:
+            resolved[key] = exam
+
+    # Step 2: one candidate query per exam, by registration or index number
+    pending_by_exam: dict[int, list[int]] = defaultdict(list)
+    exam_by_id: dict[int, RegistrationExam] = {}
+    for pos, key in keys.items():
+        target = resolved[key]
+        if isinstance(target, Exception):
+            outcomes[pos] = target
+            continue
+        exam_by_id[target.id] = target
+        pending_by_exam[target.id].append(pos)
+
+    matched: dict[int, RegistrationCandidate] = {}
+    for exam_id, positions in pending_by_exam.items():
+        registration_numbers = {items[p].registration_number for p in positions if items[p].registration_number}
+        index_numbers = {items[p].index_number for p in positions if items[p].index_number}
+        identifier_conditions = []
+        if registration_numbers:
+            identifier_conditions.append(RegistrationCandidate.registration_number.in_(registration_numbers))
+        if index_numbers:
+            identifier_conditions.append(RegistrationCandidate.index_number.in_(index_numbers))
+        candidates_stmt = (
+            select(RegistrationCandidate)
+            .where(RegistrationCandidate.registration_exam_id == exam_id, or_(*identifier_conditions))
+            .options(
+                selectinload(RegistrationCandidate.school),
+                selectinload(RegistrationCandidate.programme),
+                selectinload(RegistrationCandidate.photo),
+            )
+        )
+        candidates = list((await session.execute(candidates_stmt)).scalars().all())
+        for pos in positions:
+            try:
+                candidate = _match_candidate(items[pos], candidates)
+            except Exception as e:
+                outcomes[pos] = e
+                continue
+            if candidate is None:
+                outcomes[pos] = HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Candidate not found. Please verify your credentials.",
+                )
+            else:
+                matched[pos] = candidate
+
+    if not matched:
+        return outcomes  # type: ignore[return-value]
+
+    # Step 3: results, subject selections and active blocks for every matched candidate
+    candidate_ids = sorted({c.id for c in matched.values()})
+    exam_ids = sorted({c.registration_exam_id for c in matched.values()})
+    school_ids = sorted({c.school_id for c in matched.values() if c.school_id})
+
+    results_stmt = (
+        select(CandidateResult)
+        .where(
+            CandidateResult.registration_candidate_id.in_(candidate_ids),
+            CandidateResult.registration_exam_id.in_(exam_ids),
+        )
+        .options(selectinload(CandidateResult.subject))
+    )
+    results_by_candidate: dict[tuple[int, int], list[CandidateResult]] = defaultdict(list)
+    for result in (await session.execute(results_stmt)).scalars().all():
+        results_by_candidate[(result.registration_candidate_id, result.registration_exam_id)].append(result)
+
+    selections_stmt = (
+        select(RegistrationSubjectSelection)
+        .where(RegistrationSubjectSelection.registration_candidate_id.in_(candidate_ids))
+        .options(selectinload(RegistrationSubjectSelection.subject))
+    )
+    selections_by_candidate: dict[int, list[RegistrationSubjectSelection]] = defaultdict(list)
+    for selection in (await session.execute(selections_stmt)).scalars().all():
+        selections_by_candidate[selection.registration_candidate_id].append(selection)
+
+    block_scope = [ResultBlock.registration_candidate_id.in_(candidate_ids)]
+    if school_ids:
+        block_scope.append(ResultBlock.school_id.in_(school_ids))
+    blocks_stmt = select(ResultBlock).where(
+        and_(
+            ResultBlock.registration_exam_id.in_(exam_ids),
+            ResultBlock.is_active == True,
+            or_(*block_scope),
+        )
+    )
+    blocks = ResultBlockSet(list((await session.execute(blocks_stmt)).scalars().all()))
+
+    for pos, candidate in matched.items():
+        exam = exam_by_id[candidate.registration_exam_id]
+        outcomes[pos] = _build_response(
+            exam,
+            candidate,
+            results_by_candidate.get((candidate.id, exam.id), []),
+            selections_by_candidate.get(candidate.id, []),
+            blocks,
+        )
+
+    logger.info(
+        "Batch verification completed",
+        extra={"item_count": len(items), "matched_count": len(matched), "exam_count": len(exam_ids)},
+    )
+    return outcomes  # type: ignore[return-value]
@@ -0,0 +1,36 @@
+"""Client IP resolution for requests that arrive through reverse proxies."""
+from fastapi import Request
+
+from app.config import settings
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Return the address of the client that sent the request.
+
+    Behind Traefik every connection comes from the proxy, so ``request.client.host`` is the
+    same for all users. When ``trusted_proxy_hops`` is set, the client is taken from
+    ``X-Forwarded-For``: each trusted proxy appends the address it received the request from,
+    so the entry ``trusted_proxy_hops`` places from the right was written by our outermost
+    proxy and cannot be spoofed by the client (anything further left can).
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Client IP address, or "unknown" if it cannot be determined
+    """
+    peer = request.client.host if request.client else "unknown"
+    hops = settings.trusted_proxy_hops
+    if hops <= 0:
+        return peer
+    forwarded = [
+        part.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for part in header.split(",")
+        if part.strip()
+    ]
+    if len(forwarded) < hops:
+        # Fewer entries than trusted proxies: the request bypassed part of the proxy chain.
+        return forwarded[0] if forwarded else peer
+    return forwarded[-hops]
@@ -1,10 +1,27 @@
-"""Utility functions for registration number generation."""
+"""Utility functions for registration number generation.
+
+Structured registration numbers are ``[F/R/P][last 5 chars of school code][2-digit year][4-digit
+sequence]``. The next sequence for each school, exam and prefix is kept in a
+``RegistrationNumberCounter`` row, so a number (or a block of numbers for a bulk import) is
+reserved with a single upsert instead of scanning the school's existing candidates.
+"""
+from dataclasses import dataclass, field
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import RegistrationCandidate, RegistrationExam, RegistrationType, School
+from app.models import RegistrationCandidate, RegistrationExam, RegistrationNumberCounter, RegistrationType, School
+
+# 4-digit sequential part: 0000-9999
+REGISTRATION_SEQUENCE_LIMIT = 10000
+
+_PREFIX_BY_REGISTRATION_TYPE = {
+    RegistrationType.FREE_TVET.value: "F",
+    RegistrationType.REFERRAL.value: "R",
+    RegistrationType.PRIVATE.value: "P",
+}
 
 
 def generate_registration_number(length: int = 10) -> str:
@@ -25,13 +42,172 @@ def generate_registration_number(length: int = 10) -> str:
     return "".join(secrets.choice(characters) for _ in range(length))
 
 
+async def registration_number_prefix(
+    session: AsyncSession,
+    exam_id: int,
+    school_id: int,
+    registration_type: Optional[str] = None,
+) -> str:
+    """
+    Build the registration number prefix ``[F/R/P][school code part][year part]`` (e.g. "FCH00125").
+
+    Raises:
+        ValueError: If school_id is None, the exam or school is not found, or registration_type is invalid
+    """
+    if school_id is None:
+        raise ValueError("school_id is required for registration number generation")
+
+    # Fetch exam to get year
+    exam_stmt = select(RegistrationExam.year).where(RegistrationExam.id == exam_id)
+    exam_year = (await session.execute(exam_stmt)).scalar_one_or_none()
+    if exam_year is None:
+        raise ValueError(f"Exam with id {exam_id} not found")
+
+    # Fetch school to get code
+    school_stmt = select(School.code).where(School.id == school_id)
+    school_code = (await session.execute(school_stmt)).scalar_one_or_none()
+    if school_code is None:
+        raise ValueError(f"School with id {school_id} not found")
+
+    # Default to FREE_TVET if not provided; accept enum values or strings
+    if registration_type is None:
+        registration_type = RegistrationType.FREE_TVET.value
+    registration_type_value = getattr(registration_type, "value", registration_type)
+    prefix = _PREFIX_BY_REGISTRATION_TYPE.get(registration_type_value)
+    if prefix is None:
+        raise ValueError(f"Invalid registration_type: {registration_type_value}. Must be one of: FREE_TVET, REFERRAL, PRIVATE")
+
+    # Last 5 characters of the school code (right-padded with zeros if shorter)
+    school_code_part = school_code[-5:] if len(school_code) >= 5 else school_code.rjust(5, "0")
+
+    # Last 2 digits of exam year
+    year_part = str(exam_year)[-2:]
+
+    return f"{prefix}{school_code_part}{year_part}"
+
+
+@dataclass
+class _ReservedBlock:
+    school_id: int
+    exam_id: int
+    prefix: str
+    next_sequence: int
+    end_sequence: int  # Counter value after this block (exclusive end)
+    taken: set[str] = field(default_factory=set)  # Numbers in the block that already exist
+
+
+class RegistrationNumberAllocator:
+    """
+    Issues registration numbers from blocks reserved on the per-(school, exam, prefix) counters.
+
+    The first number needed for a school, exam and registration type reserves ``block_size``
+    sequences with one upsert; the rest are handed out from memory. The counter row stays
+    locked until the transaction ends, so concurrent registrations for the same school and
+    exam wait instead of colliding. Bulk imports should call ``release_unused`` before
+    committing so sequences reserved for rows that failed are handed back.
+    """
+
+    def __init__(self, session: AsyncSession, block_size: int = 1):
+        self._session = session
+        self._block_size = max(1, block_size)
+        self._prefixes: dict[tuple, str] = {}
+        self._blocks: dict[tuple[int, int, str], _ReservedBlock] = {}
+
+    async def _reserve(self, school_id: int, exam_id: int, prefix: str, block: Optional[_ReservedBlock]) -> _ReservedBlock:
+        count = self._block_size
+        stmt = (
+            pg_insert(RegistrationNumberCounter)
+            .values(school_id=school_id, registration_exam_id=exam_id, prefix=prefix, next_sequence=count)
+            .on_conflict_do_update(
+                constraint="uq_registration_number_counter",
+                set_={"next_sequence": RegistrationNumberCounter.next_sequence + count},
+            )
+            .returning(RegistrationNumberCounter.next_sequence)
+        )
+        end_sequence = (await self._session.execute(stmt)).scalar_one()
+        start_sequence = end_sequence - count
+
+        # Skip numbers that already exist (e.g. entered explicitly by an admin import)
+        last_sequence = min(end_sequence, REGISTRATION_SEQUENCE_LIMIT) - 1
+        taken: set[str] = set()
+        if start_sequence <= last_sequence:
+            existing_stmt = select(RegistrationCandidate.registration_number).where(
+                RegistrationCandidate.registration_number >= f"{prefix}{start_sequence:04d}",
+                RegistrationCandidate.registration_number <= f"{prefix}{last_sequence:04d}",
+                func.length(RegistrationCandidate.registration_number) == len(prefix) + 4,
+            )
+            taken = set((await self._session.execute(existing_stmt)).scalars().all())
+
+        if block is not None and block.end_sequence == start_sequence:
+            # The row is still locked by this transaction, so the new block follows the old one
+            block.end_sequence = end_sequence
+            block.taken |= taken
+            return block
+        return _ReservedBlock(school_id, exam_id, prefix, start_sequence, end_sequence, taken)
+
+    async def allocate(self, exam_id: int, school_id: int, registration_type: Optional[str] = None) -> str:
+        """
+        Return the next unused registration number for the school, exam and registration type.
+
+        Raises:
+            ValueError: If school_id is None, the exam or school is not found, or registration_type is invalid
+            RuntimeError: If the sequence for the prefix exceeded 9999
+        """
+        prefix_key = (exam_id, school_id, getattr(registration_type, "value", registration_type))
+        prefix = self._prefixes.get(prefix_key)
+        if prefix is None:
+            prefix = await registration_number_prefix(self._session, exam_id, school_id, registration_type)
+            self._prefixes[prefix_key] = prefix
+
+        key = (school_id, exam_id, prefix)
+        block = self._blocks.get(key)
+        while True:
+            if block is None or block.next_sequence >= block.end_sequence:
+                block = await self._reserve(school_id, exam_id, prefix, block)
+                self._blocks[key] = block
+            sequence = block.next_sequence
+            if sequence >= REGISTRATION_SEQUENCE_LIMIT:
+                raise RuntimeError(
+                    f"Registration number sequence exceeded maximum (9999) for prefix {prefix}, "
+                    f"school {school_id}, exam {exam_id}. Cannot generate more registration numbers."
+                )
+            block.next_sequence += 1
+            registration_number = f"{prefix}{sequence:04d}"
+            if registration_number not in block.taken:
+                return registration_number
+
+    def is_reserved(self, registration_number: str) -> bool:
+        """Whether the number lies in a block reserved by this allocator but not handed out yet."""
+        for block in self._blocks.values():
+            if registration_number.startswith(block.prefix) and len(registration_number) == len(block.prefix) + 4:
+                sequence = registration_number[len(block.prefix):]
+                if sequence.isdigit() and block.next_sequence <= int(sequence) < block.end_sequence:
+                    return True
+        return False
+
+    async def release_unused(self) -> None:
+        """Hand back the unused tail of each reserved block (call before committing)."""
+        for block in self._blocks.values():
+            if block.next_sequence < block.end_sequence:
+                await self._session.execute(
+                    update(RegistrationNumberCounter)
+                    .where(
+                        RegistrationNumberCounter.school_id == block.school_id,
+                        RegistrationNumberCounter.registration_exam_id == block.exam_id,
+                        RegistrationNumberCounter.prefix == block.prefix,
+                        RegistrationNumberCounter.next_sequence == block.end_sequence,
+                    )
+                    .values(next_sequence=block.next_sequence)
+                )
+                block.end_sequence = block.next_sequence
+
+
 async def generate_unique_registration_number(
     session: AsyncSession,
     exam_id: int,
     school_id: int,
     registration_type: Optional[str] = None,
     length: Optional[int] = None,  # Deprecated, kept for backward compatibility
-    max_attempts: int = 100
 ) -> str:
     """
     Generate a unique registration number using the structured format:
@@ -45,13 +221,16 @@ async def generate_unique_registration_number(
 
     Example: FCH001251234 (F + CH001 + 25 + 1234)
 
+    The sequence is taken from the school/exam/prefix counter, which stays locked until the
+    caller's transaction ends. Bulk imports should use ``RegistrationNumberAllocator`` with a
+    block size instead of calling this per candidate.
+
     Args:
         session: Database session
         exam_id: Exam ID to get exam year
         school_id: School ID to get school code
         registration_type: Registration type (FREE_TVET, REFERRAL, or PRIVATE). Defaults to FREE_TVET if not provided.
         length: Deprecated parameter (kept for backward compatibility, ignored)
-        max_attempts: Maximum attempts to generate a unique number (should not be needed with sequential logic)
 
     Returns:
         A unique registration number in the format specified
@@ -60,134 +239,4 @@ async def generate_unique_registration_number(
         ValueError: If school_id is None or invalid, or if exam not found, or if school not found, or if registration_type is invalid
         RuntimeError: If unable to generate a unique number (e.g., sequence exceeded 9999)
     """
-    if school_id is None:
-        raise ValueError("school_id is required for registration number generation")
-
-    # Fetch exam to get year
-    exam_stmt = select(RegistrationExam).where(RegistrationExam.id == exam_id)
-    exam_result = await session.execute(exam_stmt)
-    exam = exam_result.scalar_one_or_none()
-
-    if not exam:
-        raise ValueError(f"Exam with id {exam_id} not found")
-
-    # Fetch school to get code
-    school_stmt = select(School).where(School.id == school_id)
-    school_result = await session.execute(school_stmt)
-    school = school_result.scalar_one_or_none()
-
-    if not school:
-        raise ValueError(f"School with id {school_id} not found")
-
-    # Determine prefix based on registration_type
-    # Default to FREE_TVET if not provided
-    if registration_type is None:
-        registration_type = RegistrationType.FREE_TVET.value
-
-    # Normalize registration_type to handle enum values or strings
-    registration_type_value = registration_type
-    if hasattr(registration_type, 'value'):
-        registration_type_value = registration_type.value
-
-    # Map registration_type to prefix
-    if registration_type_value == RegistrationType.FREE_TVET.value:
-        prefix = "F"
-    elif registration_type_value == RegistrationType.REFERRAL.value:
-        prefix = "R"
-    elif registration_type_value == RegistrationType.PRIVATE.value:
-        prefix = "P"
-    else:
-        raise ValueError(f"Invalid registration_type: {registration_type_value}. Must be one of: FREE_TVET, REFERRAL, PRIVATE")
-
-    # Extract last 5 characters of school code
-    school_code = school.code
-    if len(school_code) >= 5:
-        school_code_part = school_code[-5:]
-    else:
-        # If school code is shorter than 5 characters, right-pad with zeros
-        school_code_part = school_code.rjust(5, "0")
-
-    # Extract last 2 digits of exam year
-    year_part = str(exam.year)[-2:]
-
-    # Build the prefix pattern for querying existing registration numbers
-    # Format: [F/R/P][school_code][year] (e.g., "FCH00125")
-    base_prefix = f"{prefix}{school_code_part}{year_part}"
-
-    # Find all existing registration numbers with this prefix
-    # We need to extract the sequential part (last 4 digits) to determine the next number
-    # Also filter by registration_type to ensure sequences are per type
-    stmt = select(RegistrationCandidate.registration_number).where(
-        RegistrationCandidate.registration_number.like(f"{base_prefix}%"),
-        RegistrationCandidate.registration_exam_id == exam_id,
-        RegistrationCandidate.school_id == school_id,
-        RegistrationCandidate.registration_type == registration_type_value,
-    )
-    result = await session.execute(stmt)
-    existing_numbers = [row[0] for row in result.fetchall()]
-
-    # Extract sequential numbers from existing registration numbers
-    # The sequential part should be the last 4 digits
-    sequential_numbers = []
-    expected_length = len(base_prefix) + 4  # base_prefix + 4 digits
-
-    for reg_num in existing_numbers:
-        # Validate format: should be exactly expected_length characters
-        if len(reg_num) == expected_length and reg_num.startswith(base_prefix):
-            # Extract the last 4 characters as the sequential number
-            seq_part = reg_num[-4:]
-            # Verify it's numeric
-            if seq_part.isdigit():
-                sequential_numbers.append(int(seq_part))
-
-    # Determine next sequential number
-    if sequential_numbers:
-        max_seq = max(sequential_numbers)
-        next_seq = max_seq + 1
-    else:
-        next_seq = 0
-
-    # Check for overflow
-    if next_seq > 9999:
-        raise RuntimeError(
-            f"Registration number sequence exceeded maximum (9999) for school {school.code}, "
-            f"exam {exam_id}, year {exam.year}. Cannot generate more registration numbers."
-        )
-
-    # Generate the registration number
-    sequential_part = str(next_seq).zfill(4)
-    registration_number = f"{base_prefix}{sequential_part}"
-
-    # Verify uniqueness (should be unique by construction, but double-check for safety)
-    check_stmt = select(RegistrationCandidate).where(
-        RegistrationCandidate.registration_number == registration_number
-    )
-    check_result = await session.execute(check_stmt)
-    existing = check_result.scalar_one_or_none()
-
-    if existing:
-        # This should rarely happen, but if it does, try incrementing
-        for _ in range(max_attempts):
-            next_seq += 1
-            if next_seq > 9999:
-                raise RuntimeError(
-                    f"Unable to generate unique registration number after {max_attempts} attempts. "
-                    f"Sequence overflow for school {school.code}, exam {exam_id}, year {exam.year}."
-                )
-            sequential_part = str(next_seq).zfill(4)
-            registration_number = f"{base_prefix}{sequential_part}"
-
-            check_stmt = select(RegistrationCandidate).where(
-                RegistrationCandidate.registration_number == registration_number
-            )
-            check_result = await session.execute(check_stmt)
-            existing = check_result.scalar_one_or_none()
-            if existing is None:
-                return registration_number
-
-        raise RuntimeError(
-            f"Unable to generate unique registration number after {max_attempts} attempts. "
-            f"School: {school.code}, Exam: {exam_id}, Year: {exam.year}."
-        )
-
-    return registration_number
+    return await RegistrationNumberAllocator(session).allocate(exam_id, school_id, registration_type)